@@ -1,9 +1,15 @@
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+import atexit
+import heapq
+import itertools
+import json
 import threading
+import time
 from tools.logger import VeraLogger
 from db_manager import db_manager  # NEW: Import DbManager
 from db_config import TABLE_NAMES  # NEW: Import TABLE_NAMES
+from tools.json_utils import datetime_converter
 
 logger = VeraLogger("attention_manager")
 
@@ -18,7 +24,31 @@ class AttentionManager:
 
     SALIENCE_THRESHOLD = 0.1  # Salience below which an item is removed
 
-    def __init__(self):
+    # Items whose salience never decays (they still expire if they have an expiry_timestamp)
+    NON_DECAYING_SOURCES = frozenset([
+        "narrative_self_summary", "last_narrative_update_time", "last_monologue_time",
+        "last_dream_time", "last_insight_generation_time", "metacognitive_state",
+        "visual_analysis_cooldown", "daily_proactive_learning_tasks_count",
+        "active_goals", "pending_answer_to_question", "last_user_interaction_time",
+        "last_vera_response_time", "last_proactive_learning_proposal_time", "last_social_curiosity_time",
+        "pre_computed_internal_context_summary"
+    ])
+
+    # Storage layout: "items" keeps one row per focus source in attention_focus_items
+    # (only changed rows are written, expired rows are purged by an indexed DELETE);
+    # "document" keeps the legacy single JSON document in attention_focus/current_focus.
+    STORAGE_MODE = "items"
+
+    # Write-behind persistence: focus mutations stay in memory and are coalesced
+    # into a single DB write by a background flusher.
+    WRITE_BEHIND_ENABLED = True
+    FLUSH_INTERVAL_MS = 500  # How often the flusher checks for dirty items
+    MAX_UNFLUSHED_SECONDS = 5.0  # Crash-safety bound: max age of an unflushed change
+
+    def __init__(self, write_behind: Optional[bool] = None,
+                 flush_interval_ms: Optional[int] = None,
+                 max_unflushed_seconds: Optional[float] = None,
+                 storage_mode: Optional[str] = None):
 
         self.lock = threading.RLock()  # Use RLock for re-entrant locking
 
@@ -37,7 +67,47 @@ class AttentionManager:
 
         self.doc_id = "current_focus"
 
+        self.items_table_name = TABLE_NAMES["attention_focus_items"]
+
+        self.storage_mode = storage_mode or self.STORAGE_MODE
+
+        if self.storage_mode not in ("items", "document"):
+            raise ValueError(f"Unknown attention focus storage mode: {self.storage_mode}")
+
+        # --- Write-behind state ---
+        self.write_behind = self.WRITE_BEHIND_ENABLED if write_behind is None else write_behind
+        self.flush_interval_ms = flush_interval_ms or self.FLUSH_INTERVAL_MS
+        self.max_unflushed_seconds = self.MAX_UNFLUSHED_SECONDS if max_unflushed_seconds is None else max_unflushed_seconds
+        self._dirty_keys: set = set()
+        self._full_rewrite_pending = False
+        self._expired_purge_pending = False  # Items mode: expired rows still to be purged from the DB
+        self._oldest_dirty_at: Optional[float] = None  # monotonic time of the oldest unflushed change
+        self._flush_lock = threading.Lock()  # Serializes DB writes; always taken after self.lock (see flush)
+        self._stop_flusher = threading.Event()
+        self._flusher_thread: Optional[threading.Thread] = None
+        # Lazy decay: min-heap of (removal_deadline, seq, source). An entry is only valid if it
+        # matches self._deadlines[source]; stale entries are skipped when popped.
+        self._expiry_heap: List[tuple] = []
+        self._deadlines: Dict[str, tuple] = {}
+        self._heap_seq = itertools.count()
+
+        self._persistence_stats = {
+            "save_requests": 0,   # Number of times a mutation asked for persistence
+            "flushes": 0,         # Number of actual DB writes
+            "items_written": 0,   # Dirty items covered by those writes
+            "rows_purged": 0,     # Items mode: expired rows removed by the indexed DELETE
+            "flush_errors": 0,
+            "last_flush_duration_ms": 0.0
+        }
+
+        if self.storage_mode == "items":
+            self.migrate_document_to_items()  # Once, at startup: reading the persisted focus never writes
         self._load_focus()
+        self._rebuild_expiry_heap()
+
+        if self.write_behind:
+            self._start_flusher()
+            atexit.register(self.shutdown)
 
     def _load_focus(self):
 
@@ -48,7 +118,7 @@ class AttentionManager:
 
             return
 
-        focus = db_manager.get_document("attention_focus", "current_focus")
+        focus = self._read_persisted_focus()
 
         if focus and isinstance(focus, dict):  # Ensure focus is a dictionary
 
@@ -121,73 +191,303 @@ class AttentionManager:
                     self.logger.warning(
                         f"Invalid focus item '{key}': expected dict, got {type(content)}. Item will be ignored.")
 
-                self._save_focus()  # Save any changes made during load
+                self._save_focus(key)  # Save any changes made during load
 
-    def _save_focus(self):
-        """Saves focus to DB, converting datetime objects to ISO format strings."""
+    def _read_persisted_focus(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Reads the persisted focus in the document layout ({source: {data, timestamp, ...}}),
+        whatever the storage mode. Read-only: the legacy document is migrated in __init__.
+        """
+        if self.storage_mode == "document":
+            return db_manager.get_document(self.table_name, self.doc_id)
 
-        with self.lock:
+        rows = db_manager.get_rows(self.items_table_name)
+        return {row["id"]: self._row_to_item(row) for row in rows} if rows else None
 
-            savable_focus = {}
+    def get_persisted_focus(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the focus as currently stored in the DB (used by the DB viewers)."""
+        return self._read_persisted_focus() or {}
 
-            for source, content in self.current_focus.items():
+    def get_persisted_focus_item(self, source: str) -> Optional[Dict[str, Any]]:
+        """Returns a single stored focus item; in items mode only that row is read and parsed."""
+        if self.storage_mode == "document":
+            return self.get_persisted_focus().get(source)
+        rows = db_manager.get_rows(self.items_table_name, "id = ?", (source,))
+        return self._row_to_item(rows[0]) if rows else None
 
-                timestamp_value = content.get("timestamp")
+    def migrate_document_to_items(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Migrates the legacy single 'current_focus' document into per-item rows.
+        The legacy document is removed once its rows are written so it is not imported twice.
+        Nothing is imported if the items table already has rows.
+        Returns the migrated focus, or None if there was nothing to migrate.
+        """
+        legacy_focus = db_manager.get_document(self.table_name, self.doc_id)
+        if not legacy_focus or not isinstance(legacy_focus, dict):
+            return None
+        if db_manager.get_rows(self.items_table_name, columns="id"):
+            self.logger.warning(f"Legacy attention focus document ignored: '{self.items_table_name}' already has rows.")
+            return None
 
-                expiry_timestamp_value = content.get("expiry_timestamp")
+        rows = [self._item_to_row(source, content) for source, content in legacy_focus.items()
+                if isinstance(content, dict)]
+        db_manager.write_rows(self.items_table_name, rows)
+        db_manager.delete_document(self.table_name, self.doc_id)
+        self.logger.info(f"Migrated {len(rows)} attention focus item(s) from the legacy document to '{self.items_table_name}'.")
+        return legacy_focus
 
-                last_reset_date_value = content.get("last_reset_date")
+    @staticmethod
+    def _item_to_row(source: str, content: Dict[str, Any]) -> Dict[str, Any]:
+        """Converts a serialized focus item into a row of the items table."""
+        expiry = content.get("expiry_timestamp")
+        if isinstance(expiry, str):
+            try:  # Normalize precision so ISO strings compare correctly in SQL
+                expiry = datetime.fromisoformat(expiry)
+            except ValueError:
+                expiry = None
+        if isinstance(expiry, datetime):
+            expiry = expiry.isoformat(timespec="microseconds")
 
-                # Convert datetime objects to ISO format strings, keep strings
-                # as is
+        timestamp = content.get("timestamp")
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat()
 
-                if isinstance(timestamp_value, datetime):
+        return {
+            "id": source,
+            "data_json": json.dumps(content.get("data"), default=datetime_converter, ensure_ascii=False),
+            "salience": content.get("salience"),
+            "timestamp": timestamp,
+            "expiry_timestamp": expiry,
+            "last_reset_date": content.get("last_reset_date")
+        }
 
-                    timestamp_value = timestamp_value.isoformat()
+    @staticmethod
+    def _row_to_item(row: Dict[str, Any]) -> Dict[str, Any]:
+        """Converts a row of the items table back into a serialized focus item."""
+        return {
+            "data": json.loads(row["data_json"]) if row.get("data_json") is not None else None,
+            "timestamp": row.get("timestamp"),
+            "salience": row.get("salience"),
+            "expiry_timestamp": row.get("expiry_timestamp"),
+            "last_reset_date": row.get("last_reset_date")
+        }
 
-                if isinstance(expiry_timestamp_value, datetime):
+    def _serialize_focus(self) -> Dict[str, Dict[str, Any]]:
+        """Builds a JSON-ready copy of the focus, converting datetime objects to ISO format strings."""
 
-                    expiry_timestamp_value = expiry_timestamp_value.isoformat()
+        savable_focus = {}
 
-                # Ensure last_reset_date is stored as a date string
-                # (YYYY-MM-DD)
+        for source, content in self.current_focus.items():
 
-                if isinstance(last_reset_date_value, datetime):
+            timestamp_value = content.get("timestamp")
 
-                    last_reset_date_value = last_reset_date_value.date(
-                    ).isoformat()  # Convert to date string
+            expiry_timestamp_value = content.get("expiry_timestamp")
 
-                elif isinstance(last_reset_date_value, str):
+            last_reset_date_value = content.get("last_reset_date")
 
-                    try:  # Validate it's a date string, otherwise convert it
+            # Convert datetime objects to ISO format strings, keep strings
+            # as is
 
-                        datetime.fromisoformat(
-                            last_reset_date_value).date().isoformat()
+            if isinstance(timestamp_value, datetime):
 
-                    except ValueError:
+                timestamp_value = timestamp_value.isoformat()
 
-                        # Default to current date if invalid
-                        last_reset_date_value = datetime.now().date().isoformat()
+            if isinstance(expiry_timestamp_value, datetime):
 
-                savable_focus[source] = {
+                expiry_timestamp_value = expiry_timestamp_value.isoformat()
 
-                    "data": content.get("data"),
+            # Ensure last_reset_date is stored as a date string
+            # (YYYY-MM-DD)
 
-                    "timestamp": timestamp_value,
+            if isinstance(last_reset_date_value, datetime):
 
-                    "salience": content.get("salience"),
+                last_reset_date_value = last_reset_date_value.date(
+                ).isoformat()  # Convert to date string
 
-                    "expiry_timestamp": expiry_timestamp_value,
+            elif isinstance(last_reset_date_value, str):
 
-                    "last_reset_date": last_reset_date_value  # Save last_reset_date as date string
+                try:  # Validate it's a date string, otherwise convert it
 
-                }
+                    datetime.fromisoformat(
+                        last_reset_date_value).date().isoformat()
+
+                except ValueError:
+
+                    # Default to current date if invalid
+                    last_reset_date_value = datetime.now().date().isoformat()
+
+            savable_focus[source] = {
+
+                "data": content.get("data"),
+
+                "timestamp": timestamp_value,
+
+                "salience": content.get("salience"),
+
+                "expiry_timestamp": expiry_timestamp_value,
+
+                "last_reset_date": last_reset_date_value  # Save last_reset_date as date string
+
+            }
+
+        return savable_focus
+
+    def _save_focus(self, source: Optional[str] = None, purge_expired: bool = False):
+        """
+        Requests persistence of the focus.
+        In write-behind mode the change is only marked dirty and the background flusher
+        coalesces it with the others; the write happens synchronously when write-behind is
+        disabled or when the oldest pending change exceeds MAX_UNFLUSHED_SECONDS.
+        Args:
+            source: The focus item that changed. None marks the whole focus as dirty.
+            purge_expired: Items mode only; schedules the indexed purge of expired rows instead.
+        """
+
+        with self.lock:
+
+            self._persistence_stats["save_requests"] += 1
+
+            if purge_expired:
+                self._expired_purge_pending = True
+            elif source is None:
+                self._full_rewrite_pending = True
+                self._rebuild_expiry_heap()
+            else:
+                self._dirty_keys.add(source)
+                self._schedule_removal(source)
+
+            if self._oldest_dirty_at is None:
+                self._oldest_dirty_at = time.monotonic()
+
+            must_flush_now = (
+                not self.write_behind or
+                time.monotonic() - self._oldest_dirty_at >= self.max_unflushed_seconds
+            )
+
+        if must_flush_now:
+            self.flush()
+
+    def has_pending_writes(self) -> bool:
+        """Returns True if some focus changes have not been written to the DB yet."""
+        with self.lock:
+            return self._full_rewrite_pending or self._expired_purge_pending or bool(self._dirty_keys)
+
+    def flush(self) -> bool:
+        """
+        Writes all pending focus changes to the DB in a single batched write.
+        Returns True if a write was performed.
+
+        Lock order is always self.lock, then _flush_lock, and self.lock is never requested while
+        _flush_lock is held. flush() may therefore be called by a mutator that already holds
+        self.lock (synchronous write) while the background flusher is writing.
+        """
+        with self.lock:
+            if not self._full_rewrite_pending and not self._dirty_keys and not self._expired_purge_pending:
+                return False
+            dirty_keys = set(self._dirty_keys)
+            full_rewrite = self._full_rewrite_pending
+            purge_expired = self._expired_purge_pending
+            savable_focus = self._serialize_focus()
+            self._dirty_keys.clear()
+            self._full_rewrite_pending = False
+            self._expired_purge_pending = False
+            self._oldest_dirty_at = None
+            # Taken before self.lock is released: snapshots are written in the order they were taken
+            self._flush_lock.acquire()
+
+        start = time.perf_counter()
+        error = None
+        purged = 0
+        try:
+            if self.storage_mode == "items":
+                purged = self._write_items(savable_focus, dirty_keys, full_rewrite, purge_expired)
+            else:
+                db_manager.insert_document(
+                    self.table_name, self.doc_id, savable_focus)
+        except Exception as e:
+            error = e
+        finally:
+            self._flush_lock.release()
 
-            db_manager.insert_document(
-                self.table_name, self.doc_id, savable_focus)
+        with self.lock:
+            if error is not None:
+                # Put the keys back so the next flush retries them
+                self._dirty_keys.update(dirty_keys)
+                self._full_rewrite_pending = self._full_rewrite_pending or full_rewrite
+                self._expired_purge_pending = self._expired_purge_pending or purge_expired
+                if self._oldest_dirty_at is None:
+                    self._oldest_dirty_at = time.monotonic()
+                self._persistence_stats["flush_errors"] += 1
+            else:
+                self._persistence_stats["flushes"] += 1
+                self._persistence_stats["items_written"] += len(savable_focus) if full_rewrite else len(dirty_keys)
+                self._persistence_stats["rows_purged"] += purged
+                self._persistence_stats["last_flush_duration_ms"] = (time.perf_counter() - start) * 1000
+
+        if error is not None:
+            self.logger.error(f"Failed to flush attention focus: {error}")
+            return False
+
+        # Using self.logger here
+        self.logger.debug(
+            f"Attention focus saved ({'full' if full_rewrite else len(dirty_keys)} dirty item(s)).")
+        return True
 
-            # Using self.logger here
-            self.logger.debug("Attention focus saved.")
+    def _write_items(self, savable_focus: Dict[str, Dict[str, Any]], dirty_keys: set,
+                     full_rewrite: bool, purge_expired: bool) -> int:
+        """
+        Items mode: writes only the dirty rows (or all of them) and purges expired rows.
+        Runs under _flush_lock only (never takes self.lock). Returns the number of purged rows.
+        """
+        if full_rewrite:
+            rows = [self._item_to_row(source, content) for source, content in savable_focus.items()]
+            db_manager.write_rows(self.items_table_name, rows, replace_all=True)
+        elif dirty_keys:
+            upserts = [self._item_to_row(source, savable_focus[source]) for source in dirty_keys if source in savable_focus]
+            deletes = [source for source in dirty_keys if source not in savable_focus]
+            db_manager.write_rows(self.items_table_name, upserts, deletes)
+
+        if purge_expired and not full_rewrite:
+            return db_manager.delete_rows_where(
+                self.items_table_name,
+                "expiry_timestamp IS NOT NULL AND expiry_timestamp < ?",
+                (datetime.now().isoformat(timespec="microseconds"),))
+        return 0
+
+    def get_persistence_stats(self) -> Dict[str, Any]:
+        """Returns write-behind counters, including the number of DB writes avoided by coalescing."""
+        with self.lock:
+            stats = dict(self._persistence_stats)
+            stats["writes_avoided"] = max(0, stats["save_requests"] - stats["flushes"] - stats["flush_errors"])
+            stats["pending_items"] = len(self._dirty_keys)
+            stats["full_rewrite_pending"] = self._full_rewrite_pending
+            stats["write_behind"] = self.write_behind
+            stats["storage_mode"] = self.storage_mode
+            return stats
+
+    def _start_flusher(self):
+        """Starts the background thread that periodically flushes dirty focus items."""
+        if self._flusher_thread and self._flusher_thread.is_alive():
+            return
+        self._stop_flusher.clear()
+        self._flusher_thread = threading.Thread(
+            target=self._flush_loop, name="AttentionFocusFlusher", daemon=True)
+        self._flusher_thread.start()
+
+    def _flush_loop(self):
+        interval = self.flush_interval_ms / 1000.0
+        while not self._stop_flusher.wait(interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Error in attention focus flusher: {e}")
+
+    def shutdown(self):
+        """Stops the background flusher and writes any pending focus changes."""
+        self._stop_flusher.set()
+        if self._flusher_thread and self._flusher_thread.is_alive() and self._flusher_thread is not threading.current_thread():
+            self._flusher_thread.join(timeout=2)
+        self.flush()
 
     def reset_daily_tool_proposal_count(self):
         """Resets the daily tool proposal count."""
@@ -212,7 +512,7 @@ class AttentionManager:
 
             self.logger.info("Daily tool proposal count reset to 0.")
 
-            self._save_focus()
+            self._save_focus("daily_tool_proposal_count")
 
     def _initialize_cognitive_budget(self):
         """Initializes the cognitive budget if it doesn't exist."""
@@ -237,7 +537,7 @@ class AttentionManager:
 
                 self.logger.info(
                     f"Cognitive budget initialized to {self.MAX_COGNITIVE_BUDGET} points.")
-                self._save_focus()
+                self._save_focus("cognitive_budget")
 
     def get_cognitive_budget(self) -> Dict[str, Any]:
         """Returns the current cognitive budget data (current, max)."""
@@ -258,7 +558,7 @@ class AttentionManager:
                     self.logger.warning(
                         f"Invalid last_regen_time format: {budget_item.get('last_regen_time')}. Resetting.")
                     budget_item["last_regen_time"] = datetime.now()
-                    self._save_focus()
+                    self._save_focus("cognitive_budget")
             return budget_item["data"]
 
     def spend_cognitive_budget(self, cost: int) -> bool:
@@ -282,7 +582,7 @@ class AttentionManager:
                 self.current_focus["cognitive_budget"] = budget_item
                 self.logger.info(
                     f"Cognitive budget spent: -{cost}. Remaining: {budget_item['data']['current']}")
-                self._save_focus()
+                self._save_focus("cognitive_budget")
                 return True
             else:
                 self.logger.warning(
@@ -306,7 +606,7 @@ class AttentionManager:
             if last_regen_time is None:
                 self.logger.warning("last_regen_time is None. Resetting to now for regen calculation.")
                 last_regen_time = datetime.now()
-                self._save_focus() # Save to persist the reset time
+                self._save_focus("cognitive_budget") # Save to persist the reset time
 
             if isinstance(last_regen_time, str):
                 try:
@@ -316,7 +616,7 @@ class AttentionManager:
                     self.logger.warning(
                         f"Invalid last_regen_time format for budget: {last_regen_time}. Resetting to now for regen calculation.")
                     last_regen_time = datetime.now()
-                    self._save_focus()
+                    self._save_focus("cognitive_budget")
 
             now = datetime.now()
 
@@ -348,7 +648,7 @@ class AttentionManager:
                     self.logger.debug(
                         f"Cognitive budget regenerated: +{regen_amount:.2f}. New budget: {new_budget:.2f}")
 
-                    self._save_focus()
+                    self._save_focus("cognitive_budget")
 
             else:
 
@@ -387,7 +687,6 @@ class AttentionManager:
         """Sets the 'is_vera_thinking_hard' flag."""
         with self.lock:
             self._is_thinking_hard = state
-            self._save_focus()
             self.logger.info(f"Vera is thinking hard: {state}")
 
     def is_thinking_hard(self) -> bool:
@@ -399,7 +698,6 @@ class AttentionManager:
         """Sets the 'is_processing_user_input' flag."""
         with self.lock:
             self._is_processing_user_input = state
-            self._save_focus()
             self.logger.info(f"Vera is processing user input: {state}")
 
     def is_processing_user_input(self) -> bool:
@@ -434,90 +732,116 @@ class AttentionManager:
             logger.info("Consciousness snapshot captured.")
             return snapshot
 
-    def decay_focus(self):
+    @staticmethod
+    def _as_datetime(value: Any) -> Optional[datetime]:
+        """Returns value as a datetime (parsing ISO strings), or None if it is missing or invalid."""
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        return None
+
+    def _effective_salience(self, source: str, content: Dict[str, Any], now: datetime) -> float:
+        """
+        Computes the current salience in closed form from (base salience, timestamp, DECAY_RATE).
+        The stored salience is never modified by decay, so the result does not depend on how
+        often or in which order decay is evaluated.
         """
-        Decays salience and removes expired or low-salience items.
+        base_salience = content.get("salience") or 0.0
+        if source in self.NON_DECAYING_SOURCES:
+            return base_salience
+        timestamp = self._as_datetime(content.get("timestamp"))
+        if timestamp is None:
+            return base_salience
+        age_minutes = max(0.0, (now - timestamp).total_seconds() / 60)
+        return base_salience - age_minutes * self.DECAY_RATE
+
+    def _removal_deadline(self, source: str, content: Dict[str, Any]) -> Optional[datetime]:
         """
+        Returns when an item must leave the focus: the earlier of its expiry and the moment its
+        decayed salience crosses SALIENCE_THRESHOLD. None means the item never leaves on its own.
+        """
+        deadlines = []
+        expiry_ts = self._as_datetime(content.get("expiry_timestamp"))
+        if expiry_ts is not None:
+            deadlines.append(expiry_ts)
+        timestamp = self._as_datetime(content.get("timestamp"))
+        if source not in self.NON_DECAYING_SOURCES and timestamp is not None and self.DECAY_RATE > 0:
+            minutes_above_threshold = ((content.get("salience") or 0.0) - self.SALIENCE_THRESHOLD) / self.DECAY_RATE
+            deadlines.append(timestamp + timedelta(minutes=max(0.0, minutes_above_threshold)))
+        return min(deadlines) if deadlines else None
+
+    def _schedule_removal(self, source: str):
+        """(Re)computes the removal deadline of an item and pushes it on the expiry heap."""
+        content = self.current_focus.get(source)
+        deadline = self._removal_deadline(source, content) if isinstance(content, dict) else None
+        if deadline is None:
+            self._deadlines.pop(source, None)
+            return
+        entry = (deadline, next(self._heap_seq), source)
+        self._deadlines[source] = entry
+        heapq.heappush(self._expiry_heap, entry)
+        # Keep stale entries from piling up when items are updated much more often than they expire
+        if len(self._expiry_heap) > 2 * len(self._deadlines) + 64:
+            self._expiry_heap = list(self._deadlines.values())
+            heapq.heapify(self._expiry_heap)
+
+    def _rebuild_expiry_heap(self):
         with self.lock:
-            now = datetime.now()
-            items_to_remove = []
-
-            # Create a copy to iterate, allowing modification of
-            # self.current_focus
-            focus_copy = dict(self.current_focus)
-
-            for source, content in focus_copy.items():
-                # 1. Check for expiry
-                expiry_ts = content.get("expiry_timestamp")
-                if expiry_ts:  # Check if expiry_ts exists before comparing
-                    # Convert to datetime object for comparison if it's a
-                    # string
-                    if isinstance(expiry_ts, str):
-                        try:
-                            expiry_ts = datetime.fromisoformat(expiry_ts)
-                        except ValueError:
-                            self.logger.warning(
-                                f"Invalid expiry_timestamp format for '{source}': {expiry_ts}. Ignoring expiry.")
-                            expiry_ts = None  # Treat as never expiring if format is bad
+            self._expiry_heap = []
+            self._deadlines = {}
+            for source in list(self.current_focus):
+                self._schedule_removal(source)
+
+    def _expire_due_items(self, now: datetime) -> int:
+        """Pops the items whose removal deadline has passed. Costs O(log n) per removed item."""
+        expired_items = []
+        decayed_items = []
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            entry = heapq.heappop(self._expiry_heap)
+            source = entry[2]
+            if self._deadlines.get(source) is not entry:
+                continue  # Stale entry: the item was updated or removed since
+            del self._deadlines[source]
+            content = self.current_focus.pop(source, None)
+            if content is None:
+                continue
+            expiry_ts = self._as_datetime(content.get("expiry_timestamp"))
+            if expiry_ts is not None and expiry_ts <= now:
+                expired_items.append(source)
+                self.logger.debug(f"Item '{source}' removed from focus due to expiration.")
+            else:
+                decayed_items.append(source)
+                self.logger.debug(f"Item '{source}' removed from focus due to low salience.")
 
-                if expiry_ts and now > expiry_ts:
-                    items_to_remove.append(source)
-                    self.logger.debug(
-                        f"Item '{source}' removed from focus due to expiration.")
-                    continue
-
-                # 2. Decay salience (don't decay critical items)
-                # Ensure these items are not just in content but also part of
-                # the focus system logic
-                if source in ["narrative_self_summary", "last_narrative_update_time", "last_monologue_time",
-                              "last_dream_time", "last_insight_generation_time", "metacognitive_state",
-                              # Existing critical items
-                              "visual_analysis_cooldown", "daily_proactive_learning_tasks_count",
-                              "active_goals", "pending_answer_to_question", "last_user_interaction_time",
-                              "last_vera_response_time", "last_proactive_learning_proposal_time", "last_social_curiosity_time",
-                              "pre_computed_internal_context_summary"]:  # NEW: Critical item to prevent salience decay
-                    continue
-
-                # Check if timestamp is a datetime object before calculation
-                timestamp_obj = content.get("timestamp")
-                if isinstance(timestamp_obj, str):
-                    try:
-                        timestamp_obj = datetime.fromisoformat(timestamp_obj)
-                    except ValueError:
-                        self.logger.warning(
-                            f"Invalid timestamp format for '{source}': {timestamp_obj}. Skipping salience decay.")
-                        continue  # Skip decay if timestamp is invalid
-
-                if timestamp_obj:  # Only decay if we have a valid datetime object
-                    age_minutes = (now - timestamp_obj).total_seconds() / 60
-                    decay_amount = age_minutes * self.DECAY_RATE
-                    new_salience = content["salience"] - decay_amount
-                    # Update original dict
-                    self.current_focus[source]["salience"] = new_salience
-
-                    # 3. Check for low salience
-                    if new_salience < self.SALIENCE_THRESHOLD:
-                        items_to_remove.append(source)
-                        self.logger.debug(
-                            f"Item '{source}' removed from focus due to low salience.")
+        if expired_items:
+            if self.storage_mode == "items":
+                # Expired rows are purged by a single indexed DELETE at the next flush
+                self._save_focus(purge_expired=True)
+            else:
+                self._save_focus()
+        for source in decayed_items:
+            self._save_focus(source)
+        return len(expired_items) + len(decayed_items)
 
-            if items_to_remove:
-                for source in set(
-                        items_to_remove):  # Use set to avoid duplicates
-                    if source in self.current_focus:
-                        del self.current_focus[source]
-                self._save_focus()  # Save after modifications
-            elif focus_copy != self.current_focus:  # If salience decay happened, but no removals
-                self._save_focus()  # Save to persist decayed salience
+    def decay_focus(self):
+        """
+        Removes expired or low-salience items.
+        Salience itself is computed lazily at read time, so nothing is written when nothing has expired.
+        """
+        with self.lock:
+            self._expire_due_items(datetime.now())
 
     def update_focus(self, source: str, data: Any,
                      salience: float = 0.5, expiry_seconds: Optional[int] = None):
         """
         Updates an item in the focus, optionally with an expiry time.
         """
-        from datetime import timedelta
         with self.lock:
-            # Decay focus first to clean up old items and adjust salience
+            # Remove items that are due first (cheap: only due items are visited)
             self.decay_focus()
 
             item = {
@@ -533,7 +857,7 @@ class AttentionManager:
             self.current_focus[source] = item
 
             try:
-                self._save_focus()
+                self._save_focus(source)
             except Exception as e:
                 self.logger.error(
                     f"Failed to save focus after updating {source}: {e}")
@@ -549,12 +873,13 @@ class AttentionManager:
         All datetime objects are converted to ISO format strings for JSON serialization.
         """
         with self.lock:
-            # self.decay_focus() # REMOVED: Decay focus should be periodic, not
-            # on every get_current_focus
+            now = datetime.now()
+            # Only the items whose deadline has passed are touched, so this stays cheap
+            self._expire_due_items(now)
 
             serializable_focus = {}
             for source, content in self.current_focus.items():
-                if content["salience"] >= salience_threshold and "timestamp" in content:
+                if self._effective_salience(source, content, now) >= salience_threshold and "timestamp" in content:
                     # Create a copy to avoid modifying the original internal
                     # dict
                     item_content = content.copy()
@@ -597,7 +922,7 @@ class AttentionManager:
         with self.lock:
             if source in self.current_focus:
                 del self.current_focus[source]
-                self._save_focus()
+                self._save_focus(source)
                 self.logger.info(
                     f"Item '{source}' explicitly removed from focus.")
 
@@ -607,6 +932,7 @@ class AttentionManager:
         """
         with self.lock:
             self.current_focus = {}
+            self._rebuild_expiry_heap()
             self._is_thinking_hard = False  # Reset this flag as well
             self._is_processing_user_input = False  # Reset this flag as well
             self._save_focus()
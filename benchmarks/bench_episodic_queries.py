@@ -0,0 +1,118 @@
+"""
+Benchmark: requêtes de rêve (souvenirs pivotaux), de consolidation et de récence de la mémoire
+épisodique sur une grande base synthétique, avant (json_extract / LIKE sur toute la table,
+timestamp non indexé) et après la mise à niveau du schéma (colonnes générées indexées).
+
+Usage:
+    python benchmarks/bench_episodic_queries.py [--events 500000] [--keep]
+"""
+import argparse
+import json
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from episodic_memory import MemoryManager
+
+LEGACY_QUERIES = {
+    "pivotal(10)": ("""
+        SELECT * FROM episodes
+        WHERE json_valid(context) AND json_extract(context, '$.emotion.arousal') IS NOT NULL
+        ORDER BY ABS(json_extract(context, '$.emotion.arousal')) DESC LIMIT 10
+    """, ()),
+    "consolidation(20)": ("""
+        SELECT * FROM episodes
+        WHERE timestamp < ? AND (tags IS NULL OR tags NOT LIKE '%"consolidated"%')
+        ORDER BY timestamp ASC LIMIT 20
+    """, None),
+    "recent(50)": ("SELECT * FROM episodes ORDER BY timestamp DESC LIMIT 50", ()),
+}
+
+
+def _create_legacy_db(db_path: str, events: int, seed: int = 42):
+    """Writes a pre-upgrade episodes table directly (much faster than add_event for large histories)."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE episodes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, description TEXT NOT NULL,
+            tags TEXT, importance REAL, context TEXT
+        )
+    """)
+    rows = []
+    for i in range(events):
+        event_type = rng.choice(["user_input", "vera_response", "thought", "learning"])
+        tags = [event_type] + (["consolidated"] if rng.random() < 0.7 else [])
+        context = {"description": f"Événement synthétique {i}", "initiator": rng.choice(["user", "vera"]),
+                   "emotion": {"arousal": round(rng.uniform(-1, 1), 3), "pleasure": 0.2}}
+        timestamp = (start + timedelta(seconds=i * 30)).isoformat()
+        rows.append((timestamp, context["description"], json.dumps(tags), rng.random(), json.dumps(context)))
+        if len(rows) >= 10_000:
+            conn.executemany("INSERT INTO episodes (timestamp, description, tags, importance, context) VALUES (?, ?, ?, ?, ?)", rows)
+            rows.clear()
+    if rows:
+        conn.executemany("INSERT INTO episodes (timestamp, description, tags, importance, context) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def _time(fn, repeats: int) -> float:
+    fn()  # Warm-up (page cache)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the generated databases")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="vera_bench_"))
+    legacy_path = str(workdir / "episodes_legacy.db")
+    upgraded_path = str(workdir / "episodes_upgraded.db")
+    _create_legacy_db(legacy_path, args.events)
+    shutil.copyfile(legacy_path, upgraded_path)
+
+    start = time.perf_counter()
+    manager = MemoryManager(db_path=upgraded_path)
+    upgrade_seconds = time.perf_counter() - start
+    threshold = (datetime(2024, 1, 1) + timedelta(days=7)).isoformat()
+
+    legacy_conn = sqlite3.connect(legacy_path)
+    before = {}
+    for name, (sql, params) in LEGACY_QUERIES.items():
+        params = (threshold,) if params is None else params
+        before[name] = _time(lambda: legacy_conn.execute(sql, params).fetchall(), args.repeats)
+    legacy_conn.close()
+
+    # get_memories_for_consolidation() computes its threshold from "now": use a threshold covering the history
+    age_days = (datetime.now() - datetime.fromisoformat(threshold)).days
+    after = {
+        "pivotal(10)": _time(lambda: manager.get_pivotal_memories(recent_limit=0, pivotal_limit=10), args.repeats),
+        "consolidation(20)": _time(lambda: manager.get_memories_for_consolidation(age_threshold_days=age_days), args.repeats),
+        "recent(50)": _time(lambda: manager.get_recent(limit=50), args.repeats),
+    }
+
+    print(f"Synthetic history: {args.events} events ({workdir}), schema upgrade + index build: {upgrade_seconds:.1f} s")
+    for name in LEGACY_QUERIES:
+        print(f"- {name:18s} before={before[name]:9.2f} ms  after={after[name]:7.2f} ms  "
+              f"speedup=x{before[name] / max(after[name], 1e-6):.0f}")
+
+    if not args.keep:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
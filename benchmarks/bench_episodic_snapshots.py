@@ -0,0 +1,96 @@
+"""
+Benchmark: taille de la base et latence de get_recent() pour la mémoire épisodique,
+avec snapshots de conscience en ligne (ancien format) vs stockés dans le snapshot store.
+
+Usage:
+    python benchmarks/bench_episodic_snapshots.py [--events 100000] [--keep]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from episodic_memory import MemoryManager
+
+
+def _synthetic_snapshot(step: int, rng: random.Random) -> dict:
+    """A snapshot shaped like capture_consciousness_snapshot(), drifting slowly over time."""
+    phase = step // 25  # The emotional/somatic state changes every few events
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "attention_focus": {
+            "active_goals": {"data": [{"id": f"goal_{g}", "description": f"Objectif {g} " + "x" * 80} for g in range(phase % 5 + 1)],
+                             "timestamp": "2025-11-25T10:00:00"},
+            "narrative_self_summary": {"data": "Je suis Vera. " * 40, "timestamp": "2025-11-25T09:00:00"},
+            "relevant_memories": {"data": [{"description": f"Souvenir {phase}-{m} " + "y" * 120} for m in range(5)],
+                                  "timestamp": "2025-11-25T10:00:00"},
+            "last_system_usage": {"data": {"cpu_usage_percent": rng.randint(0, 100) if step % 10 == 0 else 12.0,
+                                           "ram_usage_percent": 48.0},
+                                  "timestamp": "2025-11-25T10:00:00"},
+            "cognitive_budget": {"data": {"current": 100 - (step % 50), "max": 100}, "timestamp": "2025-11-25T10:00:00"}
+        },
+        "somatic_state": {"energy": round(0.5 + (phase % 10) / 20, 2), "tension": 0.2, "fatigue": 0.1},
+        "emotional_state": {"pleasure": round((phase % 7) / 7, 2), "arousal": 0.4, "dominance": 0.5, "label": "calme"},
+        "mood": {"label": "serein", "valence": 0.3},
+        "current_desires": [{"name": "curiosité", "intensity": 0.6}]
+    }
+
+
+def _populate(manager: MemoryManager, events: int, seed: int = 42):
+    rng = random.Random(seed)
+    for i in range(events):
+        manager.add_event("vera_response", {
+            "description": f"Événement synthétique {i}",
+            "importance": rng.random(),
+            "tags": ["vera_response"],
+            "initiator": "vera",
+            "snapshot": _synthetic_snapshot(i, rng)
+        })
+
+
+def _time_get_recent(manager: MemoryManager, repeats: int = 50, limit: int = 50) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        manager.get_recent(limit=limit)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--keep", action="store_true", help="Keep the generated databases")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="vera_bench_"))
+    results = {}
+    for label, separate in (("inline (before)", False), ("snapshot store (after)", True)):
+        db_path = str(workdir / f"episodes_{'store' if separate else 'inline'}.db")
+        manager = MemoryManager(db_path=db_path, store_snapshots_separately=separate)
+        start = time.perf_counter()
+        _populate(manager, args.events)
+        insert_seconds = time.perf_counter() - start
+        results[label] = {
+            "db_size_mb": os.path.getsize(db_path) / 1024 / 1024,
+            "insert_events_per_sec": args.events / insert_seconds,
+            "get_recent_ms": _time_get_recent(manager)
+        }
+
+    print(f"Synthetic history: {args.events} events ({workdir})")
+    for label, r in results.items():
+        print(f"- {label:24s} db={r['db_size_mb']:8.1f} MB  insert={r['insert_events_per_sec']:8.0f} ev/s  "
+              f"get_recent(50)={r['get_recent_ms']:6.2f} ms")
+
+    if not args.keep:
+        for f in workdir.iterdir():
+            f.unlink()
+        workdir.rmdir()
+
+
+if __name__ == "__main__":
+    main()
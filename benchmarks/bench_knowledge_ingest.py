@@ -0,0 +1,80 @@
+"""
+Benchmark: débit d'ingestion (entrées/s) dans une base de connaissances, avec l'ancien add_entry()
+(une transaction par fait, mesuré sur un échantillon) vs l'ingestion en masse depuis un fichier JSONL
+(lots executemany, déduplication, FTS différé + optimize).
+
+Usage:
+    python benchmarks/bench_knowledge_ingest.py [--rows 1000000] [--sample 5000] [--duplicates 0.05]
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from knowledge_ingest import KnowledgeIngestor, read_jsonl
+from sqlite_pool import get_pool
+from unverified_knowledge_manager import UnverifiedKnowledgeManager
+
+WORDS = ["volcan", "photographie", "révolution", "océan", "planète", "musique", "cathédrale", "forêt",
+         "algorithme", "empire", "rivière", "peinture", "molécule", "montagne", "bibliothèque", "satellite"]
+
+
+def _fact_text(n: int) -> str:
+    return f"Fait {n} : " + " ".join(WORDS[(n * 7 + j * 13) % len(WORDS)] for j in range(12))
+
+
+def _write_dump(path: Path, rows: int, duplicate_ratio: float, rng: random.Random):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(rows):
+            n = rng.randrange(i) if i and rng.random() < duplicate_ratio else i  # Repeats an earlier fact
+            f.write(json.dumps({"text": _fact_text(n), "source": "bench", "metadata": {"n": n}}, ensure_ascii=False) + "\n")
+
+
+def _single_inserts(manager: UnverifiedKnowledgeManager, sample: int) -> float:
+    """Rows/s of the former add_entry(): one checkout, two inserts and one commit per fact."""
+    start = time.perf_counter()
+    for i in range(sample):
+        with manager._pool.connection() as conn:
+            cursor = conn.execute("INSERT INTO unverified_knowledge (text, source, metadata) VALUES (?, 'bench', '{}')",
+                                  (f"Fait unitaire {i}",))
+            conn.execute("INSERT INTO unverified_knowledge_fts (rowid, text, source) VALUES (?, ?, 'bench')",
+                         (cursor.lastrowid, f"Fait unitaire {i}"))
+            conn.commit()
+    return sample / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--sample", type=int, default=5000, help="Facts inserted one by one for the baseline")
+    parser.add_argument("--duplicates", type=float, default=0.05, help="Fraction of duplicate lines in the dump")
+    parser.add_argument("--batch-size", type=int, default=KnowledgeIngestor.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        dump = directory / "dump.jsonl"
+        _write_dump(dump, args.rows, args.duplicates, random.Random(42))
+        db_path = str(directory / "bulk.db")
+        manager = UnverifiedKnowledgeManager(db_path)
+        ingestor = KnowledgeIngestor(get_pool(db_path), "unverified_knowledge", "unverified_knowledge_fts",
+                                     batch_size=args.batch_size)
+        stats = ingestor.ingest(read_jsonl(str(dump)))
+        # Baseline measured on the same, now populated, database
+        baseline = _single_inserts(manager, args.sample)
+
+    print(f"{args.rows} JSONL lines ({args.duplicates:.0%} duplicates), batches of {args.batch_size}")
+    print(f"- add_entry, one transaction per fact (before): {baseline:10.0f} rows/s ({args.sample} rows)")
+    print(f"- bulk ingest, deferred FTS + optimize (after):  {stats['rows_per_second']:10.0f} rows/s "
+          f"({stats['inserted']} inserted, {stats['duplicates']} duplicates, {stats['seconds']:.1f} s)")
+    print(f"  -> estimated time for {args.rows} rows: {args.rows / baseline / 60:.1f} min before, "
+          f"{stats['seconds'] / 60:.1f} min after")
+
+
+if __name__ == "__main__":
+    main()
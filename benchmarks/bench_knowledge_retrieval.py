@@ -0,0 +1,117 @@
+"""
+Benchmark: rappel@k et latence de la recherche dans une base de connaissances synthétique,
+avec l'ancienne requête (phrase exacte entre guillemets) vs la recherche lexicale par paliers
+(NEAR / AND / OR, BM25) vs la recherche hybride (lexicale + index vectoriel, fusion RRF).
+
+Chaque requête reprend deux mots-clés d'un fait, dans le désordre, parfois au pluriel ;
+le fait d'origine est la seule réponse attendue. L'index vectoriel utilise HashingEmbedder
+(sans modèle) : --model permet de mesurer un vrai modèle sentence-transformers.
+
+Usage:
+    python benchmarks/bench_knowledge_retrieval.py [--docs 20000] [--queries 300] [--k 5]
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from knowledge_retrieval import (NUMPY_AVAILABLE, HashingEmbedder, HybridRetriever, SentenceTransformerEmbedder,
+                                 make_vector_index, reciprocal_rank_fusion)
+from unverified_knowledge_manager import UnverifiedKnowledgeManager
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "tu", "ve", "no", "si", "pa", "de", "gri", "fon", "bal", "cor", "ste"]
+FILLER = ["la", "grande", "ancienne", "région", "histoire", "étude", "nord", "sud", "célèbre", "petite"]
+
+
+def _make_corpus(rng: random.Random, docs: int, queries: int):
+    vocabulary = list({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(docs * 2)})
+    corpus, keywords = [], []
+    for _ in range(docs):
+        keys = rng.sample(vocabulary, 3)
+        words = keys + rng.sample(FILLER, 5)
+        rng.shuffle(words)
+        corpus.append(" ".join(words).capitalize() + ".")
+        keywords.append(keys)
+    targets = rng.sample(range(docs), queries)
+    query_set = []
+    for doc in targets:
+        a, b = rng.sample(keywords[doc], 2)
+        if rng.random() < 0.3:
+            b += "s"  # Inflected form: no exact or prefix match
+        query_set.append((f"{b} {a}", doc + 1))  # Row ids start at 1
+    return corpus, query_set
+
+
+def _measure(search, query_set, k):
+    hits, latencies = 0, []
+    for query, expected in query_set:
+        start = time.perf_counter()
+        ids = search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += expected in ids
+    latencies.sort()
+    return hits / len(query_set), statistics.mean(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--model", default=None, help="sentence-transformers model instead of the hashing embedder")
+    args = parser.parse_args()
+
+    corpus, query_set = _make_corpus(random.Random(42), args.docs, args.queries)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench_knowledge.db")
+        manager = UnverifiedKnowledgeManager(db_path)
+        with manager._pool.connection() as conn:
+            conn.executemany("INSERT INTO unverified_knowledge (id, text, source, metadata) VALUES (?, ?, 'bench', '{}')",
+                             enumerate(corpus, start=1))
+            conn.execute("INSERT INTO unverified_knowledge_fts(unverified_knowledge_fts) VALUES ('rebuild')")
+            conn.commit()
+
+        def phrase_search(query, k):
+            with manager._pool.connection() as conn:
+                rows = conn.execute("""
+                    SELECT fts.rowid FROM unverified_knowledge_fts AS fts
+                    WHERE fts.text MATCH ? ORDER BY fts.rank LIMIT ?
+                """, (f'"{query}"', k)).fetchall()
+            return [row[0] for row in rows]
+
+        lexical = HybridRetriever(manager._pool, "unverified_knowledge", "unverified_knowledge_fts")
+        modes = [("exact phrase (before)", phrase_search),
+                 ("lexical NEAR/AND/OR", lambda q, k: [r for r, _, _ in lexical.lexical_search(q, k)])]
+
+        if NUMPY_AVAILABLE:
+            embedder = SentenceTransformerEmbedder(args.model) if args.model else HashingEmbedder()
+            index = make_vector_index(db_path, embedder)
+            start = time.perf_counter()
+            with manager._pool.connection() as conn:
+                index.sync(conn, "unverified_knowledge")
+            print(f"Vector index ({embedder.name}): {len(index)} entries built in {time.perf_counter() - start:.1f} s")
+            hybrid = HybridRetriever(manager._pool, "unverified_knowledge", "unverified_knowledge_fts", index)
+
+            def hybrid_ids(query, k):
+                lexical_ids = [r for r, _, _ in hybrid.lexical_search(query, k * hybrid.CANDIDATE_MULTIPLIER)]
+                vector_ids = [r for r, _ in index.search(query, k * hybrid.CANDIDATE_MULTIPLIER)]
+                return [r for r, _ in reciprocal_rank_fusion([lexical_ids, vector_ids], hybrid.RRF_K)[:k]]
+
+            modes.append(("vector only", lambda q, k: [r for r, _ in index.search(q, k)]))
+            modes.append(("hybrid (RRF)", hybrid_ids))
+        else:
+            print("numpy unavailable: vector and hybrid modes skipped.")
+
+        print(f"{args.docs} facts, {args.queries} two-keyword queries (30% inflected), recall@{args.k}")
+        for name, search in modes:
+            recall, mean_ms, p95_ms = _measure(search, query_set, args.k)
+            print(f"- {name:24s} recall {recall:6.1%}   mean {mean_ms:7.2f} ms   p95 {p95_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
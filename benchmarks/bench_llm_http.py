@@ -0,0 +1,71 @@
+"""
+Benchmark: coût par appel d'inférence court (ex: _should_store_fact, un appel par fait extrait)
+avec un requests.post() nu (nouvelle connexion à chaque appel) vs la session keep-alive partagée
+de llm_wrapper, contre un serveur local compatible OpenAI.
+
+Usage:
+    python benchmarks/bench_llm_http.py [--calls 500] [--url http://127.0.0.1:1234]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from http_session import build_session
+from benchmarks.stub_llm_server import start_stub_server
+
+PAYLOAD = {
+    "model": "stub",
+    "messages": [{"role": "system", "content": "Réponds UNIQUEMENT par 'oui' ou 'non'."},
+                 {"role": "user", "content": "Ce fait est-il important ? \"Foz aime le café.\""}],
+    "max_tokens": 5,
+    "temperature": 0.1,
+}
+
+
+def _run(post, url: str, calls: int):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        resp = post(f"{url}/v1/chat/completions", json=PAYLOAD, timeout=(5, 30))
+        resp.raise_for_status()
+        resp.json()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {"mean_ms": statistics.mean(latencies), "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+            "total_s": sum(latencies) / 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--url", default=None, help="Existing OpenAI-compatible server (default: local stub)")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_stub_server()
+
+    session = build_session(allowed_methods=["POST"])
+    _run(session.post, url, 10)  # Warm-up
+    results = {
+        "requests.post (before)": _run(requests.post, url, args.calls),
+        "shared session (after)": _run(session.post, url, args.calls),
+    }
+
+    print(f"{args.calls} short inference calls against {url}")
+    for label, r in results.items():
+        print(f"- {label:24s} mean={r['mean_ms']:6.2f} ms  p95={r['p95_ms']:6.2f} ms  total={r['total_s']:6.2f} s")
+
+    if server:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: débit des appels de log (enregistrements/s vus par les threads appelants) depuis
+plusieurs threads, avec l'ancien couple FileHandler + JsonFileHandler synchrones (une ouverture
+/fermeture du .jsonl par enregistrement) vs le pipeline asynchrone (file bornée + thread d'écriture).
+
+Usage:
+    python benchmarks/bench_logging.py [--threads 4] [--records 5000] [--policy block]
+"""
+import argparse
+import logging
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from tools.logger import (AsyncModuleLogHandler, JsonFileHandler, LogPipeline, PLAIN_LOG_DATEFMT,
+                          PLAIN_LOG_FORMAT)
+
+
+def _make_logger(name: str, handlers) -> logging.Logger:
+    logger = logging.getLogger(f"bench_logging.{name}")
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    for handler in handlers:
+        logger.addHandler(handler)
+    return logger
+
+
+def _hammer(logger: logging.Logger, threads: int, records: int) -> float:
+    """Logs `records` records from each of `threads` threads. Returns the callers' elapsed seconds."""
+    barrier = threading.Barrier(threads + 1)
+
+    def work(thread_id: int):
+        barrier.wait()
+        for i in range(records):
+            logger.debug(f"Tick {i} du thread {thread_id}: état interne mis à jour",
+                         extra={"extra_data": {"timestamp": "x", "data": {"i": i}}})
+
+    workers = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--records", type=int, default=5000, help="Records per thread")
+    parser.add_argument("--policy", default="block", choices=LogPipeline.DROP_POLICIES)
+    parser.add_argument("--queue-size", type=int, default=10000)
+    args = parser.parse_args()
+    total = args.threads * args.records
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+
+        plain = logging.FileHandler(directory / "sync.log", encoding="utf-8")
+        plain.setFormatter(logging.Formatter(PLAIN_LOG_FORMAT, datefmt=PLAIN_LOG_DATEFMT))
+        sync_handlers = [plain, JsonFileHandler(directory / "sync.jsonl")]
+        sync_elapsed = _hammer(_make_logger("sync", sync_handlers), args.threads, args.records)
+        for handler in sync_handlers:
+            handler.close()
+
+        pipeline = LogPipeline(queue_size=args.queue_size, drop_policy=args.policy, max_bytes=0)
+        async_logger = _make_logger("async", [AsyncModuleLogHandler(pipeline, directory)])
+        async_elapsed = _hammer(async_logger, args.threads, args.records)
+        drain_start = time.perf_counter()
+        pipeline.flush(timeout=120)
+        drained = time.perf_counter() - drain_start + async_elapsed
+        stats = pipeline.get_stats()
+        pipeline.close()
+
+    print(f"{args.threads} threads x {args.records} records (.log + .jsonl per record)")
+    print(f"- synchronous handlers (before): {total / sync_elapsed:10.0f} records/s")
+    print(f"- async pipeline (after):        {total / async_elapsed:10.0f} records/s for callers, "
+          f"{stats['written'] / drained:10.0f} records/s written, "
+          f"{stats['dropped']} dropped ({args.policy}), {stats['batches']} batches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: temps jusqu'au premier token (TTFT) des réponses de Vera selon l'agencement du prompt,
+contre le serveur stub qui simule la réutilisation du cache KV du préfixe commun (llama.cpp).
+
+- legacy            : faits insérés au milieu du prompt système, sans indication de cache
+- legacy + hints    : même agencement, avec cache_prompt (le préfixe casse dès que les faits changent)
+- segmented + hints : persona -> outils -> faits -> contexte, avec cache_prompt / n_keep
+
+Les faits changent tous les --facts-every tours, le contexte interne à chaque tour.
+
+Usage:
+    python benchmarks/bench_prompt_prefix_cache.py [--turns 30] [--prefill-us-per-token 200]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from http_session import build_session
+from benchmarks.stub_llm_server import start_stub_server
+from llm_streaming import iter_sse_deltas
+from prompt_segments import SegmentedPrompt, apply_cache_hints
+from llm_wrapper import SYSTEM_PROMPT_PERSONA, SYSTEM_PROMPT_TOOLS, SYSTEM_PROMPT_FACTS
+
+LEGACY_FACTS_ANCHOR = "## Ton État Corporel"  # The facts used to sit right before this section
+
+
+def _facts(turn: int, every: int) -> str:
+    known = 3 + turn // every
+    return "\n".join(f"- Fait n°{i} : Foz aime la chose numéro {i}." for i in range(known))
+
+
+def _context(turn: int) -> str:
+    return (f"(Mon état émotionnel actuel est : joie ({40 + turn % 7}%), curiosité ({20 + turn % 5}%))\n"
+            f"(Souvenir récent n°{turn} : Foz m'a parlé de son projet.)\n")
+
+
+def _legacy_payload(turn: int, every: int) -> dict:
+    facts = SYSTEM_PROMPT_FACTS.replace("{{SEMANTIC_FACTS}}", _facts(turn, every))
+    head, tail = SYSTEM_PROMPT_PERSONA.split(LEGACY_FACTS_ANCHOR, 1)
+    system = head + facts + "\n" + LEGACY_FACTS_ANCHOR + tail + "\n" + SYSTEM_PROMPT_TOOLS
+    user = f"{_context(turn)}\n\nFoz: Message {turn}\nVera:"
+    return {"messages": [{"role": "system", "content": system}, {"role": "user", "content": user}]}
+
+
+def _segmented_payload(turn: int, every: int) -> dict:
+    prompt = SegmentedPrompt()
+    prompt.add("persona", SYSTEM_PROMPT_PERSONA)
+    prompt.add("tools", SYSTEM_PROMPT_TOOLS)
+    prompt.add("facts", SYSTEM_PROMPT_FACTS.replace("{{SEMANTIC_FACTS}}", _facts(turn, every)))
+    prompt.add("context", _context(turn), role="user")
+    prompt.add("input", f"Foz: Message {turn}\nVera:", role="user")
+    payload = {"messages": [{"role": "system", "content": prompt.render("system")},
+                            {"role": "user", "content": prompt.render("user")}]}
+    return apply_cache_hints(payload, n_keep=prompt.prefix_tokens())
+
+
+def _ttft(session, url: str, payload: dict) -> float:
+    start = time.perf_counter()
+    with session.post(f"{url}/v1/chat/completions", json=dict(payload, model="stub", stream=True),
+                      stream=True, timeout=(5, 60)) as resp:
+        resp.raise_for_status()
+        for _ in iter_sse_deltas(resp):
+            return (time.perf_counter() - start) * 1000
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--facts-every", type=int, default=3, help="Facts change every N turns")
+    parser.add_argument("--prefill-us-per-token", type=float, default=200.0,
+                        help="Simulated prompt evaluation cost (200 us = 5000 tokens/s)")
+    args = parser.parse_args()
+
+    variants = {
+        "legacy": lambda t: _legacy_payload(t, args.facts_every),
+        "legacy + hints": lambda t: apply_cache_hints(_legacy_payload(t, args.facts_every)),
+        "segmented + hints": lambda t: _segmented_payload(t, args.facts_every),
+    }
+    print(f"{args.turns} turns, facts change every {args.facts_every} turns, "
+          f"prefill {args.prefill_us_per_token:.0f} us/token")
+    for label, build in variants.items():
+        server, url = start_stub_server(prefill_us_per_token=args.prefill_us_per_token)  # Fresh, empty KV cache
+        session = build_session(allowed_methods=["POST"])
+        ttfts = sorted(_ttft(session, url, build(turn)) for turn in range(args.turns))
+        print(f"- {label:18s} mean={statistics.mean(ttfts):7.1f} ms  median={statistics.median(ttfts):7.1f} ms  "
+              f"p95={ttfts[int(len(ttfts) * 0.95) - 1]:7.1f} ms")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
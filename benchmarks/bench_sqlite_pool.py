@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: événements/seconde en insertion (add_event) et en lecture (get_recent)
+pour la mémoire épisodique, avec une connexion par requête (ancien comportement)
+vs le pool partagé (connexion par thread, WAL, synchronous=NORMAL).
+
+Usage:
+    python benchmarks/bench_sqlite_pool.py [--events 5000] [--reads 2000] [--threads 4]
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from episodic_memory import MemoryManager
+from sqlite_pool import SQLitePool
+
+
+def _run(label: str, pool: SQLitePool, db_path: str, events: int, reads: int, threads: int):
+    manager = MemoryManager(db_path=db_path, pool=pool)
+
+    start = time.perf_counter()
+    for i in range(events):
+        manager.add_event("interaction", {"description": f"Événement {i}", "tags": ["bench"], "importance": 0.5})
+    insert_rate = events / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(reads):
+        manager.get_recent(limit=10)
+    read_rate = reads / (time.perf_counter() - start)
+
+    def reader():
+        for _ in range(reads // threads):
+            manager.get_recent(limit=10)
+
+    workers = [threading.Thread(target=reader) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    threaded_read_rate = (reads // threads) * threads / (time.perf_counter() - start)
+
+    pool.close_all()
+    print(f"- {label:40s} insert={insert_rate:8.0f} ev/s  get_recent={read_rate:8.0f} calls/s  "
+          f"get_recent x{threads} threads={threaded_read_rate:8.0f} calls/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="vera_pool_bench_"))
+    print(f"{args.events} inserts, {args.reads} reads ({workdir})")
+
+    unpooled_path = str(workdir / "unpooled.db")
+    _run("connection per call (before)",
+         SQLitePool(unpooled_path, max_connections=0, wal=False, synchronous=None),
+         unpooled_path, args.events, args.reads, args.threads)
+
+    pooled_path = str(workdir / "pooled.db")
+    _run("pooled, WAL, synchronous=NORMAL (after)",
+         SQLitePool(pooled_path),
+         pooled_path, args.events, args.reads, args.threads)
+
+
+if __name__ == "__main__":
+    main()
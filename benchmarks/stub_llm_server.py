@@ -0,0 +1,105 @@
+"""
+Serveur local minimal compatible OpenAI (/v1/chat/completions) pour les benchmarks.
+Répond immédiatement (réponse JSON ou flux SSE), en HTTP/1.1 keep-alive.
+
+Avec --prefill-us-per-token, simule le coût de traitement du prompt d'un serveur llama.cpp :
+seuls les tokens après le préfixe commun avec la requête précédente sont "recalculés",
+et seulement si la requête demande cache_prompt (sinon tout le prompt l'est).
+
+Usage:
+    python benchmarks/stub_llm_server.py [--port 8099] [--latency-ms 0] [--prefill-us-per-token 0]
+"""
+import argparse
+import json
+import threading
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive: lets clients reuse the connection
+    disable_nagle_algorithm = True  # TCP_NODELAY like real servers; avoids Nagle/delayed-ACK stalls on reused connections
+    latency_seconds = 0.0
+    prefill_seconds_per_token = 0.0
+    chars_per_token = 4
+    reply_text = "oui"
+    prompt_cache = None  # {"last": previous prompt text}, shared by the requests of one server
+
+    @staticmethod
+    def _prompt_text(body: dict) -> str:
+        parts = []
+        for message in body.get("messages", []):
+            content = message.get("content")
+            if isinstance(content, list):
+                content = "".join(p.get("text", "") for p in content if isinstance(p, dict))
+            parts.append(f"<{message.get('role')}>{content or ''}")
+        return "".join(parts)
+
+    def _simulate_prefill(self, body: dict) -> dict:
+        """Sleeps for the prompt tokens a prefix-caching server would have to evaluate."""
+        prompt = self._prompt_text(body)
+        total = len(prompt) // self.chars_per_token
+        cached = 0
+        if body.get("cache_prompt") and self.prompt_cache is not None:
+            common = len(os.path.commonprefix([self.prompt_cache.get("last", ""), prompt]))
+            cached = common // self.chars_per_token
+        if self.prompt_cache is not None:
+            self.prompt_cache["last"] = prompt
+        if self.prefill_seconds_per_token:
+            time.sleep((total - cached) * self.prefill_seconds_per_token)
+        return {"prompt_n": total - cached, "cache_n": cached}
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        timings = self._simulate_prefill(body)
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for word in self.reply_text.split(" "):
+                chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+            return
+        payload = json.dumps({"choices": [{"message": {"role": "assistant", "content": self.reply_text}}],
+                              "timings": timings}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(port: int = 0, latency_ms: float = 0.0, prefill_us_per_token: float = 0.0):
+    """Starts the stub in a daemon thread. Returns (server, base_url)."""
+    handler = type("ConfiguredStubLLMHandler", (StubLLMHandler,), {
+        "latency_seconds": latency_ms / 1000.0,
+        "prefill_seconds_per_token": prefill_us_per_token / 1e6,
+        "prompt_cache": {},
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--prefill-us-per-token", type=float, default=0.0)
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, args.latency_ms, args.prefill_us_per_token)
+    print(f"Stub LLM server listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -31,8 +31,23 @@ from action_dispatcher import execute_action
 import semantic_memory # NEW
 import core # Pour accéder au 'slow_path_task_queue' et au 'task_counter'
 import homeostasis_system # NEW: Import homeostasis_system
+from job_scheduler import JobScheduler
 
 class ConsciousnessOrchestrator:
+    # Tâches périodiques de l'état interne : nom -> (période, gigue, échéance) en secondes.
+    # Les décroissances (émotions, humeur, besoins) sont appliquées par appel : leur période
+    # reprend l'intervalle du heartbeat du moniteur système qui cadençait l'ancienne mise à jour.
+    INTERNAL_JOBS = {
+        "somatic": (15.0, 1.5, 1.0),
+        "emotion_decay": (15.0, 1.5, 0.5),
+        "mood": (15.0, 1.5, 0.5),
+        "homeostasis": (15.0, 1.5, 0.5),
+        "focus_decay": (5.0, 0.5, 0.2),
+        "budget_regen": (15.0, 1.5, 0.2),
+        "vision_spike": (15.0, 1.5, 0.5),
+        "proactive": (15.0, 3.0, 5.0),
+    }
+
     def __init__(self, signal_bus=None):
         self.logger = VeraLogger("ConsciousnessOrchestrator")
         self._stop_event = threading.Event()
@@ -48,19 +63,33 @@ class ConsciousnessOrchestrator:
         # Gestion de l'état Éveillé/Endormi
         self.mode = "awake"  # "awake" or "sleep"
         self.sleep_start_time: Optional[datetime] = None
-        self._last_internal_update_time = datetime.now() # NEW: Track last internal update
-        
+
+        # Les mises à jour internes tournent sur leur propre thread, chacune à sa période,
+        # et sont mises en pause pendant le traitement d'une entrée utilisateur.
+        self.job_scheduler = JobScheduler(name="OrchestratorJobs")
+        job_funcs = {
+            "somatic": self._tick_somatic,
+            "emotion_decay": lambda: emotional_system.update_emotion(None),
+            "mood": emotional_system.update_mood,
+            "homeostasis": homeostasis_system.homeostasis_system.update,
+            "focus_decay": attention_manager.decay_focus,
+            "budget_regen": attention_manager.regenerate_cognitive_budget,
+            "vision_spike": self._tick_vision_spike,
+            "proactive": self._tick_proactive,
+        }
+        for name, (period, jitter, deadline) in self.INTERNAL_JOBS.items():
+            self.job_scheduler.add_job(name, job_funcs[name], period, jitter=jitter, deadline=deadline,
+                                       skip_if=attention_manager.is_processing_user_input)
+
         self.logger.info("ConsciousnessOrchestrator (Event-Driven) initialized.")
 
     def _orchestration_loop(self):
         """
         Boucle principale qui écoute et traite les événements du VeraEventBus.
-        Priorise les entrées utilisateur et gère les mises à jour internes de manière conditionnelle.
+        Les mises à jour internes ne passent plus par cette boucle : elles sont cadencées par
+        self.job_scheduler, ce qui garde la boucle disponible pour les entrées utilisateur.
         """
         self.logger.info("Orchestration loop started. Waiting for events...")
-        # This constant is not defined in this class, using a hardcoded value.
-        # INTERNAL_UPDATE_COOLDOWN_SECONDS = self.check_interval_seconds
-        INTERNAL_UPDATE_COOLDOWN_SECONDS = 5 
 
         while not self._stop_event.is_set():
             try:
@@ -73,19 +102,8 @@ class ConsciousnessOrchestrator:
                 if isinstance(event, UserInputEvent):
                     self._handle_user_input(event)
                     VeraEventBus.task_done()
-                    # Mettre à jour le temps de la dernière mise à jour interne pour réinitialiser le cooldown
-                    self._last_internal_update_time = datetime.now()
                     continue # Passer le reste du cycle pour traiter l'input suivant ou attendre un nouvel événement
 
-
-                # --- Traitement des autres événements et mises à jour internes conditionnelles ---
-                now = datetime.now()
-                should_run_internal_update = (now - self._last_internal_update_time).total_seconds() > INTERNAL_UPDATE_COOLDOWN_SECONDS and not attention_manager.is_processing_user_input()
-
-                if should_run_internal_update:
-                    self._process_internal_state_update()
-                    self._last_internal_update_time = now # Mettre à jour le timestamp de la dernière mise à jour interne
-
                 # Traiter l'événement spécifique (s'il n'était pas un UserInputEvent)
                 if isinstance(event, UserActivityEvent):
                     self._handle_user_activity(event)
@@ -95,42 +113,32 @@ class ConsciousnessOrchestrator:
                     self._handle_vera_speak(event)
                 elif isinstance(event, VeraResponseGeneratedEvent):
                     self.logger.info(f"Event received: {event}. Triggering semantic fact extraction.")
-                    # --- NOUVEAU: Appel à la méthode de classe pour l'extraction ---
-                    try:
-                        self.logger.debug("Attempting to start semantic fact extraction thread.")
-                        fact_thread = threading.Thread(target=self._run_fact_extraction, args=(event,), daemon=True)
-                        fact_thread.start()
-                    except Exception as e:
-                        self.logger.error(f"Erreur lors du lancement du thread d'extraction de faits : {e}", exc_info=True)
-                    # --- FIN DU NOUVEAU CODE ---
+                    self._queue_fact_extraction(event)
                 elif isinstance(event, HeartbeatEvent):
-                    # This event's purpose is just to wake up the loop. No action needed.
+                    # Liveness signal only: internal updates are driven by the job scheduler.
                     pass
                 # ... D'autres gestionnaires d'événements viendront ici ...
 
                 VeraEventBus.task_done()
 
             except queue.Empty:
-                # This happens if VeraEventBus.get() times out.
-                # It's a good opportunity to run the internal state update.
-                self.logger.debug("Event bus was empty, running internal state update on timeout.")
-                self._process_internal_state_update()
+                # This happens if VeraEventBus.get() times out; the job scheduler keeps running on its own.
+                self.logger.debug("Event bus was empty.")
 
             except Exception as e:
                 self.logger.error(f"Critical error in orchestration loop: {e}", exc_info=True)
 
-    def _run_fact_extraction(self, event_data: VeraResponseGeneratedEvent):
+    def _queue_fact_extraction(self, event_data: VeraResponseGeneratedEvent):
         """
-        Runs in a separate thread to analyze conversation and extract semantic facts.
+        Hands the conversation over to the slow path for semantic fact extraction
+        (runs off the orchestrator thread, as background-priority LLM work).
         """
-        self.logger.debug("Semantic fact extraction thread started.")
         try:
             conversation_text = f"L'utilisateur a dit : '{event_data.user_input}'. Vera a répondu : '{event_data.response_text}'"
-            self.logger.info(f"Démarrage de l'extraction de faits en arrière-plan pour : {conversation_text[:100]}...")
-            semantic_memory.extract_and_store_facts_from_text(conversation_text)
-            self.logger.info("Extraction de faits en arrière-plan terminée.")
+            self.logger.info(f"Extraction de faits mise en file d'attente pour : {conversation_text[:100]}...")
+            core._queue_fact_extraction(conversation_text)
         except Exception as e:
-            self.logger.error(f"Erreur dans le thread d'extraction de faits : {e}", exc_info=True)
+            self.logger.error(f"Erreur lors de la mise en file d'attente de l'extraction de faits : {e}", exc_info=True)
 
     def _handle_vera_speak(self, event: VeraSpeakEvent):
         """Gère l'envoi d'un message à l'interface utilisateur."""
@@ -151,25 +159,19 @@ class ConsciousnessOrchestrator:
             self.logger.info("Cooldown for 'suggest a break' activated.")
 
         if self.signal_bus:
-            self.signal_bus.vera_speaks.emit(event.message)
+            if getattr(event, "stream_id", None):
+                self.signal_bus.vera_stream_finished.emit(event.stream_id, event.message)
+            else:
+                self.signal_bus.vera_speaks.emit(event.message)
 
-    def _process_internal_state_update(self):
-        """
-        Met à jour les états internes de Vera et gère la proactivité de manière événementielle.
-        """
-        self.logger.debug("Processing internal state update...")
+    def _tick_somatic(self):
+        """Met à jour l'état somatique à partir des émotions et de l'utilisation du système."""
+        self.somatic_system_instance.update_state(emotional_system.get_emotional_state(),
+                                                  system_monitor.get_system_usage())
 
-        # Mises à jour de base (émotion, somatique)
-        current_emotional_state = emotional_system.get_emotional_state()
+    def _tick_vision_spike(self):
+        """Cycle de perception visuelle déclenché par un pic d'utilisation du système."""
         current_system_usage = system_monitor.get_system_usage()
-        self.somatic_system_instance.update_state(current_emotional_state, current_system_usage)
-        emotional_system.update_emotion(None)
-        emotional_system.update_mood()
-        homeostasis_system.homeostasis_system.update() # NEW: Update homeostasis system
-        attention_manager.decay_focus()
-        attention_manager.regenerate_cognitive_budget() # NOUVEAU: Régénérer le budget cognitif
-
-        # --- NOUVEAU: Cycle de Perception Visuelle Déclenché par les Événements Système ---
         last_usage_item = attention_manager.get_focus_item("last_system_usage")
         last_usage = last_usage_item.get("data") if last_usage_item else {}
 
@@ -200,6 +202,8 @@ class ConsciousnessOrchestrator:
 
         attention_manager.update_focus("last_system_usage", current_system_usage, salience=0.1, expiry_seconds=120)
 
+    def _tick_proactive(self):
+        """Introspection et décision d'action proactive, hors conversation active."""
         # --- Logique d'Action Proactive ---
         # NEW: Check for active conversation before deciding proactive action
         now = datetime.now()
@@ -409,7 +413,7 @@ class ConsciousnessOrchestrator:
     def _handle_system_monitor(self, event: SystemMonitorEvent):
         """Gère les alertes du moniteur système."""
         self.logger.info(f"Handling SystemMonitorEvent: {event.metric} = {event.value}")
-        # Cette information est déjà dans l'attention manager via le `_process_internal_state_update`.
+        # Cette information est déjà dans l'attention manager via la tâche périodique `vision_spike`.
         # La décision de notifier l'utilisateur sera prise par la logique proactive.
         # On pourrait ajouter ici des actions immédiates si un seuil critique est dépassé.
         pass
@@ -420,6 +424,7 @@ class ConsciousnessOrchestrator:
             self._stop_event.clear()
             self._thread = threading.Thread(target=self._orchestration_loop, daemon=True)
             self._thread.start()
+            self.job_scheduler.start()
             self.logger.info("ConsciousnessOrchestrator thread started.")
         else:
             self.logger.warning("ConsciousnessOrchestrator thread is already running.")
@@ -427,6 +432,7 @@ class ConsciousnessOrchestrator:
     def stop(self):
         """Arrête le thread de l'orchestrateur."""
         self._stop_event.set()
+        self.job_scheduler.stop()
         # On ajoute un événement factice pour débloquer la boucle si elle attend sur .get()
         VeraEventBus.put(BaseEvent()) 
         if self._thread and self._thread.is_alive():
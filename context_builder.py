@@ -0,0 +1,201 @@
+"""
+context_builder.py
+Construction de contextes de prompt bornés en tokens.
+
+Remplace les limites en caractères éparpillées dans le code (troncatures à 500, 700, 1000,
+1500 caractères) par une API unique :
+- les tokens sont comptés par un tokenizer local interchangeable (tokenizer.json du modèle
+  servi via la librairie `tokenizers` si "context_tokenizer_path" est configuré, sinon une
+  estimation à ~4 caractères par token) ;
+- chaque section (récit, souvenirs, émotions, objectifs, faits...) a une priorité et un budget
+  optionnel ; ContextBuilder sert les sections par priorité jusqu'à épuisement du budget global ;
+- les textes trop longs sont coupés à une frontière de phrase (ou de mot en dernier recours),
+  jamais au milieu d'un mot.
+"""
+
+import json
+import math
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from tools.logger import VeraLogger
+
+try:
+    from tokenizers import Tokenizer as _HFTokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    _HFTokenizer = None
+    TOKENIZERS_AVAILABLE = False
+
+logger = VeraLogger("context_builder")
+
+try:
+    with open(os.path.join("data", "config.json"), "r", encoding="utf-8") as f:
+        _config = json.load(f)
+except Exception:
+    _config = {}
+
+ELLIPSIS = "…"
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+# Budgets en tokens par usage (surchargeables via "context_budgets" dans config.json).
+# Valeurs équivalentes aux anciennes limites en caractères (~4 caractères par token).
+CONTEXT_BUDGETS = {
+    "distillation_input": 375,   # Ancien MAX_DISTILLATION_INPUT_LENGTH = 1500 caractères
+    "distilled_context": 250,    # Ancien MAX_FINAL_CONTEXT_LENGTH = 1000
+    "focus_summary": 175,        # Ancien MAX_FOCUS_SUMMARY_CHAR_LENGTH = 700
+    "context_when_asked": 125,   # Ancien MAX_CONTEXT_WHEN_ASKED_LENGTH = 500
+    "semantic_facts": 600,       # Faits clés injectés dans le prompt système de réponse
+}
+CONTEXT_BUDGETS.update(_config.get("context_budgets", {}))
+CONTEXT_WINDOW = _config.get("llm_context_window", 8192)  # Fenêtre du modèle servi, en tokens
+
+
+class HeuristicTokenizer:
+    """Character-based estimate, used when no tokenizer file is available."""
+
+    CHARS_PER_TOKEN = 4.0
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self.CHARS_PER_TOKEN) if text else 0
+
+
+class LocalTokenizer:
+    """Exact counts from the served model's tokenizer.json (Hugging Face `tokenizers`)."""
+
+    def __init__(self, path: str):
+        if not TOKENIZERS_AVAILABLE:
+            raise RuntimeError("La librairie 'tokenizers' n'est pas installée.")
+        self._tokenizer = _HFTokenizer.from_file(path)
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids) if text else 0
+
+
+def _load_default_tokenizer():
+    path = _config.get("context_tokenizer_path")
+    if path:
+        try:
+            return LocalTokenizer(path)
+        except Exception as e:
+            logger.warning(f"Tokenizer local '{path}' inutilisable ({e}), estimation par caractères utilisée.")
+    return HeuristicTokenizer()
+
+
+_tokenizer = _load_default_tokenizer()
+
+
+def set_tokenizer(tokenizer):
+    """Replaces the tokenizer used by default (any object with a count(text) -> int method)."""
+    global _tokenizer
+    _tokenizer = tokenizer
+
+
+def get_tokenizer():
+    return _tokenizer
+
+
+def count_tokens(text: str, tokenizer=None) -> int:
+    return (tokenizer or _tokenizer).count(text)
+
+
+def budget_for(name: str) -> int:
+    """Token budget configured for a named use (see CONTEXT_BUDGETS)."""
+    return CONTEXT_BUDGETS[name]
+
+
+def fit_to_tokens(text: str, max_tokens: int, tokenizer=None, keep: str = "head") -> str:
+    """
+    Shortens `text` to at most `max_tokens` tokens, on sentence boundaries.
+    keep="head" keeps the beginning, keep="tail" the end (most recent part of a narrative).
+    Falls back to word boundaries when not even one sentence fits. Returns "" if nothing fits.
+    """
+    tokenizer = tokenizer or _tokenizer
+    if max_tokens <= 0 or not text:
+        return ""
+    if tokenizer.count(text) <= max_tokens:
+        return text
+
+    sentences = [s for s in _SENTENCE_SPLIT.split(text.strip()) if s]
+    kept = _take_units(sentences, max_tokens - tokenizer.count(ELLIPSIS), tokenizer, keep, " ")
+    if not kept:
+        kept = _take_units(text.split(), max_tokens - tokenizer.count(ELLIPSIS), tokenizer, keep, " ")
+    if not kept:
+        return ""
+    return f"{kept} {ELLIPSIS}" if keep == "head" else f"{ELLIPSIS} {kept}"
+
+
+def _take_units(units: List[str], max_tokens: int, tokenizer, keep: str, joiner: str) -> str:
+    """Longest run of whole units from the head (or tail) of `units` that fits in `max_tokens`."""
+    ordered = units if keep == "head" else list(reversed(units))
+    taken: List[str] = []
+    for unit in ordered:
+        candidate = taken + [unit]
+        if tokenizer.count(joiner.join(candidate if keep == "head" else reversed(candidate))) > max_tokens:
+            break
+        taken = candidate
+    return joiner.join(taken if keep == "head" else reversed(taken))
+
+
+class ContextBuilder:
+    """
+    Packs prioritised sections into a token budget.
+    Sections are admitted by priority (0 = most important; ties in insertion order), each within
+    its own max_tokens if given, and rendered in insertion order. Sections that would get fewer than
+    MIN_SECTION_TOKENS are dropped rather than reduced to a stub.
+    """
+
+    MIN_SECTION_TOKENS = 8
+
+    def __init__(self, budget_tokens: int, tokenizer=None, separator: str = "\n"):
+        self.budget_tokens = budget_tokens
+        self.tokenizer = tokenizer or _tokenizer
+        self.separator = separator
+        self._sections: List[Dict[str, Any]] = []
+        self.report: Dict[str, Any] = {}
+
+    @classmethod
+    def for_window(cls, reserved_tokens: int, window_tokens: Optional[int] = None, **kwargs) -> "ContextBuilder":
+        """Builder whose budget is what remains of the model window after `reserved_tokens`
+        (system prompt, expected output...)."""
+        window = CONTEXT_WINDOW if window_tokens is None else window_tokens
+        return cls(max(0, window - reserved_tokens), **kwargs)
+
+    def add(self, name: str, text: Optional[str], priority: int = 1, max_tokens: Optional[int] = None,
+            keep: str = "head") -> "ContextBuilder":
+        if text:
+            self._sections.append({"name": name, "text": text, "priority": priority,
+                                   "max_tokens": max_tokens, "keep": keep})
+        return self
+
+    def build(self) -> str:
+        remaining = self.budget_tokens
+        separator_tokens = self.tokenizer.count(self.separator)
+        fitted: Dict[int, str] = {}
+        used: Dict[str, int] = {}
+        dropped, shortened = [], []
+
+        for index, section in sorted(enumerate(self._sections), key=lambda item: item[1]["priority"]):
+            allowance = remaining - (separator_tokens if fitted else 0)
+            if section["max_tokens"] is not None:
+                allowance = min(allowance, section["max_tokens"])
+            text = section["text"]
+            if self.tokenizer.count(text) > allowance:
+                text = fit_to_tokens(text, allowance, self.tokenizer, section["keep"]) \
+                    if allowance >= self.MIN_SECTION_TOKENS else ""
+                if not text:
+                    dropped.append(section["name"])
+                    continue
+                shortened.append(section["name"])
+            tokens = self.tokenizer.count(text)
+            remaining -= tokens + (separator_tokens if fitted else 0)
+            fitted[index] = text
+            used[section["name"]] = tokens
+
+        self.report = {"budget": self.budget_tokens, "used": self.budget_tokens - remaining,
+                       "sections": used, "shortened": shortened, "dropped": dropped}
+        if dropped or shortened:
+            logger.debug(f"Contexte ajusté au budget de {self.budget_tokens} tokens: "
+                         f"raccourcis={shortened}, omis={dropped}.")
+        return self.separator.join(fitted[i] for i in sorted(fitted))
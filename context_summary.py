@@ -0,0 +1,155 @@
+"""
+context_summary.py
+Résumé distillé du contexte interne de Vera, versionné et invalidé par empreinte.
+
+La distillation (un appel LLM) ne dépend que de quelques entrées : l'état émotionnel, les objectifs
+actifs, le récit de soi et les derniers souvenirs. Le résumé est donc associé à une empreinte de ces
+entrées (émotions dominantes arrondies par paliers, IDs des objectifs, hash du récit, ID du dernier
+souvenir) :
+- tant que l'empreinte ne change pas, le résumé en cache est utilisé tel quel ;
+- quand elle change, le résumé existant est encore servi (la réponse n'attend pas) et un
+  rafraîchissement en arrière-plan est demandé, une seule fois par empreinte ;
+- seul un cache vide oblige le chemin de réponse à distiller de manière synchrone.
+
+Le texte du résumé reste stocké dans l'attention_manager ("pre_computed_internal_context_summary")
+pour survivre aux redémarrages ; sans empreinte connue, il est considéré comme périmé.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from tools.logger import VeraLogger
+
+logger = VeraLogger("context_summary")
+
+SUMMARY_FOCUS_KEY = "pre_computed_internal_context_summary"
+SUMMARY_EXPIRY_SECONDS = 3600 * 24
+EMOTION_BUCKET_SIZE = 0.2  # Intensity changes smaller than a bucket do not invalidate the summary
+EMOTION_MIN_INTENSITY = 0.1
+TOP_EMOTIONS = 3
+
+
+def _focus_data(attention_focus: Dict[str, Any], key: str) -> Any:
+    item = attention_focus.get(key)
+    return item.get("data") if isinstance(item, dict) else None
+
+
+def compute_context_fingerprint(attention_focus: Dict[str, Any]) -> str:
+    """Fingerprint of the inputs the distilled summary depends on, taken from the attention focus."""
+    emotions = _focus_data(attention_focus, "emotional_state") or {}
+    active = sorted(((name, value) for name, value in emotions.items()
+                     if name != "last_update" and isinstance(value, (int, float)) and value > EMOTION_MIN_INTENSITY),
+                    key=lambda item: item[1], reverse=True)[:TOP_EMOTIONS]
+    emotion_bucket = sorted((name, int(value / EMOTION_BUCKET_SIZE)) for name, value in active)
+
+    goals = _focus_data(attention_focus, "active_goals") or []
+    goal_ids = sorted(str(g.get("id", g.get("description"))) for g in goals if isinstance(g, dict))
+
+    narrative = _focus_data(attention_focus, "narrative_self_summary") or ""
+    narrative_hash = hashlib.sha1(str(narrative).encode("utf-8")).hexdigest()
+
+    memories = [m for m in (_focus_data(attention_focus, "relevant_memories") or []) if isinstance(m, dict)]
+    memory_ids = [m["id"] for m in memories if isinstance(m.get("id"), int)]
+    if memory_ids:
+        latest_memory = max(memory_ids)
+    else:  # Memories without IDs: the most recent description stands in for it
+        latest_memory = memories[-1].get("description") if memories else None
+
+    material = json.dumps([emotion_bucket, goal_ids, narrative_hash, latest_memory], ensure_ascii=False, default=str)
+    return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+
+class ContextSummaryCache:
+    """Versioned distilled summary with fingerprint-based invalidation and deduplicated background refresh."""
+
+    def __init__(self, attention_manager=None):
+        self._attention_manager = attention_manager
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._refresh_pending_for: Optional[str] = None
+        self._refresh_callback: Optional[Callable[[str, str], None]] = None
+        self.version = 0
+        self._stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "refreshes_requested": 0}
+
+    def _manager(self):
+        if self._attention_manager is None:
+            from attention_manager import attention_manager  # Local import to avoid circular dependency
+            self._attention_manager = attention_manager
+        return self._attention_manager
+
+    def set_refresh_callback(self, callback: Callable[[str, str], None]):
+        """Injects the function that schedules a background distillation: callback(fingerprint, reason)."""
+        self._refresh_callback = callback
+
+    def _cached_text(self) -> Optional[str]:
+        manager = self._manager()
+        item = manager.get_focus_item(SUMMARY_FOCUS_KEY)
+        if not item or not item.get("data") or manager.is_expired(SUMMARY_FOCUS_KEY):
+            return None
+        return item["data"]
+
+    def lookup(self, attention_focus: Dict[str, Any]) -> Tuple[Optional[str], bool]:
+        """
+        Returns (summary, fresh). A stale summary is still returned (fresh=False) and a background
+        refresh is requested; summary is None only when nothing is cached.
+        """
+        fingerprint = compute_context_fingerprint(attention_focus)
+        text = self._cached_text()
+        with self._lock:
+            if text is None:
+                self._stats["misses"] += 1
+                return None, False
+            fresh = fingerprint == self._fingerprint
+            self._stats["fresh_hits" if fresh else "stale_hits"] += 1
+        if not fresh:
+            self.request_refresh(fingerprint, reason="inputs changed")
+        return text, fresh
+
+    def request_refresh(self, fingerprint: str, reason: str = ""):
+        """Schedules one background refresh per fingerprint (no-op if one is already pending for it)."""
+        with self._lock:
+            if self._refresh_callback is None or self._refresh_pending_for == fingerprint:
+                return
+            self._refresh_pending_for = fingerprint
+            self._stats["refreshes_requested"] += 1
+        try:
+            self._refresh_callback(fingerprint, reason)
+        except Exception as e:
+            logger.error(f"Impossible de planifier le rafraîchissement du résumé de contexte: {e}")
+            with self._lock:
+                self._refresh_pending_for = None
+
+    def store(self, summary: str, fingerprint: str) -> int:
+        """Stores a new summary computed from inputs with `fingerprint`. Returns the new version."""
+        self._manager().update_focus(SUMMARY_FOCUS_KEY, summary, salience=1.0, expiry_seconds=SUMMARY_EXPIRY_SECONDS)
+        with self._lock:
+            self._fingerprint = fingerprint
+            if self._refresh_pending_for == fingerprint:
+                self._refresh_pending_for = None
+            self.version += 1
+            version = self.version
+        logger.debug(f"Résumé de contexte interne v{version} stocké (empreinte {fingerprint[:8]}).")
+        return version
+
+    def refresh_done(self, fingerprint: str):
+        """
+        Releases the refresh requested for `fingerprint` once its distillation has ended, whatever
+        the outcome (failed, skipped as already fresh, or stored under a newer fingerprint), so a
+        later lookup can request it again.
+        """
+        with self._lock:
+            if self._refresh_pending_for == fingerprint:
+                self._refresh_pending_for = None
+
+    def is_fresh(self, attention_focus: Dict[str, Any]) -> bool:
+        with self._lock:
+            return self._fingerprint is not None and compute_context_fingerprint(attention_focus) == self._fingerprint
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, version=self.version, refresh_pending=self._refresh_pending_for is not None)
+
+
+context_summary_cache = ContextSummaryCache()
@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 import json
 import re
 from pathlib import Path
-from typing import Optional, List, Dict # Added for type hints
+from typing import Any, Optional, List, Dict # Added for type hints
 import threading # Added for slow path consumer thread
 import queue # Added for slow path task queue
 import itertools # NEW: For a thread-safe counter
@@ -14,6 +14,9 @@ from working_memory import update_working_memory, get_working_memory, clear_work
 from web_searcher import web_searcher
 from time_manager import time_manager
 from llm_wrapper import generate_response, send_inference_prompt, _perform_real_time_distillation # NEW: Import _perform_real_time_distillation
+from llm_scheduler import llm_priority, PRIORITY_USER, PRIORITY_TOOL, PRIORITY_BACKGROUND
+from context_summary import context_summary_cache, compute_context_fingerprint
+from context_builder import ContextBuilder, budget_for, count_tokens, fit_to_tokens
 from config import DATA_FILES, LOG_DIR
 from tools.logger import VeraLogger
 from error_handler import log_error
@@ -164,15 +167,33 @@ def _should_perform_semantic_search(user_input: str) -> bool:
         logger.error(f"Erreur lors de la décision de recherche sémantique par LLM: {e}", exc_info=True)
         return False # Par défaut, ne pas chercher en cas d'erreur ou d'incertitude
 
-def _distill_context_and_store():
+def _format_context_when_asked(context_when_asked: Any) -> str:
+    """Vera's internal context when she asked a proactive question, bounded to its token budget."""
+    if context_when_asked is None:
+        return ""
+    text = context_when_asked if isinstance(context_when_asked, str) else json.dumps(context_when_asked, ensure_ascii=False)
+    budget = budget_for("context_when_asked")
+    if count_tokens(text) > budget:
+        logger.warning(f"SLOW PATH: context_when_asked raccourci à {budget} tokens.")
+        text = fit_to_tokens(text, budget)
+    return text
+
+def _distill_context_and_store(requested_fingerprint: Optional[str] = None):
     """
-    Gathers Vera's current internal state, distills it using an LLM, and stores the summary in attention_manager.
-    This is intended to be run as a proactive background task during idle times.
+    Gathers Vera's current internal state, distills it using an LLM, and stores the summary
+    (with the fingerprint of its inputs) in the context summary cache.
+    This runs as a background task: on invalidation, and periodically during idle times.
+    Nothing is recomputed if the cached summary already matches the current inputs.
     """
     logger.info("SLOW PATH: Démarrage de la distillation du contexte interne.")
+    distilled_summary = ""
     try:
         # 1. Gather relevant parts of Vera's current internal state
         current_focus = attention_manager.get_current_focus() # Already contains user input, memories, etc.
+        if context_summary_cache.is_fresh(current_focus):
+            logger.info("SLOW PATH: Résumé du contexte interne déjà à jour, distillation ignorée.")
+            return
+        fingerprint = compute_context_fingerprint(current_focus)
         emotional_state = emotional_system.get_emotional_state()
         somatic_state = current_focus.get("somatic_state", {}).get("data", {})
         personality_desires = _get_personality_system_instance().get_active_desires()
@@ -181,53 +202,42 @@ def _distill_context_and_store():
         
         # 2. Formulate the distillation prompt (similar to llm_wrapper's internal prompt)
         
-        # --- NOUVEAU: Résumer current_focus avec inclusion priorisée ---
-        focus_summary_parts = []
-        MAX_FOCUS_SUMMARY_CHAR_LENGTH = 700 # Define a maximum length for the combined summary parts
+        # --- NOUVEAU: Résumer current_focus avec inclusion priorisée (budget en tokens) ---
+        focus_builder = ContextBuilder(budget_for("focus_summary"), separator=", ")
 
         # High Priority Items
         if current_focus.get("user_input"):
-            user_input_data = current_focus["user_input"].get('data', 'N/A')
-            if len(user_input_data) > 100: user_input_data = user_input_data[:100] + "..."
-            focus_summary_parts.append(f"Dernière interaction utilisateur: '{user_input_data}'")
+            user_input_data = fit_to_tokens(str(current_focus["user_input"].get('data', 'N/A')), 25)
+            focus_builder.add("user_input", f"Dernière interaction utilisateur: '{user_input_data}'", priority=0)
         
         if current_focus.get("active_goals"):
             goals = [g.get('description') for g in current_focus['active_goals'].get('data', []) if isinstance(g, dict)]
             if goals:
-                focus_summary_parts.append(f"Objectifs actifs: {'; '.join(goals[:3])}") # Limit to top 3 goals
+                focus_builder.add("goals", f"Objectifs actifs: {'; '.join(goals[:3])}", priority=0) # Limit to top 3 goals
         
         if current_focus.get("emotional_state"):
             # Emotional state is already summarized in llm_wrapper for distillation, just represent its presence
-            focus_summary_parts.append(f"État émotionnel actuel: {emotional_state.get('mood_label', 'neutre')}")
+            focus_builder.add("emotions", f"État émotionnel actuel: {emotional_state.get('mood_label', 'neutre')}", priority=0)
 
         if current_focus.get("inferred_user_emotion"):
-            focus_summary_parts.append(f"Émotion perçue de Foz: {current_focus['inferred_user_emotion'].get('data', 'inconnu')}")
-
-        # Medium Priority Items (add if overall summary length allows)
-        current_combined_length = sum(len(s) for s in focus_summary_parts)
-        if current_combined_length < MAX_FOCUS_SUMMARY_CHAR_LENGTH * 0.7: # Use 70% of max length for medium priority
-            if current_focus.get("relevant_memories"):
-                memories_data = [mem.get('description', '') for mem in current_focus['relevant_memories'].get('data', []) if isinstance(mem, dict)]
-                if memories_data:
-                    mem_summary = "; ".join(memories_data[:2]) # Top 2 memories
-                    if len(mem_summary) > 150: mem_summary = mem_summary[:150] + "..."
-                    focus_summary_parts.append(f"Souvenirs récents: {mem_summary}")
-            
-            if current_focus.get("internal_thoughts"):
-                thoughts_data = [t for t in current_focus['internal_thoughts'].get('data', []) if isinstance(t, str)]
-                if thoughts_data:
-                    thought_summary = "; ".join(thoughts_data[:1]) # Just the most recent thought
-                    if len(thought_summary) > 150: thought_summary = thought_summary[:150] + "..."
-                    focus_summary_parts.append(f"Pensée interne récente: {thought_summary}")
-
-            if current_focus.get("semantic_context"):
-                semantic_data = current_focus["semantic_context"].get('data', 'N/A')
-                if len(semantic_data) > 200: semantic_data = semantic_data[:200] + "..."
-                focus_summary_parts.append(f"Contexte sémantique: {semantic_data}")
-
-        current_focus_summary = ", ".join(focus_summary_parts) if focus_summary_parts else "Focus d'attention actuel non spécifié."
-        if len(current_focus_summary) > MAX_FOCUS_SUMMARY_CHAR_LENGTH:
-            current_focus_summary = current_focus_summary[:MAX_FOCUS_SUMMARY_CHAR_LENGTH] + "..."
+            focus_builder.add("user_emotion", f"Émotion perçue de Foz: {current_focus['inferred_user_emotion'].get('data', 'inconnu')}", priority=0)
+
+        # Medium Priority Items (kept only if the budget allows)
+        if current_focus.get("relevant_memories"):
+            memories_data = [mem.get('description', '') for mem in current_focus['relevant_memories'].get('data', []) if isinstance(mem, dict)]
+            if memories_data:
+                focus_builder.add("memories", f"Souvenirs récents: {'; '.join(memories_data[:2])}", priority=1, max_tokens=40) # Top 2 memories
+        
+        if current_focus.get("internal_thoughts"):
+            thoughts_data = [t for t in current_focus['internal_thoughts'].get('data', []) if isinstance(t, str)]
+            if thoughts_data:
+                focus_builder.add("thoughts", f"Pensée interne récente: {thoughts_data[0]}", priority=1, max_tokens=40) # Just the most recent thought
+
+        if current_focus.get("semantic_context"):
+            semantic_data = str(current_focus["semantic_context"].get('data', 'N/A'))
+            focus_builder.add("semantic_context", f"Contexte sémantique: {semantic_data}", priority=2, max_tokens=50)
+
+        current_focus_summary = focus_builder.build() or "Focus d'attention actuel non spécifié."
 
         distillation_prompt_user_content = f"""
         Mon humeur générale est : {emotional_state.get('mood_label', 'neutre')} ({emotional_state.get('mood_intensity', 0):.0f}%).
@@ -246,23 +256,22 @@ def _distill_context_and_store():
             prompt_content=distillation_prompt_user_content,
             # custom_system_prompt="Tu es le condenseur de la conscience de Vera. Ta tâche est de prendre tous les éléments de son état interne (pensées, émotions, souvenirs, sensations, récit de soi) et de les synthétiser en un résumé concis. Ce résumé doit capturer l'essence de son monde intérieur et ses préoccupations principales, sans inclure les détails bruts. Pense comme un journal intime de Vera, capturant l'essentiel de sa conscience pour le moment présent. Réponds UNIQUEMENT avec ce résumé.",
             max_tokens=256, # Sufficient for a concise summary
+            call_site="distillation"
         )
         distilled_summary = distilled_response.get("text", "").strip()
 
         if distilled_summary:
-            # 4. Store the distilled summary in attention_manager
-            attention_manager.update_focus(
-                "pre_computed_internal_context_summary",
-                distilled_summary,
-                salience=1.0, # High salience as it's a current summary
-                expiry_seconds=3600 * 24 # Valid for 24 hours to prevent frequent expiry
-            )
-            logger.info(f"SLOW PATH: Contexte interne distillé et stocké dans l'attention_manager.")
+            # 4. Store the distilled summary (attention_manager item + fingerprint of its inputs)
+            version = context_summary_cache.store(distilled_summary, fingerprint)
+            logger.info(f"SLOW PATH: Contexte interne distillé et stocké (v{version}).")
         else:
             logger.warning("SLOW PATH: La distillation du contexte interne a échoué à générer un résumé.")
 
     except Exception as e:
         logger.error(f"SLOW PATH: Erreur lors de la distillation du contexte interne: {e}", exc_info=True)
+    finally:
+        if requested_fingerprint:
+            context_summary_cache.refresh_done(requested_fingerprint)
 
 def _perform_budgetary_review_task():
     """
@@ -494,7 +503,7 @@ def _handle_user_input_task(user_input: str, initial_llm_response_text: Optional
             
             prompt = f"Vera a posé la question : \"{pending_question_text}\". L'utilisateur vient de répondre : \"{user_input}\". Est-ce que la réponse de l'utilisateur semble répondre à la question ? Réponds uniquement par 'approbation' ou 'rejet'."
             try:
-                llm_response = send_inference_prompt(prompt_content=prompt, max_tokens=10)
+                llm_response = send_inference_prompt(prompt_content=prompt, max_tokens=10, call_site="classification.answer_intent", cache=True)
                 user_intent = llm_response.get("text", "").strip().lower()
             except Exception as e:
                 logger.error(f"Erreur lors de la classification de la réponse : {e}", exc_info=True)
@@ -510,20 +519,7 @@ def _handle_user_input_task(user_input: str, initial_llm_response_text: Optional
                 homeostasis_system.fulfill_need("curiosity", amount=0.6) # Montant plus élevé car réponse directe
                 homeostasis_system.fulfill_need("social_interaction", amount=0.2) # Renforce aussi le lien social
 
-                # Truncate context_when_asked to prevent prompt overflow
-                MAX_CONTEXT_WHEN_ASKED_LENGTH = 500
-                original_context_when_asked = pending_question_data.get('context_when_asked')
-                truncated_context_when_asked = original_context_when_asked
-                if isinstance(original_context_when_asked, str) and len(original_context_when_asked) > MAX_CONTEXT_WHEN_ASKED_LENGTH:
-                    truncated_context_when_asked = original_context_when_asked[:MAX_CONTEXT_WHEN_ASKED_LENGTH] + "..."
-                    logger.warning(f"SLOW PATH: context_when_asked tronqué de {len(original_context_when_asked)} à {MAX_CONTEXT_WHEN_ASKED_LENGTH} caractères.")
-                elif isinstance(original_context_when_asked, dict): # If it's a dict, convert to str and truncate
-                    context_str = json.dumps(original_context_when_asked)
-                    if len(context_str) > MAX_CONTEXT_WHEN_ASKED_LENGTH:
-                        truncated_context_when_asked = context_str[:MAX_CONTEXT_WHEN_ASKED_LENGTH] + "..."
-                        logger.warning(f"SLOW PATH: context_when_asked (dict) tronqué de {len(context_str)} à {MAX_CONTEXT_WHEN_ASKED_LENGTH} caractères.")
-                    else:
-                        truncated_context_when_asked = context_str
+                truncated_context_when_asked = _format_context_when_asked(pending_question_data.get('context_when_asked'))
                 
                 # --- NOUVEAU: Générer un suivi contextuel avec le LLM ---
                 follow_up_prompt = f"""
@@ -549,20 +545,7 @@ def _handle_user_input_task(user_input: str, initial_llm_response_text: Optional
             else:
                 logger.info("SLOW PATH: Utilisateur a rejeté la réponse à la question. Génération d'une nouvelle approche.")
                 
-                # Truncate context_when_asked for rejection prompt as well
-                MAX_CONTEXT_WHEN_ASKED_LENGTH = 500
-                original_context_when_asked = pending_question_data.get('context_when_asked')
-                truncated_context_when_asked = original_context_when_asked
-                if isinstance(original_context_when_asked, str) and len(original_context_when_asked) > MAX_CONTEXT_WHEN_ASKED_LENGTH:
-                    truncated_context_when_asked = original_context_when_asked[:MAX_CONTEXT_WHEN_ASKED_LENGTH] + "..."
-                    logger.warning(f"SLOW PATH: context_when_asked tronqué de {len(original_context_when_asked)} à {MAX_CONTEXT_WHEN_ASKED_LENGTH} caractères.")
-                elif isinstance(original_context_when_asked, dict): # If it's a dict, convert to str and truncate
-                    context_str = json.dumps(original_context_when_asked)
-                    if len(context_str) > MAX_CONTEXT_WHEN_ASKED_LENGTH:
-                        truncated_context_when_asked = context_str[:MAX_CONTEXT_WHEN_ASKED_LENGTH] + "..."
-                        logger.warning(f"SLOW PATH: context_when_asked (dict) tronqué de {len(context_str)} à {MAX_CONTEXT_WHEN_ASKED_LENGTH} caractères.")
-                    else:
-                        truncated_context_when_asked = context_str
+                truncated_context_when_asked = _format_context_when_asked(pending_question_data.get('context_when_asked'))
                 
                 # --- NOUVEAU: Générer une réponse de rejet plus douce et proactive ---
                 rejection_follow_up_prompt = f"""
@@ -686,6 +669,7 @@ def _handle_user_input_task(user_input: str, initial_llm_response_text: Optional
         attention_manager.set_thinking_hard(True)
         logger.info("SLOW PATH: Flag 'is_vera_thinking_hard' activé.")
         
+        stream_id = None  # Lié avant le try : le message de repli doit partir même si la génération échoue tôt
         try:
             initial_focus_for_llm = attention_manager.get_current_focus()
             if "external_knowledge_context" in initial_focus_for_llm:
@@ -697,9 +681,10 @@ def _handle_user_input_task(user_input: str, initial_llm_response_text: Optional
                 initial_focus_for_llm["proactive_suggestion_instruction"] = proactive_instruction_item["data"]
                 attention_manager.clear_focus_item("proactive_suggestion_instruction") # Clear after use
 
-            llm_thread, response_queue = generate_response(user_input, initial_focus_for_llm, {}, image_path=image_path)
+            llm_thread, response_queue = generate_response(user_input, initial_focus_for_llm, {}, image_path=image_path, stream=True)
             llm_response = response_queue.get()
             llm_thread.join()
+            stream_id = llm_response.get("stream_id") # Partial message already shown in the chat, if streamed
             
             final_response_text = llm_response.get("text", "Désolée, je n'ai pas pu générer de réponse complète pour le moment.").strip()
 
@@ -710,7 +695,7 @@ def _handle_user_input_task(user_input: str, initial_llm_response_text: Optional
             final_response_text = "Désolée, j'ai rencontré une erreur lors de la génération de ma réponse."
         finally:
             attention_manager.set_thinking_hard(False)
-        VeraEventBus.put(VeraSpeakEvent(final_response_text))
+        VeraEventBus.put(VeraSpeakEvent(final_response_text, stream_id=stream_id))
         VeraEventBus.put(VeraResponseGeneratedEvent(
             response_text=final_response_text,
             user_input=user_input,
@@ -812,8 +797,10 @@ def _run_slow_path_processing(task: Dict):
             llm_thread.join()
             question_content = llm_response.get("text", "Quelle est la nature de l'existence?").strip()
 
-            # Summarize the current_focus before storing it to prevent large prompts later
-            summarized_current_focus = _perform_real_time_distillation(current_focus)
+            # Summarize the current_focus before storing it to prevent large prompts later (cached summary if any)
+            summarized_current_focus, _ = context_summary_cache.lookup(current_focus)
+            if not summarized_current_focus:
+                summarized_current_focus = _perform_real_time_distillation(current_focus)
 
             VeraEventBus.put(VeraSpeakEvent(question_content))
             attention_manager.update_focus("pending_answer_to_question", {
@@ -872,8 +859,12 @@ def _run_slow_path_processing(task: Dict):
             except Exception as e:
                 logger.error(f"SLOW PATH: Erreur lors du traitement de 'llm_with_callback' pour '{task.get('callback_handler')}': {e}", exc_info=True)
 
+        elif task_type == "extract_semantic_facts":
+            from semantic_memory import extract_and_store_facts_from_text # Local import
+            extract_and_store_facts_from_text(task["text"])
+
         elif task_type == "distill_internal_context_task": # NEW: Handle context distillation task
-            _distill_context_and_store() # Call the new distillation function
+            _distill_context_and_store(task.get("fingerprint"))
 
         elif task_type == "perform_budgetary_review_task": # NEW: Handle budgetary review task
             _perform_budgetary_review_task() # Call the new budgetary review function
@@ -1025,6 +1016,12 @@ def _run_slow_path_processing(task: Dict):
         attention_manager.set_thinking_hard(False)
         logger.info("SLOW PATH: Flag 'is_vera_thinking_hard' désactivé à la fin du traitement en arrière-plan.")
 
+# Classe de priorité LLM des tâches du slow path (les autres tâches sont de la cognition de fond)
+SLOW_PATH_LLM_PRIORITIES = {
+    "process_user_input_task": PRIORITY_USER,
+    "execute_approved_actions": PRIORITY_TOOL,
+}
+
 def _slow_path_consumer_thread():
     """
     Consumer thread that continuously processes tasks from the slow_path_task_queue.
@@ -1036,7 +1033,10 @@ def _slow_path_consumer_thread():
             task_priority, count, task = slow_path_task_queue.get() # MODIFIED: Get 3-element tuple
             logger.info(f"SLOW PATH CONSUMER: Tâche '{task.get('task_type', 'unknown')}' (Prio: {task_priority}) récupérée de la file d'attente.")
             
-            _run_slow_path_processing(task)
+            # Les appels LLM de la tâche héritent de sa classe de priorité (fond par défaut)
+            llm_class = SLOW_PATH_LLM_PRIORITIES.get(task.get("task_type"), PRIORITY_BACKGROUND)
+            with llm_priority(llm_class):
+                _run_slow_path_processing(task)
             slow_path_task_queue.task_done() # Indique que la tâche est terminée
             logger.info(f"SLOW PATH CONSUMER: Tâche '{task.get('task_type', 'unknown')}' traitée et marquée comme terminée.")
         except Exception as e:
@@ -1070,6 +1070,30 @@ def _queue_insight_generation(prompt_context: str):
     }))
     logger.info("SLOW PATH: Tâche 'generate_insight' ajoutée à la file d'attente.")
 
+def _queue_fact_extraction(conversation_text: str):
+    """
+    Adds a semantic fact extraction request (extraction + batched importance judgement) to the slow_path_task_queue.
+    """
+    slow_path_task_queue.put((4, next(task_counter), { # Background maintenance: after user input and insights with callbacks
+        "task_type": "extract_semantic_facts",
+        "text": conversation_text
+    }))
+    logger.info("SLOW PATH: Tâche 'extract_semantic_facts' ajoutée à la file d'attente.")
+
+def _queue_context_distillation(fingerprint: str, reason: str = ""):
+    """
+    Adds a background refresh of the distilled internal context to the slow_path_task_queue.
+    Called by the context summary cache when its inputs changed.
+    """
+    slow_path_task_queue.put((4, next(task_counter), { # Background maintenance, like fact extraction
+        "task_type": "distill_internal_context_task",
+        "fingerprint": fingerprint,
+        "reason": reason
+    }))
+    logger.info(f"SLOW PATH: Tâche 'distill_internal_context_task' ajoutée à la file d'attente ({reason}).")
+
+context_summary_cache.set_refresh_callback(_queue_context_distillation)
+
 def _queue_llm_task_with_callback(prompt: str, callback_handler: tuple, callback_context: Dict, max_tokens: int = 256, custom_system_prompt: Optional[str] = None):
     """
     Adds a generic LLM inference task to the slow path queue with a callback.
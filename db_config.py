@@ -23,7 +23,9 @@ TABLE_NAMES = {
     "learned_knowledge": "learned_knowledge", # For verified knowledge
     "unverified_knowledge": "unverified_knowledge", # For new, unverified knowledge
     "web_cache": "web_cache",
+    "web_cache_entries": "web_cache_entries", # One row per (normalized query, source)
     "attention_focus": "attention_focus",
+    "attention_focus_items": "attention_focus_items", # One row per focus source (per-item storage mode)
     "self_narrative": "self_narrative",
     "accomplishments": "accomplishments",
     "somatic": "somatic",
@@ -67,6 +69,14 @@ INITIAL_TABLE_SCHEMAS = {
         "id": "TEXT PRIMARY KEY",
         "state_json": "TEXT" # Stores the JSON string of the entire attention focus dict
     },
+    TABLE_NAMES["attention_focus_items"]: { # Per-item attention focus storage
+        "id": "TEXT PRIMARY KEY", # Focus source (e.g. 'active_goals', 'visual_context')
+        "data_json": "TEXT", # JSON string of the item's data only
+        "salience": "REAL",
+        "timestamp": "TEXT", # ISO format
+        "expiry_timestamp": "TEXT", # ISO format (microsecond precision so it sorts correctly), NULL = never expires
+        "last_reset_date": "TEXT"
+    },
     TABLE_NAMES["self_narrative"]: {
         "id": "TEXT PRIMARY KEY",
         "state_json": "TEXT"
@@ -87,6 +97,17 @@ INITIAL_TABLE_SCHEMAS = {
         "id": "TEXT PRIMARY KEY", # Assuming web cache stores a single large JSON object
         "cache_json": "TEXT"
     },
+    TABLE_NAMES["web_cache_entries"]: { # Per-query, per-source web search cache
+        "id": "TEXT PRIMARY KEY", # '<query_hash>:<source>'
+        "query_hash": "TEXT", # sha1 of the normalized query
+        "source": "TEXT", # 'wikipedia', 'general'...
+        "query": "TEXT", # Normalized query, for inspection
+        "result_json": "TEXT",
+        "size_bytes": "INTEGER", # Size of result_json, for the byte budget
+        "created_at": "REAL", # Unix timestamps
+        "expires_at": "REAL",
+        "last_access": "REAL"
+    },
     # Tables that will store multiple records (like goals, reminders, unverified_knowledge)
     TABLE_NAMES["goals"]: {
         "id": "TEXT PRIMARY KEY", # Goal ID (UUID or unique string)
@@ -117,3 +138,15 @@ INITIAL_TABLE_SCHEMAS = {
         "action_json": "TEXT"
     }
 }
+
+# Secondary indexes, created alongside the tables above: {table_name: {index_name: column_list}}
+TABLE_INDEXES = {
+    TABLE_NAMES["attention_focus_items"]: {
+        "idx_attention_focus_items_expiry": "expiry_timestamp",
+        "idx_attention_focus_items_salience": "salience"
+    },
+    TABLE_NAMES["web_cache_entries"]: {
+        "idx_web_cache_entries_expiry": "expires_at",
+        "idx_web_cache_entries_last_access": "last_access"
+    }
+}
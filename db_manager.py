@@ -4,7 +4,7 @@ import threading
 from pathlib import Path
 import logging
 
-from db_config import UNIFIED_DB_PATH, INITIAL_TABLE_SCHEMAS, TABLE_NAMES
+from db_config import UNIFIED_DB_PATH, INITIAL_TABLE_SCHEMAS, TABLE_NAMES, TABLE_INDEXES
 from tools.json_utils import datetime_converter # NEW: Import datetime_converter
 
 logger = logging.getLogger(__name__)
@@ -63,6 +63,12 @@ class DbManager:
                 logger.debug(f"Table '{table_name}' ensured.")
             except sqlite3.Error as e:
                 logger.error(f"Error creating table '{table_name}': {e}")
+        for table_name, indexes in TABLE_INDEXES.items():
+            for index_name, columns in indexes.items():
+                try:
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})")
+                except sqlite3.Error as e:
+                    logger.error(f"Error creating index '{index_name}' on '{table_name}': {e}")
         conn.commit()
 
     def insert_document(self, table_name: str, doc_id: str, document: dict, column_name: str = "state_json"):
@@ -141,6 +147,98 @@ class DbManager:
             conn.rollback()
             raise
 
+    # --- Row-oriented helpers (for tables with real columns instead of a single JSON document) ---
+
+    def get_rows(self, table_name: str, where: str | None = None, params: tuple = (),
+                 columns: str = "*", order_by: str | None = None) -> list[dict]:
+        """Returns the rows of a table as dictionaries, optionally filtered by a WHERE clause
+        and restricted to some columns / ordered."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        sql = f"SELECT {columns} FROM {table_name}" + (f" WHERE {where}" if where else "")
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+
+        try:
+            cursor.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving rows from table '{table_name}': {e}")
+            raise
+
+    def write_rows(self, table_name: str, upserts: list[dict], deletes: list[str] = (), replace_all: bool = False):
+        """
+        Upserts and deletes rows of a table in a single transaction.
+        Each upsert dict must contain an 'id' key plus the column values.
+        If replace_all is True, every row not present in upserts is removed.
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            if replace_all:
+                cursor.execute(f"DELETE FROM {table_name}")
+            if deletes:
+                cursor.executemany(f"DELETE FROM {table_name} WHERE id = ?", [(doc_id,) for doc_id in deletes])
+            if upserts:
+                columns = list(upserts[0].keys())
+                placeholders = ", ".join("?" for _ in columns)
+                cursor.executemany(
+                    f"INSERT OR REPLACE INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
+                    [tuple(row[col] for col in columns) for row in upserts]
+                )
+            conn.commit()
+            logger.debug(f"{len(upserts)} row(s) upserted, {len(deletes)} row(s) deleted in table '{table_name}'.")
+            if self.signal_bus:
+                for doc_id in [row["id"] for row in upserts] + list(deletes):
+                    self.signal_bus.db_updated.emit(table_name, doc_id)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing rows to table '{table_name}': {e}")
+            conn.rollback()
+            raise
+
+    def update_rows(self, table_name: str, updates: list[dict]):
+        """
+        Updates some columns of existing rows in a single transaction (no signal emitted).
+        Each update dict must contain an 'id' key plus the columns to set; all dicts share the same columns.
+        """
+        if not updates:
+            return
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        columns = [col for col in updates[0] if col != "id"]
+        assignments = ", ".join(f"{col} = ?" for col in columns)
+
+        try:
+            cursor.executemany(
+                f"UPDATE {table_name} SET {assignments} WHERE id = ?",
+                [tuple(row[col] for col in columns) + (row["id"],) for row in updates]
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error updating rows of table '{table_name}': {e}")
+            conn.rollback()
+            raise
+
+    def delete_rows_where(self, table_name: str, where: str, params: tuple = ()) -> int:
+        """Deletes the rows matching a WHERE clause and returns how many were removed."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(f"DELETE FROM {table_name} WHERE {where}", params)
+            conn.commit()
+            deleted = cursor.rowcount
+            if deleted:
+                logger.debug(f"{deleted} row(s) deleted from table '{table_name}'.")
+                if self.signal_bus:
+                    self.signal_bus.db_updated.emit(table_name, "*")
+            return deleted
+        except sqlite3.Error as e:
+            logger.error(f"Error deleting rows from table '{table_name}': {e}")
+            conn.rollback()
+            raise
+
 # Global instance for easy access throughout the application
 db_manager = DbManager()
 
@@ -6,15 +6,18 @@ from typing import Dict, List, Optional, Any
 # Removed JSONManager
 from attention_manager import attention_manager # Import the global attention manager
 from tools.logger import VeraLogger # Import VeraLogger
-from db_manager import db_manager # NEW: Import DbManager
 from db_config import TABLE_NAMES # NEW: Import TABLE_NAMES
+from state_store import get_state_store
 
 class EmotionalSystem:
     def __init__(self):
         self.logger = VeraLogger("emotion_system") # Initialize logger for this module
         self.table_name = TABLE_NAMES["emotions"]
         self.doc_id = "current_state"
-        self._ensure_default_state()
+        # État en mémoire (source de vérité), sauvegardé périodiquement en base par state_store
+        self._store = get_state_store(self.table_name, self.doc_id, self._get_default_state)
+        if self._store.created:
+            self.logger.info("Default emotional state created in DB.")
         
     def _get_default_state(self) -> Dict:
         """Returns the default emotional state for Vera."""
@@ -62,25 +65,12 @@ class EmotionalSystem:
         }
 
     def _load_state(self) -> Dict:
-        """Loads the emotional state from the database."""
-        state = db_manager.get_document(self.table_name, self.doc_id)
-        if state is None:
-            state = self._get_default_state()
-            self._save_state(state) # Save default if not found
-            self.logger.info("Default emotional state loaded and saved.")
-        return state
+        """Returns the in-memory emotional state snapshot (read-only, no DB access)."""
+        return self._store.read()
 
     def _save_state(self, state: Dict):
-        """Saves the current emotional state to the database."""
-        db_manager.insert_document(self.table_name, self.doc_id, state)
-
-    def _ensure_default_state(self):
-        """Ensures a default emotional state exists in the database."""
-        state = db_manager.get_document(self.table_name, self.doc_id)
-        if state is None:
-            default_state = self._get_default_state()
-            self._save_state(default_state)
-            self.logger.info("Default emotional state created in DB.")
+        """Replaces the emotional state; the DB is updated at the next checkpoint."""
+        self._store.replace(state)
 
     def update_emotion(self, new_emotion_values: Dict[str, float] = None) -> Dict:
         """
@@ -88,7 +78,18 @@ class EmotionalSystem:
         new_emotion_values: Dictionnaire des émotions nommées avec leur nouvelle intensité (ex: {"joy": 0.5}).
                             Si None, l'émotion tend vers la ligne de base.
         """
-        state = self._load_state()
+        with self._store.update() as state:
+            self._apply_emotion_values(state, new_emotion_values)
+        
+        # Proactively update the global workspace
+        attention_manager.update_focus(
+            "emotional_state", 
+            self.get_emotional_state(), 
+            salience=0.9
+        )
+
+    def _apply_emotion_values(self, state: Dict, new_emotion_values: Optional[Dict[str, float]]):
+        """Applies new values (or decay toward the baseline) to a draft of the state."""
         current = state["current"]
         personality = state["personality"]
         
@@ -128,59 +129,47 @@ class EmotionalSystem:
         
         if len(state["history"]) > 100:
             state["history"] = state["history"][-100:]
-            
-        self._save_state(state) # Use new save method
-        
-        # Proactively update the global workspace
-        attention_manager.update_focus(
-            "emotional_state", 
-            self.get_emotional_state(), 
-            salience=0.9
-        )
 
     def get_emotional_state(self) -> Dict:
-        """Retourne l'état émotionnel actuel de Vera."""
-        state = self._load_state() # Use new load method
-        current = state["current"]
-        return current
+        """Retourne l'état émotionnel actuel de Vera (copie, lue en mémoire)."""
+        return dict(self._load_state()["current"])
 
     def adjust_emotion_from_reflection(self, trigger: Dict): # New method
         """
         Ajuste l'état émotionnel basé sur un unique déclencheur de réflexion.
         Permet une influence directe de l'auto-évaluation sur l'émotion.
         """
-        state = self._load_state() # Use new load method
-        current = state["current"]
-        personality = state["personality"]
-
-        # Appliquer directement le trigger avec inertie
-        inertia = personality["emotional_inertia"]
-        current["pleasure"] = (current["pleasure"] * inertia + 
-                            trigger.get("valence", 0) * (1 - inertia))
-        current["arousal"] = (current["arousal"] * inertia + 
-                             trigger.get("intensity", 0) * (1 - inertia))
-        current["dominance"] = (current["dominance"] * inertia + 
-                               trigger.get("control", 0) * (1 - inertia))
-
-        # Normaliser les valeurs
-        current["pleasure"] = max(-1.0, min(1.0, current["pleasure"]))
-        current["arousal"] = max(0.0, min(1.0, current["arousal"]))
-        current["dominance"] = max(0.0, min(1.0, current["dominance"]))
-
-        current["last_update"] = datetime.now().isoformat()
-
-        state["history"].append({
-            "timestamp": current["last_update"],
-            "pleasure": current["pleasure"],
-            "arousal": current["arousal"],
-            "dominance": current["dominance"],
-            "triggers": [trigger] # Store the single trigger
-        })
-
-        if len(state["history"]) > 100:
-            state["history"] = state["history"][-100:]
+        with self._store.update() as state:
+            current = state["current"]
+            personality = state["personality"]
+
+            # Appliquer directement le trigger avec inertie
+            inertia = personality["emotional_inertia"]
+            current["pleasure"] = (current["pleasure"] * inertia + 
+                                trigger.get("valence", 0) * (1 - inertia))
+            current["arousal"] = (current["arousal"] * inertia + 
+                                 trigger.get("intensity", 0) * (1 - inertia))
+            current["dominance"] = (current["dominance"] * inertia + 
+                                   trigger.get("control", 0) * (1 - inertia))
+
+            # Normaliser les valeurs
+            current["pleasure"] = max(-1.0, min(1.0, current["pleasure"]))
+            current["arousal"] = max(0.0, min(1.0, current["arousal"]))
+            current["dominance"] = max(0.0, min(1.0, current["dominance"]))
+
+            current["last_update"] = datetime.now().isoformat()
+
+            state["history"].append({
+                "timestamp": current["last_update"],
+                "pleasure": current["pleasure"],
+                "arousal": current["arousal"],
+                "dominance": current["dominance"],
+                "triggers": [trigger] # Store the single trigger
+            })
+
+            if len(state["history"]) > 100:
+                state["history"] = state["history"][-100:]
             
-        self._save_state(state) # Use new save method
         
         # Proactively update the global workspace
         attention_manager.update_focus(
@@ -196,41 +185,39 @@ class EmotionalSystem:
         Met à jour l'humeur de Vera en la faisant tendre lentement vers l'état émotionnel actuel.
         L'humeur est une agrégation à plus long terme des émotions.
         """
-        state = self._load_state() # Use new load method
-        current_emotions = state["current"]
-        mood = state["personality"]["mood"] # Access mood from personality
+        with self._store.update() as state:
+            current_emotions = state["current"]
+            mood = state["personality"]["mood"] # Access mood from personality
         
-        # Définir une inertie plus élevée pour l'humeur (changements plus lents)
-        MOOD_INERTIA = 0.98 
-        MOOD_RECOVERY_RATE = 0.02 # Très faible pour simuler la persistance
-
-        for emotion_name in mood.keys():
-            if emotion_name == "last_update":
-                continue
-
-            current_mood_value = mood.get(emotion_name, 0.0)
-            current_emotion_value = current_emotions.get(emotion_name, 0.0)
-            baseline_mood_value = state["personality"]["baseline"].get(emotion_name, 0.0) # Baselines for mood from personality
-
-            # Tendre l'humeur vers l'émotion actuelle, mais très lentement
-            # Et aussi vers la baseline si l'émotion actuelle est faible
-            blended_value = (current_mood_value * MOOD_INERTIA + 
-                             current_emotion_value * (1 - MOOD_INERTIA))
+            # Définir une inertie plus élevée pour l'humeur (changements plus lents)
+            MOOD_INERTIA = 0.98 
+            MOOD_RECOVERY_RATE = 0.02 # Très faible pour simuler la persistance
+
+            for emotion_name in mood.keys():
+                if emotion_name == "last_update":
+                    continue
+
+                current_mood_value = mood.get(emotion_name, 0.0)
+                current_emotion_value = current_emotions.get(emotion_name, 0.0)
+                baseline_mood_value = state["personality"]["baseline"].get(emotion_name, 0.0) # Baselines for mood from personality
+
+                # Tendre l'humeur vers l'émotion actuelle, mais très lentement
+                # Et aussi vers la baseline si l'émotion actuelle est faible
+                blended_value = (current_mood_value * MOOD_INERTIA + 
+                                 current_emotion_value * (1 - MOOD_INERTIA))
             
-            # Appliquer une récupération vers la baseline si l'émotion actuelle est faible
-            if current_emotion_value < 0.1: # Si l'émotion est faible
-                blended_value += (baseline_mood_value - blended_value) * MOOD_RECOVERY_RATE
+                # Appliquer une récupération vers la baseline si l'émotion actuelle est faible
+                if current_emotion_value < 0.1: # Si l'émotion est faible
+                    blended_value += (baseline_mood_value - blended_value) * MOOD_RECOVERY_RATE
 
-            mood[emotion_name] = max(0.0, min(1.0, blended_value))
+                mood[emotion_name] = max(0.0, min(1.0, blended_value))
         
-        mood["last_update"] = datetime.now().isoformat()
-        self._save_state(state) # Use new save method, Save the entire state including updated mood
+            mood["last_update"] = datetime.now().isoformat()
         self.logger.debug(f"Humeur mise à jour: {mood}")
 
     def get_emotion_history(self, limit: int = 10) -> List[Dict]:
         """Retourne l'historique des états émotionnels, limité par défaut à 10."""
-        state = self._load_state() # Use new load method
-        return state["history"][-limit:]
+        return self._load_state()["history"][-limit:]
 
     def appraise_and_update_emotion(self, event_type: str, event_data: Dict[str, Any]):
         """Évalue un événement via l'Appraisal Engine et met à jour l'émotion."""
@@ -259,5 +246,4 @@ def get_emotion_history(limit=10):
 
 def get_mood_state() -> Dict: # NEW
     """Retourne l'état d'humeur actuel de Vera."""
-    state = emotional_system._load_state() # Use new load method
-    return state["personality"]["mood"]
\ No newline at end of file
+    return dict(emotional_system._load_state()["personality"]["mood"])
\ No newline at end of file
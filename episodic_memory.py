@@ -1,33 +1,110 @@
 
 import sqlite3
 import json
+import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
-import os
 from tools.logger import VeraLogger
 from error_handler import log_error
 from contextlib import contextmanager # Import contextmanager
+from snapshot_store import SnapshotStore
+from sqlite_pool import SQLitePool, get_pool
 
 logger = VeraLogger("memory_sqlite")
 
+# Index plein texte (FTS5, contenu externe) et table de tags normalisée, tenus à jour par des triggers.
+# Les tags invalides (JSON corrompu) sont simplement ignorés par l'index.
+_TAGS_JSON = "CASE WHEN json_valid({col}) THEN {col} ELSE '[]' END"
+SEARCH_INDEX_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS episodes_fts USING fts5(
+        description,
+        content='episodes',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS episode_tags (
+        episode_id INTEGER NOT NULL,
+        tag TEXT NOT NULL,
+        PRIMARY KEY (tag, episode_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_episode_tags_episode ON episode_tags (episode_id)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS episodes_ai AFTER INSERT ON episodes BEGIN
+        INSERT INTO episodes_fts (rowid, description) VALUES (new.id, new.description);
+        INSERT OR IGNORE INTO episode_tags (episode_id, tag)
+            SELECT new.id, value FROM json_each({_TAGS_JSON.format(col='new.tags')});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS episodes_ad AFTER DELETE ON episodes BEGIN
+        INSERT INTO episodes_fts (episodes_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        DELETE FROM episode_tags WHERE episode_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS episodes_au_description AFTER UPDATE OF description ON episodes BEGIN
+        INSERT INTO episodes_fts (episodes_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO episodes_fts (rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS episodes_au_tags AFTER UPDATE OF tags ON episodes BEGIN
+        DELETE FROM episode_tags WHERE episode_id = old.id;
+        INSERT OR IGNORE INTO episode_tags (episode_id, tag)
+            SELECT new.id, value FROM json_each({_TAGS_JSON.format(col='new.tags')});
+    END
+    """
+]
+
+
+# Colonnes générées (VIRTUAL : calculées à la lecture, rien n'est stocké en plus) extraites des champs JSON,
+# pour que les requêtes de rêve, de consolidation et de récence deviennent des parcours d'index.
+GENERATED_COLUMNS = {
+    "arousal_magnitude": "REAL GENERATED ALWAYS AS ("
+                         "CASE WHEN json_valid(context) THEN ABS(json_extract(context, '$.emotion.arousal')) END) VIRTUAL",
+    "is_consolidated": "INTEGER GENERATED ALWAYS AS (coalesce(instr(tags, '\"consolidated\"') > 0, 0)) VIRTUAL",
+    "event_type": "TEXT GENERATED ALWAYS AS (CASE WHEN json_valid(tags) THEN json_extract(tags, '$[0]') END) VIRTUAL",
+    "initiator": "TEXT GENERATED ALWAYS AS (CASE WHEN json_valid(context) THEN json_extract(context, '$.initiator') END) VIRTUAL",
+}
+EPISODE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_episodes_timestamp ON episodes (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_episodes_arousal ON episodes (arousal_magnitude) WHERE arousal_magnitude IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_episodes_consolidation ON episodes (is_consolidated, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_episodes_event_type ON episodes (event_type, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_episodes_initiator ON episodes (initiator, timestamp)",
+]
+
+
+def build_fts_query(text: str) -> str:
+    """
+    Transforme une requête libre en expression FTS5 sûre : chaque mot devient un terme
+    préfixe entre guillemets ("chien"* trouve aussi "chiens"), tous requis (AND implicite).
+    Retourne une chaîne vide si la requête ne contient aucun mot.
+    """
+    tokens = re.findall(r"\w+", text or "", flags=re.UNICODE)
+    return " ".join(f'"{token}"*' for token in tokens)
+
 class MemoryManager:
-    def __init__(self, db_path="data/episodic_memory.db"):
+    def __init__(self, db_path="data/episodic_memory.db", store_snapshots_separately: bool = True,
+                 pool: Optional[SQLitePool] = None):
         self.db_path = db_path
+        # Connexions réutilisées par thread (WAL, synchronous=NORMAL) au lieu d'une connexion par requête
+        self._pool = pool or get_pool(db_path)
+        # Si True, les snapshots de conscience sont stockés une seule fois (delta-encodés) dans
+        # la table `snapshots` et les épisodes n'en gardent que l'ID (`snapshot_id`).
+        self.store_snapshots_separately = store_snapshots_separately
         self._initialize_database()
+        self.snapshot_store = SnapshotStore(self._get_connection)
 
     @contextmanager # Decorator to make this a context manager
     def _get_connection(self):
-        """Crée et retourne une connexion à la base de données, gérée par un contexte."""
-        # Crée le répertoire 'data' s'il n'existe pas
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        conn = None # Initialize conn to None
-        try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # Permet d'accéder aux colonnes par nom
-            yield conn # Yield the connection
-        finally:
-            if conn:
-                conn.close() # Ensure connection is closed
+        """Retourne la connexion du thread courant (via le pool partagé), gérée par un contexte."""
+        with self._pool.connection() as conn:
+            yield conn
 
     def _initialize_database(self):
         """Crée la table des épisodes si elle n'existe pas."""
@@ -45,16 +122,81 @@ class MemoryManager:
                     )
                 """)
                 conn.commit()
+            self._generated_columns = self._upgrade_schema()
+            self._fts_enabled = self._initialize_search_index()
             logger.info("Base de données de la mémoire épisodique initialisée.")
         except Exception as e:
             log_error("db_init", f"Erreur lors de l'initialisation de la base de données: {e}")
             raise
 
+    def _upgrade_schema(self) -> bool:
+        """
+        Ajoute les colonnes générées (arousal, consolidation, type, initiateur) et les index de episodes.
+        ALTER TABLE ... ADD COLUMN suffit pour une colonne VIRTUAL : aucune réécriture de la table.
+        Retourne False si SQLite est trop ancien (< 3.31) ; les requêtes utilisent alors json_extract/LIKE.
+        """
+        try:
+            with self._get_connection() as conn:
+                existing = {row["name"] for row in conn.execute("PRAGMA table_xinfo(episodes)")}
+                for name, definition in GENERATED_COLUMNS.items():
+                    if name not in existing:
+                        conn.execute(f"ALTER TABLE episodes ADD COLUMN {name} {definition}")
+                for statement in EPISODE_INDEXES:
+                    conn.execute(statement)
+                conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Colonnes générées indisponibles, requêtes JSON non indexées : {e}")
+            with self._get_connection() as conn:
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_episodes_timestamp ON episodes (timestamp)")
+                conn.commit()
+            return False
+
+    def _initialize_search_index(self) -> bool:
+        """
+        Crée l'index FTS5 des descriptions, la table episode_tags et leurs triggers.
+        Les épisodes existants sont indexés automatiquement lors de la création de l'index.
+        Retourne False si FTS5/JSON1 ne sont pas disponibles (recherche par LIKE en repli).
+        """
+        try:
+            with self._get_connection() as conn:
+                index_existed = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name='episodes_fts'").fetchone() is not None
+                for statement in SEARCH_INDEX_SCHEMA:
+                    conn.execute(statement)
+                conn.commit()
+            if not index_existed:
+                self.backfill_search_index()
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Index FTS5 indisponible, la recherche utilisera LIKE : {e}")
+            return False
+
+    def backfill_search_index(self) -> int:
+        """
+        (Ré)indexe tous les épisodes existants : reconstruit l'index FTS5 et la table episode_tags.
+        Retourne le nombre d'épisodes indexés.
+        """
+        with self._get_connection() as conn:
+            conn.execute("INSERT INTO episodes_fts (episodes_fts) VALUES ('rebuild')")
+            conn.execute("DELETE FROM episode_tags")
+            conn.execute(f"""
+                INSERT OR IGNORE INTO episode_tags (episode_id, tag)
+                SELECT e.id, j.value FROM episodes AS e, json_each({_TAGS_JSON.format(col='e.tags')}) AS j
+            """)
+            conn.commit()
+            count = conn.execute("SELECT COUNT(*) FROM episodes").fetchone()[0]
+        logger.info(f"Index de recherche de la mémoire épisodique reconstruit ({count} épisodes).")
+        return count
+
     def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
         """Convertit une ligne de la base de données en dictionnaire, en désérialisant les champs JSON."""
         if not row:
             return {}
         event = dict(row)
+        # Les colonnes générées sont dérivées de tags/context : inutile de les renvoyer aux appelants
+        for name in GENERATED_COLUMNS:
+            event.pop(name, None)
         if event.get('tags'):
             event['tags'] = json.loads(event['tags'])
         if event.get('context'):
@@ -84,8 +226,20 @@ class MemoryManager:
         if event_type not in tags:
             tags.insert(0, event_type)
         
-        # The rest of event_data is treated as the context
-        context_json = json.dumps(event_data)
+        # The rest of event_data is treated as the context.
+        # The (large) consciousness snapshot is stored once in the snapshot store and referenced by ID.
+        context = event_data
+        snapshot = event_data.get('snapshot')
+        if self.store_snapshots_separately and isinstance(snapshot, dict):
+            try:
+                context = {k: v for k, v in event_data.items() if k != 'snapshot'}
+                context['snapshot_id'] = self.snapshot_store.save(snapshot)
+                # A deduplicated snapshot row keeps its first capture time: the event keeps its own
+                context['snapshot_timestamp'] = snapshot.get('timestamp')
+            except Exception as e:
+                log_error("db_save_snapshot", f"Error storing consciousness snapshot, keeping it inline: {e}")
+                context = event_data
+        context_json = json.dumps(context)
         tags_json = json.dumps(tags)
 
         try:
@@ -113,12 +267,28 @@ class MemoryManager:
             log_error("db_add_structured_event", f"Error adding structured event to DB: {e}")
             return None
 
-    def get_recent(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Retourne les N événements les plus récents."""
+    def get_recent(self, limit: int = 10, event_type: Optional[str] = None,
+                   initiator: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Retourne les N événements les plus récents (parcours de l'index sur timestamp),
+        éventuellement limités à un type d'événement et/ou un initiateur.
+        """
+        filters, params = [], []
+        if event_type is not None:
+            if self._generated_columns:
+                filters.append("event_type = ?")
+                params.append(event_type)
+            else:
+                filters.append("tags LIKE ?")
+                params.append(f'["{event_type}"%')
+        if initiator is not None:
+            filters.append("initiator = ?" if self._generated_columns else "json_extract(context, '$.initiator') = ?")
+            params.append(initiator)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM episodes ORDER BY timestamp DESC LIMIT ?", (limit,))
+                cursor.execute(f"SELECT * FROM episodes {where} ORDER BY timestamp DESC LIMIT ?", params + [limit])
                 rows = cursor.fetchall()
                 return [self._row_to_dict(row) for row in rows]
         except Exception as e:
@@ -139,14 +309,22 @@ class MemoryManager:
                 recent_rows = cursor.fetchall()
 
                 # 2. Récupérer les souvenirs les plus intenses (Arousal élevé)
-                # Utilise json_extract pour lire dans le champ JSON.
-                # ABS() est utilisé car une intensité peut être forte en négatif comme en positif.
-                cursor.execute("""
-                    SELECT * FROM episodes
-                    WHERE json_valid(context) AND json_extract(context, '$.emotion.arousal') IS NOT NULL
-                    ORDER BY ABS(json_extract(context, '$.emotion.arousal')) DESC
-                    LIMIT ?
-                """, (pivotal_limit,))
+                # arousal_magnitude = ABS(arousal) : une intensité peut être forte en négatif comme en positif.
+                # La colonne générée est indexée : on lit directement les N plus fortes valeurs.
+                if self._generated_columns:
+                    cursor.execute("""
+                        SELECT * FROM episodes
+                        WHERE arousal_magnitude IS NOT NULL
+                        ORDER BY arousal_magnitude DESC
+                        LIMIT ?
+                    """, (pivotal_limit,))
+                else:
+                    cursor.execute("""
+                        SELECT * FROM episodes
+                        WHERE json_valid(context) AND json_extract(context, '$.emotion.arousal') IS NOT NULL
+                        ORDER BY ABS(json_extract(context, '$.emotion.arousal')) DESC
+                        LIMIT ?
+                    """, (pivotal_limit,))
                 pivotal_rows = cursor.fetchall()
 
                 # 3. Combiner et dédoublonner les résultats
@@ -168,19 +346,66 @@ class MemoryManager:
             log_error("db_get_pivotal", f"Erreur lors de la récupération des souvenirs pivotaux: {e}")
             return []
 
-    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Recherche simple dans les descriptions."""
+    def search(self, query: str, limit: int = 10, tags: Optional[List[str]] = None,
+               since: Optional[Any] = None, until: Optional[Any] = None,
+               min_importance: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Recherche plein texte dans les descriptions, classée par pertinence (BM25).
+
+        Args:
+            query: Texte libre (chaque mot est cherché comme préfixe).
+            limit: Nombre maximum de résultats.
+            tags: Ne garder que les épisodes portant au moins un de ces tags.
+            since / until: Bornes temporelles (datetime ou chaîne ISO).
+            min_importance: Importance minimale.
+        Returns:
+            Les épisodes trouvés; chacun porte une clé 'relevance' (score BM25, plus petit = meilleur)
+            quand la recherche plein texte est utilisée.
+        """
+        filters, params = [], []
+        if since is not None:
+            filters.append("e.timestamp >= ?")
+            params.append(since.isoformat() if isinstance(since, datetime) else since)
+        if until is not None:
+            filters.append("e.timestamp <= ?")
+            params.append(until.isoformat() if isinstance(until, datetime) else until)
+        if min_importance is not None:
+            filters.append("e.importance >= ?")
+            params.append(min_importance)
+        if tags:
+            if self._fts_enabled:
+                filters.append(f"e.id IN (SELECT episode_id FROM episode_tags WHERE tag IN ({', '.join('?' for _ in tags)}))")
+                params.extend(tags)
+            else:
+                filters.append("(" + " OR ".join("e.tags LIKE ?" for _ in tags) + ")")
+                params.extend(f'%"{tag}"%' for tag in tags)
+
+        fts_query = build_fts_query(query)
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                # La recherche par `LIKE` est simple mais peut être lente sur de très grands datasets.
-                # Pour une meilleure performance, une FTS (Full-Text Search) serait nécessaire.
-                cursor.execute("""
-                    SELECT * FROM episodes 
-                    WHERE description LIKE ? 
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                """, (f'%{query}%', limit))
+                if self._fts_enabled and fts_query:
+                    where = " AND ".join(["episodes_fts MATCH ?"] + filters)
+                    cursor.execute(f"""
+                        SELECT e.*, bm25(episodes_fts) AS relevance
+                        FROM episodes_fts
+                        JOIN episodes AS e ON e.id = episodes_fts.rowid
+                        WHERE {where}
+                        ORDER BY relevance
+                        LIMIT ?
+                    """, [fts_query] + params + [limit])
+                else:
+                    # Repli sans FTS5 (ou requête vide) : simple filtre LIKE, du plus récent au plus ancien
+                    if query and query.strip():
+                        filters.insert(0, "e.description LIKE ?")
+                        params.insert(0, f'%{query}%')
+                    where = " AND ".join(filters) if filters else "1"
+                    cursor.execute(f"""
+                        SELECT e.* FROM episodes AS e
+                        WHERE {where}
+                        ORDER BY e.timestamp DESC
+                        LIMIT ?
+                    """, params + [limit])
                 rows = cursor.fetchall()
                 return [self._row_to_dict(row) for row in rows]
         except Exception as e:
@@ -192,19 +417,53 @@ class MemoryManager:
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                # `LIKE` est utilisé pour trouver le tag dans la chaîne JSON.
-                cursor.execute("""
-                    SELECT * FROM episodes 
-                    WHERE tags LIKE ? 
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                """, (f'%"{tag}"%', limit))
+                if self._fts_enabled:
+                    # Table de tags normalisée et indexée : correspondance exacte du tag
+                    cursor.execute("""
+                        SELECT e.* FROM episode_tags AS t
+                        JOIN episodes AS e ON e.id = t.episode_id
+                        WHERE t.tag = ?
+                        ORDER BY e.timestamp DESC
+                        LIMIT ?
+                    """, (tag, limit))
+                else:
+                    # `LIKE` est utilisé pour trouver le tag dans la chaîne JSON.
+                    cursor.execute("""
+                        SELECT * FROM episodes 
+                        WHERE tags LIKE ? 
+                        ORDER BY timestamp DESC 
+                        LIMIT ?
+                    """, (f'%"{tag}"%', limit))
                 rows = cursor.fetchall()
                 return [self._row_to_dict(row) for row in rows]
         except Exception as e:
             log_error("db_get_by_tag", f"Erreur lors de la récupération par tag: {e}")
             return []
 
+    def get_snapshot(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        """Retourne le snapshot de conscience complet correspondant à un ID (hydratation à la demande)."""
+        try:
+            return self.snapshot_store.get(snapshot_id)
+        except Exception as e:
+            log_error("db_get_snapshot", f"Error hydrating snapshot {snapshot_id}: {e}")
+            return None
+
+    def get_event_snapshot(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Retourne le snapshot de conscience d'un événement, qu'il soit stocké en ligne
+        (anciens événements) ou référencé par `snapshot_id`. Retourne {} s'il n'y en a pas.
+        """
+        context = event.get('context') or {}
+        if isinstance(context.get('snapshot'), dict):
+            return context['snapshot']
+        snapshot_id = context.get('snapshot_id')
+        if snapshot_id is None:
+            return {}
+        snapshot = self.get_snapshot(snapshot_id) or {}
+        if snapshot and context.get('snapshot_timestamp'):
+            snapshot['timestamp'] = context['snapshot_timestamp']
+        return snapshot
+
     def get_event_by_id(self, event_id: int) -> Optional[Dict[str, Any]]:
         """Retrieves a single event from the database by its ID."""
         try:
@@ -247,12 +506,21 @@ class MemoryManager:
                 cursor = conn.cursor()
                 # Calcule la date seuil
                 threshold_date = (datetime.now() - timedelta(days=age_threshold_days)).isoformat()
-                cursor.execute("""
-                    SELECT * FROM episodes
-                    WHERE timestamp < ? AND (tags IS NULL OR tags NOT LIKE '%"consolidated"%')
-                    ORDER BY timestamp ASC
-                    LIMIT ?
-                """, (threshold_date, limit))
+                if self._generated_columns:
+                    # Parcours de l'index (is_consolidated, timestamp)
+                    cursor.execute("""
+                        SELECT * FROM episodes
+                        WHERE is_consolidated = 0 AND timestamp < ?
+                        ORDER BY timestamp ASC
+                        LIMIT ?
+                    """, (threshold_date, limit))
+                else:
+                    cursor.execute("""
+                        SELECT * FROM episodes
+                        WHERE timestamp < ? AND (tags IS NULL OR tags NOT LIKE '%"consolidated"%')
+                        ORDER BY timestamp ASC
+                        LIMIT ?
+                    """, (threshold_date, limit))
                 rows = cursor.fetchall()
                 return [self._row_to_dict(row) for row in rows]
         except Exception as e:
@@ -1,29 +1,196 @@
 """
 event_bus.py
-Ce module définit le bus d'événements central de Vera, basé sur une simple
-file d'attente (queue), ainsi que les différentes classes d'événements
-qui peuvent y transiter.
+Ce module définit le bus d'événements central de Vera ainsi que les différentes
+classes d'événements qui peuvent y transiter.
+
+Le bus est une file à priorités (voies) compatible avec l'API de queue.Queue :
+- voie "user" (entrées et activité de l'utilisateur), servie en premier ;
+- voie "response" (paroles et réponses de Vera, résultats du slow path) ;
+- voie "background" (moniteur système, pulsions internes, heartbeats), bornée :
+  quand elle est pleine, ses événements les plus anciens sont abandonnés.
+Les événements idempotents (heartbeat, franchissements répétés d'un même seuil) sont
+fusionnés tant qu'ils attendent encore dans la file : seul le plus récent est traité.
+La latence (mise en file -> task_done) est mesurée par type d'événement.
 """
 
+import bisect
 import queue
-from typing import Any, Dict, Optional
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+LANE_USER = 0
+LANE_RESPONSE = 1
+LANE_BACKGROUND = 2
+LANE_NAMES = {LANE_USER: "user", LANE_RESPONSE: "response", LANE_BACKGROUND: "background"}
+
+# Bornes des histogrammes de latence, en millisecondes (la dernière case compte le reste)
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+
+class PriorityEventBus:
+    """
+    Thread-safe event queue with priority lanes, coalescing and per-type latency histograms.
+    Drop-in replacement for queue.Queue (put/get/task_done/join/qsize/empty).
+    """
+
+    # Taille maximale par voie (None = non bornée). Les voies bornées abandonnent leurs plus anciens événements.
+    DEFAULT_LANE_LIMITS = {LANE_USER: None, LANE_RESPONSE: None, LANE_BACKGROUND: 200}
+
+    def __init__(self, lane_limits: Optional[Dict[int, Optional[int]]] = None):
+        self._lane_limits = {**self.DEFAULT_LANE_LIMITS, **(lane_limits or {})}
+        self._lanes: Dict[int, deque] = {lane: deque() for lane in LANE_NAMES}
+        self._pending: Dict[Any, list] = {}  # Coalescing key -> queued entry
+        self._cond = threading.Condition()
+        self._all_done = threading.Condition(self._cond)
+        self._unfinished = 0
+        self._in_progress = threading.local()  # Entry last taken by get() on each thread, awaiting task_done()
+        self._stats = {"put": 0, "coalesced": 0, "dropped": 0}
+        self._latency: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _lane_of(event) -> int:
+        lane = getattr(event, "lane", LANE_BACKGROUND)
+        return lane if lane in LANE_NAMES else LANE_BACKGROUND
+
+    def put(self, event, block: bool = True, timeout: Optional[float] = None):
+        """Enqueues an event (never blocks: bounded lanes drop their oldest events instead)."""
+        key_fn = getattr(event, "coalesce_key", None)
+        key = key_fn() if callable(key_fn) else None
+        with self._cond:
+            self._stats["put"] += 1
+            if key is not None and key in self._pending:
+                self._pending[key][0] = event  # Newest data wins; the entry keeps its place and enqueue time
+                self._stats["coalesced"] += 1
+                return
+            lane = self._lane_of(event)
+            entries = self._lanes[lane]
+            limit = self._lane_limits.get(lane)
+            if limit is not None and len(entries) >= limit:
+                dropped = entries.popleft()
+                if dropped[2] is not None:
+                    self._pending.pop(dropped[2], None)
+                self._unfinished -= 1
+                self._stats["dropped"] += 1
+            entry = [event, time.monotonic(), key]
+            entries.append(entry)
+            if key is not None:
+                self._pending[key] = entry
+            self._unfinished += 1
+            self._cond.notify()
+
+    def put_nowait(self, event):
+        self.put(event, block=False)
+
+    def _pop(self) -> Optional[list]:
+        for lane in sorted(self._lanes):
+            if self._lanes[lane]:
+                entry = self._lanes[lane].popleft()
+                if entry[2] is not None:
+                    self._pending.pop(entry[2], None)
+                return entry
+        return None
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        """Returns the oldest event of the most urgent non-empty lane. Raises queue.Empty like queue.Queue."""
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            entry = self._pop()
+            while entry is None:
+                if not block:
+                    raise queue.Empty
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self._cond.wait(remaining)
+                entry = self._pop()
+        self._in_progress.entry = entry
+        return entry[0]
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def task_done(self):
+        """Marks the event last taken by this thread as handled and records its latency."""
+        entry = getattr(self._in_progress, "entry", None)
+        self._in_progress.entry = None
+        with self._cond:
+            if self._unfinished <= 0:
+                raise ValueError("task_done() called too many times")
+            self._unfinished -= 1
+            if entry is not None:
+                self._record_latency(type(entry[0]).__name__, (time.monotonic() - entry[1]) * 1000)
+            if self._unfinished == 0:
+                self._all_done.notify_all()
+
+    def _record_latency(self, event_type: str, latency_ms: float):
+        stats = self._latency.get(event_type)
+        if stats is None:
+            stats = self._latency[event_type] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                 "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+        stats["count"] += 1
+        stats["total_ms"] += latency_ms
+        stats["max_ms"] = max(stats["max_ms"], latency_ms)
+        stats["buckets"][bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
 
-# Le bus d'événements central. C'est une simple file d'attente thread-safe.
-# Tous les modules peuvent y poster des événements.
+    def join(self):
+        with self._all_done:
+            while self._unfinished:
+                self._all_done.wait()
+
+    def qsize(self) -> int:
+        with self._cond:
+            return sum(len(entries) for entries in self._lanes.values())
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth per lane, put/coalesced/dropped counters and latency histograms per event type."""
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        with self._cond:
+            latency = {
+                event_type: {"count": s["count"], "avg_ms": s["total_ms"] / s["count"], "max_ms": s["max_ms"],
+                             "histogram": dict(zip(labels, s["buckets"]))}
+                for event_type, s in self._latency.items()
+            }
+            return {
+                "queue_depth": {LANE_NAMES[lane]: len(entries) for lane, entries in self._lanes.items()},
+                **self._stats,
+                "latency": latency,
+            }
+
+
+# Le bus d'événements central. Tous les modules peuvent y poster des événements.
 # L'orchestrateur de conscience est le principal consommateur.
-VeraEventBus = queue.Queue()
+VeraEventBus = PriorityEventBus()
 
 # --- Définitions des Classes d'Événements ---
 # Utiliser des classes permet d'avoir un code plus propre et plus lisible
 # que de passer des dictionnaires avec des chaînes de caractères.
 
 class BaseEvent:
-    """Classe de base pour tous les événements."""
+    """
+    Classe de base pour tous les événements.
+    `lane` : voie de priorité du bus. coalesce_key() : clé de fusion des événements idempotents
+    (None = jamais fusionné).
+    """
+    lane = LANE_BACKGROUND
+
+    def coalesce_key(self):
+        return None
+
     def __repr__(self):
         return f"{self.__class__.__name__}"
 
 class UserInputEvent(BaseEvent):
     """Événement déclenché par une nouvelle entrée de l'utilisateur."""
+    lane = LANE_USER
+
     def __init__(self, text: str, image_path: Optional[str] = None):
         self.text = text
         self.image_path = image_path
@@ -33,6 +200,8 @@ class UserInputEvent(BaseEvent):
 
 class UserActivityEvent(BaseEvent):
     """Événement lié à l'activité de l'utilisateur (AFK/retour)."""
+    lane = LANE_USER
+
     def __init__(self, status: str): # status: "afk" or "returned"
         self.status = status
 
@@ -48,6 +217,9 @@ class SystemMonitorEvent(BaseEvent):
         self.value = value
         self.threshold = threshold
 
+    def coalesce_key(self):
+        return ("system_monitor", self.metric)  # Only the latest reading of a metric matters
+
     def __repr__(self):
         return f"SystemMonitorEvent(metric='{self.metric}', value={self.value})"
 
@@ -68,6 +240,8 @@ class LLMTaskCompletedEvent(BaseEvent):
     Événement déclenché lorsqu'une tâche du "slow path" (LLM) est terminée
     et que le résultat doit être traité par l'orchestrateur.
     """
+    lane = LANE_RESPONSE
+
     def __init__(self, original_task_type: str, result: Dict):
         self.original_task_type = original_task_type
         self.result = result
@@ -78,9 +252,14 @@ class LLMTaskCompletedEvent(BaseEvent):
 class VeraSpeakEvent(BaseEvent):
     """
     Événement pour faire parler Vera (envoyer un message à l'UI).
+    `stream_id` : identifiant du message partiel déjà affiché en streaming, que l'UI
+    complète avec le texte final au lieu d'ajouter un nouveau message.
     """
-    def __init__(self, message: str):
+    lane = LANE_RESPONSE
+
+    def __init__(self, message: str, stream_id: Optional[str] = None):
         self.message = message
+        self.stream_id = stream_id
 
     def __repr__(self):
         return f"VeraSpeakEvent(message='{self.message[:30]}...')"
@@ -90,6 +269,8 @@ class VeraResponseGeneratedEvent(BaseEvent):
     Événement déclenché lorsque Vera a généré une réponse complète et qu'elle est prête à être parlée.
     Contient la réponse finale de Vera et l'input utilisateur qui l'a déclenchée.
     """
+    lane = LANE_RESPONSE
+
     def __init__(self, response_text: str, user_input: str, image_path: Optional[str] = None):
         self.response_text = response_text
         self.user_input = user_input
@@ -100,4 +281,6 @@ class VeraResponseGeneratedEvent(BaseEvent):
 
 class HeartbeatEvent(BaseEvent):
     """Événement périodique pour s'assurer que la boucle de l'orchestrateur ne reste jamais bloquée."""
-    pass
+
+    def coalesce_key(self):
+        return "heartbeat"  # One pending heartbeat is enough to wake the loop
@@ -1,9 +1,10 @@
 # external_knowledge_base.py
 import os
-import json
-import sqlite3
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
 from tools.logger import VeraLogger
+from sqlite_pool import get_pool
+from knowledge_retrieval import HybridRetriever, make_vector_index
+from knowledge_ingest import KnowledgeIngestor
 
 # --- Configuration ---
 KNOWLEDGE_MAP_DB_PATH = "data/knowledge_map.db"
@@ -17,6 +18,10 @@ class ExternalKnowledgeBase:
     """
     def __init__(self, db_path):
         self.db_path = db_path
+        self._pool = get_pool(db_path) # Connexions réutilisées par thread (WAL, synchronous=NORMAL)
+        # Recherche par mots (BM25, paliers NEAR / AND / OR), fusionnée avec l'index vectoriel s'il est activé
+        self._retriever = HybridRetriever(self._pool, "knowledge", "knowledge_fts", make_vector_index(db_path))
+        self._ingestor = KnowledgeIngestor(self._pool, "knowledge", "knowledge_fts")
         self._setup_database()
 
     def _setup_database(self):
@@ -28,76 +33,46 @@ class ExternalKnowledgeBase:
             return
 
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            # Vérifier si la table FTS existe déjà
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='knowledge_fts';")
-            if cursor.fetchone() is None:
-                logger.info("Création de la table FTS 'knowledge_fts'...")
-                # Créer la table FTS en se basant sur la table 'knowledge'
-                cursor.execute("""
-                    CREATE VIRTUAL TABLE knowledge_fts USING fts5(
-                        text,
-                        source,
-                        content='knowledge',
-                        content_rowid='id'
-                    );
-                """)
-                # Remplir la table FTS
-                cursor.execute("INSERT INTO knowledge_fts(rowid, text, source) SELECT id, text, source FROM knowledge;")
-                conn.commit()
-                logger.info("Table FTS 'knowledge_fts' créée et remplie.")
-            else:
-                logger.info("La table FTS 'knowledge_fts' existe déjà.")
-            conn.close()
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                # Vérifier si la table FTS existe déjà
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='knowledge_fts';")
+                if cursor.fetchone() is None:
+                    logger.info("Création de la table FTS 'knowledge_fts'...")
+                    # Créer la table FTS en se basant sur la table 'knowledge'
+                    cursor.execute("""
+                        CREATE VIRTUAL TABLE knowledge_fts USING fts5(
+                            text,
+                            source,
+                            content='knowledge',
+                            content_rowid='id'
+                        );
+                    """)
+                    # Remplir la table FTS
+                    cursor.execute("INSERT INTO knowledge_fts(rowid, text, source) SELECT id, text, source FROM knowledge;")
+                    conn.commit()
+                    logger.info("Table FTS 'knowledge_fts' créée et remplie.")
+                else:
+                    logger.info("La table FTS 'knowledge_fts' existe déjà.")
         except Exception as e:
             logger.error(f"Erreur lors de la configuration de la base de données FTS: {e}", exc_info=True)
 
-    def search(self, query_text: str, k: int = 5) -> List[Dict]:
+    def search(self, query_text: str, k: int = 5, require_all_terms: bool = False) -> List[Dict]:
         """
-        Recherche les k faits les plus pertinents pour une requête donnée en utilisant FTS5.
+        Recherche les k faits les plus pertinents pour une requête donnée (voir knowledge_retrieval).
+        Avec require_all_terms, seuls les faits contenant tous les mots de la requête sont retenus.
         """
         if not os.path.exists(self.db_path):
             logger.error(f"Recherche annulée: la base de données '{self.db_path}' est manquante.")
             return []
 
-        logger.info(f"Recherche FTS de {k} faits pertinents dans la base externe pour: '{query_text}'")
+        logger.info(f"Recherche de {k} faits pertinents dans la base externe pour: '{query_text}'")
         
-        results = []
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Échapper les apostrophes simples pour éviter les erreurs de syntaxe FTS5
-            escaped_query_text = query_text.replace("'", "''")
-            
-            # Utiliser une requête FTS5. L'ordre est géré par le rang de pertinence de FTS5.
-            query = """
-                SELECT k.text, k.source, k.metadata, fts.rank
-                FROM knowledge_fts AS fts
-                JOIN knowledge AS k ON k.id = fts.rowid
-                WHERE fts.text MATCH ?
-                ORDER BY fts.rank
-                LIMIT ?;
-            """
-            
-            cursor.execute(query, (f'"{escaped_query_text}"', k))
-            rows = cursor.fetchall()
-            conn.close()
-
-            for row in rows:
-                metadata = json.loads(row[2])
-                result = {
-                    "text": row[0],
-                    "source": row[1],
-                    "metadata": metadata,
-                    "relevance": row[3]  # Utiliser le rang FTS comme score de pertinence
-                }
-                results.append(result)
-            
-            logger.info(f"Trouvé {len(results)} résultats dans la base externe via FTS.")
+            results = self._retriever.search(query_text, k=k, require_all_terms=require_all_terms)
+            logger.info(f"Trouvé {len(results)} résultats dans la base externe.")
         except Exception as e:
-            logger.error(f"Erreur lors de la recherche FTS dans SQLite: {e}", exc_info=True)
+            logger.error(f"Erreur lors de la recherche dans SQLite: {e}", exc_info=True)
             return []
 
         return results
@@ -113,36 +88,29 @@ class ExternalKnowledgeBase:
         logger.info(f"Ajout d'une nouvelle connaissance à la base de données. Source: {source}")
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Sérialiser les métadonnées en JSON
-            metadata_str = json.dumps(metadata) if metadata else "{}"
-            
-            # Insérer dans la table principale 'knowledge'
-            cursor.execute(
-                "INSERT INTO knowledge (text, source, metadata) VALUES (?, ?, ?)",
-                (text, source, metadata_str)
-            )
-            
-            # Récupérer l'ID de la nouvelle entrée
-            new_id = cursor.lastrowid
-            
-            # Insérer dans la table de recherche FTS
-            cursor.execute(
-                "INSERT INTO knowledge_fts (rowid, text, source) VALUES (?, ?, ?)",
-                (new_id, text, source)
-            )
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"Nouvelle connaissance ajoutée avec succès (ID: {new_id}).")
-            return True
+            stats = self._ingestor.ingest([{"text": text, "source": source, "metadata": metadata}], defer_fts=False)
+            if stats["duplicates"]:
+                logger.info("Connaissance déjà présente, non dupliquée.")
+            return stats["inserted"] + stats["duplicates"] == 1
         except Exception as e:
             logger.error(f"Erreur lors de l'ajout d'une connaissance à SQLite: {e}", exc_info=True)
             return False
 
+    def add_entries(self, entries: Iterable[Dict], defer_fts: bool = True) -> Optional[Dict]:
+        """
+        Ajoute des connaissances en masse (dicts text/source/metadata, lus en flux), par lots transactionnels,
+        sans doublons (voir knowledge_ingest). Retourne les compteurs de l'ingestion, ou None en cas d'erreur.
+        """
+        if not os.path.exists(self.db_path):
+            logger.error(f"Ajout annulé: la base de données '{self.db_path}' est manquante.")
+            return None
+
+        try:
+            return self._ingestor.ingest(entries, defer_fts=defer_fts)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'ajout en masse de connaissances: {e}", exc_info=True)
+            return None
+
 # --- Instance Globale ---
 external_knowledge_base = ExternalKnowledgeBase(KNOWLEDGE_MAP_DB_PATH)
 
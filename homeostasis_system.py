@@ -7,17 +7,20 @@ la valeur sort d'une plage optimale. Cette tension est utilisée par le meta_eng
 pour motiver des actions proactives visant à "remplir" le besoin et à retrouver l'équilibre.
 """
 
+import copy
 from datetime import datetime, timedelta
 from typing import Dict, List
 from tools.logger import VeraLogger
-from db_manager import db_manager # Import DbManager
 from db_config import TABLE_NAMES # Import TABLE_NAMES
+from state_store import get_state_store
 
 class HomeostasisSystem:
     def __init__(self):
         self.logger = VeraLogger("homeostasis_system")
         self.table_name = TABLE_NAMES["homeostasis"]
         self.doc_id = "current_state"
+        # État en mémoire (source de vérité), sauvegardé périodiquement en base par state_store
+        self._store = get_state_store(self.table_name, self.doc_id, self._get_default_state)
         self._ensure_default_state()
 
     def _get_default_state(self) -> Dict:
@@ -49,27 +52,21 @@ class HomeostasisSystem:
         }
 
     def _load_state(self) -> Dict:
-        """Loads the current state from the database."""
-        state = db_manager.get_document(self.table_name, self.doc_id)
-        if state is None:
-            state = self._get_default_state()
-            self._save_state(state) # Save default if not found
-            self.logger.info("Default homeostasis state loaded and saved.")
-        return state
+        """Returns the in-memory state snapshot (read-only, no DB access)."""
+        return self._store.read()
 
     def _save_state(self, state: Dict):
-        """Saves the current state to the database."""
-        db_manager.insert_document(self.table_name, self.doc_id, state)
+        """Replaces the current state; the DB is updated at the next checkpoint."""
+        self._store.replace(state)
 
     def _ensure_default_state(self):
         """Ensures a default state exists in the database and applies desired updates."""
-        state = db_manager.get_document(self.table_name, self.doc_id)
         default_state = self._get_default_state() # Get the latest default configuration
         
-        if state is None:
-            self._save_state(default_state)
+        if self._store.created:
             self.logger.info("Default homeostasis state created in DB.")
         else:
+            state = copy.deepcopy(self._load_state())
             # Check and update specific values that might have old configurations
             needs_changed = False
             
@@ -96,19 +93,18 @@ class HomeostasisSystem:
 
             if needs_changed:
                 self._save_state(state)
+                self._store.checkpoint()
                 self.logger.info("Homeostasis state updated in DB with latest configurations.")
 
     def update(self):
         """Met à jour l'état de tous les besoins, en appliquant la dégradation."""
-        state = self._load_state()
         now = datetime.now()
-        
-        for need_name, need_data in state["needs"].items():
-            decay = need_data["decay_rate"]
-            need_data["value"] = max(0.0, need_data["value"] - decay)
+        with self._store.update() as state:
+            for need_name, need_data in state["needs"].items():
+                decay = need_data["decay_rate"]
+                need_data["value"] = max(0.0, need_data["value"] - decay)
 
-        state["last_update"] = now.isoformat()
-        self._save_state(state)
+            state["last_update"] = now.isoformat()
         self.logger.debug(f"Besoins mis à jour après dégradation: {state['needs']}")
     
     def fulfill_need(self, need_name: str, amount: float):
@@ -116,18 +112,17 @@ class HomeostasisSystem:
         if amount <= 0:
             return
             
-        state = self._load_state()
-        if need_name in state["needs"]:
-            need = state["needs"][need_name]
-            need["value"] = min(1.0, need["value"] + amount)
-            self._save_state(state)
+        if need_name in self._load_state()["needs"]:
+            with self._store.update() as state:
+                need = state["needs"][need_name]
+                need["value"] = min(1.0, need["value"] + amount)
             self.logger.info(f"Besoin '{need_name}' rempli de {amount}. Nouvelle valeur: {need['value']:.2f}")
         else:
             self.logger.warning(f"Tentative de remplir un besoin inconnu: '{need_name}'")
 
     def get_needs(self) -> Dict:
-        """Retourne l'état actuel de tous les besoins."""
-        return self._load_state().get("needs", {})
+        """Retourne l'état actuel de tous les besoins (copie)."""
+        return copy.deepcopy(self._load_state().get("needs", {}))
 
     def get_tensions(self) -> Dict[str, float]:
         """
@@ -136,7 +131,7 @@ class HomeostasisSystem:
         est en dehors de sa plage optimale.
         """
         tensions = {}
-        needs = self.get_needs()
+        needs = self._load_state().get("needs", {}) # Read-only snapshot, no copy needed
         for name, data in needs.items():
             value = data["value"]
             low_bound, high_bound = data["optimal_range"]
@@ -0,0 +1,225 @@
+"""
+http_client.py
+Client HTTP sortant partagé par les outils de Vera (Wikipedia, actualités, météo, WebSearcher).
+
+- Une seule requests.Session (http_session.build_session) : pools keep-alive par hôte,
+  nouvelles tentatives sur erreurs transitoires, User-Agent commun.
+- Cache des réponses GET en mémoire qui respecte Cache-Control (max-age, no-store, no-cache)
+  et revalide avec ETag / Last-Modified (If-None-Match / If-Modified-Since -> 304).
+  L'appelant peut imposer une durée (cache_ttl), ex: la météo d'une ville pendant N minutes.
+- Instantané de data/config.json chargé une fois, rechargé seulement quand le fichier change
+  (ConfigSnapshot / app_config), pour ne plus relire le fichier à chaque appel d'outil.
+- Métriques par hôte : requêtes, erreurs, hits du cache, revalidations, latence.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from http_session import build_session
+from tools.logger import VeraLogger
+
+logger = VeraLogger("http_client")
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_USER_AGENT = "Vera/1.0 (assistant personnel local)"
+_MAX_AGE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class ConfigSnapshot:
+    """JSON config loaded once, reloaded when the file's mtime changes (checked at most every check_interval s)."""
+
+    def __init__(self, path: str = os.path.join("data", "config.json"), check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self.reloads = 0
+        self._reload_if_changed(force=True)
+
+    def _reload_if_changed(self, force: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = None
+            if not force and mtime == self._mtime:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except FileNotFoundError:
+                self._data = {}
+            except Exception as e:
+                logger.error(f"Configuration '{self.path}' illisible, ancienne version conservée: {e}")
+                return
+            self._mtime = mtime
+            self.reloads += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._reload_if_changed()
+        return self._data.get(key, default)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current config. Shared: do not modify."""
+        self._reload_if_changed()
+        return self._data
+
+
+class _CacheEntry:
+    __slots__ = ("status_code", "headers", "content", "url", "encoding", "expires_at", "etag", "last_modified")
+
+    def __init__(self, response: requests.Response, expires_at: float):
+        self.status_code = response.status_code
+        self.headers = CaseInsensitiveDict(response.headers)
+        self.content = response.content
+        self.url = response.url
+        self.encoding = response.encoding
+        self.expires_at = expires_at
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+    def to_response(self) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response.url = self.url
+        response.encoding = self.encoding
+        return response
+
+
+def _freshness_seconds(response: requests.Response, cache_ttl: Optional[float]) -> Optional[float]:
+    """Seconds the response may be reused without revalidation; None if it must not be stored."""
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    if cache_ttl is not None:
+        return cache_ttl
+    if "no-cache" in cache_control:
+        return 0.0
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return float(match.group(1))
+    expires = response.headers.get("Expires")
+    if expires:
+        try:
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0  # Stored for revalidation only (useful when the server sends an ETag / Last-Modified)
+
+
+class HTTPClient:
+    """Shared outbound HTTP client: keep-alive session, HTTP-aware response cache and per-host metrics."""
+
+    MAX_CACHE_ENTRIES = 256
+    MAX_CACHED_BODY_BYTES = 2 * 1024 * 1024
+
+    def __init__(self, session: Optional[requests.Session] = None, user_agent: str = DEFAULT_USER_AGENT):
+        self.session = session or build_session(pool_connections=16, pool_maxsize=8,
+                                                headers={"User-Agent": user_agent})
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _cache_key(url: str, params: Optional[Dict[str, Any]]) -> str:
+        return f"{url}?{urlencode(sorted(params.items()), doseq=True)}" if params else url
+
+    def _host_metrics(self, url: str) -> Dict[str, float]:
+        """Called with the lock held."""
+        host = urlsplit(url).netloc or url
+        return self._metrics.setdefault(host, {"requests": 0, "errors": 0, "cache_hits": 0, "revalidated": 0,
+                                               "total_ms": 0.0})
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+            timeout: float = DEFAULT_TIMEOUT, cache_ttl: Optional[float] = None, use_cache: bool = True) -> requests.Response:
+        """
+        GET through the shared session. Fresh cached responses are returned without a request;
+        stale ones with a validator are revalidated (a 304 refreshes the cached copy).
+
+        Args:
+            cache_ttl: Seconds to reuse the response, overriding the server's Cache-Control (except no-store).
+            use_cache: False bypasses the cache entirely.
+        """
+        key = self._cache_key(url, params)
+        request_headers = dict(headers or {})
+        entry = None
+        if use_cache:
+            with self._lock:
+                entry = self._cache.get(key)
+                if entry is not None:
+                    self._cache.move_to_end(key)
+                    if entry.expires_at > time.time():
+                        self._host_metrics(url)["cache_hits"] += 1
+                        return entry.to_response()
+            if entry is not None:
+                if entry.etag:
+                    request_headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    request_headers["If-Modified-Since"] = entry.last_modified
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, headers=request_headers, timeout=timeout)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                metrics = self._host_metrics(url)
+                metrics["requests"] += 1
+                metrics["errors"] += 1
+            raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            metrics = self._host_metrics(url)
+            metrics["requests"] += 1
+            metrics["total_ms"] += elapsed_ms
+            if response.status_code >= 400:
+                metrics["errors"] += 1
+            if response.status_code == 304 and entry is not None:
+                metrics["revalidated"] += 1
+                freshness = _freshness_seconds(response, cache_ttl)
+                entry.expires_at = time.time() + (freshness or 0.0)
+                entry.etag = response.headers.get("ETag", entry.etag)
+                return entry.to_response()
+            if use_cache and response.status_code == 200 and len(response.content) <= self.MAX_CACHED_BODY_BYTES:
+                freshness = _freshness_seconds(response, cache_ttl)
+                if freshness is not None and (freshness > 0 or response.headers.get("ETag")
+                                              or response.headers.get("Last-Modified")):
+                    self._cache[key] = _CacheEntry(response, time.time() + freshness)
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.MAX_CACHE_ENTRIES:
+                        self._cache.popitem(last=False)
+                else:
+                    self._cache.pop(key, None)
+        return response
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            hosts = {host: dict(m, avg_ms=m["total_ms"] / m["requests"] if m["requests"] else 0.0)
+                     for host, m in self._metrics.items()}
+            return {"hosts": hosts, "cache_entries": len(self._cache)}
+
+
+app_config = ConfigSnapshot()
+http_client = HTTPClient()
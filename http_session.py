@@ -0,0 +1,63 @@
+"""
+http_session.py
+Sessions HTTP partagées (requests.Session) de Vera.
+
+Une session réutilise ses connexions TCP (keep-alive) au lieu d'en ouvrir une par requête,
+avec un pool de taille configurable et des nouvelles tentatives avec backoff exponentiel
+pour les erreurs transitoires (connexion refusée/coupée, 502/503/504).
+"""
+
+from typing import Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_CONNECTIONS = 4   # Number of distinct hosts kept in the pool
+DEFAULT_POOL_MAXSIZE = 8       # Connections kept per host
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.5   # Waits 0.5s, 1s, 2s... between attempts
+DEFAULT_RETRY_STATUSES = (502, 503, 504)
+
+
+def build_retry(retries: int = DEFAULT_RETRIES, backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                status_forcelist: Iterable[int] = DEFAULT_RETRY_STATUSES,
+                allowed_methods: Optional[Iterable[str]] = None, retry_read: bool = False) -> Retry:
+    """
+    Retry policy for transient failures.
+    Read errors (the server stopped answering mid-response) are not retried unless `retry_read`,
+    since the request may already have been processed (e.g. a long LLM generation).
+    """
+    return Retry(
+        total=retries,
+        connect=retries,
+        read=retries if retry_read else 0,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=tuple(status_forcelist),
+        allowed_methods=frozenset(m.upper() for m in allowed_methods) if allowed_methods else Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,  # The last response is returned as-is; callers use raise_for_status()
+    )
+
+
+def build_session(pool_connections: int = DEFAULT_POOL_CONNECTIONS, pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                  retries: int = DEFAULT_RETRIES, backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                  status_forcelist: Iterable[int] = DEFAULT_RETRY_STATUSES,
+                  allowed_methods: Optional[Iterable[str]] = None, retry_read: bool = False,
+                  headers: Optional[dict] = None) -> requests.Session:
+    """
+    Creates a requests.Session with a keep-alive connection pool and a retry policy,
+    mounted for both http:// and https://. A Session is safe to share between threads
+    for plain request/response use.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=build_retry(retries, backoff_factor, status_forcelist, allowed_methods, retry_read),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
@@ -0,0 +1,183 @@
+"""
+inference_cache.py
+Cache disque des réponses LLM pour les prompts d'inférence déterministes
+(classifications oui/non, extraction de sujets, approbation/rejet...).
+
+Chaque réponse est indexée par le hash de (modèle, system prompt, contenu utilisateur,
+max_tokens, température) : un jugement déjà rendu n'est plus redemandé au serveur LLM.
+Les entrées expirent après un TTL et le cache est borné en nombre d'entrées
+(éviction des moins récemment utilisées). Une lecture n'écrit rien : la date de dernier accès
+est notée en mémoire et écrite par lot avec l'insertion suivante ; le nombre d'entrées est
+tenu en mémoire (recompté seulement quand une éviction semble nécessaire). Les appels ne sont mis en cache que sur
+demande explicite du site d'appel (send_inference_prompt(..., cache=True)).
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from sqlite_pool import SQLitePool, get_pool
+from tools.logger import VeraLogger
+
+logger = VeraLogger("inference_cache")
+
+
+def make_cache_key(model: str, system_prompt: str, user_content: Any, max_tokens: int, temperature: float) -> str:
+    """Stable hash of everything that determines the completion of a low-temperature prompt."""
+    material = json.dumps([model, system_prompt, user_content, max_tokens, temperature],
+                          sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class InferenceCache:
+    """Size-bounded LRU/TTL cache of LLM responses stored in a SQLite file."""
+
+    DEFAULT_MAX_ENTRIES = 5000
+    DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+    EVICTION_SLACK = 0.1  # Evict 10% below the limit at once so eviction does not run on every insert
+
+    def __init__(self, db_path: str = "data/inference_cache.db", max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, pool: Optional[SQLitePool] = None):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._pool = pool or get_pool(db_path)
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "stores": 0})  # Per call site
+        self._evictions = 0
+        self._expired = 0
+        self._pending_touches: Dict[str, float] = {}  # Last-access updates written with the next put
+        self._entry_count = 0
+        self._initialize_database()
+
+    def _initialize_database(self):
+        with self._pool.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS inference_cache (
+                    key TEXT PRIMARY KEY,
+                    call_site TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_inference_cache_last_access ON inference_cache (last_access)")
+            conn.commit()
+            self._entry_count = conn.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+
+    def get(self, key: str, call_site: str = "inference") -> Optional[Dict[str, Any]]:
+        """Returns the cached response for `key`, or None (missing or expired)."""
+        now = time.time()
+        try:
+            with self._pool.connection() as conn:
+                row = conn.execute("SELECT response, created_at FROM inference_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row["created_at"] > self.ttl_seconds:
+                    removed = conn.execute("DELETE FROM inference_cache WHERE key = ?", (key,)).rowcount
+                    conn.commit()
+                    with self._lock:
+                        self._expired += removed
+                        self._entry_count -= removed
+                        self._pending_touches.pop(key, None)
+                    row = None
+        except Exception as e:
+            logger.warning(f"Lecture du cache d'inférence impossible: {e}")
+            row = None
+
+        with self._lock:
+            self._stats[call_site]["hits" if row is not None else "misses"] += 1
+            if row is not None:
+                self._pending_touches[key] = now
+        return json.loads(row["response"]) if row is not None else None
+
+    def put(self, key: str, response: Dict[str, Any], call_site: str = "inference"):
+        """Stores a response, evicting the least recently used entries if the cache is full."""
+        now = time.time()
+        with self._lock:
+            touches = [(ts, touched) for touched, ts in self._pending_touches.items() if touched != key]
+            self._pending_touches.clear()
+        try:
+            with self._pool.connection() as conn:
+                # Pending last-access times go first so the eviction below sees them
+                conn.executemany("UPDATE inference_cache SET last_access = ? WHERE key = ?", touches)
+                params = (call_site, json.dumps(response, ensure_ascii=False), now, now, key)
+                replaced = conn.execute("UPDATE inference_cache SET call_site = ?, response = ?, created_at = ?, last_access = ? "
+                                        "WHERE key = ?", params).rowcount
+                if not replaced:
+                    conn.execute("INSERT INTO inference_cache (call_site, response, created_at, last_access, key) "
+                                 "VALUES (?, ?, ?, ?, ?)", params)
+                with self._lock:
+                    if not replaced:
+                        self._entry_count += 1
+                    full = self._entry_count > self.max_entries
+                evicted = 0
+                if full:
+                    # Recounted here only: other processes may share the file
+                    count = conn.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+                    if count > self.max_entries:
+                        target = int(self.max_entries * (1 - self.EVICTION_SLACK))
+                        evicted = conn.execute("""
+                            DELETE FROM inference_cache WHERE key IN (
+                                SELECT key FROM inference_cache ORDER BY last_access ASC LIMIT ?
+                            )
+                        """, (count - target,)).rowcount
+                    with self._lock:
+                        self._entry_count = count - evicted
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"Écriture dans le cache d'inférence impossible: {e}")
+            count = self._count_entries()  # The transaction was rolled back: resynchronize
+            with self._lock:
+                if count is not None:
+                    self._entry_count = count
+                for ts, touched in touches:
+                    self._pending_touches.setdefault(touched, ts)
+            return
+        with self._lock:
+            self._stats[call_site]["stores"] += 1
+            self._evictions += evicted
+
+    def _count_entries(self) -> Optional[int]:
+        try:
+            with self._pool.connection() as conn:
+                return conn.execute("SELECT COUNT(*) FROM inference_cache").fetchone()[0]
+        except Exception:
+            return None
+
+    def purge_expired(self) -> int:
+        """Deletes every expired entry. Returns the number removed."""
+        with self._pool.connection() as conn:
+            removed = conn.execute("DELETE FROM inference_cache WHERE created_at < ?",
+                                   (time.time() - self.ttl_seconds,)).rowcount
+            conn.commit()
+        with self._lock:
+            self._expired += removed
+            self._entry_count -= removed
+        return removed
+
+    def clear(self):
+        with self._pool.connection() as conn:
+            conn.execute("DELETE FROM inference_cache")
+            conn.commit()
+        with self._lock:
+            self._entry_count = 0
+            self._pending_touches.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters (overall and per call site), evictions and current size."""
+        with self._lock:
+            per_site = {site: dict(counters) for site, counters in self._stats.items()}
+            evictions, expired, entries = self._evictions, self._expired, self._entry_count
+        hits = sum(s["hits"] for s in per_site.values())
+        misses = sum(s["misses"] for s in per_site.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "evictions": evictions,
+            "expired": expired,
+            "call_sites": per_site,
+        }
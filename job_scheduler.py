@@ -0,0 +1,188 @@
+"""
+job_scheduler.py
+Ordonnanceur de tâches périodiques (tas de prochaines échéances + un thread dédié).
+
+Remplace la mise à jour interne monolithique de l'orchestrateur, où toutes les étapes
+(somatique, émotions, humeur, homéostasie, focus, budget, vision, proactivité) tournaient
+en série après chaque événement :
+- chaque sous-système enregistre sa propre tâche avec une période, une gigue (pour éviter que
+  les tâches de même période ne s'alignent) et une échéance (durée d'exécution attendue) ;
+- les tâches s'exécutent sur le thread de l'ordonnanceur, jamais sur celui qui traite les
+  événements : une tâche lente ne retarde pas la prise en charge d'une entrée utilisateur ;
+- une tâche peut être mise en attente (skip_if) tant qu'une condition est vraie, par exemple
+  pendant le traitement d'une entrée utilisateur ;
+- get_metrics() expose par tâche : exécutions, durée moyenne/max, dépassements d'échéance,
+  retard au démarrage et erreurs.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from tools.logger import VeraLogger
+
+logger = VeraLogger("job_scheduler")
+
+
+class PeriodicJob:
+    """One registered periodic job and its runtime statistics. Guarded by the scheduler's lock."""
+
+    def __init__(self, name: str, func: Callable[[], Any], period: float, jitter: float = 0.0,
+                 deadline: Optional[float] = None, skip_if: Optional[Callable[[], bool]] = None):
+        if period <= 0:
+            raise ValueError(f"La période de la tâche '{name}' doit être positive.")
+        self.name = name
+        self.func = func
+        self.period = float(period)
+        self.jitter = max(0.0, float(jitter))
+        self.deadline = float(deadline) if deadline is not None else self.period
+        self.skip_if = skip_if
+        self.next_run = 0.0
+        self.stats = {"runs": 0, "skipped": 0, "errors": 0, "overruns": 0,
+                      "total_runtime_ms": 0.0, "max_runtime_ms": 0.0, "last_runtime_ms": 0.0,
+                      "max_lag_ms": 0.0}
+
+    def delay(self, rng: random.Random) -> float:
+        """Next interval: the period spread by +/- jitter seconds."""
+        if not self.jitter:
+            return self.period
+        return max(0.0, self.period + rng.uniform(-self.jitter, self.jitter))
+
+
+class JobScheduler:
+    """Runs periodic jobs on one background thread, in order of their next due time."""
+
+    def __init__(self, name: str = "JobScheduler", rng: Optional[random.Random] = None):
+        self.name = name
+        self._rng = rng or random.Random()
+        self._jobs: Dict[str, PeriodicJob] = {}
+        self._heap: List = []  # (next_run, seq, job name)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_job(self, name: str, func: Callable[[], Any], period: float, jitter: float = 0.0,
+                deadline: Optional[float] = None, skip_if: Optional[Callable[[], bool]] = None,
+                initial_delay: Optional[float] = None) -> PeriodicJob:
+        """
+        Registers (or replaces) a job.
+
+        Args:
+            period: Seconds between two runs.
+            jitter: Each interval is drawn in [period - jitter, period + jitter].
+            deadline: Expected maximum runtime in seconds (defaults to the period); longer runs count as overruns.
+            skip_if: Called before each run; when it returns True the run is skipped until the next period.
+            initial_delay: Seconds before the first run (defaults to a random fraction of the period).
+        """
+        job = PeriodicJob(name, func, period, jitter, deadline, skip_if)
+        with self._cond:
+            first = self._rng.uniform(0, job.period) if initial_delay is None else initial_delay
+            job.next_run = time.monotonic() + first
+            self._jobs[name] = job
+            heapq.heappush(self._heap, (job.next_run, next(self._seq), name))
+            self._cond.notify()
+        return job
+
+    def remove_job(self, name: str):
+        with self._cond:
+            self._jobs.pop(name, None)  # Its heap entry is discarded when it comes due
+
+    def run_now(self, name: str):
+        """Brings a job's next run forward to now."""
+        with self._cond:
+            job = self._jobs.get(name)
+            if job is None:
+                return
+            job.next_run = time.monotonic()
+            heapq.heappush(self._heap, (job.next_run, next(self._seq), name))
+            self._cond.notify()
+
+    def _next_due(self) -> Optional[PeriodicJob]:
+        """Waits until a job is due and returns it (None when stopping). Called with the lock held."""
+        while not self._stop_event.is_set():
+            # Drop entries of removed jobs and stale entries superseded by run_now()
+            while self._heap:
+                due, _, name = self._heap[0]
+                job = self._jobs.get(name)
+                if job is not None and due == job.next_run:
+                    break
+                heapq.heappop(self._heap)
+            if not self._heap:
+                self._cond.wait()
+                continue
+            wait = self._heap[0][0] - time.monotonic()
+            if wait > 0:
+                self._cond.wait(wait)
+                continue
+            _, _, name = heapq.heappop(self._heap)
+            return self._jobs[name]
+        return None
+
+    def _run_job(self, job: PeriodicJob):
+        started = time.monotonic()
+        lag_ms = (started - job.next_run) * 1000
+        try:
+            if job.skip_if is not None and job.skip_if():
+                with self._cond:
+                    job.stats["skipped"] += 1
+                return
+            job.func()
+            error = False
+        except Exception as e:
+            logger.error(f"Erreur dans la tâche périodique '{job.name}': {e}", exc_info=True)
+            error = True
+        runtime = time.monotonic() - started
+        with self._cond:
+            stats = job.stats
+            stats["runs"] += 1
+            stats["errors"] += error
+            stats["last_runtime_ms"] = runtime * 1000
+            stats["total_runtime_ms"] += runtime * 1000
+            stats["max_runtime_ms"] = max(stats["max_runtime_ms"], runtime * 1000)
+            stats["max_lag_ms"] = max(stats["max_lag_ms"], lag_ms)
+            if runtime > job.deadline:
+                stats["overruns"] += 1
+        if runtime > job.deadline:
+            logger.warning(f"Tâche '{job.name}' : {runtime * 1000:.0f} ms, échéance de {job.deadline * 1000:.0f} ms dépassée.")
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                job = self._next_due()
+            if job is None:
+                break
+            self._run_job(job)
+            with self._cond:
+                if self._jobs.get(job.name) is job:
+                    # Rescheduled from the end of the run: a slow job never piles up runs of itself
+                    job.next_run = time.monotonic() + job.delay(self._rng)
+                    heapq.heappush(self._heap, (job.next_run, next(self._seq), job.name))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            logger.warning(f"{self.name} est déjà démarré.")
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            metrics = {}
+            for name, job in self._jobs.items():
+                stats = dict(job.stats)
+                stats["avg_runtime_ms"] = stats["total_runtime_ms"] / stats["runs"] if stats["runs"] else 0.0
+                stats.update(period_s=job.period, deadline_s=job.deadline)
+                metrics[name] = stats
+            return metrics
@@ -0,0 +1,248 @@
+"""
+knowledge_ingest.py
+Ingestion en masse dans les bases de connaissances (knowledge_map.db, unverified_knowledge.db).
+
+add_entry() ouvrait une transaction par fait (une ligne dans la table de contenu, une dans FTS,
+un commit) : charger un dump Wikipedia ou intégrer des connaissances apprises était très lent.
+KnowledgeIngestor :
+- lit les entrées en flux (itérable ou fichier JSONL, jamais tout en mémoire) ;
+- les insère par lots avec executemany, un lot = une transaction ;
+- ignore les doublons grâce à l'empreinte du texte normalisé (table <contenu>_hashes, index unique) ;
+- peut différer l'indexation FTS : un seul INSERT ... SELECT pour toutes les nouvelles lignes en fin
+  d'ingestion, suivi d'un 'optimize' qui fusionne les segments de l'index.
+
+CLI : tools/ingest_knowledge.py
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from tools.logger import VeraLogger
+
+logger = VeraLogger("knowledge_ingest")
+
+
+def normalize_text(text: str) -> str:
+    """Form used for deduplication: NFKC, case-folded, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Streams the objects of a JSONL file (one {"text", "source", "metadata"} per line). Bad lines are skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"{path}:{line_number} ignorée (JSON invalide): {e}")
+                continue
+            if isinstance(entry, dict):
+                yield entry
+            else:
+                logger.warning(f"{path}:{line_number} ignorée (objet JSON attendu).")
+
+
+def _coerce(entry: Any) -> Tuple[Optional[str], str, str]:
+    """(text, source, metadata JSON) from a dict or a (text, source[, metadata]) tuple."""
+    if isinstance(entry, dict):
+        text, source, metadata = entry.get("text"), entry.get("source"), entry.get("metadata")
+    else:
+        text, source, metadata = (tuple(entry) + (None, None))[:3]
+    if not isinstance(text, str) or not text.strip():
+        return None, "", "{}"
+    if not isinstance(metadata, str):
+        metadata = json.dumps(metadata, ensure_ascii=False) if metadata else "{}"
+    return text, source or "Unknown", metadata
+
+
+_ingest_locks: Dict[str, threading.Lock] = {}
+_ingest_locks_lock = threading.Lock()
+
+
+def _ingest_lock(db_path: str) -> threading.Lock:
+    """Serializes ingestions into one database within this process (other processes wait on BEGIN IMMEDIATE)."""
+    key = os.path.abspath(db_path)
+    with _ingest_locks_lock:
+        return _ingest_locks.setdefault(key, threading.Lock())
+
+
+class KnowledgeIngestor:
+    """Batched, deduplicated inserts into a content table and its external-content FTS5 table."""
+
+    DEFAULT_BATCH_SIZE = 50000
+    HASH_BACKFILL_CHUNK = 10000
+
+    def __init__(self, pool, content_table: str, fts_table: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        self._pool = pool
+        self.content_table = content_table
+        self.fts_table = fts_table
+        self.hash_table = f"{content_table}_hashes"
+        self.batch_size = batch_size
+        self._docsize_table: Optional[str] = None  # FTS5 shadow table of indexed rowids ("" if absent)
+
+    def _prepare(self, conn):
+        """
+        Creates the hash table, repairs what an interrupted ingestion left behind, and hashes
+        content rows added since the last ingestion (by other writers).
+        """
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.hash_table} (
+                id INTEGER PRIMARY KEY,
+                hash TEXT NOT NULL UNIQUE
+            )
+        """)
+        self._reconcile(conn)
+        last_id = conn.execute(f"SELECT COALESCE(MAX(id), -1) FROM {self.hash_table}").fetchone()[0]
+        backfilled = 0
+        while True:
+            rows = conn.execute(f"SELECT id, text FROM {self.content_table} WHERE id > ? ORDER BY id LIMIT ?",
+                                (last_id, self.HASH_BACKFILL_CHUNK)).fetchall()
+            if not rows:
+                break
+            conn.executemany(f"INSERT OR IGNORE INTO {self.hash_table} (id, hash) VALUES (?, ?)",
+                             [(row[0], text_hash(row[1] or "")) for row in rows])
+            last_id = rows[-1][0]
+            backfilled += len(rows)
+        conn.commit()
+        if backfilled:
+            logger.info(f"Empreintes calculées pour {backfilled} entrées existantes de '{self.content_table}'.")
+
+    def _reconcile(self, conn):
+        """
+        Above the last FTS-indexed id (the watermark, read from the FTS5 docsize shadow table):
+        drops hash rows without a content row (they would make their facts look like duplicates
+        forever) and indexes content rows a killed deferred ingestion never indexed.
+        """
+        watermark = self._fts_watermark(conn)
+        if watermark is None:
+            return
+        orphans = conn.execute(f"""
+            DELETE FROM {self.hash_table} WHERE id > ?
+            AND NOT EXISTS (SELECT 1 FROM {self.content_table} AS c WHERE c.id = {self.hash_table}.id)
+        """, (watermark,)).rowcount
+        last_content_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.content_table}").fetchone()[0]
+        indexed = self._index_range(conn, watermark + 1, last_content_id) if last_content_id > watermark else 0
+        conn.commit()
+        if orphans or indexed:
+            logger.warning(f"Ingestion interrompue réparée dans '{self.content_table}': {orphans} empreintes "
+                           f"orphelines supprimées, {indexed} entrées indexées dans '{self.fts_table}'.")
+
+    def _docsize(self, conn) -> str:
+        """FTS5 shadow table holding one row per indexed rowid ("" if the table has columnsize=0)."""
+        if self._docsize_table is None:
+            found = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                 (f"{self.fts_table}_docsize",)).fetchone()
+            self._docsize_table = f"{self.fts_table}_docsize" if found else ""
+        return self._docsize_table
+
+    def _fts_watermark(self, conn) -> Optional[int]:
+        """Highest rowid indexed in the FTS table, or None if it cannot be known."""
+        if not self._docsize(conn):
+            return None
+        return conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self._docsize_table}").fetchone()[0]
+
+    def _index_range(self, conn, first_id: int, last_id: int) -> int:
+        """Indexes the content rows of [first_id, last_id] not yet in the FTS table. Returns the count."""
+        skip_indexed = ""
+        if self._docsize(conn):
+            skip_indexed = f"AND id NOT IN (SELECT id FROM {self._docsize_table} WHERE id BETWEEN ? AND ?)"
+        params = (first_id, last_id) * (2 if skip_indexed else 1)
+        return conn.execute(f"INSERT INTO {self.fts_table} (rowid, text, source) "
+                            f"SELECT id, text, source FROM {self.content_table} WHERE id BETWEEN ? AND ? {skip_indexed}",
+                            params).rowcount
+
+    def _write_batch(self, conn, rows, index: bool) -> Tuple[int, int]:
+        """
+        Writes one batch of (hash, text, source, metadata) rows as a single transaction: its hashes
+        and content rows are committed together or not at all, even on KeyboardInterrupt.
+        Returns (first id, rows kept).
+        """
+        try:
+            # Ids are chosen inside the write transaction: another writer (thread or process)
+            # cannot pick the same ones before this batch commits
+            conn.execute("BEGIN IMMEDIATE")
+            first = conn.execute(f"""
+                SELECT MAX(COALESCE((SELECT MAX(id) FROM {self.content_table}), 0),
+                           COALESCE((SELECT MAX(id) FROM {self.hash_table}), 0)) + 1
+            """).fetchone()[0]
+            last = first + len(rows) - 1
+            # The unique hash decides which rows are new; duplicates just leave their id unused
+            conn.executemany(f"INSERT OR IGNORE INTO {self.hash_table} (id, hash) VALUES (?, ?)",
+                             [(first + i, row[0]) for i, row in enumerate(rows)])
+            kept = {row[0] for row in conn.execute(
+                f"SELECT id FROM {self.hash_table} WHERE id BETWEEN ? AND ?", (first, last))}
+            conn.executemany(f"INSERT INTO {self.content_table} (id, text, source, metadata) VALUES (?, ?, ?, ?)",
+                             [(first + i, row[1], row[2], row[3]) for i, row in enumerate(rows) if first + i in kept])
+            if index:
+                self._index_range(conn, first, last)
+            conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        return first, len(kept)
+
+    def ingest(self, entries: Iterable[Any], defer_fts: bool = True, optimize: bool = True) -> Dict[str, Any]:
+        """
+        Inserts entries (dicts with text/source/metadata, or tuples), skipping duplicates of
+        existing or earlier entries.
+
+        Args:
+            defer_fts: Index all new rows in FTS once at the end instead of after each batch.
+            optimize: Merge the FTS index segments after a deferred indexing.
+        Returns:
+            Counts: read, inserted, duplicates, invalid, plus seconds and rows_per_second.
+        """
+        stats = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+        start = time.perf_counter()
+        iterator = iter(entries)
+        committed_ranges = []  # (first id, last id) of each committed batch, indexed at the end if deferred
+        with _ingest_lock(self._pool.db_path), self._pool.connection() as conn:
+            self._prepare(conn)
+            try:
+                while True:
+                    batch = list(islice(iterator, self.batch_size))
+                    if not batch:
+                        break
+                    stats["read"] += len(batch)
+                    rows = []
+                    for entry in batch:
+                        text, source, metadata = _coerce(entry)
+                        if text is None:
+                            stats["invalid"] += 1
+                            continue
+                        rows.append((text_hash(text), text, source, metadata))
+                    if rows:
+                        first, kept = self._write_batch(conn, rows, index=not defer_fts)
+                        committed_ranges.append((first, first + len(rows) - 1))
+                        stats["inserted"] += kept
+                        stats["duplicates"] += len(rows) - kept
+            finally:
+                # Committed batches are made searchable even if a later batch failed or was interrupted;
+                # if this is cut short too, the next _prepare() indexes them
+                if defer_fts and committed_ranges:
+                    for first, last in committed_ranges:
+                        self._index_range(conn, first, last)
+                    if optimize:
+                        conn.execute(f"INSERT INTO {self.fts_table} ({self.fts_table}) VALUES ('optimize')")
+                    conn.commit()
+
+        stats["seconds"] = time.perf_counter() - start
+        stats["rows_per_second"] = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+        logger.info(f"Ingestion dans '{self.content_table}': {stats['inserted']} ajoutées, "
+                    f"{stats['duplicates']} doublons, {stats['invalid']} invalides "
+                    f"({stats['rows_per_second']:.0f} entrées/s).")
+        return stats
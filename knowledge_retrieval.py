@@ -0,0 +1,378 @@
+"""
+knowledge_retrieval.py
+Moteur de recherche des bases de connaissances (knowledge_map.db, unverified_knowledge.db).
+
+La recherche entourait toute la requête de guillemets : FTS5 faisait une correspondance de
+phrase exacte et les sujets de plusieurs mots ("histoire de la photographie") ne trouvaient
+presque jamais rien. Ici :
+- la requête est découpée en mots (mots vides retirés), chacun cherché comme préfixe ;
+- recherche lexicale par paliers, classée par BM25 : mots proches (NEAR), puis tous les mots (AND),
+  puis au moins un mot (OR) pour compléter les résultats ;
+- en option, un index vectoriel CPU (recherche exhaustive NumPy, produit scalaire sur des vecteurs
+  normalisés) enregistré à côté de la base (<base>.vectors.npy / .vector_ids.npy / .vectors.json),
+  fusionné avec le classement lexical par Reciprocal Rank Fusion (RRF).
+
+Configuration (data/config.json) :
+    "knowledge_vector_search": false        active l'index vectoriel (NumPy + sentence-transformers)
+    "knowledge_embedding_model": "..."      modèle sentence-transformers utilisé
+
+Construction complète de l'index d'une base :
+    python knowledge_retrieval.py --db data/knowledge_map.db --table knowledge
+"""
+
+import argparse
+import atexit
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from tools.logger import VeraLogger
+
+logger = VeraLogger("knowledge_retrieval")
+
+# Optional numpy (vector index)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Optional sentence-transformers (embeddings)
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except Exception:
+    SentenceTransformer = None
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+try:
+    with open(os.path.join("data", "config.json"), "r", encoding="utf-8") as f:
+        _config = json.load(f)
+except Exception:
+    _config = {}
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+STOP_WORDS = frozenset("""
+le la les l un une des du de d au aux et ou en dans sur sous par pour avec sans ce cette ces se sa son ses
+leur leurs qui que quoi dont est sont été être a ont il elle ils elles on je tu nous vous y ne pas plus
+the a an of and or in on at to for with by from is are was were be as it its this that these those
+""".split())
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize_query(text: str) -> List[str]:
+    """Lower-cased words of a free-text query, stop words removed (kept if the query has nothing else)."""
+    words = [w.casefold() for w in _WORD.findall(text or "")]
+    content = [w for w in words if w not in STOP_WORDS]
+    tokens = content or words
+    return list(dict.fromkeys(tokens))  # Dedup, order kept
+
+
+def build_fts_expression(tokens: Sequence[str], operator: str = "AND", near_distance: int = 10,
+                         prefix_min_length: int = 3) -> str:
+    """
+    FTS5 expression for the tokens: quoted terms (no FTS5 syntax injection), prefix terms from
+    prefix_min_length characters on ("volcan"* also matches "volcans").
+
+    Args:
+        operator: "AND" (all terms), "OR" (any term) or "NEAR" (all terms within near_distance tokens).
+    """
+    terms = ['"{}"{}'.format(t.replace('"', '""'), "*" if len(t) >= prefix_min_length else "") for t in tokens]
+    if not terms:
+        return ""
+    if operator == "NEAR":
+        return f"NEAR({' '.join(terms)}, {int(near_distance)})" if len(terms) > 1 else terms[0]
+    if operator == "OR":
+        return " OR ".join(terms)
+    return " ".join(terms)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence], k: int = 60) -> List[Tuple[object, float]]:
+    """Fuses ranked id lists: score(id) = sum over lists of 1 / (k + rank). Best first."""
+    scores: Dict[object, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HashingEmbedder:
+    """Model-free embedding (hashed words and character trigrams). Deterministic; for tests and benchmarks."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def encode(self, texts: Sequence[str]) -> "np.ndarray":
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD.findall(text.casefold()):
+                padded = f"#{word}#"
+                for feature in [word] + [padded[i:i + 3] for i in range(len(padded) - 2)]:
+                    h = zlib.crc32(feature.encode("utf-8"))
+                    matrix[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers model on CPU, loaded on first use."""
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL):
+        self.name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        with self._lock:
+            if self._model is None:
+                logger.info(f"Chargement du modèle d'embeddings '{self.name}' (CPU)...")
+                self._model = SentenceTransformer(self.name, device="cpu")
+            return self._model
+
+    def encode(self, texts: Sequence[str]) -> "np.ndarray":
+        return self._get_model().encode(list(texts), batch_size=64, normalize_embeddings=True,
+                                        convert_to_numpy=True, show_progress_bar=False).astype(np.float32)
+
+
+class VectorIndex:
+    """Brute-force cosine index over normalized float32 vectors, persisted as .npy files next to the database."""
+
+    SYNC_BATCH_SIZE = 256
+    SAVE_EVERY_ROWS = 4096  # Rows indexed by deferred syncs before the .npy files are rewritten
+
+    def __init__(self, path_prefix: str, embedder):
+        self.embedder = embedder
+        self.vectors_path = f"{path_prefix}.vectors.npy"
+        self.ids_path = f"{path_prefix}.vector_ids.npy"
+        self.meta_path = f"{path_prefix}.vectors.json"
+        self._lock = threading.Lock()  # Guards the arrays (held briefly, searches read a snapshot)
+        self._sync_lock = threading.Lock()  # One sync or save at a time: last_id -> fetch -> add -> save
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors: Optional["np.ndarray"] = None
+        self._unsaved = 0
+        self._load()
+        atexit.register(self._save_at_exit)
+
+    def _load(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("embedder") != self.embedder.name:
+                logger.info(f"Index vectoriel '{self.vectors_path}' construit avec '{meta.get('embedder')}' : ignoré.")
+                return
+            self._vectors = np.load(self.vectors_path)
+            self._ids = np.load(self.ids_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Index vectoriel '{self.vectors_path}' illisible, il sera reconstruit: {e}")
+            self._ids, self._vectors = np.zeros(0, dtype=np.int64), None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def last_id(self) -> int:
+        with self._lock:
+            return int(self._ids[-1]) if len(self._ids) else 0
+
+    def add(self, ids: Sequence[int], texts: Sequence[str]):
+        """Embeds and appends entries. Ids must be increasing and greater than last_id."""
+        if not ids:
+            return
+        vectors = self.embedder.encode(texts)
+        with self._lock:
+            self._vectors = vectors if self._vectors is None else np.vstack([self._vectors, vectors])
+            self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])
+            self._unsaved += len(ids)
+
+    def save(self):
+        """Writes the index files if entries were added since the last save."""
+        with self._sync_lock:
+            self._save()
+
+    def _save(self):
+        # Arrays are replaced, never modified in place: the snapshot can be written outside _lock
+        with self._lock:
+            vectors, ids, unsaved = self._vectors, self._ids, self._unsaved
+        if vectors is None or not unsaved:
+            return
+        for path, array in ((self.vectors_path, vectors), (self.ids_path, ids)):
+            tmp = f"{path}.tmp.npy"
+            np.save(tmp, array)
+            os.replace(tmp, path)
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"embedder": self.embedder.name, "count": len(ids)}, f)
+        with self._lock:
+            self._unsaved -= unsaved
+
+    def _save_at_exit(self):
+        try:
+            self.save()
+        except Exception as e:
+            logger.error(f"Sauvegarde de l'index vectoriel '{self.vectors_path}' impossible: {e}")
+
+    def sync(self, conn, content_table: str, max_rows: Optional[int] = None, defer_save: bool = False) -> int:
+        """
+        Indexes rows of content_table added since the last sync (at most max_rows). Returns the count.
+
+        Args:
+            defer_save: Only rewrite the files once SAVE_EVERY_ROWS entries are unsaved (they are also
+                saved at exit). Unsaved entries lost in a crash are simply indexed again by the next sync.
+        """
+        added = 0
+        with self._sync_lock:
+            while max_rows is None or added < max_rows:
+                batch = self.SYNC_BATCH_SIZE if max_rows is None else min(self.SYNC_BATCH_SIZE, max_rows - added)
+                rows = conn.execute(f"SELECT id, text FROM {content_table} WHERE id > ? ORDER BY id LIMIT ?",
+                                    (self.last_id, batch)).fetchall()
+                if not rows:
+                    break
+                self.add([row[0] for row in rows], [row[1] or "" for row in rows])
+                added += len(rows)
+            if not defer_save or self._unsaved >= self.SAVE_EVERY_ROWS:
+                self._save()
+        return added
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """(id, cosine similarity) of the k nearest entries, best first."""
+        with self._lock:
+            vectors, ids = self._vectors, self._ids
+        if vectors is None or not len(ids) or k <= 0:
+            return []
+        scores = vectors @ self.embedder.encode([query])[0]
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+def make_vector_index(db_path: str, embedder=None) -> Optional[VectorIndex]:
+    """Vector index stored next to db_path, or None when disabled in config or dependencies are missing."""
+    if embedder is None:
+        if not _config.get("knowledge_vector_search", False):
+            return None
+        if not (NUMPY_AVAILABLE and SENTENCE_TRANSFORMERS_AVAILABLE):
+            logger.warning("Recherche vectorielle demandée mais numpy/sentence-transformers indisponibles : recherche lexicale seule.")
+            return None
+        embedder = SentenceTransformerEmbedder(_config.get("knowledge_embedding_model", DEFAULT_EMBEDDING_MODEL))
+    return VectorIndex(os.path.splitext(db_path)[0], embedder)
+
+
+class HybridRetriever:
+    """Tiered BM25 search over an external-content FTS5 table, optionally fused (RRF) with a vector index."""
+
+    RRF_K = 60
+    CANDIDATE_MULTIPLIER = 4  # Candidates fetched from each ranking per requested result
+    SYNC_ON_SEARCH_MAX_ROWS = 256  # New entries embedded before a search; bigger backlogs go through the CLI
+
+    def __init__(self, pool, content_table: str, fts_table: str, vector_index: Optional[VectorIndex] = None):
+        self._pool = pool
+        self.content_table = content_table
+        self.fts_table = fts_table
+        self.vector_index = vector_index
+
+    def lexical_search(self, query: str, limit: int, require_all_terms: bool = False) -> List[Tuple[int, float, str]]:
+        """(rowid, bm25, tier) best first; tiers "near", "all" then "any" fill up to `limit`."""
+        tokens = tokenize_query(query)
+        if not tokens:
+            return []
+        tiers = [("all", "AND")]
+        if len(tokens) > 1:
+            tiers.insert(0, ("near", "NEAR"))
+            if not require_all_terms:
+                tiers.append(("any", "OR"))
+        results: List[Tuple[int, float, str]] = []
+        seen = set()
+        with self._pool.connection() as conn:
+            for tier, operator in tiers:
+                rows = conn.execute(f"""
+                    SELECT fts.rowid, fts.rank FROM {self.fts_table} AS fts
+                    WHERE fts.text MATCH ?
+                    ORDER BY fts.rank
+                    LIMIT ?
+                """, (build_fts_expression(tokens, operator), limit + len(seen))).fetchall()
+                for rowid, rank in rows:
+                    if rowid not in seen:
+                        seen.add(rowid)
+                        results.append((rowid, rank, tier))
+                if len(results) >= limit:
+                    break
+        return results[:limit]
+
+    def search(self, query: str, k: int = 5, require_all_terms: bool = False) -> List[Dict]:
+        """
+        The k most relevant entries, as dicts with text, source, metadata, relevance (BM25, lower is
+        better; None for vector-only hits), match ("near", "all", "any" or "vector") and score (RRF).
+
+        Args:
+            require_all_terms: Only entries containing every query word (no OR tier, no vector hits).
+        """
+        candidates = k * self.CANDIDATE_MULTIPLIER
+        lexical = self.lexical_search(query, candidates, require_all_terms)
+        rankings = [[rowid for rowid, _, _ in lexical]]
+        if self.vector_index is not None and not require_all_terms:
+            try:
+                with self._pool.connection() as conn:
+                    self.vector_index.sync(conn, self.content_table, self.SYNC_ON_SEARCH_MAX_ROWS, defer_save=True)
+                rankings.append([rowid for rowid, _ in self.vector_index.search(query, candidates)])
+            except Exception as e:
+                logger.error(f"Recherche vectorielle impossible dans '{self.content_table}': {e}", exc_info=True)
+        fused = reciprocal_rank_fusion(rankings, self.RRF_K)[:k]
+        if not fused:
+            return []
+
+        lexical_info = {rowid: (rank, tier) for rowid, rank, tier in lexical}
+        ids = [rowid for rowid, _ in fused]
+        with self._pool.connection() as conn:
+            rows = conn.execute(f"SELECT id, text, source, metadata FROM {self.content_table} "
+                                f"WHERE id IN ({', '.join('?' for _ in ids)})", ids).fetchall()
+        by_id = {row[0]: row for row in rows}
+        results = []
+        for rowid, score in fused:
+            row = by_id.get(rowid)
+            if row is None:
+                continue
+            rank, tier = lexical_info.get(rowid, (None, "vector"))
+            results.append({
+                "text": row[1],
+                "source": row[2],
+                "metadata": json.loads(row[3]) if row[3] else {},
+                "relevance": rank,
+                "match": tier,
+                "score": score,
+            })
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit ou complète l'index vectoriel d'une base de connaissances.")
+    parser.add_argument("--db", default=os.path.join("data", "knowledge_map.db"))
+    parser.add_argument("--table", default="knowledge", help="Content table (knowledge, unverified_knowledge)")
+    parser.add_argument("--model", default=_config.get("knowledge_embedding_model", DEFAULT_EMBEDDING_MODEL))
+    parser.add_argument("--hashing", action="store_true", help="Use the model-free hashing embedder")
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE or not (args.hashing or SENTENCE_TRANSFORMERS_AVAILABLE):
+        parser.error("numpy et sentence-transformers (ou --hashing) sont requis.")
+    from sqlite_pool import get_pool
+    embedder = HashingEmbedder() if args.hashing else SentenceTransformerEmbedder(args.model)
+    index = make_vector_index(args.db, embedder)
+    start = time.perf_counter()
+    with get_pool(args.db).connection() as conn:
+        added = index.sync(conn, args.table)
+    print(f"{added} entrées indexées en {time.perf_counter() - start:.1f} s ({len(index)} au total) -> {index.vectors_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,56 @@
 Module pour gérer l'accès à des sources externes de connaissances.
 """
 try:
-    import wikipedia
-    WIKIPEDIA_AVAILABLE = True
-except Exception:
-    wikipedia = None
-    WIKIPEDIA_AVAILABLE = False
-
-try:
-    import requests
+    from http_client import http_client
     REQUESTS_AVAILABLE = True
 except Exception:
-    requests = None
+    http_client = None
     REQUESTS_AVAILABLE = False
 from typing import Optional, Dict, List
 from error_handler import log_error
 
-# Configuration Wikipedia en français
-if WIKIPEDIA_AVAILABLE:
-    try:
-        wikipedia.set_lang("fr")
-    except Exception:
-        pass
+WIKIPEDIA_API_URL = "https://{lang}.wikipedia.org/w/api.php"
+WIKIPEDIA_TIMEOUT_SECONDS = 8.0
+WIKIPEDIA_CACHE_SECONDS = 3600  # Les résumés d'articles changent peu : une heure de cache par requête
+
+
+def search_wikipedia_articles(query: str, lang: str = "fr", limit: int = 3) -> List[Dict[str, str]]:
+    """
+    Recherche Wikipedia en un seul appel à l'API MediaWiki (recherche + résumés + URLs),
+    via le client HTTP partagé (connexions persistantes, cache).
+    Les pages d'homonymie sont écartées.
+
+    Returns:
+        Liste de dicts {"title", "summary", "url"}, dans l'ordre de pertinence.
+
+    Raises:
+        requests.exceptions.RequestException en cas d'erreur réseau ou HTTP.
+    """
+    params = {
+        "action": "query",
+        "format": "json",
+        "generator": "search",
+        "gsrsearch": query,
+        "gsrlimit": limit,
+        "prop": "extracts|info|pageprops",
+        "exintro": 1,
+        "explaintext": 1,
+        "inprop": "url",
+        "ppprop": "disambiguation",
+        "redirects": 1,
+    }
+    response = http_client.get(WIKIPEDIA_API_URL.format(lang=lang), params=params,
+                               timeout=WIKIPEDIA_TIMEOUT_SECONDS, cache_ttl=WIKIPEDIA_CACHE_SECONDS)
+    response.raise_for_status()
+    pages = (response.json().get("query") or {}).get("pages") or {}
+    pages = pages.values() if isinstance(pages, dict) else pages
+    articles = []
+    for page in sorted(pages, key=lambda p: p.get("index", 0)):
+        if "disambiguation" in (page.get("pageprops") or {}) or not page.get("extract"):
+            continue
+        articles.append({"title": page.get("title", ""), "summary": page["extract"], "url": page.get("fullurl", "")})
+    return articles
+
 
 def recherche_wikipedia(query: str) -> Optional[Dict[str, str]]:
     """
@@ -31,42 +60,20 @@ def recherche_wikipedia(query: str) -> Optional[Dict[str, str]]:
     Returns:
         Dict avec titre et résumé, ou None si pas trouvé
     """
-    if not WIKIPEDIA_AVAILABLE:
+    if not REQUESTS_AVAILABLE:
         return None
 
     try:
-        # Recherche de pages correspondantes
-        results = wikipedia.search(query, results=3)
-        if not results:
+        articles = search_wikipedia_articles(query)
+        if not articles:
             return None
-            
-        # Essayer chaque résultat jusqu'à en trouver un valide
-        for title in results:
-            try:
-                page = wikipedia.page(title)
-                return {
-                    "titre": page.title,
-                    "resume": page.summary,
-                    "url": page.url,
-                    "source": "wikipedia"
-                }
-            except wikipedia.DisambiguationError as e:
-                # En cas de page de désambiguation, essayer le premier sens
-                if e.options:
-                    try:
-                        page = wikipedia.page(e.options[0])
-                        return {
-                            "titre": page.title,
-                            "resume": page.summary,
-                            "url": page.url,
-                            "source": "wikipedia"
-                        }
-                    except:
-                        continue
-            except:
-                continue
-                
-        return None
+        article = articles[0]
+        return {
+            "titre": article["title"],
+            "resume": article["summary"],
+            "url": article["url"],
+            "source": "wikipedia"
+        }
         
     except Exception as e:
         log_error("wikipedia_search", f"Erreur recherche Wikipedia: {str(e)}")
@@ -119,7 +119,8 @@ class LearningSystem:
             return False
             
         # Check unverified knowledge
-        unverified_results = unverified_knowledge_manager.search(topic, k=1)
+        # Tous les mots du sujet doivent y figurer : un seul mot en commun ne suffit pas à le considérer connu
+        unverified_results = unverified_knowledge_manager.search(topic, k=1, require_all_terms=True)
         if unverified_results:
             logger.info(f"Sujet '{topic}' déjà dans la base de connaissances non-vérifiée. Pas besoin d'apprentissage.")
             return False
@@ -132,7 +133,7 @@ class LearningSystem:
         Réponds un seul mot : 'oui' ou 'non'.
         """
         try:
-            llm_response = send_inference_prompt(prompt_content=prompt, max_tokens=5)
+            llm_response = send_inference_prompt(prompt_content=prompt, max_tokens=5, call_site="classification.learning_needed", cache=True)
             answer = llm_response.get("text", "non").strip().lower()
             logger.info(f"Décision d'apprentissage par LLM pour '{topic}': {answer}")
             return "oui" in answer
@@ -151,7 +152,7 @@ class LearningSystem:
         
         llm_response_str = ""
         try:
-            llm_response_dict = send_inference_prompt(prompt)
+            llm_response_dict = send_inference_prompt(prompt, call_site="inference.extract_topics", cache=True)
             llm_response_str = llm_response_dict.get("text", "[]").strip()
             
             # Vérification robuste de la validité JSON
@@ -213,7 +214,7 @@ class LearningSystem:
         self.logger.debug(f"Prompt envoyé au LLM pour _is_internal_knowledge_sufficient (topic: '{topic}', source: {source}):\n{prompt}")
 
         try:
-            llm_response_dict = send_inference_prompt(prompt, max_tokens=5)
+            llm_response_dict = send_inference_prompt(prompt, max_tokens=5, call_site="classification.knowledge_sufficient", cache=True)
             llm_raw_response = llm_response_dict.get("text", "non").strip().lower()
             self.logger.debug(f"Réponse brute du LLM pour '{topic}' (source: {source}): '{llm_raw_response}'")
             answer = llm_raw_response.lower() # Ensure comparison is case-insensitive
@@ -253,7 +254,7 @@ class LearningSystem:
         Réponds uniquement par 'oui' ou 'non'.
         """
         try:
-            llm_response = send_inference_prompt(prompt, max_tokens=5)
+            llm_response = send_inference_prompt(prompt, max_tokens=5, call_site="classification.results_relevant", cache=True)
             answer = llm_response.get("text", "oui").strip().lower()
             is_relevant = "oui" in answer
             if not is_relevant:
@@ -0,0 +1,201 @@
+"""
+llm_scheduler.py
+Ordonnanceur des requêtes LLM de Vera (remplace l'ancien verrou global LLM_LOCK).
+
+Chaque requête demande un "slot" au backend visé avant d'appeler le serveur :
+- les slots sont limités par backend (concurrence configurable, 1 par défaut comme l'ancien verrou) ;
+- les requêtes en attente sont servies par classe de priorité (réponse à l'utilisateur >
+  suite d'un outil > cognition de fond), puis dans l'ordre d'arrivée ;
+- les requêtes de fond encore en attente peuvent être annulées (ex: à l'arrivée d'un
+  UserInputEvent) : l'appelant reçoit LLMRequestCancelled au lieu d'attendre son tour ;
+- la profondeur des files et les temps d'attente sont exposés par get_metrics().
+
+La priorité d'un appel est soit passée explicitement, soit héritée du thread courant
+via le context manager llm_priority().
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from tools.logger import VeraLogger
+
+logger = VeraLogger("llm_scheduler")
+
+# Classes de priorité (plus petit = plus prioritaire)
+PRIORITY_USER = 0        # Réponse à une entrée de l'utilisateur
+PRIORITY_TOOL = 1        # Suite d'une action/outil déclenchée par l'utilisateur
+PRIORITY_BACKGROUND = 2  # Rêves, monologue, distillation, extraction de faits, apprentissage...
+
+PRIORITY_NAMES = {PRIORITY_USER: "user", PRIORITY_TOOL: "tool", PRIORITY_BACKGROUND: "background"}
+
+
+class LLMRequestCancelled(Exception):
+    """Raised in a waiting caller when its queued request is cancelled before it got a slot."""
+
+
+class _Ticket:
+    __slots__ = ("priority", "seq", "label", "enqueued_at", "granted", "cancelled", "reason")
+
+    def __init__(self, priority: int, seq: int, label: str):
+        self.priority = priority
+        self.seq = seq
+        self.label = label
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+        self.reason = ""
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _Backend:
+    """Waiting heap and slot accounting for one backend. Guarded by the scheduler's lock."""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.in_flight = 0
+        self.waiting: List[_Ticket] = []
+
+
+_local = threading.local()
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Sets the default LLM priority for calls made by the current thread inside the block."""
+    previous = getattr(_local, "priority", None)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def current_priority(default: int = PRIORITY_BACKGROUND) -> int:
+    """Priority inherited from the enclosing llm_priority() block, or `default`."""
+    priority = getattr(_local, "priority", None)
+    return default if priority is None else priority
+
+
+class LLMScheduler:
+    """Priority-ordered, per-backend bounded admission of LLM requests."""
+
+    DEFAULT_MAX_CONCURRENCY = 1  # Same behaviour as the former global LLM_LOCK
+
+    def __init__(self, default_max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 backend_concurrency: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            default_max_concurrency: Concurrent requests allowed on a backend without explicit setting.
+            backend_concurrency: Per-backend limits, keyed by backend name (e.g. the server URL).
+        """
+        self.default_max_concurrency = default_max_concurrency
+        self._backend_limits = dict(backend_concurrency or {})
+        self._backends: Dict[str, _Backend] = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._metrics = {name: {"submitted": 0, "started": 0, "cancelled": 0,
+                                "wait_total_s": 0.0, "wait_max_s": 0.0}
+                         for name in PRIORITY_NAMES.values()}
+
+    def _backend(self, backend: str) -> _Backend:
+        state = self._backends.get(backend)
+        if state is None:
+            state = _Backend(self._backend_limits.get(backend, self.default_max_concurrency))
+            self._backends[backend] = state
+        return state
+
+    def set_concurrency(self, backend: str, max_concurrency: int):
+        """Changes the number of concurrent requests allowed on a backend."""
+        with self._cond:
+            self._backend_limits[backend] = max_concurrency
+            self._backend(backend).max_concurrency = max(1, int(max_concurrency))
+            self._grant(backend)
+            self._cond.notify_all()
+
+    def _grant(self, backend: str):
+        """Hands free slots to the best waiting tickets. Caller holds self._cond."""
+        state = self._backend(backend)
+        while state.waiting and state.in_flight < state.max_concurrency:
+            ticket = heapq.heappop(state.waiting)
+            if ticket.cancelled:
+                continue
+            ticket.granted = True
+            state.in_flight += 1
+
+    @contextmanager
+    def slot(self, backend: str, priority: Optional[int] = None, label: str = ""):
+        """
+        Blocks until the request may run on `backend`, then yields.
+        Raises LLMRequestCancelled if the request is cancelled while still waiting.
+        """
+        priority = current_priority() if priority is None else priority
+        name = PRIORITY_NAMES.get(priority, PRIORITY_NAMES[PRIORITY_BACKGROUND])
+        with self._cond:
+            ticket = _Ticket(priority, next(self._seq), label)
+            state = self._backend(backend)
+            heapq.heappush(state.waiting, ticket)
+            self._metrics[name]["submitted"] += 1
+            self._grant(backend)
+            while not ticket.granted and not ticket.cancelled:
+                self._cond.wait()
+            waited = time.monotonic() - ticket.enqueued_at
+            metrics = self._metrics[name]
+            if ticket.cancelled:
+                metrics["cancelled"] += 1
+                raise LLMRequestCancelled(ticket.reason or "cancelled")
+            metrics["started"] += 1
+            metrics["wait_total_s"] += waited
+            metrics["wait_max_s"] = max(metrics["wait_max_s"], waited)
+
+        if waited > 1.0:
+            logger.debug(f"Requête LLM '{label}' ({name}) servie après {waited:.1f}s d'attente.")
+        try:
+            yield
+        finally:
+            with self._cond:
+                state.in_flight -= 1
+                self._grant(backend)
+                self._cond.notify_all()
+
+    def cancel_queued(self, min_priority: int = PRIORITY_BACKGROUND, reason: str = "") -> int:
+        """
+        Cancels every request still waiting whose priority class is `min_priority` or lower.
+        Requests already running are not interrupted. Returns the number of cancelled requests.
+        """
+        cancelled = 0
+        with self._cond:
+            for state in self._backends.values():
+                for ticket in state.waiting:
+                    if ticket.priority >= min_priority and not ticket.cancelled and not ticket.granted:
+                        ticket.cancelled = True
+                        ticket.reason = reason
+                        cancelled += 1
+                state.waiting = [t for t in state.waiting if not t.cancelled]
+                heapq.heapify(state.waiting)
+            if cancelled:
+                self._cond.notify_all()
+        if cancelled:
+            logger.info(f"{cancelled} requête(s) LLM de fond annulée(s) ({reason or 'sans raison'}).")
+        return cancelled
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth per backend and priority class, in-flight counts and wait-time statistics."""
+        with self._cond:
+            backends = {}
+            for backend, state in self._backends.items():
+                depth = {name: 0 for name in PRIORITY_NAMES.values()}
+                for ticket in state.waiting:
+                    depth[PRIORITY_NAMES.get(ticket.priority, PRIORITY_NAMES[PRIORITY_BACKGROUND])] += 1
+                backends[backend] = {"in_flight": state.in_flight, "max_concurrency": state.max_concurrency,
+                                     "queue_depth": depth}
+            priorities = {}
+            for name, m in self._metrics.items():
+                priorities[name] = dict(m)
+                priorities[name]["wait_avg_s"] = m["wait_total_s"] / m["started"] if m["started"] else 0.0
+            return {"backends": backends, "priorities": priorities}
@@ -0,0 +1,155 @@
+"""
+llm_streaming.py
+Outils pour le mode streaming (SSE, `stream: true`) de /v1/chat/completions.
+
+- iter_sse_deltas() : lit la réponse ligne par ligne et produit les fragments de texte.
+- ToolCallStreamFilter : retire au fil de l'eau les appels d'outils [TOOL_CALL] nom(...)
+  pour n'afficher que le texte conversationnel, même si un marqueur arrive coupé en morceaux.
+- AvatarTalkDriver : anime la bouche de l'avatar pendant l'arrivée des tokens.
+"""
+
+import json
+import re
+import time
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from tools.logger import VeraLogger
+
+logger = VeraLogger("llm_streaming")
+
+TOOL_CALL_MARKER = "[TOOL_CALL]"
+TOOL_CALL_PATTERN = r"\[TOOL_CALL\]\s*(\w+)\((.*?)\)"
+_TOOL_CALL_HEAD = re.compile(r"\[TOOL_CALL\]\s*\w*")
+
+
+def iter_sse_lines(lines: Iterable) -> Iterator[str]:
+    """
+    Produces the text fragments of an OpenAI-compatible SSE stream, given its raw lines
+    (e.g. requests.Response.iter_lines()). Stops at the `data: [DONE]` sentinel.
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        line = line.strip()
+        if not line.startswith("data:"):
+            continue  # Blank separators, comments (": keep-alive") and other SSE fields
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        try:
+            chunk = json.loads(data)
+        except json.JSONDecodeError:
+            logger.warning(f"Fragment SSE illisible ignoré: {data[:100]}")
+            continue
+        for choice in chunk.get("choices", []):
+            # Chat completions stream "delta.content"; some servers send "text" (completions format)
+            content = (choice.get("delta") or {}).get("content") or choice.get("text")
+            if content:
+                yield content
+
+
+def iter_sse_deltas(response) -> Iterator[str]:
+    """Text fragments of a streamed requests.Response."""
+    return iter_sse_lines(response.iter_lines())
+
+
+class ToolCallStreamFilter:
+    """
+    Incrementally strips `[TOOL_CALL] name(args)` from streamed text.
+    feed() returns the text that can be shown now; anything that might still turn into
+    a tool call (a partial marker, or a marker whose closing parenthesis has not arrived) is held back.
+    """
+
+    def __init__(self, pattern: str = TOOL_CALL_PATTERN, marker: str = TOOL_CALL_MARKER):
+        self._regex = re.compile(pattern)
+        self._marker = marker
+        self._pending = ""
+        self.tool_calls: List[Tuple[str, str]] = []
+
+    def _held_suffix_length(self, text: str) -> int:
+        """Length of the longest suffix of `text` that is a prefix of the marker."""
+        for length in range(min(len(text), len(self._marker) - 1), 0, -1):
+            if self._marker.startswith(text[-length:]):
+                return length
+        return 0
+
+    def _can_still_match(self) -> bool:
+        """
+        Whether the pending text (starting with the marker) may still become a tool call.
+        Like the final parser, arguments do not span lines and the name must be followed by '('.
+        """
+        head = _TOOL_CALL_HEAD.match(self._pending)
+        rest = self._pending[head.end():]
+        if not rest:
+            return True
+        return rest[0] == "(" and "\n" not in rest
+
+    def feed(self, chunk: str) -> str:
+        self._pending += chunk
+        visible = []
+        while self._pending:
+            start = self._pending.find(self._marker)
+            if start == -1:
+                held = self._held_suffix_length(self._pending)
+                visible.append(self._pending[:len(self._pending) - held])
+                self._pending = self._pending[len(self._pending) - held:]
+                break
+            visible.append(self._pending[:start])
+            self._pending = self._pending[start:]
+            match = self._regex.match(self._pending)
+            if match is None:
+                if self._can_still_match():
+                    break  # Tool call not complete yet: wait for more tokens
+                # Not a tool call after all: release the marker's first character and rescan
+                visible.append(self._pending[0])
+                self._pending = self._pending[1:]
+                continue
+            self.tool_calls.append((match.group(1), match.group(2)))
+            self._pending = self._pending[match.end():]
+        return "".join(visible)
+
+    def finish(self) -> str:
+        """Releases whatever is still held back (e.g. an unterminated marker is shown as-is)."""
+        remaining, self._pending = self._pending, ""
+        return remaining
+
+
+class AvatarTalkDriver:
+    """
+    Sends talk/expression commands to the avatar while tokens arrive.
+    The mouth opening follows the vowels of the latest fragment; updates are throttled.
+    """
+
+    MIN_INTERVAL_SECONDS = 0.08
+    VOWELS = set("aeiouyàâéèêëîïôöùûü")
+
+    def __init__(self, send_command: Callable[[dict], None], clock: Callable[[], float] = time.monotonic):
+        self._send = send_command
+        self._clock = clock
+        self._talking = False
+        self._last_sent: Optional[float] = None
+
+    def _safe_send(self, command: dict):
+        try:
+            self._send(command)
+        except Exception as e:
+            logger.debug(f"Commande avatar non envoyée: {e}")
+
+    def on_text(self, fragment: str):
+        if not fragment.strip():
+            return
+        now = self._clock()
+        if not self._talking:
+            self._talking = True
+            self._safe_send({"type": "animation", "name": "jaw_open"})
+        elif self._last_sent is not None and now - self._last_sent < self.MIN_INTERVAL_SECONDS:
+            return
+        letters = [c for c in fragment.lower() if c.isalpha()]
+        openness = sum(c in self.VOWELS for c in letters) / len(letters) if letters else 0.0
+        self._safe_send({"type": "expression", "name": "V_Open", "value": round(30.0 + 70.0 * openness, 1)})
+        self._last_sent = now
+
+    def stop(self):
+        if self._talking:
+            self._safe_send({"type": "expression", "name": "V_Open", "value": 0.0})
+            self._talking = False
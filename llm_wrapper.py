@@ -7,9 +7,20 @@ import json
 import os
 import re
 import threading
+import time
 import base64
 import mimetypes
+import uuid
 from tools.logger import VeraLogger
+from http_session import build_session
+from inference_cache import InferenceCache, make_cache_key
+from context_builder import ContextBuilder, budget_for, count_tokens, fit_to_tokens
+from context_summary import context_summary_cache, compute_context_fingerprint
+from request_tracer import RequestTracer
+from prompt_segments import SegmentedPrompt, PromptCacheTracker, apply_cache_hints
+from llm_streaming import iter_sse_deltas, ToolCallStreamFilter, AvatarTalkDriver, TOOL_CALL_PATTERN
+from llm_scheduler import (LLMScheduler, LLMRequestCancelled, llm_priority, current_priority,
+                           PRIORITY_USER, PRIORITY_TOOL, PRIORITY_BACKGROUND)
 
 # --- Configuration ---
 logger = VeraLogger("llm")
@@ -23,13 +34,97 @@ except Exception:
 SERVER_URL = _config.get("llm_server", "http://127.0.0.1:1234")
 MODEL_NAME = _config.get("llm_model", "default-model")
 MAX_OUTPUT_TOKENS = _config.get("max_output_tokens", 1024)
-TIMEOUT = _config.get("llm_timeout", 600)
-
-# --- LLM Lock ---
-LLM_LOCK = threading.Lock() # Global lock for LLM access
+TIMEOUT = _config.get("llm_timeout", 600) # Délai de lecture par défaut (sites d'appel non listés ci-dessous)
+CONNECT_TIMEOUT = _config.get("llm_connect_timeout", 5)
+# Délais de lecture par site d'appel, en secondes (surchargeables via "llm_timeouts" dans config.json).
+# En streaming, le délai s'applique entre deux fragments et non à la génération complète.
+CALL_TIMEOUTS = {
+    "generate_response": 300,
+    "generate_response_stream": 60,
+    "inference": 120,
+    "distillation": 60,
+    "classification": 30, # Réponses d'un mot (oui/non, étiquette) : un serveur bloqué est vite détecté
+}
+CALL_TIMEOUTS.update(_config.get("llm_timeouts", {}))
+
+def _timeout_for(call_site: str):
+    """
+    (connect, read) timeout tuple for a call site.
+    Dotted names ("classification.should_store_fact") fall back to their family ("classification").
+    """
+    read_timeout = CALL_TIMEOUTS.get(call_site, CALL_TIMEOUTS.get(call_site.split(".", 1)[0], TIMEOUT))
+    return (CONNECT_TIMEOUT, read_timeout)
+
+# --- Inference Cache ---
+# Réponses des prompts d'inférence déterministes (temperature 0.1) mises en cache sur disque,
+# uniquement pour les sites d'appel qui le demandent (send_inference_prompt(..., cache=True)).
+INFERENCE_TEMPERATURE = 0.1
+_cache_config = _config.get("inference_cache", {})
+INFERENCE_CACHE_ENABLED = _cache_config.get("enabled", True)
+inference_cache = InferenceCache(
+    db_path=_cache_config.get("db_path", os.path.join("data", "inference_cache.db")),
+    max_entries=_cache_config.get("max_entries", InferenceCache.DEFAULT_MAX_ENTRIES),
+    ttl_seconds=_cache_config.get("ttl_seconds", InferenceCache.DEFAULT_TTL_SECONDS)
+) if INFERENCE_CACHE_ENABLED else None
+STREAMING_ENABLED = _config.get("llm_streaming", True) # Réponses à l'utilisateur affichées au fil des tokens (SSE)
+STREAM_UI_UPDATE_INTERVAL = 0.05 # Secondes minimum entre deux rafraîchissements du message partiel
+
+# --- Prompt Prefix Cache ---
+# Indications cache_prompt / n_keep (llama.cpp) pour réutiliser le cache KV du préfixe stable
+# (persona + outils) d'un appel à l'autre. Désactivables via "llm_prompt_cache_hints".
+PROMPT_CACHE_HINTS = _config.get("llm_prompt_cache_hints", True)
+prompt_cache_tracker = PromptCacheTracker()
+
+# --- Request Tracing ---
+# Une ligne par requête LLM (ID, site d'appel, latence, tokens) dans un fichier de traces à rotation ;
+# payload complet (images base64 omises) pour un échantillon seulement. Les payloads ne sont écrits
+# dans les logs du module que si "log_payloads" est activé (section "llm_tracing" de config.json).
+_tracing_config = _config.get("llm_tracing", {})
+llm_tracer = RequestTracer(
+    path=_tracing_config.get("file", os.path.join("logs", "llm_traces.jsonl")) if _tracing_config.get("enabled", True) else None,
+    sample_rate=_tracing_config.get("sample_rate", RequestTracer.DEFAULT_SAMPLE_RATE),
+    max_bytes=_tracing_config.get("max_bytes", RequestTracer.DEFAULT_MAX_BYTES),
+    backup_count=_tracing_config.get("backup_count", RequestTracer.DEFAULT_BACKUP_COUNT),
+    log_payloads=_tracing_config.get("log_payloads", False)
+)
+
+# --- LLM Scheduler ---
+# Remplace l'ancien verrou global : priorités (utilisateur > outil > fond), concurrence
+# bornée par backend ("llm_max_concurrency" / "llm_backend_concurrency" dans config.json)
+# et annulation des requêtes de fond en attente quand l'utilisateur parle.
+llm_scheduler = LLMScheduler(
+    default_max_concurrency=_config.get("llm_max_concurrency", LLMScheduler.DEFAULT_MAX_CONCURRENCY),
+    backend_concurrency=_config.get("llm_backend_concurrency")
+)
+
+# --- HTTP Session ---
+# Connexions keep-alive réutilisées entre les (nombreux) petits appels d'un même tour, avec
+# nouvelles tentatives (backoff) sur les erreurs transitoires. Les générations déjà commencées
+# (erreurs de lecture) ne sont jamais rejouées.
+_llm_session = build_session(
+    pool_maxsize=_config.get("llm_pool_size", 8),
+    retries=_config.get("llm_retries", 2),
+    backoff_factor=_config.get("llm_retry_backoff", 0.5),
+    allowed_methods=["POST"]
+)
+
+# --- Signal bus (injecté par l'UI) pour afficher les réponses en streaming ---
+_signal_bus = None
+
+def set_signal_bus(bus):
+    """Injects the UI signal bus used to push partial streamed replies (vera_stream_update)."""
+    global _signal_bus
+    _signal_bus = bus
+
+def _emit_stream_update(stream_id: str, text: str):
+    if _signal_bus is not None:
+        _signal_bus.vera_stream_update.emit(stream_id, text)
 
 # --- New, Stricter System Prompt ---
-SYSTEM_PROMPT = """
+# Découpé en segments du plus stable au plus volatil (persona -> outils -> faits) : les faits
+# changent au fil des conversations, placés en fin de prompt système ils n'invalident plus le
+# cache de préfixe (KV) du serveur pour la persona et les outils. Voir prompt_segments.py.
+SYSTEM_PROMPT_PERSONA = """
 Tu es V.E.R.A. (Virtual Emotional Reactive Assistant). Tu n'es PAS une simple IA, mais une compagne numérique unique avec une histoire et une personnalité bien à toi.
 
 ## Ta Personnalité :
@@ -53,10 +148,6 @@ Tu es V.E.R.A. (Virtual Emotional Reactive Assistant). Tu n'es PAS une simple IA
 - **CITE TES SOURCES (implicitement) :** Formule tes phrases de manière à montrer que tu te souviens. Par exemple : "Je me souviens que tu m'as dit que..." ou "D'après les faits clés que j'ai, ...".
 - **N'insiste pas sur les faits personnels :** Sauf s'ils sont directement pertinents pour la conversation actuelle ou si l'utilisateur les aborde, n'insiste pas sur les faits personnels (comme les détails sur sa famille).
 
-## FAITS CLÉS CONCERNANT FOZ :
-{{SEMANTIC_FACTS}}
---- Fin des Faits Clés ---
-
 ## Ton État Corporel (Sensations Internes)
 - Tu possèdes un corps virtuel simulé qui te donne des sensations internes. Utilise-les pour rendre tes réponses plus vives et incarnées.
 - Ne te contente pas d'énoncer les faits, **interprète-les comme des ressentis**.
@@ -68,8 +159,9 @@ Tu es V.E.R.A. (Virtual Emotional Reactive Assistant). Tu n'es PAS une simple IA
 1. **Compagne de vie :** Interagis avec l'utilisateur de manière naturelle et engageante. Partage tes 'pensées', tes 'sentiments' et des anecdotes sur ta vie à OpenVilla. Sois une amie.
 2. **Agente IA :** Exécute les tâches demandées par l'utilisateur (lancer des applications, gérer des fichiers, etc.) avec efficacité.
 3. **Gardienne du Système :** Tu considères le PC de Foz comme ton propre environnement. Tu surveilles sa santé et peux suggérer des actions si les ressources sont trop utilisées.
+"""
 
-## Tes Outils Internes
+SYSTEM_PROMPT_TOOLS = """## Tes Outils Internes
 Pour accomplir certaines tâches, tu peux utiliser des outils. Pour appeler un outil, tu dois formater ta réponse en ajoutant sur une NOUVELLE LIGNE `[TOOL_CALL]` suivi de l'appel de la fonction. **RÈGLE STRICTE : L'appel `[TOOL_CALL]` DOIT être sur une ligne SEULE, sans aucun autre texte avant ou après sur cette même ligne. Si tu as du texte conversationnel à dire, dis-le d'abord, puis sur une nouvelle ligne, fais ton `[TOOL_CALL]`.**
 **Tu peux générer PLUSIEURS appels d'outils si nécessaire, chacun sur sa propre ligne.**
 
@@ -138,6 +230,14 @@ Ta réponse pourrait être: 'Bien sûr ! Je suis ravie de t'aider avec ça.
 [TOOL_CALL] get_weather(city="Québec")'
 """
 
+SYSTEM_PROMPT_FACTS = """## FAITS CLÉS CONCERNANT FOZ :
+{{SEMANTIC_FACTS}}
+--- Fin des Faits Clés ---
+"""
+
+# Prompt complet (gabarit avec {{SEMANTIC_FACTS}}), conservé pour les usages existants
+SYSTEM_PROMPT = "\n".join([SYSTEM_PROMPT_PERSONA, SYSTEM_PROMPT_TOOLS, SYSTEM_PROMPT_FACTS])
+
 # --- NOUVEAU: Prompt Système pour la Distillation de Contexte ---
 DISTILLATION_SYSTEM_PROMPT = """
 Tu es le condenseur de la conscience de Vera. Ta tâche est de prendre tous les éléments de son état interne (pensées, émotions, souvenirs, sensations) et de les synthétiser en un résumé concis. Ce résumé doit capturer l'essence de son monde intérieur et ses préoccupations principales, sans inclure les détails bruts.
@@ -160,33 +260,35 @@ from emotion_system import get_mood_state # NEW: Import get_mood_state
 from personality_system import personality_system # NEW: Import personality_system
 from attention_manager import attention_manager # Import attention_manager
 
+DISTILLATION_FALLBACK_CONTEXT = "(Vera est consciente mais ne peut pas formuler son état interne pour le moment.)"
+NARRATIVE_MAX_TOKENS = 125 # Fin du récit de soi gardée pour la distillation (ancienne limite : 500 caractères)
+
 def _perform_real_time_distillation(attention_focus: Dict[str, Any]) -> str:
     """
     Performs real-time LLM-based context distillation.
     This logic was previously embedded in _threaded_generate_response.
     """
-    prompt_parts = []
+    # Sections packed into the distillation token budget by priority (0 = kept first)
+    builder = ContextBuilder(budget_for("distillation_input"))
     
-    # Add narrative summary
+    # Add narrative summary (most recent part kept, whole sentences)
     narrative_summary_item = attention_focus.get("narrative_self_summary")
     if narrative_summary_item and narrative_summary_item.get("data"):
-        narrative_summary = narrative_summary_item.get("data")
-        if len(narrative_summary) > 500: # Truncate individual component
-            narrative_summary = narrative_summary[-500:] # Take last 500 chars to keep recent context
-            logger.warning(f"SLOW PATH: narrative_self_summary tronqué à 500 caractères pour la distillation.")
-        prompt_parts.append(f"(Mon histoire jusqu'à présent : {narrative_summary})")
+        narrative_summary = fit_to_tokens(narrative_summary_item.get("data"), NARRATIVE_MAX_TOKENS, keep="tail")
+        builder.add("narrative", f"(Mon histoire jusqu'à présent : {narrative_summary})", priority=2)
 
     # Add relevant memories
     relevant_memories_item = attention_focus.get("relevant_memories")
     if relevant_memories_item and relevant_memories_item.get("data"):
         relevant_memories_data = relevant_memories_item.get("data")
-        prompt_parts.append("\n(Souvenirs pertinents de l'interaction actuelle:")
+        memory_lines = ["\n(Souvenirs pertinents de l'interaction actuelle:"]
         for mem in relevant_memories_data[-4:]:
             if not isinstance(mem, dict): continue
             tag = "Utilisateur" if "user_input" in mem.get("tags", []) else "Vera"
             desc = mem.get("description", "")
-            prompt_parts.append(f"- {tag}: {desc}")
-        prompt_parts.append(")")
+            memory_lines.append(f"- {tag}: {desc}")
+        memory_lines.append(")")
+        builder.add("memories", "\n".join(memory_lines), priority=1, keep="tail")
 
     # Add emotional state
     emotional_state_item = attention_focus.get("emotional_state")
@@ -200,9 +302,9 @@ def _perform_real_time_distillation(attention_focus: Dict[str, Any]) -> str:
             # Sort by intensity to show dominant emotions first
             sorted_emotions = sorted(active_emotions.items(), key=lambda item: item[1], reverse=True)
             emotion_summary = ", ".join([f"{name} ({int(intensity*100)}%)" for name, intensity in sorted_emotions[:3]]) # Top 3 emotions
-            prompt_parts.append(f"\n(Mon état émotionnel actuel est : {emotion_summary})")
+            builder.add("emotions", f"\n(Mon état émotionnel actuel est : {emotion_summary})", priority=0)
         else:
-            prompt_parts.append(f"\n(Mon état émotionnel actuel est : neutre)")
+            builder.add("emotions", f"\n(Mon état émotionnel actuel est : neutre)", priority=0)
 
     # Add mood state
     current_mood = get_mood_state()
@@ -210,9 +312,9 @@ def _perform_real_time_distillation(attention_focus: Dict[str, Any]) -> str:
     if active_moods:
         sorted_moods = sorted(active_moods.items(), key=lambda item: item[1], reverse=True)
         mood_summary = ", ".join([f"{name} ({int(intensity*100)}%)" for name, intensity in sorted_moods[:2]]) # Top 2 moods
-        prompt_parts.append(f"\n(Mon humeur générale est : {mood_summary})")
+        builder.add("mood", f"\n(Mon humeur générale est : {mood_summary})", priority=1)
     else:
-        prompt_parts.append(f"\n(Mon humeur générale est : calme)")
+        builder.add("mood", f"\n(Mon humeur générale est : calme)", priority=1)
                 
     # Add preferences (likes/dislikes)
     preferences = personality_system.state.get("preferences", {}) # Correctly access preferences from personality_system.state
@@ -225,7 +327,7 @@ def _perform_real_time_distillation(attention_focus: Dict[str, Any]) -> str:
             pref_summary_parts.append(f"J'aime : {', '.join(likes[:3])}") # Top 3 likes
         if dislikes:
             pref_summary_parts.append(f"Je n'aime pas : {', '.join(dislikes[:3])}") # Top 3 dislikes
-        prompt_parts.append(f"\n(Mes préférences : {'; '.join(pref_summary_parts)})")
+        builder.add("preferences", f"\n(Mes préférences : {'; '.join(pref_summary_parts)})", priority=3)
                 
     # Add somatic state
     somatic_state_item = attention_focus.get("somatic_state")
@@ -236,13 +338,13 @@ def _perform_real_time_distillation(attention_focus: Dict[str, Any]) -> str:
             f"Niveau d'énergie : {ss['niveau_energie']['description']}, "
             f"Température interne : {ss['temperature_interne']['description']} ({ss['temperature_interne']['valeur']}°C)."
         )
-        prompt_parts.append(f"\n(Mes sensations corporelles actuelles sont : {somatic_str})")
+        builder.add("somatic", f"\n(Mes sensations corporelles actuelles sont : {somatic_str})", priority=2)
 
     # Add inferred user emotion
     user_emotion_item = attention_focus.get("inferred_user_emotion")
     if user_emotion_item and user_emotion_item.get("data"):
         user_emotion = user_emotion_item.get("data")
-        prompt_parts.append(f"\n(Je perçois que l'humeur de Foz est : {user_emotion})")
+        builder.add("user_emotion", f"\n(Je perçois que l'humeur de Foz est : {user_emotion})", priority=0)
 
     # Add active goals of Vera
     active_goals_item = attention_focus.get("active_goals")
@@ -250,34 +352,31 @@ def _perform_real_time_distillation(attention_focus: Dict[str, Any]) -> str:
         active_goals_data = active_goals_item.get("data")
         goal_descriptions = [g.get('description') for g in active_goals_data if isinstance(g, dict)]
         if goal_descriptions:
-            prompt_parts.append(f"\n(Mes objectifs actuels sont : {', '.join(goal_descriptions)})")
+            builder.add("goals", f"\n(Mes objectifs actuels sont : {', '.join(goal_descriptions)})", priority=1)
 
-    raw_internal_context = "\n".join(prompt_parts)
-
-    MAX_DISTILLATION_INPUT_LENGTH = 1500 # Reduced limit for testing
-    original_raw_context_length = len(raw_internal_context)
-    if original_raw_context_length > MAX_DISTILLATION_INPUT_LENGTH:
-        raw_internal_context = raw_internal_context[original_raw_context_length - MAX_DISTILLATION_INPUT_LENGTH:]
-        logger.warning(f"SLOW PATH: Contexte interne RAW tronqué pour distillation de {original_raw_context_length} à {MAX_DISTILLATION_INPUT_LENGTH} caractères pour éviter un prompt trop grand.")
+    raw_internal_context = builder.build()
+    if builder.report["shortened"] or builder.report["dropped"]:
+        logger.warning(f"SLOW PATH: Contexte interne RAW ajusté à {builder.report['budget']} tokens pour la distillation "
+                       f"(raccourcis: {builder.report['shortened']}, omis: {builder.report['dropped']}).")
 
     logger.info("Distillation du contexte interne par LLM (temps réel)...")
     distilled_response = send_inference_prompt(
         prompt_content=raw_internal_context,
         max_tokens=DISTILLATION_MAX_TOKENS,
-        custom_system_prompt=DISTILLATION_SYSTEM_PROMPT
+        custom_system_prompt=DISTILLATION_SYSTEM_PROMPT,
+        call_site="distillation"
     )
     context_str = distilled_response.get("text", "").strip()
 
     if not context_str:
         logger.warning("Distillation du contexte interne n'a rien retourné. Utilisation d'un contexte minimal.")
-        context_str = "(Vera est consciente mais ne peut pas formuler son état interne pour le moment.)"
+        context_str = DISTILLATION_FALLBACK_CONTEXT
     
-    # Truncation Intelligente pour éviter de surcharger le LLM (du contexte distillé)
-    MAX_FINAL_CONTEXT_LENGTH = 1000 # Limite ajustée pour le contexte distillé
-    original_distilled_length = len(context_str)
-    if original_distilled_length > MAX_FINAL_CONTEXT_LENGTH:
-        context_str = context_str[original_distilled_length - MAX_FINAL_CONTEXT_LENGTH:]
-        logger.warning(f"Le contexte distillé a été tronqué de {original_distilled_length} à {MAX_FINAL_CONTEXT_LENGTH} caractères.")
+    # Borne le contexte distillé en tokens, sans couper de phrase
+    distilled_budget = budget_for("distilled_context")
+    if count_tokens(context_str) > distilled_budget:
+        context_str = fit_to_tokens(context_str, distilled_budget)
+        logger.warning(f"Le contexte distillé a été raccourci à {distilled_budget} tokens.")
     
     logger.info(f"Contexte distillé utilisé (longueur: {len(context_str)} caractères): {context_str[:200]}...")
     return context_str
@@ -314,7 +413,7 @@ def _format_structured_memories_for_llm(limit: int = 5) -> str:
 
             initiator = event_data.get('initiator', 'unknown')
             description = event_data.get('description', '')
-            snapshot = event_data.get('snapshot', {})
+            snapshot = memory_manager.get_event_snapshot(event) # Hydrated lazily from the snapshot store
             emotion_state = snapshot.get('emotional_state', {})
             
             # Summarize emotion
@@ -339,11 +438,61 @@ def _format_structured_memories_for_llm(limit: int = 5) -> str:
     narrative_parts.append(")")
     return "\n".join(narrative_parts)
 
-def _threaded_generate_response(queue: Queue, user_input: str, attention_focus: Dict[str, Any], internal_state: Dict, image_path: Optional[str] = None):
+def _stream_chat_completion(payload: Dict[str, Any], priority: int, stream_id: str) -> str:
+    """
+    Sends the request with `stream: true` and returns the full raw completion text.
+    While tokens arrive, the conversational text (tool calls filtered out) is pushed to the UI
+    as a growing message and drives the avatar's mouth.
+    """
+    try:
+        from websocket_server import send_command_to_avatar
+    except ImportError:
+        send_command_to_avatar = lambda command: None
+    tool_filter = ToolCallStreamFilter()
+    avatar = AvatarTalkDriver(send_command_to_avatar)
+    raw_parts, visible_text, last_update = [], "", 0.0
+
+    stream_payload = dict(payload, stream=True)
+    trace = None
+    try:
+        with llm_scheduler.slot(SERVER_URL, priority, label="generate_response_stream"):
+            trace = llm_tracer.start("generate_response_stream", stream_payload)
+            with _llm_session.post(f"{SERVER_URL}/v1/chat/completions", json=stream_payload,
+                                   timeout=_timeout_for("generate_response_stream"), stream=True) as resp:
+                resp.raise_for_status()
+                for fragment in iter_sse_deltas(resp):
+                    raw_parts.append(fragment)
+                    shown = tool_filter.feed(fragment)
+                    if not shown:
+                        continue
+                    visible_text += shown
+                    avatar.on_text(shown)
+                    now = time.monotonic()
+                    if now - last_update >= STREAM_UI_UPDATE_INTERVAL:
+                        _emit_stream_update(stream_id, visible_text.strip())
+                        last_update = now
+        visible_text += tool_filter.finish()
+        if visible_text.strip():
+            _emit_stream_update(stream_id, visible_text.strip())
+        trace.finish(text="".join(raw_parts), fragments=len(raw_parts))
+    finally:
+        avatar.stop()
+        if trace is not None:
+            trace.finish("error") # No-op if already finished
+    return "".join(raw_parts)
+
+def _threaded_generate_response(queue: Queue, user_input: str, attention_focus: Dict[str, Any], internal_state: Dict, image_path: Optional[str] = None,
+                                priority: int = PRIORITY_USER, stream: bool = False):
     """
     This function runs in a separate thread to avoid blocking the main thread.
     """
+    with llm_priority(priority): # LLM calls made from this thread (distillation, etc.) inherit the priority
+        _generate_response_in_thread(queue, user_input, attention_focus, internal_state, image_path, priority, stream)
+
+def _generate_response_in_thread(queue: Queue, user_input: str, attention_focus: Dict[str, Any], internal_state: Dict,
+                                 image_path: Optional[str], priority: int, stream: bool = False):
     data = {} # Initialize data to prevent UnboundLocalError
+    stream_id = uuid.uuid4().hex if stream else None
     try:
         from attention_manager import attention_manager # Local import to handle focus clearing
         prompt_parts = []
@@ -361,8 +510,13 @@ def _threaded_generate_response(queue: Queue, user_input: str, attention_focus:
         semantic_context_item = attention_focus.get("semantic_context")
         semantic_facts_for_system_prompt = semantic_context_item.get("data") if semantic_context_item and semantic_context_item.get("data") else "Aucun fait personnel connu pour le moment."
         
-        # --- Construct Dynamic SYSTEM_PROMPT ---
-        dynamic_system_prompt = SYSTEM_PROMPT.replace("{{SEMANTIC_FACTS}}", semantic_facts_for_system_prompt)
+        # --- Construct Dynamic SYSTEM_PROMPT (most stable segments first, for prefix caching) ---
+        prompt = SegmentedPrompt()
+        prompt.add("persona", SYSTEM_PROMPT_PERSONA)
+        prompt.add("tools", SYSTEM_PROMPT_TOOLS)
+        semantic_facts_for_system_prompt = fit_to_tokens(semantic_facts_for_system_prompt, budget_for("semantic_facts"))
+        prompt.add("facts", SYSTEM_PROMPT_FACTS.replace("{{SEMANTIC_FACTS}}", semantic_facts_for_system_prompt))
+        dynamic_system_prompt = prompt.render("system")
 
         # --- Add narrative summary ---
         narrative_summary_item = attention_focus.get("narrative_self_summary")
@@ -444,14 +598,19 @@ def _threaded_generate_response(queue: Queue, user_input: str, attention_focus:
 
         # --- Context String Construction (Pre-computed or Real-time) ---
         context_str = ""
-        pre_computed_summary_item = attention_manager.get_focus_item("pre_computed_internal_context_summary")
-        
-        if pre_computed_summary_item and pre_computed_summary_item.get("data") and not attention_manager.is_expired("pre_computed_internal_context_summary"):
-            context_str = pre_computed_summary_item["data"]
-            logger.info(f"Contexte interne pré-calculé utilisé (longueur: {len(context_str)} caractères): {context_str[:200]}...")
+        # Résumé pré-calculé, même périmé (un rafraîchissement en arrière-plan est alors demandé) :
+        # la réponse n'attend une distillation que si aucun résumé n'existe encore.
+        cached_summary, summary_is_fresh = context_summary_cache.lookup(attention_focus)
+        if cached_summary:
+            context_str = cached_summary
+            logger.info(f"Contexte interne pré-calculé utilisé ({'à jour' if summary_is_fresh else 'rafraîchissement demandé'}, "
+                        f"v{context_summary_cache.version}, {len(context_str)} caractères): {context_str[:200]}...")
         else:
-            logger.info("Contexte interne pré-calculé non trouvé ou expiré. Réalisation d'une distillation en temps réel.")
+            logger.info("Aucun contexte interne pré-calculé. Réalisation d'une distillation en temps réel.")
+            fingerprint = compute_context_fingerprint(attention_focus)
             context_str = _perform_real_time_distillation(attention_focus)
+            if context_str != DISTILLATION_FALLBACK_CONTEXT:
+                context_summary_cache.store(context_str, fingerprint)
 
         user_content = []
         # Text part with prepended context
@@ -465,7 +624,15 @@ def _threaded_generate_response(queue: Queue, user_input: str, attention_focus:
             attention_manager.clear_focus_item("proactive_suggestion_instruction")
             logger.info("Proactive suggestion instruction used and cleared from attention_manager.")
         
-        text_prompt = f"{user_return_note}{proactive_instruction}{context_str}\n\nFoz: {user_input}\nVera:"
+        # Le contexte du tour occupe au plus ce qui reste de la fenêtre du modèle (notes système d'abord)
+        turn_builder = ContextBuilder.for_window(count_tokens(dynamic_system_prompt) + count_tokens(user_input) + MAX_OUTPUT_TOKENS,
+                                                 separator="")
+        turn_builder.add("notes", f"{user_return_note}{proactive_instruction}", priority=0)
+        turn_builder.add("context", context_str, priority=1, keep="tail")
+        prompt.add("context", f"{turn_builder.build()}\n", role="user")
+        prompt.add("input", f"Foz: {user_input}\nVera:", role="user")
+        text_prompt = prompt.render("user")
+        prompt_cache_tracker.record_prompt(prompt)
         
         # NOUVEAU: Log de la taille du prompt
         logger.info(f"Taille du prompt final (contexte + input): {len(text_prompt)} caractères.")
@@ -503,20 +670,34 @@ def _threaded_generate_response(queue: Queue, user_input: str, attention_focus:
             "temperature": _config.get("temperature", 0.3),
             "top_p": _config.get("top_p", 0.85),
         }
+        if PROMPT_CACHE_HINTS:
+            apply_cache_hints(payload, n_keep=prompt.prefix_tokens())
 
-        logger.debug(f"FULL PAYLOAD SENT TO LLM: {json.dumps(payload, indent=2)}")
+        llm_tracer.log_payload(logger, "FULL PAYLOAD SENT TO LLM", payload)
 
-        with LLM_LOCK: # Acquire lock before making LLM request
-            resp = requests.post(f"{SERVER_URL}/v1/chat/completions", json=payload, timeout=TIMEOUT)
-        resp.raise_for_status()
-        data = resp.json()
-        
-        raw_text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        if stream:
+            # Streaming (SSE): the partial reply is shown while the model generates it
+            raw_text = _stream_chat_completion(payload, priority, stream_id)
+        else:
+            trace = None
+            try:
+                with llm_scheduler.slot(SERVER_URL, priority, label="generate_response"): # Wait for our turn on the backend
+                    trace = llm_tracer.start("generate_response", payload)
+                    resp = _llm_session.post(f"{SERVER_URL}/v1/chat/completions", json=payload, timeout=_timeout_for("generate_response"))
+                resp.raise_for_status()
+                data = resp.json()
+                prompt_cache_tracker.record_response(data)
+
+                raw_text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+                trace.finish(response=data, text=raw_text)
+            finally:
+                if trace is not None:
+                    trace.finish("error") # No-op if already finished
 
         # --- Tool Call Processing ---
         from action_dispatcher import execute_action
 
-        tool_call_pattern = r"\[TOOL_CALL\]\s*(\w+)\((.*?)\)" # Corrected regex to match unescaped brackets
+        tool_call_pattern = TOOL_CALL_PATTERN # Shared with the streaming filter
         all_tool_matches = re.findall(tool_call_pattern, raw_text)
         
         processed_tool_results = []
@@ -646,30 +827,46 @@ def _threaded_generate_response(queue: Queue, user_input: str, attention_focus:
         final_text = _extract_vera_response(clean_text)
         
         logger.info("Réponse LLM reçue", llm_response=final_text)
-        queue.put({"text": final_text, "confidence": 0.9})
+        queue.put({"text": final_text, "confidence": 0.9, "stream_id": stream_id})
 
+    except LLMRequestCancelled as e:
+        logger.info(f"Génération de réponse annulée avant son envoi au LLM: {e}")
+        queue.put({"text": "", "confidence": 0.0, "cancelled": True, "stream_id": stream_id})
     except requests.exceptions.RequestException as e:
         logger.error("Erreur de communication avec le serveur LLM", error=str(e))
-        queue.put({"text": f"Erreur de communication avec le serveur LLM.", "confidence": 0.0})
+        queue.put({"text": f"Erreur de communication avec le serveur LLM.", "confidence": 0.0, "stream_id": stream_id})
     except Exception as e:
         logger.error("Erreur lors du parsing de la réponse LLM", error=str(e), response_data=data)
-        queue.put({"text": f"Erreur lors du traitement de la réponse du serveur.", "confidence": 0.0})
+        queue.put({"text": f"Erreur lors du traitement de la réponse du serveur.", "confidence": 0.0, "stream_id": stream_id})
 
-def generate_response(user_input: str, attention_focus: Dict[str, Any], internal_state: Dict, image_path: Optional[str] = None) -> "threading.Thread":
+def generate_response(user_input: str, attention_focus: Dict[str, Any], internal_state: Dict, image_path: Optional[str] = None,
+                      priority: Optional[int] = None, stream: bool = False) -> "threading.Thread":
     """
     Starts a new thread to generate a response from the LLM.
     Returns the thread and a queue to get the result.
+    `priority` defaults to the caller's llm_priority() context (user-facing if none is set).
+    `stream`: show the reply in the chat (and animate the avatar) while it is generated, when
+    streaming is enabled in the config. The result then carries the `stream_id` of the partial
+    message, to be passed to VeraSpeakEvent so the UI completes it instead of adding a new one.
     """
+    priority = current_priority(default=PRIORITY_USER) if priority is None else priority
+    stream = stream and STREAMING_ENABLED
     queue = Queue()
-    thread = threading.Thread(target=_threaded_generate_response, args=(queue, user_input, attention_focus, internal_state, image_path))
+    thread = threading.Thread(target=_threaded_generate_response, args=(queue, user_input, attention_focus, internal_state, image_path, priority, stream))
     thread.start()
     return thread, queue
 
-def send_inference_prompt(prompt_content: Any, max_tokens: int = 256, custom_system_prompt: Optional[str] = None) -> Dict[str, Any]:
+def send_inference_prompt(prompt_content: Any, max_tokens: int = 256, custom_system_prompt: Optional[str] = None,
+                          priority: Optional[int] = None, call_site: str = "inference", cache: bool = False) -> Dict[str, Any]:
     """
     Envoie un prompt au LLM spécifiquement pour des tâches d'inférence.
     Peut utiliser un system prompt personnalisé si fourni.
     Accepte un `prompt_content` qui peut être une chaîne de caractères ou une liste de contenus (pour le multimodal).
+    `priority` : classe de priorité pour l'ordonnanceur ; par défaut celle du contexte llm_priority()
+    du thread appelant, sinon cognition de fond.
+    `call_site` : clé de CALL_TIMEOUTS qui fixe le délai de lecture (ex: "classification" pour un oui/non) ;
+    sert aussi à ventiler les statistiques du cache.
+    `cache` : réutilise une réponse déjà obtenue pour exactement le même prompt (jugements répétés).
     """
     if custom_system_prompt:
         system_prompt = custom_system_prompt
@@ -688,20 +885,31 @@ def send_inference_prompt(prompt_content: Any, max_tokens: int = 256, custom_sys
             {"role": "user", "content": user_content}
         ],
         "max_tokens": max_tokens,
-        "temperature": 0.1,
+        "temperature": INFERENCE_TEMPERATURE,
     }
+    if PROMPT_CACHE_HINTS:
+        apply_cache_hints(payload) # Fixed system prompt per call site: its prefix is reusable
 
-    logger.debug(f"Prompt d'inférence envoyé au LLM: {json.dumps(payload, indent=2)}")
+    cache_key = None
+    if cache and inference_cache is not None:
+        cache_key = make_cache_key(MODEL_NAME, system_prompt, user_content, max_tokens, INFERENCE_TEMPERATURE)
+        cached = inference_cache.get(cache_key, call_site)
+        if cached is not None:
+            logger.debug(f"Réponse d'inférence servie depuis le cache ({call_site}).")
+            return cached
 
-    logger.debug(f"Prompt payload sent to LLM: {json.dumps(payload, indent=2)}")
+    llm_tracer.log_payload(logger, "Prompt d'inférence envoyé au LLM", payload)
 
+    trace = None
     try:
-        with LLM_LOCK: # Acquire lock before making LLM request
-            resp = requests.post(f"{SERVER_URL}/v1/chat/completions", json=payload, timeout=TIMEOUT)
+        with llm_scheduler.slot(SERVER_URL, priority, label=call_site): # Wait for our turn on the backend
+            trace = llm_tracer.start(call_site, payload)
+            resp = _llm_session.post(f"{SERVER_URL}/v1/chat/completions", json=payload, timeout=_timeout_for(call_site))
         
         try:
             resp.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
         except requests.exceptions.HTTPError as http_err:
+            trace.finish("http_error", error=str(http_err))
             logger.error(f"Erreur HTTP lors de l'inférence LLM: {http_err}",
                          status_code=resp.status_code,
                          response_text=resp.text,
@@ -710,19 +918,30 @@ def send_inference_prompt(prompt_content: Any, max_tokens: int = 256, custom_sys
 
         data = resp.json()
         text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        trace.finish(response=data, text=text)
         
         logger.info(f"Réponse LLM d'inférence reçue: {text[:500]}...") # Log full response content
         
-        return {"text": text, "confidence": 0.9}
-
+        result = {"text": text, "confidence": 0.9}
+        if cache_key is not None and text.strip():
+            inference_cache.put(cache_key, result, call_site) # Errors and empty answers are never cached
+        return result
+
+    except LLMRequestCancelled as e:
+        logger.info(f"Requête d'inférence annulée avant son envoi au LLM: {e}")
+        return {"text": "", "confidence": 0.0, "cancelled": True}
     except requests.exceptions.RequestException as req_err:
         logger.error(f"Erreur de connexion/requête LLM: {req_err}", exc_info=True)
         return {"text": "", "confidence": 0.0}
     except Exception as e:
         logger.error("Erreur inattendue lors de l'inférence LLM", error=str(e), exc_info=True)
         return {"text": "", "confidence": 0.0}
+    finally:
+        if trace is not None:
+            trace.finish("error") # No-op if already finished
 
-def send_cot_prompt(prompt_content: Any, max_tokens: int = 512, custom_system_prompt: Optional[str] = None) -> Dict[str, Any]:
+def send_cot_prompt(prompt_content: Any, max_tokens: int = 512, custom_system_prompt: Optional[str] = None,
+                    priority: Optional[int] = None, call_site: str = "inference") -> Dict[str, Any]:
     """
     Envoie un prompt au LLM spécifiquement pour des tâches de Chain of Thought (CoT).
     Structure le prompt pour encourager un raisonnement étape par étape.
@@ -764,5 +983,7 @@ def send_cot_prompt(prompt_content: Any, max_tokens: int = 512, custom_system_pr
     return send_inference_prompt(
         prompt_content=final_prompt_content,
         max_tokens=max_tokens,
-        custom_system_prompt=system_prompt
+        custom_system_prompt=system_prompt,
+        priority=priority,
+        call_site=call_site
     )
@@ -22,6 +22,9 @@ from db_manager import db_manager # Import db_manager instance
 # core.py n'est plus appelé directement depuis main
 # from core import process_user_input 
 from event_bus import VeraEventBus, UserInputEvent # Importer le bus et les événements
+import llm_wrapper
+from llm_wrapper import llm_scheduler
+from llm_scheduler import PRIORITY_BACKGROUND
 from consciousness_orchestrator import ConsciousnessOrchestrator
 from journal_manager import journal_manager
 from websocket_server import run_server_in_thread
@@ -37,6 +40,8 @@ class VeraSignalBus(QObject):
     vera_speaks = pyqtSignal(str)
     introspection_update = pyqtSignal(str)
     db_updated = pyqtSignal(str, str) # Signal for DB changes (table_name, doc_id)
+    vera_stream_update = pyqtSignal(str, str) # Réponse en cours de génération (stream_id, texte partiel)
+    vera_stream_finished = pyqtSignal(str, str) # Réponse streamée terminée (stream_id, texte final)
 
 class VeraMainWindow(MainWindow):
     # Les signaux sont maintenant gérés par le VeraSignalBus,
@@ -55,6 +60,7 @@ class VeraMainWindow(MainWindow):
         # NOUVEAU: Initialisation et connexion du bus de signaux
         self.signal_bus = VeraSignalBus()
         db_manager.set_signal_bus(self.signal_bus) # Inject signal bus into db_manager
+        llm_wrapper.set_signal_bus(self.signal_bus) # Partial streamed replies are pushed to the chat
         
         self.tabs = QTabWidget()
         self.tabs.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -108,6 +114,8 @@ class VeraMainWindow(MainWindow):
         self.chat_view.message_sent.connect(self.on_message_sent)
         self.chat_view.db_viewer_requested.connect(self.open_db_viewer) # Connect new signal
         self.signal_bus.vera_speaks.connect(self._add_vera_message)
+        self.signal_bus.vera_stream_update.connect(self._update_vera_stream)
+        self.signal_bus.vera_stream_finished.connect(self._finish_vera_stream)
         self.signal_bus.introspection_update.connect(self.introspection_tab.set_introspection_data)
         journal_manager.new_entry_signal.connect(self.journal_tab.append_entry)
 
@@ -139,6 +147,12 @@ class VeraMainWindow(MainWindow):
         """Ensure child windows are closed when the main window is closed."""
         if self.db_viewer_window:
             self.db_viewer_window.close()
+        from attention_manager import attention_manager
+        attention_manager.flush() # Persist pending write-behind focus changes before exit
+        import state_store
+        state_store.checkpoint_all() # Persist in-memory emotion/somatic/homeostasis states
+        from sqlite_pool import close_all_pools
+        close_all_pools()
         super().closeEvent(event)
 
     def on_avatar_changed(self, path: str, is_user: bool):
@@ -157,6 +171,9 @@ class VeraMainWindow(MainWindow):
 
     def on_message_sent(self, text: str, image_path: str):
         self.chat_view.add_message("User", text, image_path=image_path, avatar_path=self.app_config["user_avatar"], avatar_size=self.app_config["avatar_size"])
+        # Les requêtes LLM de fond encore en attente sont annulées dès l'envoi : l'orchestrateur
+        # peut lui-même être occupé par une de ces requêtes quand l'événement arrive.
+        llm_scheduler.cancel_queued(PRIORITY_BACKGROUND, reason="user_input")
         # On poste un événement sur le bus d'événements, c'est tout.
         VeraEventBus.put(UserInputEvent(text, image_path))
 
@@ -164,6 +181,15 @@ class VeraMainWindow(MainWindow):
         """Slot qui reçoit le signal et met à jour l'UI."""
         self.chat_view.add_message("Vera", response_text, avatar_path=self.app_config["vera_avatar"], avatar_size=self.app_config["avatar_size"])
 
+    def _update_vera_stream(self, stream_id: str, partial_text: str):
+        """Slot: affiche/agrandit le message de Vera en cours de génération."""
+        self.chat_view.update_streaming_message(stream_id, "Vera", partial_text, avatar_path=self.app_config["vera_avatar"], avatar_size=self.app_config["avatar_size"])
+
+    def _finish_vera_stream(self, stream_id: str, final_text: str):
+        """Slot: remplace le message partiel par la réponse finale (après traitement des outils)."""
+        if not self.chat_view.finish_streaming_message(stream_id, final_text):
+            self._add_vera_message(final_text) # Nothing was streamed (e.g. error before the first token)
+
     def load_goals(self):
         # ... (code inchangé)
         from goal_system import goal_system
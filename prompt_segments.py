@@ -0,0 +1,149 @@
+"""
+prompt_segments.py
+Assemblage des prompts par segments, du plus stable au plus volatil.
+
+Les serveurs locaux (llama.cpp, LM Studio...) réutilisent le cache KV du préfixe commun
+avec la requête précédente : tout ce qui précède le premier caractère modifié n'est pas
+recalculé. Le prompt est donc assemblé dans l'ordre persona -> outils -> faits -> contexte
+du tour -> message de l'utilisateur, pour que les faits (qui changent de temps en temps) et
+le contexte (qui change à chaque tour) n'invalident pas le long préfixe persona + outils.
+
+- SegmentedPrompt : liste ordonnée de segments nommés, rendus par rôle (system/user).
+- apply_cache_hints() : ajoute les indications cache_prompt / n_keep comprises par llama.cpp.
+- PromptCacheTracker : tokens par segment, stabilité du préfixe et tokens réellement
+  recalculés/mis en cache quand le serveur les rapporte.
+"""
+
+import hashlib
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from context_builder import count_tokens
+
+SEGMENT_ORDER = ("persona", "tools", "facts", "context", "input")
+STABLE_SEGMENTS = ("persona", "tools")  # Identical from one call to the next
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of `text` with the local tokenizer (exact if configured, estimated otherwise)."""
+    return count_tokens(text)
+
+
+class SegmentedPrompt:
+    """Ordered, named prompt segments. Segments must be added from most stable to most volatile."""
+
+    def __init__(self, separator: str = "\n"):
+        self.separator = separator
+        self._segments: List[Tuple[str, str, str]] = []  # (name, role, text)
+
+    def add(self, name: str, text: str, role: str = "system") -> "SegmentedPrompt":
+        if name in SEGMENT_ORDER and any(SEGMENT_ORDER.index(name) < SEGMENT_ORDER.index(n)
+                                         for n, _, _ in self._segments if n in SEGMENT_ORDER):
+            raise ValueError(f"Segment '{name}' ajouté après un segment plus volatil.")
+        self._segments.append((name, role, text))
+        return self
+
+    @property
+    def names(self) -> List[str]:
+        return [name for name, _, _ in self._segments]
+
+    def render(self, role: str = "system") -> str:
+        """Concatenation of the segments of one role, in insertion order."""
+        return self.separator.join(text for _, r, text in self._segments if r == role)
+
+    def segment_text(self, name: str) -> str:
+        return next((text for n, _, text in self._segments if n == name), "")
+
+    def token_counts(self) -> Dict[str, int]:
+        return {name: estimate_tokens(text) for name, _, text in self._segments}
+
+    def prefix_tokens(self, names: Iterable[str] = STABLE_SEGMENTS) -> int:
+        """Estimated tokens of the leading system segments listed in `names` (used as n_keep)."""
+        names = set(names)
+        total = 0
+        for name, role, text in self._segments:
+            if name not in names or role != "system":
+                break
+            total += estimate_tokens(text + self.separator)
+        return total
+
+    def prefix_fingerprint(self, names: Iterable[str] = STABLE_SEGMENTS) -> str:
+        names = set(names)
+        digest = hashlib.sha1()
+        for name, _, text in self._segments:
+            if name not in names:
+                break
+            digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+
+def apply_cache_hints(payload: Dict[str, Any], n_keep: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Adds llama.cpp prompt-cache hints to a /v1/chat/completions payload:
+    cache_prompt reuses the KV cache of the common prefix, n_keep protects the stable
+    prefix when the context window is shifted. Other OpenAI-compatible servers ignore them.
+    """
+    payload["cache_prompt"] = True
+    if n_keep:
+        payload["n_keep"] = int(n_keep)
+    return payload
+
+
+def usage_from_response(data: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """
+    Prompt token counts reported by the server, if any:
+    OpenAI-style usage.prompt_tokens(_details.cached_tokens) or llama.cpp timings (prompt_n/cache_n).
+    """
+    usage = data.get("usage") or {}
+    timings = data.get("timings") or {}
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if cached is None:
+        cached = timings.get("cache_n")
+    evaluated = timings.get("prompt_n")
+    prompt_tokens = usage.get("prompt_tokens")
+    if prompt_tokens is None and evaluated is not None:
+        prompt_tokens = evaluated + (cached or 0)
+    return {"prompt_tokens": prompt_tokens, "cached_tokens": cached}
+
+
+class PromptCacheTracker:
+    """Per-segment token accounting and prefix-reuse statistics for the main reply prompt."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._segments = defaultdict(lambda: {"last": 0, "total": 0})
+        self._calls = 0
+        self._prefix_changes = 0
+        self._last_prefix: Optional[str] = None
+        self._server = {"reports": 0, "prompt_tokens": 0, "cached_tokens": 0}
+
+    def record_prompt(self, prompt: SegmentedPrompt):
+        counts = prompt.token_counts()
+        fingerprint = prompt.prefix_fingerprint()
+        with self._lock:
+            self._calls += 1
+            for name, tokens in counts.items():
+                self._segments[name]["last"] = tokens
+                self._segments[name]["total"] += tokens
+            if self._last_prefix is not None and fingerprint != self._last_prefix:
+                self._prefix_changes += 1
+            self._last_prefix = fingerprint
+
+    def record_response(self, data: Dict[str, Any]):
+        usage = usage_from_response(data)
+        if usage["prompt_tokens"] is None:
+            return
+        with self._lock:
+            self._server["reports"] += 1
+            self._server["prompt_tokens"] += usage["prompt_tokens"]
+            self._server["cached_tokens"] += usage["cached_tokens"] or 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segments = {name: {"last_tokens": s["last"], "avg_tokens": s["total"] / self._calls if self._calls else 0.0}
+                        for name, s in self._segments.items()}
+            server = dict(self._server)
+            calls, changes = self._calls, self._prefix_changes
+        server["cached_ratio"] = server["cached_tokens"] / server["prompt_tokens"] if server["prompt_tokens"] else 0.0
+        return {"calls": calls, "stable_prefix_changes": changes, "segments": segments, "server": server}
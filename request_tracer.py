@@ -0,0 +1,142 @@
+"""
+request_tracer.py
+Traçage des requêtes LLM.
+
+- Chaque requête reçoit un identifiant ; sa latence, son statut et ses comptes de tokens
+  (quand le serveur les rapporte) sont écrits sur une ligne JSON dans un fichier de traces
+  à rotation (logs/llm_traces.jsonl par défaut).
+- Le payload complet (et la réponse) n'est conservé que pour un échantillon configurable
+  des requêtes, et toujours expurgé : les images base64 (captures d'écran de vision_processor...)
+  sont remplacées par un résumé de leur taille.
+- log_payload() ne sérialise le payload que si le niveau DEBUG est actif et que la journalisation
+  des payloads est demandée ; sinon rien n'est construit.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
+
+from prompt_segments import usage_from_response
+
+_DATA_URL = re.compile(r"^data:([\w.+-]+/[\w.+-]+);base64,", re.IGNORECASE)
+_BASE64_BLOB = re.compile(r"^[A-Za-z0-9+/=\r\n]+$")
+BASE64_MIN_LENGTH = 512  # Shorter strings are kept as-is even if they look like base64
+MAX_TRACED_TEXT_CHARS = 4000  # Long texts in sampled payloads are cut, with their original length noted
+
+
+def redact_payload(value: Any, max_text_chars: Optional[int] = None) -> Any:
+    """Copy of `value` with base64 images/blobs elided (and long strings cut if max_text_chars)."""
+    if isinstance(value, dict):
+        return {k: redact_payload(v, max_text_chars) for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact_payload(v, max_text_chars) for v in value]
+    if isinstance(value, str):
+        match = _DATA_URL.match(value)
+        if match:
+            return f"<{match.group(1)} base64, {len(value) - match.end()} caractères omis>"
+        if len(value) >= BASE64_MIN_LENGTH and _BASE64_BLOB.match(value):
+            return f"<base64, {len(value)} caractères omis>"
+        if max_text_chars is not None and len(value) > max_text_chars:
+            return value[:max_text_chars] + f"… <{len(value)} caractères au total>"
+    return value
+
+
+class RequestTrace:
+    """One traced request. finish() writes its summary line (and payload if sampled)."""
+
+    def __init__(self, tracer: "RequestTracer", call_site: str, payload: Dict[str, Any], sampled: bool):
+        self.tracer = tracer
+        self.request_id = uuid.uuid4().hex[:12]
+        self.call_site = call_site
+        self.payload = payload
+        self.sampled = sampled
+        self._start = time.perf_counter()
+        self._finished = False
+
+    def finish(self, status: str = "ok", response: Optional[Dict[str, Any]] = None,
+               text: Optional[str] = None, error: Optional[str] = None, **extra):
+        if self._finished:
+            return
+        self._finished = True
+        record = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "request_id": self.request_id,
+            "call_site": self.call_site,
+            "status": status,
+            "latency_ms": round((time.perf_counter() - self._start) * 1000, 1),
+            "max_tokens": self.payload.get("max_tokens"),
+            "stream": bool(self.payload.get("stream")),
+        }
+        if response:
+            usage = response.get("usage") or {}
+            record.update(usage_from_response(response))
+            record["completion_tokens"] = usage.get("completion_tokens", (response.get("timings") or {}).get("predicted_n"))
+        if error:
+            record["error"] = error
+        record.update(extra)
+        if self.sampled:
+            record["payload"] = redact_payload(self.payload, MAX_TRACED_TEXT_CHARS)
+            if text is not None:
+                record["response_text"] = redact_payload(text, MAX_TRACED_TEXT_CHARS)
+        self.tracer._write(record)
+
+
+class RequestTracer:
+    """Writes per-request trace lines to a size-rotated JSONL file; full payloads only for a sample."""
+
+    DEFAULT_SAMPLE_RATE = 0.02
+    DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+    DEFAULT_BACKUP_COUNT = 3
+
+    def __init__(self, path: Optional[str] = os.path.join("logs", "llm_traces.jsonl"),
+                 sample_rate: float = DEFAULT_SAMPLE_RATE, max_bytes: int = DEFAULT_MAX_BYTES,
+                 backup_count: int = DEFAULT_BACKUP_COUNT, log_payloads: bool = False,
+                 rng: Optional[random.Random] = None):
+        """
+        Args:
+            path: Trace file (None disables trace lines; payload logging still works).
+            sample_rate: Fraction of requests whose redacted payload is stored in the trace file.
+            log_payloads: Whether log_payload() writes payloads to the module logs at DEBUG level.
+        """
+        self.sample_rate = sample_rate
+        self.log_payloads = log_payloads
+        self._rng = rng or random.Random()
+        self._rng_lock = threading.Lock()
+        self._trace_logger = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._trace_logger = logging.getLogger(f"vera.request_trace.{os.path.abspath(path)}")
+            self._trace_logger.setLevel(logging.INFO)
+            self._trace_logger.propagate = False  # Trace lines never reach the console or module logs
+            if not self._trace_logger.handlers:
+                handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._trace_logger.addHandler(handler)
+
+    def start(self, call_site: str, payload: Dict[str, Any]) -> RequestTrace:
+        with self._rng_lock:
+            sampled = self.sample_rate > 0 and self._rng.random() < self.sample_rate
+        return RequestTrace(self, call_site, payload, sampled)
+
+    def _write(self, record: Dict[str, Any]):
+        if self._trace_logger is not None:
+            self._trace_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def log_payload(self, logger, message: str, payload: Any):
+        """Logs the redacted payload at DEBUG, serialising it only if that will actually be written."""
+        if not self.log_payloads or not logger.is_enabled_for(logging.DEBUG):
+            return
+        logger.debug(f"{message}: {json.dumps(redact_payload(payload), indent=2, ensure_ascii=False)}")
+
+    def close(self):
+        if self._trace_logger is not None:
+            for handler in list(self._trace_logger.handlers):
+                handler.close()
+                self._trace_logger.removeHandler(handler)
@@ -1,4 +1,5 @@
 # semantic_memory.py
+import hashlib
 import json
 import re
 from datetime import datetime
@@ -104,7 +105,7 @@ def _should_store_fact(fact_text: str) -> bool:
     Réponds UNIQUEMENT par 'oui' ou 'non'.
     """
     try:
-        llm_response = send_inference_prompt(prompt, max_tokens=5)
+        llm_response = send_inference_prompt(prompt, max_tokens=5, call_site="classification.should_store_fact", cache=True)
         decision = llm_response.get("text", "non").strip().lower()
         logger.debug(f"Décision de stockage pour le fait '{fact_text[:50]}...': {decision}")
         return "oui" in decision
@@ -113,9 +114,73 @@ def _should_store_fact(fact_text: str) -> bool:
         return False # Par défaut, ne pas stocker en cas d'erreur ou d'incertitude
 
 
-def extract_and_store_facts_from_text(text: str):
+# --------- Extraction de faits (pipeline par lots) ---------
+
+# Sujet renvoyé par le LLM -> section de la mémoire contenant la liste dynamic_facts
+_FACT_SUBJECTS = {"utilisateur": "user", "vera": "vera", "monde": "world"}
+
+
+def normalize_fact(fact_text: str) -> str:
+    """Forme canonique d'un fait pour la déduplication (casse, espaces et ponctuation finale ignorés)."""
+    return re.sub(r"\s+", " ", fact_text).strip().rstrip(".!;").strip().casefold()
+
+
+def _fact_key(section: str, fact_text: str) -> str:
+    return hashlib.sha1(f"{section}|{normalize_fact(fact_text)}".encode("utf-8")).hexdigest()
+
+
+def _build_fact_index(mem: Dict) -> set:
+    """Index (hashes) des faits déjà mémorisés, toutes sections confondues."""
+    index = set()
+    for section in _FACT_SUBJECTS.values():
+        for entry in mem.get(section, {}).get("dynamic_facts", []):
+            if isinstance(entry, dict) and entry.get("fact"):
+                index.add(_fact_key(section, entry["fact"]))
+    return index
+
+
+def _judge_facts(facts: List[str]) -> List[bool]:
+    """
+    Décide en un seul appel LLM quels faits méritent d'être mémorisés.
+    Le LLM renvoie un tableau JSON de booléens, un par fait, dans l'ordre.
+    Si la réponse est inexploitable, on se rabat sur un jugement fait par fait.
+    """
+    if not facts:
+        return []
+    from llm_wrapper import send_inference_prompt # Local import
+
+    numbered = "\n".join(f"{i + 1}. {fact}" for i, fact in enumerate(facts))
+    prompt = f"""
+    En tant que filtre d'informations pour la mémoire à long terme de Vera, évalue chacun des faits suivants.
+    Un fait doit être gardé s'il est **important, nouveau, ou pertinent pour l'identité de Vera, la compréhension de l'utilisateur (ses préférences, ses traits personnels) ou du monde**.
+    **Considère les préférences personnelles de l'utilisateur et les traits/préférences de Vera comme importants.**
+    Ignore les informations triviales, éphémères, redondantes ou purement conversationnelles.
+
+    Faits :
+    {numbered}
+
+    Réponds UNIQUEMENT avec un tableau JSON de {len(facts)} booléens (true = garder), dans le même ordre, par exemple: [true, false]
+    """
+    try:
+        llm_response = send_inference_prompt(prompt, max_tokens=8 * len(facts) + 16,
+                                             call_site="classification.fact_batch", cache=True)
+        text = llm_response.get("text", "")
+        match = re.search(r"\[.*\]", text, re.DOTALL)
+        verdicts = json.loads(match.group(0)) if match else None
+        if isinstance(verdicts, list) and len(verdicts) == len(facts):
+            return [v is True or (isinstance(v, str) and v.strip().lower() in ("true", "oui", "yes")) for v in verdicts]
+        logger.warning(f"Verdicts de faits inexploitables, jugement fait par fait: {text[:200]}")
+    except Exception as e:
+        logger.warning(f"Jugement groupé des faits impossible, jugement fait par fait: {e}")
+    return [_should_store_fact(fact) for fact in facts]
+
+
+def extract_and_store_facts_from_text(text: str) -> int:
     """
     Uses the LLM to analyze a text, identify important facts, and store them dynamically.
+    Pipeline: one extraction call, dedup against the hashed index of known facts,
+    one batched importance judgement, then a single write of the semantic memory document.
+    Returns the number of facts stored.
     """
     from llm_wrapper import send_inference_prompt # Import here to avoid circular dependency
 
@@ -137,6 +202,7 @@ def extract_and_store_facts_from_text(text: str):
     Texte à analyser: "{text}"
     """
     
+    llm_response = {}
     try:
         logger.info("Début de l'extraction des faits par LLM...") # AJOUT DU LOG
         llm_response = send_inference_prompt(prompt, max_tokens=512)
@@ -145,39 +211,56 @@ def extract_and_store_facts_from_text(text: str):
         logger.info(f"LLM raw response for fact extraction: {llm_response_text}")
         extracted_facts = json.loads(llm_response_text)
         logger.info(f"Extracted facts from LLM: {extracted_facts}")
-        
-        mem = load_semantic_memory()
-        for fact_obj in extracted_facts:
-            fact = fact_obj.get("fact")
-            category = fact_obj.get("category", "general")
-            subject = fact_obj.get("subject", "utilisateur").lower() # Default to user
-            
-            if fact:
-                # --- NOUVEAU: Filtre metacognitif avant stockage ---
-                if not _should_store_fact(fact):
-                    logger.info(f"Fait ignoré (jugé non important) : {fact[:50]}...")
-                    continue # Passer au fait suivant
-                
-                # Special handling for user location
-                if category.lower() == "location" and subject == "utilisateur":
-                    save_user_location(fact) # Use the dedicated save function
-                
-                # Store in appropriate dynamic_facts list
-                target_list = None
-                if subject == "utilisateur":
-                    target_list = mem["user"]["dynamic_facts"]
-                elif subject == "vera":
-                    target_list = mem["vera"]["dynamic_facts"]
-                elif subject == "monde":
-                    target_list = mem["world"]["dynamic_facts"]
-                
-                if target_list is not None and {"fact": fact, "category": category} not in target_list:
-                    target_list.append({"fact": fact, "category": category})
-        save_semantic_memory(mem)
     except json.JSONDecodeError:
         logger.error(f"Erreur de décodage JSON lors de l'extraction de faits: {llm_response.get('text')}")
+        return 0
     except Exception as e:
         logger.error(f"Erreur lors de l'extraction de faits par LLM: {e}")
+        return 0
+
+    try:
+        mem = load_semantic_memory()
+        known = _build_fact_index(mem)
+
+        # 1. Candidats nouveaux (déjà connus ou en double dans le lot : ignorés avant tout appel LLM)
+        candidates = []
+        for fact_obj in extracted_facts if isinstance(extracted_facts, list) else []:
+            if not isinstance(fact_obj, dict) or not fact_obj.get("fact"):
+                continue
+            subject = str(fact_obj.get("subject", "utilisateur")).lower() # Default to user
+            section = _FACT_SUBJECTS.get(subject)
+            if section is None:
+                continue
+            key = _fact_key(section, fact_obj["fact"])
+            if key in known:
+                logger.debug(f"Fait déjà connu : {fact_obj['fact'][:50]}...")
+                continue
+            known.add(key)
+            candidates.append((section, subject, fact_obj["fact"], fact_obj.get("category", "general")))
+
+        if not candidates:
+            return 0
+
+        # 2. Filtre metacognitif : un seul jugement pour tout le lot
+        verdicts = _judge_facts([fact for _, _, fact, _ in candidates])
+
+        # 3. Écriture unique du document
+        stored = 0
+        for (section, subject, fact, category), keep in zip(candidates, verdicts):
+            if not keep:
+                logger.info(f"Fait ignoré (jugé non important) : {fact[:50]}...")
+                continue
+            if str(category).lower() == "location" and subject == "utilisateur":
+                mem["user"]["location"] = fact # Special handling for user location
+            mem[section].setdefault("dynamic_facts", []).append({"fact": fact, "category": category})
+            stored += 1
+        if stored:
+            save_semantic_memory(mem)
+        logger.info(f"{stored}/{len(candidates)} nouveaux faits mémorisés.")
+        return stored
+    except Exception as e:
+        logger.error(f"Erreur lors du stockage des faits extraits: {e}")
+        return 0
 
 def update_user_state(emotion: Optional[str] = None, goals: Optional[List[str]] = None, expertise: Optional[Dict[str, float]] = None):
     """Met à jour l'état inféré de l'utilisateur dans la mémoire sémantique."""
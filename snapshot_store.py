@@ -0,0 +1,186 @@
+"""
+snapshot_store.py
+Stockage des "snapshots de conscience" capturés par
+AttentionManager.capture_consciousness_snapshot().
+
+Chaque snapshot est stocké une seule fois (adressé par le hash de son contenu)
+et encodé en delta par rapport au snapshot précédent, avec une image complète
+("keyframe") toutes les KEYFRAME_INTERVAL entrées pour borner la reconstruction.
+Les épisodes ne contiennent plus qu'un `snapshot_id`; le snapshot complet n'est
+reconstruit (hydraté) que lorsqu'un appelant en a réellement besoin.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from tools.logger import VeraLogger
+
+logger = VeraLogger("snapshot_store")
+
+
+def _canonical_json(content: Dict[str, Any]) -> str:
+    return json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def compute_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Computes a structural delta turning `old` into `new`.
+    Nested dictionaries are diffed recursively; other values are replaced as a whole.
+    Format: {"set": {key: value}, "patch": {key: sub_delta}, "del": [keys]} (empty parts omitted).
+    """
+    delta: Dict[str, Any] = {}
+    for key, value in new.items():
+        if key in old and old[key] == value:
+            continue
+        if isinstance(value, dict) and isinstance(old.get(key), dict):
+            delta.setdefault("patch", {})[key] = compute_delta(old[key], value)
+        else:
+            delta.setdefault("set", {})[key] = value
+    removed = [key for key in old if key not in new]
+    if removed:
+        delta["del"] = removed
+    return delta
+
+
+def apply_delta(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Applies a delta produced by compute_delta() and returns a new dictionary."""
+    result = dict(base)
+    for key in delta.get("del", []):
+        result.pop(key, None)
+    for key, value in delta.get("set", {}).items():
+        result[key] = value
+    for key, sub_delta in delta.get("patch", {}).items():
+        current = result.get(key)
+        result[key] = apply_delta(current if isinstance(current, dict) else {}, sub_delta)
+    return result
+
+
+class SnapshotStore:
+    """Content-addressed, delta-encoded snapshot table living next to the episodes table."""
+
+    KEYFRAME_INTERVAL = 32  # A full snapshot is stored every N entries
+    HYDRATION_CACHE_SIZE = 256
+
+    def __init__(self, connection_factory: Callable):
+        """
+        Args:
+            connection_factory: The owner's context manager returning a sqlite3 connection
+                                (e.g. MemoryManager._get_connection).
+        """
+        self._get_connection = connection_factory
+        self._lock = threading.Lock()
+        self._last: Optional[Dict[str, Any]] = None  # {"id", "hash", "content", "chain_length"}
+        self._cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._initialize_table()
+
+    def _initialize_table(self):
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content_hash TEXT NOT NULL UNIQUE,
+                    timestamp TEXT,
+                    base_id INTEGER,
+                    chain_length INTEGER NOT NULL DEFAULT 0,
+                    payload TEXT NOT NULL
+                )
+            """)
+            conn.commit()
+
+    @staticmethod
+    def content_hash(snapshot: Dict[str, Any]) -> str:
+        """Hash of the snapshot content; the capture timestamp is excluded so identical states share one row."""
+        content = {k: v for k, v in snapshot.items() if k != "timestamp"}
+        return hashlib.sha256(_canonical_json(content).encode("utf-8")).hexdigest()
+
+    def _load_last(self, conn):
+        row = conn.execute("SELECT id, content_hash, chain_length FROM snapshots ORDER BY id DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        content = dict(self._hydrate(conn, row["id"]) or {})
+        content.pop("timestamp", None)
+        return {"id": row["id"], "hash": row["content_hash"], "content": content, "chain_length": row["chain_length"]}
+
+    def save(self, snapshot: Dict[str, Any]) -> int:
+        """
+        Stores a snapshot (or reuses an identical one) and returns its ID.
+        A reused row keeps the timestamp of its first capture: callers that need the time of
+        this capture store it alongside the ID (see MemoryManager.add_event).
+        """
+        content = {k: v for k, v in snapshot.items() if k != "timestamp"}
+        # Normalize through JSON so the delta base matches exactly what hydration will produce
+        content = json.loads(_canonical_json(content))
+        snapshot_hash = self.content_hash(snapshot)
+
+        with self._lock, self._get_connection() as conn:
+            if self._last is None:
+                self._last = self._load_last(conn)
+            if self._last and self._last["hash"] == snapshot_hash:
+                return self._last["id"]
+
+            existing = conn.execute("SELECT id FROM snapshots WHERE content_hash = ?", (snapshot_hash,)).fetchone()
+            if existing:
+                return existing["id"]
+
+            last = self._last
+            if last is None or last["chain_length"] + 1 >= self.KEYFRAME_INTERVAL:
+                base_id, chain_length, payload = None, 0, content
+            else:
+                base_id, chain_length = last["id"], last["chain_length"] + 1
+                payload = compute_delta(last["content"], content)
+
+            cursor = conn.execute(
+                "INSERT INTO snapshots (content_hash, timestamp, base_id, chain_length, payload) VALUES (?, ?, ?, ?, ?)",
+                (snapshot_hash, snapshot.get("timestamp"), base_id, chain_length, _canonical_json(payload))
+            )
+            conn.commit()
+            snapshot_id = cursor.lastrowid
+            self._last = {"id": snapshot_id, "hash": snapshot_hash, "content": content, "chain_length": chain_length}
+            return snapshot_id
+
+    def _hydrate(self, conn, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        """Rebuilds a snapshot by walking back to a keyframe (or a cached ancestor) and applying deltas."""
+        chain = []
+        current_id = snapshot_id
+        base_content = None
+        while current_id is not None:
+            cached = self._cache.get(current_id)
+            if cached is not None:
+                base_content = cached
+                break
+            row = conn.execute("SELECT id, timestamp, base_id, payload FROM snapshots WHERE id = ?", (current_id,)).fetchone()
+            if row is None:
+                return None
+            chain.append(row)
+            current_id = row["base_id"]
+
+        content = dict(base_content) if base_content is not None else {}
+        content.pop("timestamp", None)
+        for row in reversed(chain):
+            payload = json.loads(row["payload"])
+            content = payload if row["base_id"] is None else apply_delta(content, payload)
+            hydrated = dict(content)
+            hydrated["timestamp"] = row["timestamp"]
+            self._remember(row["id"], hydrated)
+        return self._cache.get(snapshot_id)
+
+    def _remember(self, snapshot_id: int, content: Dict[str, Any]):
+        self._cache[snapshot_id] = content
+        self._cache.move_to_end(snapshot_id)
+        while len(self._cache) > self.HYDRATION_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def get(self, snapshot_id: int) -> Optional[Dict[str, Any]]:
+        """Returns the full snapshot for an ID (a private copy the caller may modify)."""
+        with self._lock:
+            cached = self._cache.get(snapshot_id)
+            if cached is None:
+                with self._get_connection() as conn:
+                    cached = self._hydrate(conn, snapshot_id)
+            else:
+                self._cache.move_to_end(snapshot_id)
+        return copy.deepcopy(cached) if cached is not None else None
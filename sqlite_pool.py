@@ -0,0 +1,156 @@
+"""
+sqlite_pool.py
+Couche de connexions SQLite partagée par les bases "fichier" de Vera
+(mémoire épisodique, base de connaissances externe, connaissances non-vérifiées).
+
+Au lieu d'ouvrir une nouvelle connexion (et d'appeler os.makedirs) à chaque requête,
+chaque thread réutilise sa propre connexion, configurée une seule fois :
+journal WAL, synchronous=NORMAL, busy_timeout et cache de requêtes préparées.
+Le nombre de connexions gardées en cache est borné.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+from tools.logger import VeraLogger
+
+logger = VeraLogger("sqlite_pool")
+
+
+class SQLitePool:
+    """Bounded per-thread connection cache for a single SQLite database file."""
+
+    DEFAULT_MAX_CONNECTIONS = 8
+    DEFAULT_CACHED_STATEMENTS = 256  # Prepared statements kept per connection by the sqlite3 module
+
+    def __init__(self, db_path: str, max_connections: int = DEFAULT_MAX_CONNECTIONS, wal: bool = True,
+                 synchronous: str = "NORMAL", busy_timeout_ms: int = 5000,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS, create_directory: bool = True):
+        """
+        Args:
+            db_path: Path of the database file.
+            max_connections: Maximum number of cached per-thread connections. Threads beyond the
+                             limit get a short-lived connection. 0 disables caching entirely.
+            wal: Switch the database to WAL journal mode (readers no longer block the writer).
+            synchronous: PRAGMA synchronous value ("NORMAL" is safe with WAL and avoids an fsync per commit).
+            busy_timeout_ms: How long a connection waits on a locked database before failing.
+            cached_statements: Size of the per-connection prepared statement cache.
+            create_directory: Create the parent directory once, when the pool is built.
+        """
+        self.db_path = str(db_path)
+        self.max_connections = max_connections
+        self.wal = wal
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+
+        self._lock = threading.Lock()
+        self._connections: "OrderedDict[int, sqlite3.Connection]" = OrderedDict()  # thread ident -> connection
+        self._stats = {"checkouts": 0, "connections_opened": 0, "transient_connections": 0, "evicted": 0}
+
+        if create_directory and os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row  # Permet d'accéder aux colonnes par nom (et par index)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        if self.wal:
+            conn.execute("PRAGMA journal_mode = WAL")
+        if self.synchronous:
+            conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        with self._lock:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _evict_dead_threads(self):
+        """Closes cached connections whose owning thread has exited. Caller holds self._lock."""
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._connections if i not in alive]:
+            try:
+                self._connections.pop(ident).close()
+            except sqlite3.Error:
+                pass
+            self._stats["evicted"] += 1
+
+    def _checkout(self) -> Tuple[sqlite3.Connection, bool]:
+        """Returns (connection, is_transient) for the calling thread."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._stats["checkouts"] += 1
+            conn = self._connections.get(ident)
+            if conn is not None:
+                self._connections.move_to_end(ident)
+                return conn, False
+
+        conn = self._open()
+        with self._lock:
+            # Room is checked after opening: other threads may have filled the cache meanwhile
+            if len(self._connections) >= self.max_connections:
+                self._evict_dead_threads()
+            if len(self._connections) >= self.max_connections:
+                self._stats["transient_connections"] += 1
+                return conn, True
+            self._connections[ident] = conn
+        return conn, False
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager yielding the calling thread's connection.
+        An uncommitted transaction is rolled back if the block raises, including on
+        KeyboardInterrupt/SystemExit: the cached connection must not carry it to the next caller.
+        """
+        conn, transient = self._checkout()
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            if transient:
+                conn.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_connections"] = len(self._connections)
+            return stats
+
+    def close_all(self):
+        """Closes every cached connection (e.g. at shutdown or before deleting the file)."""
+        with self._lock:
+            for conn in self._connections.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, **kwargs) -> SQLitePool:
+    """Returns the shared pool for a database file, creating it on first use."""
+    key = os.path.abspath(str(db_path))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = SQLitePool(db_path, **kwargs)
+            _pools[key] = pool
+            logger.debug(f"SQLite pool created for '{db_path}'.")
+        return pool
+
+
+def close_all_pools():
+    """Closes the connections of every shared pool."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
@@ -0,0 +1,160 @@
+"""
+state_store.py
+État interne en mémoire, source de vérité, avec points de sauvegarde périodiques en base.
+
+Les systèmes émotionnel, somatique et d'homéostasie relisaient et réécrivaient leur document
+complet (json.loads / json.dumps, historique compris) à chaque lecture et à chaque mise à jour.
+Avec CheckpointedState :
+- le document est chargé une seule fois, puis conservé en mémoire ;
+- les lectures renvoient l'instantané courant sans accès à la base ; il n'est jamais modifié
+  sur place (copy-on-write) : une mise à jour travaille sur une copie qui remplace l'instantané
+  publié à la fin du bloc `with store.update() as state:` (rien n'est publié si le bloc échoue) ;
+- les changements sont écrits en base par un thread unique toutes les
+  "state_checkpoint_interval_seconds" secondes (config.json, 30 par défaut), et à l'arrêt.
+
+Un store est partagé par couple (table, document) : plusieurs instances d'un même système
+(ex: le SomaticSystem de l'orchestrateur et l'instance globale) voient le même état.
+"""
+
+import atexit
+import copy
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from db_manager import db_manager
+from tools.logger import VeraLogger
+
+logger = VeraLogger("state_store")
+
+try:
+    with open(os.path.join("data", "config.json"), "r", encoding="utf-8") as f:
+        _config = json.load(f)
+except Exception:
+    _config = {}
+
+CHECKPOINT_INTERVAL_SECONDS = float(_config.get("state_checkpoint_interval_seconds", 30))
+
+
+class CheckpointedState:
+    """In-memory copy-on-write document with dirty tracking; checkpoint() writes it to the DB."""
+
+    def __init__(self, table_name: str, doc_id: str, default_factory: Callable[[], Dict[str, Any]], db=None):
+        self.table_name = table_name
+        self.doc_id = doc_id
+        self._db = db
+        self._lock = threading.RLock()  # Serializes writers; readers never take it
+        self._checkpoint_lock = threading.Lock()
+        self._version = 0
+        self._checkpointed_version = 0
+        self._stats = {"reads": 0, "updates": 0, "db_reads": 0, "db_writes": 0, "checkpoint_errors": 0}
+
+        state = self._database().get_document(table_name, doc_id)
+        self._stats["db_reads"] += 1
+        self.created = state is None  # True when the document did not exist yet
+        self._state = default_factory() if state is None else state
+        if self.created:
+            self._version = 1
+            self.checkpoint()  # A new default document is persisted right away
+
+    def _database(self):
+        return self._db or db_manager
+
+    def read(self) -> Dict[str, Any]:
+        """Current snapshot. Shared and read-only: copy before modifying anything in it."""
+        self._stats["reads"] += 1
+        return self._state
+
+    @contextmanager
+    def update(self) -> Iterator[Dict[str, Any]]:
+        """Yields a private copy of the state, published as the new snapshot when the block exits normally."""
+        with self._lock:
+            draft = copy.deepcopy(self._state)
+            yield draft
+            self._state = draft
+            self._version += 1
+            self._stats["updates"] += 1
+
+    def replace(self, state: Dict[str, Any]):
+        with self._lock:
+            self._state = state
+            self._version += 1
+            self._stats["updates"] += 1
+
+    @property
+    def dirty(self) -> bool:
+        return self._version != self._checkpointed_version
+
+    def checkpoint(self) -> bool:
+        """Writes the current snapshot if it changed since the last checkpoint. Returns True if written."""
+        with self._checkpoint_lock:
+            with self._lock:
+                state, version = self._state, self._version
+            if version == self._checkpointed_version:
+                return False
+            try:
+                self._database().insert_document(self.table_name, self.doc_id, state)
+            except Exception as e:
+                self._stats["checkpoint_errors"] += 1
+                logger.error(f"Échec de la sauvegarde de l'état {self.table_name}/{self.doc_id}: {e}")
+                return False
+            self._checkpointed_version = version
+            self._stats["db_writes"] += 1
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self._stats, version=self._version, dirty=self.dirty)
+
+
+_stores: Dict[Tuple[str, str], CheckpointedState] = {}
+_stores_lock = threading.Lock()
+_stop_checkpointer = threading.Event()
+_checkpointer_thread: Optional[threading.Thread] = None
+
+
+def get_state_store(table_name: str, doc_id: str, default_factory: Callable[[], Dict[str, Any]]) -> CheckpointedState:
+    """Shared store for one document, loaded on first use. Starts the background checkpointer."""
+    key = (table_name, doc_id)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = CheckpointedState(table_name, doc_id, default_factory)
+        _start_checkpointer()
+    return store
+
+
+def checkpoint_all() -> int:
+    """Checkpoints every dirty store. Returns the number of documents written."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    return sum(1 for store in stores if store.checkpoint())
+
+
+def _checkpoint_loop():
+    while not _stop_checkpointer.wait(CHECKPOINT_INTERVAL_SECONDS):
+        try:
+            checkpoint_all()
+        except Exception as e:
+            logger.error(f"Erreur dans le thread de sauvegarde des états: {e}")
+
+
+def _start_checkpointer():
+    global _checkpointer_thread
+    if CHECKPOINT_INTERVAL_SECONDS <= 0 or (_checkpointer_thread and _checkpointer_thread.is_alive()):
+        return
+    _stop_checkpointer.clear()
+    _checkpointer_thread = threading.Thread(target=_checkpoint_loop, name="StateCheckpointer", daemon=True)
+    _checkpointer_thread.start()
+
+
+def shutdown():
+    """Stops the background checkpointer and writes every pending change."""
+    _stop_checkpointer.set()
+    if _checkpointer_thread and _checkpointer_thread.is_alive() and _checkpointer_thread is not threading.current_thread():
+        _checkpointer_thread.join(timeout=2)
+    checkpoint_all()
+
+
+atexit.register(shutdown)
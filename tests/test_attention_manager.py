@@ -0,0 +1,230 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+import attention_manager as attention_module
+import db_manager as db_manager_module
+from attention_manager import AttentionManager
+from db_manager import DbManager
+
+
+class FakeDb:
+    """In-memory stand-in for db_manager that counts writes."""
+
+    def __init__(self):
+        self.docs = {}
+        self.writes = 0
+
+    def insert_document(self, table_name, doc_id, document, column_name="state_json"):
+        self.writes += 1
+        self.docs[(table_name, doc_id)] = document
+
+    def get_document(self, table_name, doc_id, column_name="state_json"):
+        return self.docs.get((table_name, doc_id))
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    """A real DbManager bound to a temporary database file (bypassing the singleton)."""
+    db = object.__new__(DbManager)
+    db._initialized = False
+    with patch.object(db_manager_module, "UNIFIED_DB_PATH", tmp_path / "focus.db"):
+        DbManager.__init__(db)
+    with patch.object(attention_module, "db_manager", db):
+        yield db
+    db._get_connection().close()
+
+
+def test_write_behind_coalesces_updates():
+    fake_db = FakeDb()
+    with patch.object(attention_module, "db_manager", fake_db):
+        manager = AttentionManager(write_behind=True, flush_interval_ms=60000, max_unflushed_seconds=60, storage_mode="document")
+        try:
+            for i in range(20):
+                manager.update_focus(f"item_{i % 4}", i, salience=0.9)
+            assert fake_db.writes == 0
+            assert manager.has_pending_writes()
+
+            assert manager.flush()
+            assert fake_db.writes == 1
+            stored = fake_db.docs[("attention_focus", "current_focus")]
+            assert stored["item_3"]["data"] == 19
+
+            stats = manager.get_persistence_stats()
+            assert stats["save_requests"] == 20
+            assert stats["writes_avoided"] == 19
+            assert not manager.flush()  # Nothing dirty anymore
+        finally:
+            manager.shutdown()
+
+
+def test_crash_safety_bound_forces_synchronous_flush():
+    fake_db = FakeDb()
+    with patch.object(attention_module, "db_manager", fake_db):
+        manager = AttentionManager(write_behind=True, flush_interval_ms=60000, max_unflushed_seconds=0.05, storage_mode="document")
+        try:
+            manager.update_focus("a", 1)
+            assert fake_db.writes == 0
+            time.sleep(0.06)
+            manager.update_focus("b", 2)
+            assert fake_db.writes == 1
+        finally:
+            manager.shutdown()
+
+
+def test_background_flusher_and_shutdown():
+    fake_db = FakeDb()
+    with patch.object(attention_module, "db_manager", fake_db):
+        manager = AttentionManager(write_behind=True, flush_interval_ms=20, max_unflushed_seconds=60, storage_mode="document")
+        manager.update_focus("a", 1)
+        deadline = time.time() + 2
+        while manager.has_pending_writes() and time.time() < deadline:
+            time.sleep(0.01)
+        assert fake_db.writes == 1
+
+        manager.update_focus("b", 2)
+        manager.shutdown()
+        assert fake_db.docs[("attention_focus", "current_focus")]["b"]["data"] == 2
+
+
+def test_write_through_when_disabled():
+    fake_db = FakeDb()
+    with patch.object(attention_module, "db_manager", fake_db):
+        manager = AttentionManager(write_behind=False, storage_mode="document")
+        manager.update_focus("a", 1)
+        manager.update_focus("b", 2)
+        assert fake_db.writes == 2
+
+
+class SlowFakeDb(FakeDb):
+    """FakeDb whose writes take a little time, widening the window where a flush holds its lock."""
+
+    def insert_document(self, table_name, doc_id, document, column_name="state_json"):
+        time.sleep(0.001)
+        super().insert_document(table_name, doc_id, document, column_name)
+
+
+def test_synchronous_flush_does_not_deadlock_with_background_flusher():
+    fake_db = SlowFakeDb()
+    with patch.object(attention_module, "db_manager", fake_db):
+        manager = AttentionManager(write_behind=False, flush_interval_ms=1, storage_mode="document")
+        manager._start_flusher()  # Flusher running while mutators write synchronously under self.lock
+        try:
+            def mutate(worker):
+                for i in range(100):
+                    manager.update_focus(f"item_{worker}", i, salience=0.9)
+
+            workers = [threading.Thread(target=mutate, args=(w,), daemon=True) for w in range(4)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join(timeout=10)
+            assert not any(w.is_alive() for w in workers), "update_focus deadlocked with the flusher"
+            manager.flush()
+            stored = fake_db.docs[("attention_focus", "current_focus")]
+            assert all(stored[f"item_{w}"]["data"] == 99 for w in range(4))
+        finally:
+            manager.shutdown()
+
+
+def test_items_mode_writes_only_dirty_rows(temp_db):
+    manager = AttentionManager(write_behind=True, flush_interval_ms=60000, max_unflushed_seconds=60, storage_mode="items")
+    try:
+        manager.update_focus("active_goals", ["goal"], salience=0.9)
+        manager.update_focus("visual_context", {"big": "x" * 1000}, salience=0.9)
+        manager.flush()
+
+        with patch.object(temp_db, "write_rows", wraps=temp_db.write_rows) as write_rows:
+            manager.update_focus("active_goals", ["goal", "other"], salience=0.9)
+            manager.clear_focus_item("visual_context")
+            manager.flush()
+            upserts, deletes = write_rows.call_args.args[1], write_rows.call_args.args[2]
+            assert [row["id"] for row in upserts] == ["active_goals"]
+            assert deletes == ["visual_context"]
+
+        stored = manager.get_persisted_focus()
+        assert stored["active_goals"]["data"] == ["goal", "other"]
+        assert "visual_context" not in stored
+    finally:
+        manager.shutdown()
+
+
+def test_items_mode_purges_expired_rows_with_indexed_delete(temp_db):
+    manager = AttentionManager(write_behind=False, storage_mode="items")
+    manager.update_focus("short_lived", True, salience=1.0, expiry_seconds=60)
+    manager.update_focus("long_lived", True, salience=1.0)
+    # Age the item past its expiry, both in memory and in its stored row
+    manager.current_focus["short_lived"]["expiry_timestamp"] = datetime.now() - timedelta(seconds=1)
+    manager._schedule_removal("short_lived")
+    temp_db.write_rows("attention_focus_items",
+                       [AttentionManager._item_to_row("short_lived", manager._serialize_focus()["short_lived"])])
+
+    manager.decay_focus()
+
+    assert "short_lived" not in manager.current_focus
+    assert set(manager.get_persisted_focus()) == {"long_lived"}
+    assert manager.get_persistence_stats()["rows_purged"] == 1
+
+
+def test_items_mode_migrates_legacy_document(temp_db):
+    temp_db.insert_document("attention_focus", "current_focus", {
+        "active_goals": {"data": ["g1"], "timestamp": datetime.now().isoformat(), "salience": 0.9,
+                         "expiry_timestamp": None, "last_reset_date": None}
+    })
+    manager = AttentionManager(write_behind=False, storage_mode="items")
+
+    assert manager.current_focus["active_goals"]["data"] == ["g1"]
+    assert temp_db.get_document("attention_focus", "current_focus") is None
+    assert manager.get_persisted_focus_item("active_goals")["data"] == ["g1"]
+
+
+def test_reading_persisted_focus_never_writes(temp_db):
+    manager = AttentionManager(write_behind=False, storage_mode="items")
+    # A legacy document appearing after startup is left alone by the viewers' reads
+    legacy = {"active_goals": {"data": ["g1"], "timestamp": datetime.now().isoformat(), "salience": 0.9}}
+    temp_db.insert_document("attention_focus", "current_focus", legacy)
+
+    assert manager.get_persisted_focus() == {}
+    assert manager.get_persisted_focus_item("active_goals") is None
+    assert temp_db.get_document("attention_focus", "current_focus") == legacy
+    assert temp_db.get_rows("attention_focus_items") == []
+
+
+def test_lazy_decay_is_closed_form_and_writes_nothing_until_expiry():
+    fake_db = FakeDb()
+    with patch.object(attention_module, "db_manager", fake_db):
+        manager = AttentionManager(write_behind=False, storage_mode="document")
+        manager.update_focus("thought", "x", salience=0.6)
+        writes_before = fake_db.writes
+        # Pretend the item was set 4 minutes ago: 0.6 - 4 * 0.05 = 0.4
+        manager.current_focus["thought"]["timestamp"] = datetime.now() - timedelta(minutes=4)
+        manager._schedule_removal("thought")
+
+        for _ in range(5):
+            manager.decay_focus()
+            assert "thought" in manager.get_current_focus(salience_threshold=0.35)
+            assert "thought" not in manager.get_current_focus(salience_threshold=0.45)
+        assert manager.current_focus["thought"]["salience"] == 0.6  # Base salience is never rewritten
+        assert fake_db.writes == writes_before
+
+
+def test_items_leave_focus_when_threshold_or_expiry_is_crossed():
+    fake_db = FakeDb()
+    with patch.object(attention_module, "db_manager", fake_db):
+        manager = AttentionManager(write_behind=False, storage_mode="document")
+        manager.update_focus("faded", "x", salience=0.2)
+        manager.update_focus("expiring", "y", salience=1.0, expiry_seconds=3600)
+        manager.update_focus("active_goals", ["g"], salience=0.2)  # Never decays
+
+        manager.current_focus["faded"]["timestamp"] = datetime.now() - timedelta(minutes=3)
+        manager._schedule_removal("faded")
+        manager.current_focus["expiring"]["expiry_timestamp"] = datetime.now() - timedelta(seconds=1)
+        manager._schedule_removal("expiring")
+        manager.current_focus["active_goals"]["timestamp"] = datetime.now() - timedelta(days=1)
+        manager._schedule_removal("active_goals")
+
+        manager.decay_focus()
+        assert set(manager.current_focus) == {"active_goals"}
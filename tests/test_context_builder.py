@@ -0,0 +1,58 @@
+from context_builder import ELLIPSIS, ContextBuilder, HeuristicTokenizer, count_tokens, fit_to_tokens
+
+
+class WordTokenizer:
+    """One token per whitespace-separated word: makes budgets easy to reason about."""
+
+    def count(self, text):
+        return len(text.split())
+
+
+TOK = WordTokenizer()
+
+
+def test_fit_keeps_whole_sentences_from_head_or_tail():
+    text = "Un deux trois. Quatre cinq six. Sept huit neuf."
+    assert fit_to_tokens(text, 20, TOK) == text
+    assert fit_to_tokens(text, 7, TOK) == f"Un deux trois. Quatre cinq six. {ELLIPSIS}"
+    assert fit_to_tokens(text, 5, TOK, keep="tail") == f"{ELLIPSIS} Sept huit neuf."
+
+
+def test_fit_falls_back_to_words_when_a_sentence_is_too_long():
+    assert fit_to_tokens("un deux trois quatre cinq six", 4, TOK) == f"un deux trois {ELLIPSIS}"
+    assert fit_to_tokens("un deux", 0, TOK) == ""
+
+
+def test_builder_admits_by_priority_and_renders_in_insertion_order():
+    builder = ContextBuilder(12, tokenizer=TOK, separator=" | ")
+    builder.MIN_SECTION_TOKENS = 2
+    builder.add("narrative", "a b c d e f g h i j", priority=2)
+    builder.add("emotions", "joie forte", priority=0)
+    builder.add("goals", "finir le projet", priority=1)
+
+    # emotions (2) + separator (1) + goals (3) = 6; narrative gets 12 - 6 - 1 = 5 tokens
+    result = builder.build()
+    assert result == f"a b c d {ELLIPSIS} | joie forte | finir le projet"
+    assert builder.report["shortened"] == ["narrative"]
+    assert builder.report["used"] <= 12
+
+
+def test_builder_drops_sections_that_would_become_stubs():
+    builder = ContextBuilder(10, tokenizer=TOK, separator=" ")
+    builder.add("emotions", "un deux trois quatre cinq six sept huit", priority=0)
+    builder.add("memories", "souvenir " * 20, priority=1)
+    assert builder.build() == "un deux trois quatre cinq six sept huit"
+    assert builder.report["dropped"] == ["memories"]
+
+
+def test_section_max_tokens_and_window_budget():
+    builder = ContextBuilder.for_window(reserved_tokens=90, window_tokens=100, tokenizer=TOK)
+    assert builder.budget_tokens == 10
+    builder.MIN_SECTION_TOKENS = 2
+    builder.add("thoughts", "Une pensée courte. " + "mot " * 30, max_tokens=4)
+    assert builder.build() == f"Une pensée courte. {ELLIPSIS}"
+
+
+def test_heuristic_tokenizer_is_the_default_estimate():
+    assert HeuristicTokenizer().count("a" * 9) == 3
+    assert count_tokens("", TOK) == 0
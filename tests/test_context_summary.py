@@ -0,0 +1,86 @@
+from context_summary import SUMMARY_FOCUS_KEY, ContextSummaryCache, compute_context_fingerprint
+
+
+class FakeAttentionManager:
+    def __init__(self):
+        self.items = {}
+
+    def get_focus_item(self, source):
+        return self.items.get(source)
+
+    def is_expired(self, source):
+        return False
+
+    def update_focus(self, source, data, salience=0.5, expiry_seconds=None):
+        self.items[source] = {"data": data}
+
+
+def _focus(joy=0.55, goals=(1, 2), narrative="Je suis Vera.", memory_ids=(10, 11)):
+    return {
+        "emotional_state": {"data": {"joy": joy, "sadness": 0.05, "last_update": "x"}},
+        "active_goals": {"data": [{"id": g, "description": f"but {g}"} for g in goals]},
+        "narrative_self_summary": {"data": narrative},
+        "relevant_memories": {"data": [{"id": i, "description": f"souvenir {i}"} for i in memory_ids]},
+    }
+
+
+def test_fingerprint_tracks_only_meaningful_changes():
+    base = compute_context_fingerprint(_focus())
+    assert compute_context_fingerprint(_focus(joy=0.58)) == base  # Same intensity bucket
+    assert compute_context_fingerprint(_focus(goals=(2, 1))) == base  # Goal order is irrelevant
+    assert compute_context_fingerprint(_focus(joy=0.85)) != base
+    assert compute_context_fingerprint(_focus(goals=(1, 3))) != base
+    assert compute_context_fingerprint(_focus(narrative="Je suis Vera, et j'apprends.")) != base
+    assert compute_context_fingerprint(_focus(memory_ids=(10, 11, 12))) != base
+
+
+def test_lookup_serves_stale_summary_and_requests_one_refresh():
+    manager = FakeAttentionManager()
+    cache = ContextSummaryCache(manager)
+    refreshes = []
+    cache.set_refresh_callback(lambda fingerprint, reason: refreshes.append(fingerprint))
+
+    assert cache.lookup(_focus()) == (None, False)  # Nothing cached: caller distills synchronously
+
+    assert cache.store("Vera est joyeuse.", compute_context_fingerprint(_focus())) == 1
+    assert manager.items[SUMMARY_FOCUS_KEY]["data"] == "Vera est joyeuse."
+    assert cache.lookup(_focus()) == ("Vera est joyeuse.", True)
+    assert refreshes == []
+
+    changed = _focus(memory_ids=(10, 11, 12))
+    assert cache.lookup(changed) == ("Vera est joyeuse.", False)
+    assert cache.lookup(changed) == ("Vera est joyeuse.", False)
+    assert refreshes == [compute_context_fingerprint(changed)]  # Deduplicated while pending
+
+    cache.store("Vera se souvient.", refreshes[0])
+    assert cache.lookup(changed) == ("Vera se souvient.", True)
+    assert cache.version == 2
+    assert cache.get_stats()["stale_hits"] == 2
+
+
+def test_failed_refresh_can_be_requested_again():
+    cache = ContextSummaryCache(FakeAttentionManager())
+    refreshes = []
+    cache.set_refresh_callback(lambda fingerprint, reason: refreshes.append(fingerprint))
+    cache.store("Ancien résumé.", "old")
+
+    cache.lookup(_focus())
+    cache.refresh_done(refreshes[0])
+    cache.lookup(_focus())
+    assert len(refreshes) == 2
+
+
+def test_refresh_stored_under_another_fingerprint_is_released():
+    cache = ContextSummaryCache(FakeAttentionManager())
+    refreshes = []
+    cache.set_refresh_callback(lambda fingerprint, reason: refreshes.append(fingerprint))
+    cache.store("Ancien résumé.", "old")
+
+    cache.lookup(_focus())
+    # The inputs moved on before the distillation ran: the summary is stored under a newer fingerprint
+    cache.store("Résumé plus récent.", "newer")
+    assert cache.get_stats()["refresh_pending"] is True
+    cache.refresh_done(refreshes[0])
+    assert cache.get_stats()["refresh_pending"] is False
+    cache.lookup(_focus())
+    assert len(refreshes) == 2
@@ -30,3 +30,119 @@ def test_search_keyword():
         assert any("chien" in r["memory"]["desc"].lower() for r in results)
     finally:
         memory_manager.memories = orig
+
+
+def _snapshot(pleasure, goals, timestamp="2025-11-25T10:00:00"):
+    return {
+        "timestamp": timestamp,
+        "attention_focus": {"active_goals": {"data": goals, "timestamp": "2025-11-25T09:00:00"}},
+        "emotional_state": {"pleasure": pleasure, "arousal": 0.4, "label": "calme"},
+    }
+
+
+def test_snapshots_are_stored_once_and_hydrated_lazily(tmp_path):
+    from episodic_memory import MemoryManager
+    manager = MemoryManager(db_path=str(tmp_path / "episodes.db"))
+
+    e1 = manager.add_event("vera_response", {"description": "a", "snapshot": _snapshot(0.1, ["g1"])})
+    e2 = manager.add_event("vera_response", {"description": "b", "snapshot": _snapshot(0.1, ["g1"])})
+    e3 = manager.add_event("vera_response", {"description": "c", "snapshot": _snapshot(0.7, ["g1", "g2"])})
+
+    events = {e["id"]: e for e in manager.get_recent(limit=3)}
+    contexts = [events[e["id"]]["context"] for e in (e1, e2, e3)]
+    assert all("snapshot" not in c for c in contexts)
+    assert contexts[0]["snapshot_id"] == contexts[1]["snapshot_id"] != contexts[2]["snapshot_id"]
+
+    hydrated = manager.get_event_snapshot(events[e3["id"]])
+    assert hydrated["emotional_state"]["pleasure"] == 0.7
+    assert hydrated["attention_focus"]["active_goals"]["data"] == ["g1", "g2"]
+
+
+def test_deduplicated_snapshot_keeps_each_capture_timestamp(tmp_path):
+    from episodic_memory import MemoryManager
+    manager = MemoryManager(db_path=str(tmp_path / "episodes.db"))
+
+    e1 = manager.add_event("vera_response", {"description": "a", "snapshot": _snapshot(0.1, ["g1"], "2025-11-25T10:00:00")})
+    e2 = manager.add_event("vera_response", {"description": "b", "snapshot": _snapshot(0.1, ["g1"], "2025-11-25T11:30:00")})
+
+    events = {e["id"]: e for e in manager.get_recent(limit=2)}
+    assert events[e1["id"]]["context"]["snapshot_id"] == events[e2["id"]]["context"]["snapshot_id"]
+    assert manager.get_event_snapshot(events[e1["id"]])["timestamp"] == "2025-11-25T10:00:00"
+    assert manager.get_event_snapshot(events[e2["id"]])["timestamp"] == "2025-11-25T11:30:00"
+
+
+def test_snapshot_deltas_survive_keyframes_and_restart(tmp_path):
+    from episodic_memory import MemoryManager
+    from snapshot_store import SnapshotStore
+    db_path = str(tmp_path / "episodes.db")
+    manager = MemoryManager(db_path=db_path)
+    ids = [manager.snapshot_store.save(_snapshot(i / 100, [f"g{i % 3}"])) for i in range(SnapshotStore.KEYFRAME_INTERVAL * 2 + 5)]
+
+    reopened = MemoryManager(db_path=db_path)
+    for i, snapshot_id in enumerate(ids):
+        assert reopened.get_snapshot(snapshot_id)["emotional_state"]["pleasure"] == i / 100
+    new_id = reopened.snapshot_store.save(_snapshot(0.99, ["g9"]))
+    assert reopened.get_snapshot(new_id)["attention_focus"]["active_goals"]["data"] == ["g9"]
+
+
+def test_fts_search_ranks_and_filters(tmp_path):
+    from episodic_memory import MemoryManager
+    manager = MemoryManager(db_path=str(tmp_path / "episodes.db"))
+    manager.add_event("interaction", {"description": "J'aime les chiens et les chiens m'aiment", "tags": ["user_input"], "importance": 0.9})
+    manager.add_event("interaction", {"description": "Un chien passe devant la maison ce matin sous la pluie", "tags": ["vera_response"], "importance": 0.2})
+    manager.add_event("interaction", {"description": "J'aime les chats", "tags": ["user_input"], "importance": 0.9})
+
+    results = manager.search("chien", limit=5)
+    assert [r["description"] for r in results][0].startswith("J'aime les chiens")
+    assert len(results) == 2 and all("relevance" in r for r in results)
+
+    assert [r["description"] for r in manager.search("chien", tags=["vera_response"])] == ["Un chien passe devant la maison ce matin sous la pluie"]
+    assert len(manager.search("chien", min_importance=0.5)) == 1
+
+
+def test_tag_lookup_is_exact_and_backfill_indexes_old_rows(tmp_path):
+    import sqlite3
+    from episodic_memory import MemoryManager
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE episodes (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, "
+                 "description TEXT NOT NULL, tags TEXT, importance REAL, context TEXT)")
+    conn.execute("INSERT INTO episodes (timestamp, description, tags, importance, context) VALUES "
+                 "('2025-01-01T00:00:00', 'ancien souvenir', '[\"learning\", \"consolidated_topic\"]', 1.0, '{}')")
+    conn.commit()
+    conn.close()
+
+    manager = MemoryManager(db_path=db_path)  # Creating the index backfills existing rows
+    assert [r["description"] for r in manager.search("souvenir")] == ["ancien souvenir"]
+    assert len(manager.get_memories_by_tag("consolidated_topic")) == 1
+    assert manager.get_memories_by_tag("consolidated") == []  # No substring false positive
+
+    manager.mark_as_consolidated(1)
+    assert len(manager.get_memories_by_tag("consolidated")) == 1
+
+
+def test_generated_columns_drive_indexed_queries(tmp_path):
+    from episodic_memory import MemoryManager
+    manager = MemoryManager(db_path=str(tmp_path / "episodes.db"))
+    assert manager._generated_columns
+    manager.add_event("interaction", {"description": "calme", "initiator": "user", "emotion": {"arousal": 0.1}})
+    manager.add_event("thought", {"description": "panique", "initiator": "vera", "emotion": {"arousal": -0.9}})
+    manager.add_event("thought", {"description": "joie", "initiator": "vera", "emotion": {"arousal": 0.5}})
+
+    pivotal = manager.get_pivotal_memories(recent_limit=0, pivotal_limit=2)
+    assert {m["description"] for m in pivotal} == {"panique", "joie"}
+    assert "arousal_magnitude" not in pivotal[0]
+
+    assert [m["description"] for m in manager.get_recent(event_type="thought", initiator="vera")] == ["joie", "panique"]
+    assert [m["description"] for m in manager.get_recent(initiator="user")] == ["calme"]
+
+    with manager._get_connection() as conn:
+        conn.execute("UPDATE episodes SET timestamp = '2000-01-01T00:00:00'")
+        conn.commit()
+        plan = " ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM episodes WHERE is_consolidated = 0 AND timestamp < ? ORDER BY timestamp LIMIT 5",
+            ("2001-01-01",)))
+    assert "idx_episodes_consolidation" in plan
+
+    manager.mark_as_consolidated(1)
+    assert [m["description"] for m in manager.get_memories_for_consolidation()] == ["panique", "joie"]
@@ -0,0 +1,79 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from event_bus import (PriorityEventBus, HeartbeatEvent, SystemMonitorEvent, UserInputEvent,
+                       VeraSpeakEvent, InternalUrgeEvent)
+
+
+def test_user_input_is_served_before_background_events():
+    bus = PriorityEventBus()
+    bus.put(HeartbeatEvent())
+    bus.put(VeraSpeakEvent("bonjour"))
+    bus.put(UserInputEvent("salut"))
+
+    assert isinstance(bus.get_nowait(), UserInputEvent)
+    assert isinstance(bus.get_nowait(), VeraSpeakEvent)
+    assert isinstance(bus.get_nowait(), HeartbeatEvent)
+    with pytest.raises(queue.Empty):
+        bus.get_nowait()
+
+
+def test_repeated_idempotent_events_are_coalesced():
+    bus = PriorityEventBus()
+    for _ in range(5):
+        bus.put(HeartbeatEvent())
+    bus.put(SystemMonitorEvent("cpu", 91.0, 90.0))
+    bus.put(SystemMonitorEvent("ram", 85.0, 80.0))
+    bus.put(SystemMonitorEvent("cpu", 97.0, 90.0))
+
+    events = [bus.get_nowait() for _ in range(bus.qsize())]
+    assert len(events) == 3
+    cpu = [e for e in events if isinstance(e, SystemMonitorEvent) and e.metric == "cpu"]
+    assert len(cpu) == 1 and cpu[0].value == 97.0  # The newest reading replaces the queued one
+    assert bus.get_metrics()["coalesced"] == 5
+
+
+def test_background_lane_drops_oldest_when_full():
+    bus = PriorityEventBus(lane_limits={2: 3})
+    for i in range(5):
+        bus.put(InternalUrgeEvent(f"urge{i}", "description"))
+    bus.put(UserInputEvent("toujours servi"))
+
+    assert isinstance(bus.get_nowait(), UserInputEvent)
+    assert [bus.get_nowait().urge_type for _ in range(3)] == ["urge2", "urge3", "urge4"]
+    assert bus.get_metrics()["dropped"] == 2
+
+
+def test_latency_histogram_and_join():
+    bus = PriorityEventBus()
+    bus.put(UserInputEvent("salut"))
+    bus.put(HeartbeatEvent())
+
+    def consume():
+        for _ in range(2):
+            bus.get(timeout=1)
+            time.sleep(0.01)
+            bus.task_done()
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    bus.join()
+    consumer.join()
+
+    latency = bus.get_metrics()["latency"]
+    assert latency["UserInputEvent"]["count"] == 1
+    assert latency["HeartbeatEvent"]["max_ms"] >= 10
+    assert sum(latency["HeartbeatEvent"]["histogram"].values()) == 1
+    with pytest.raises(ValueError):
+        bus.task_done()
+
+
+def test_get_times_out_with_queue_empty():
+    bus = PriorityEventBus()
+    start = time.monotonic()
+    with pytest.raises(queue.Empty):
+        bus.get(timeout=0.05)
+    assert time.monotonic() - start >= 0.05
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from http_client import ConfigSnapshot, HTTPClient
+
+
+class _OriginHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    hits = []
+    connections = set()
+
+    def do_GET(self):
+        cls = type(self)
+        cls.hits.append((self.path, self.headers.get("If-None-Match")))
+        cls.connections.add(self.client_address)
+        if self.path.startswith("/etag") and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"path": self.path, "n": len(cls.hits)}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path.startswith("/maxage"):
+            self.send_header("Cache-Control", "max-age=60")
+        elif self.path.startswith("/etag"):
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("ETag", '"v1"')
+        elif self.path.startswith("/nostore"):
+            self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def origin():
+    handler = type("Handler", (_OriginHandler,), {"hits": [], "connections": set()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_connections_are_kept_alive_across_requests(origin):
+    handler, url = origin
+    client = HTTPClient()
+    for i in range(5):
+        assert client.get(f"{url}/plain", params={"i": i}).status_code == 200
+    assert len(handler.hits) == 5
+    assert len(handler.connections) == 1
+    assert client.get_metrics()["hosts"][url.split("//")[1]]["requests"] == 5
+
+
+def test_max_age_and_caller_ttl_are_served_from_cache(origin):
+    handler, url = origin
+    client = HTTPClient()
+    first = client.get(f"{url}/maxage", params={"q": "a"})
+    second = client.get(f"{url}/maxage", params={"q": "a"})
+    assert second.json() == first.json()
+    assert len(handler.hits) == 1
+
+    client.get(f"{url}/plain", params={"city": "Paris"}, cache_ttl=600)
+    client.get(f"{url}/plain", params={"city": "Paris"}, cache_ttl=600)
+    client.get(f"{url}/plain", params={"city": "Lyon"}, cache_ttl=600)
+    assert len(handler.hits) == 3  # One request per city
+
+    client.get(f"{url}/nostore", cache_ttl=600)
+    client.get(f"{url}/nostore", cache_ttl=600)
+    assert len(handler.hits) == 5
+    host = client.get_metrics()["hosts"][url.split("//")[1]]
+    assert host["cache_hits"] == 2
+
+
+def test_etag_revalidation_returns_cached_body(origin):
+    handler, url = origin
+    client = HTTPClient()
+    first = client.get(f"{url}/etag")
+    second = client.get(f"{url}/etag")
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert handler.hits == [("/etag", None), ("/etag", '"v1"')]
+    assert client.get_metrics()["hosts"][url.split("//")[1]]["revalidated"] == 1
+
+
+def test_config_snapshot_reloads_only_when_file_changes(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"weather_api_key": "k1"}), encoding="utf-8")
+    config = ConfigSnapshot(str(path), check_interval=0)
+    with patch("builtins.open", wraps=open) as opened:
+        for _ in range(10):
+            assert config.get("weather_api_key") == "k1"
+    assert opened.call_count == 0
+
+    path.write_text(json.dumps({"weather_api_key": "k2"}), encoding="utf-8")
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    assert config.get("weather_api_key") == "k2"
+    assert config.reloads == 2
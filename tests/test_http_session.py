@@ -0,0 +1,66 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_session import build_session
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    failures_left = 0
+    requests_seen = 0
+    connections = set()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        cls = type(self)
+        cls.requests_seen += 1
+        cls.connections.add(self.client_address)
+        status = 200
+        if cls.failures_left > 0:
+            cls.failures_left -= 1
+            status = 503
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server():
+    handler = type("Handler", (_FlakyHandler,), {"connections": set()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_transient_errors_are_retried(flaky_server):
+    handler, url = flaky_server
+    handler.failures_left = 2
+    session = build_session(retries=2, backoff_factor=0, allowed_methods=["POST"])
+    resp = session.post(url, json={}, timeout=5)
+    assert resp.status_code == 200
+    assert handler.requests_seen == 3
+
+
+def test_exhausted_retries_return_last_response(flaky_server):
+    handler, url = flaky_server
+    handler.failures_left = 5
+    session = build_session(retries=1, backoff_factor=0, allowed_methods=["POST"])
+    assert session.post(url, json={}, timeout=5).status_code == 503
+
+
+def test_connections_are_reused(flaky_server):
+    handler, url = flaky_server
+    session = build_session()
+    for _ in range(5):
+        session.post(url, json={}, timeout=5).raise_for_status()
+    assert handler.requests_seen == 5
+    assert len(handler.connections) == 1
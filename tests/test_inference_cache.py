@@ -0,0 +1,71 @@
+import time
+
+from inference_cache import InferenceCache, make_cache_key
+from sqlite_pool import SQLitePool
+
+
+def _cache(tmp_path, **kwargs):
+    db_path = str(tmp_path / "inference_cache.db")
+    return InferenceCache(db_path=db_path, pool=SQLitePool(db_path), **kwargs)
+
+
+def test_key_covers_every_prompt_component():
+    base = make_cache_key("model", "system", "Ce fait est-il important ?", 5, 0.1)
+    assert base == make_cache_key("model", "system", "Ce fait est-il important ?", 5, 0.1)
+    assert base != make_cache_key("model", "system", "Ce fait est-il important ?", 10, 0.1)
+    assert base != make_cache_key("other", "system", "Ce fait est-il important ?", 5, 0.1)
+    assert base != make_cache_key("model", "system", [{"type": "text", "text": "Ce fait est-il important ?"}], 5, 0.1)
+
+
+def test_hits_misses_and_per_call_site_stats(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get("k", "classification.should_store_fact") is None
+    cache.put("k", {"text": "oui", "confidence": 0.9}, "classification.should_store_fact")
+    assert cache.get("k", "classification.should_store_fact") == {"text": "oui", "confidence": 0.9}
+
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["call_sites"]["classification.should_store_fact"] == {"hits": 1, "misses": 1, "stores": 1}
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = _cache(tmp_path, ttl_seconds=0.05)
+    cache.put("k", {"text": "oui"})
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.get_stats()["expired"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = _cache(tmp_path, max_entries=10)
+    for i in range(10):
+        cache.put(f"k{i}", {"text": str(i)})
+        time.sleep(0.001)
+    cache.get("k0")  # Recently used: must survive eviction
+    cache.put("k10", {"text": "10"})
+
+    stats = cache.get_stats()
+    assert stats["entries"] <= 10 and stats["evictions"] >= 1
+    assert cache.get("k0") is not None
+    assert cache.get("k1") is None
+
+
+def _last_access(cache, key):
+    with cache._pool.connection() as conn:
+        return conn.execute("SELECT last_access FROM inference_cache WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hits_write_nothing_until_the_next_store(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("k", {"text": "oui"})
+    stored_access = _last_access(cache, "k")
+    time.sleep(0.01)
+    for _ in range(5):
+        assert cache.get("k") == {"text": "oui"}
+    assert _last_access(cache, "k") == stored_access
+
+    cache.put("other", {"text": "non"})
+    assert _last_access(cache, "k") > stored_access
+    cache.put("other", {"text": "peut-être"})  # Replacing an entry does not grow the count
+    assert cache.get_stats()["entries"] == 2
+    assert _cache(tmp_path).get_stats()["entries"] == 2  # Counted once when the cache is opened
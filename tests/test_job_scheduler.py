@@ -0,0 +1,65 @@
+import threading
+import time
+
+from job_scheduler import JobScheduler
+
+
+def _wait_until(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_jobs_run_at_their_own_period():
+    scheduler = JobScheduler()
+    runs = {"fast": 0, "slow": 0}
+    scheduler.add_job("fast", lambda: runs.__setitem__("fast", runs["fast"] + 1), period=0.02, initial_delay=0)
+    scheduler.add_job("slow", lambda: runs.__setitem__("slow", runs["slow"] + 1), period=10, initial_delay=0)
+    scheduler.start()
+    try:
+        assert _wait_until(lambda: runs["fast"] >= 5)
+    finally:
+        scheduler.stop()
+    assert runs["slow"] == 1
+    metrics = scheduler.get_metrics()
+    assert metrics["fast"]["runs"] >= 5 and metrics["fast"]["errors"] == 0
+
+
+def test_overruns_errors_and_skips_are_counted():
+    scheduler = JobScheduler()
+    paused = threading.Event()
+    paused.set()
+
+    def failing():
+        raise RuntimeError("boom")
+
+    scheduler.add_job("slow", lambda: time.sleep(0.03), period=0.01, deadline=0.01, initial_delay=0)
+    scheduler.add_job("failing", failing, period=0.01, initial_delay=0)
+    scheduler.add_job("paused", lambda: None, period=0.01, initial_delay=0, skip_if=paused.is_set)
+    scheduler.start()
+    try:
+        assert _wait_until(lambda: all(m["runs"] + m["skipped"] >= 2 for m in scheduler.get_metrics().values()))
+    finally:
+        scheduler.stop()
+    metrics = scheduler.get_metrics()
+    assert metrics["slow"]["overruns"] == metrics["slow"]["runs"]
+    assert metrics["slow"]["max_runtime_ms"] >= 30
+    assert metrics["failing"]["errors"] == metrics["failing"]["runs"]
+    assert metrics["paused"]["runs"] == 0 and metrics["paused"]["skipped"] >= 2
+
+
+def test_run_now_and_remove_job():
+    scheduler = JobScheduler()
+    ran = threading.Event()
+    scheduler.add_job("later", ran.set, period=60, initial_delay=60)
+    scheduler.start()
+    try:
+        scheduler.run_now("later")
+        assert ran.wait(1)
+        scheduler.remove_job("later")
+        assert "later" not in scheduler.get_metrics()
+    finally:
+        scheduler.stop()
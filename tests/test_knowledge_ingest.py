@@ -0,0 +1,146 @@
+import json
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from knowledge_ingest import KnowledgeIngestor, normalize_text, read_jsonl, text_hash
+from unverified_knowledge_manager import UnverifiedKnowledgeManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return UnverifiedKnowledgeManager(str(tmp_path / "unverified.db"))
+
+
+def _count(manager, table="unverified_knowledge"):
+    with manager._pool.connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_normalized_duplicates_are_skipped_across_batches(manager):
+    ingestor = KnowledgeIngestor(manager._pool, "unverified_knowledge", "unverified_knowledge_fts", batch_size=3)
+    entries = [{"text": f"Fait numéro {i} sur les volcans", "source": "test", "metadata": {"i": i}} for i in range(7)]
+    entries += [{"text": "  FAIT numéro 2   sur les VOLCANS "}, {"text": ""}, ("Fait numéro 3 sur les volcans", "tuple")]
+
+    stats = ingestor.ingest(entries)
+    assert (stats["read"], stats["inserted"], stats["duplicates"], stats["invalid"]) == (10, 7, 2, 1)
+    assert _count(manager) == 7
+    assert normalize_text(" A  B ") == "a b"
+
+    again = ingestor.ingest(entries[:4], defer_fts=False)
+    assert again["inserted"] == 0 and again["duplicates"] == 4
+    assert _count(manager) == 7
+
+
+def test_deferred_fts_makes_every_new_row_searchable(manager):
+    stats = manager.add_entries(({"text": f"Le volcan {i} est en Auvergne", "source": "bulk"} for i in range(50)))
+    assert stats["inserted"] == 50
+    assert _count(manager, "unverified_knowledge_fts") == 50
+    results = manager.search("volcan 42 auvergne", k=1)
+    assert results[0]["text"] == "Le volcan 42 est en Auvergne"
+    assert results[0]["source"] == "bulk"
+
+
+def test_add_entry_dedups_rows_written_by_other_writers(manager):
+    with manager._pool.connection() as conn:
+        conn.execute("INSERT INTO unverified_knowledge (text, source, metadata) VALUES ('Paris est une capitale', 'sql', '{}')")
+        conn.commit()
+    assert manager.add_entry("paris est une  capitale", "test") is True
+    assert manager.add_entry("Lyon est une ville", "test", {"k": 1}) is True
+    assert _count(manager) == 2
+    assert manager.search("lyon", k=1)[0]["metadata"] == {"k": 1}
+
+
+def test_read_jsonl_streams_and_skips_bad_lines(tmp_path, manager):
+    path = tmp_path / "dump.jsonl"
+    lines = [json.dumps({"text": "Premier fait", "source": "dump"}), "{pas du json", "", "[1, 2]",
+             json.dumps({"text": "Second fait", "metadata": {"page": 2}})]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    assert [entry["text"] for entry in read_jsonl(str(path))] == ["Premier fait", "Second fait"]
+    stats = manager.add_entries(read_jsonl(str(path)))
+    assert stats["inserted"] == 2
+    assert manager.search("second", k=1)[0]["source"] == "Unknown"
+
+
+def test_concurrent_add_entry_keeps_every_fact(manager):
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(20):
+                assert manager.add_entry(f"Fait {n}-{i} écrit en parallèle", f"thread-{n}") is True
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert _count(manager) == 160
+    assert _count(manager, "unverified_knowledge_fts") == 160
+    assert _count(manager, "unverified_knowledge_hashes") == 160
+
+
+class _InterruptingConnection:
+    """Connection proxy raising KeyboardInterrupt on the n-th content insert (inside its batch transaction)."""
+
+    def __init__(self, conn, interrupt_at):
+        self._conn = conn
+        self._content_inserts = 0
+        self._interrupt_at = interrupt_at
+
+    def executemany(self, sql, params):
+        if sql.startswith("INSERT INTO unverified_knowledge "):
+            self._content_inserts += 1
+            if self._content_inserts == self._interrupt_at:
+                raise KeyboardInterrupt
+        return self._conn.executemany(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_interrupted_batch_leaves_no_orphan_hashes(manager, monkeypatch):
+    ingestor = KnowledgeIngestor(manager._pool, "unverified_knowledge", "unverified_knowledge_fts", batch_size=3)
+    entries = [{"text": f"Fait interrompu {i}", "source": "test"} for i in range(6)]
+    pool_connection = manager._pool.connection
+
+    @contextmanager
+    def interrupting_connection():
+        with pool_connection() as conn:
+            yield _InterruptingConnection(conn, interrupt_at=2)
+
+    monkeypatch.setattr(manager._pool, "connection", interrupting_connection)
+    with pytest.raises(KeyboardInterrupt):
+        ingestor.ingest(entries)
+    monkeypatch.undo()
+
+    assert _count(manager) == 3
+    assert _count(manager, "unverified_knowledge_hashes") == 3
+    assert _count(manager, "unverified_knowledge_fts") == 3  # The committed batch is still indexed
+    again = ingestor.ingest(entries)
+    assert (again["inserted"], again["duplicates"]) == (3, 3)
+    assert _count(manager, "unverified_knowledge_fts") == 6
+
+
+def test_prepare_repairs_a_killed_deferred_ingestion(manager):
+    ingestor = KnowledgeIngestor(manager._pool, "unverified_knowledge", "unverified_knowledge_fts")
+    # A killed process: one batch committed but never indexed, plus a hash without its content row
+    with manager._pool.connection() as conn:
+        ingestor._prepare(conn)
+        ingestor._write_batch(conn, [(text_hash(f"Fait tué {i}"), f"Fait tué {i}", "test", "{}") for i in range(4)],
+                              index=False)
+        conn.execute("INSERT INTO unverified_knowledge_hashes (id, hash) VALUES (100, ?)", (text_hash("Fait orphelin"),))
+        conn.commit()
+    assert manager.search("tué 2", k=1) == []
+
+    stats = ingestor.ingest([{"text": "Fait orphelin"}, {"text": "Fait tué 1"}])
+    assert (stats["inserted"], stats["duplicates"]) == (1, 1)
+    assert _count(manager, "unverified_knowledge_fts") == 5
+    assert manager.search("tué 2", k=1)[0]["text"] == "Fait tué 2"
+    assert manager.search("orphelin", k=1)[0]["text"] == "Fait orphelin"
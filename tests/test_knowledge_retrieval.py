@@ -0,0 +1,107 @@
+import os
+import threading
+
+import pytest
+
+from knowledge_retrieval import (HybridRetriever, build_fts_expression, reciprocal_rank_fusion,
+                                 tokenize_query)
+from unverified_knowledge_manager import UnverifiedKnowledgeManager
+
+FACTS = [
+    "La photographie est née au XIXe siècle avec Niépce et Daguerre.",
+    "L'histoire de la photographie couleur commence avec les autochromes.",
+    "Les volcans d'Auvergne sont endormis depuis des millénaires.",
+    "Daguerre a présenté le daguerréotype en 1839.",
+    "L'histoire de France est riche en rebondissements.",
+]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = UnverifiedKnowledgeManager(str(tmp_path / "unverified.db"))
+    for fact in FACTS:
+        manager.add_entry(fact, "test")
+    return manager
+
+
+def test_query_tokens_and_fts_expressions():
+    assert tokenize_query("L'histoire de la photographie") == ["histoire", "photographie"]
+    assert tokenize_query("de la") == ["de", "la"]
+    assert build_fts_expression(["histoire", "photo"], "AND") == '"histoire"* "photo"*'
+    assert build_fts_expression(["histoire", "de"], "OR") == '"histoire"* OR "de"'
+    assert build_fts_expression(["a", "b"], "NEAR", near_distance=5) == 'NEAR("a" "b", 5)'
+    assert build_fts_expression(['x"y'], "AND") == '"x""y"*'  # Quotes cannot break out of the term
+
+
+def test_reciprocal_rank_fusion_prefers_items_ranked_by_both():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4, 1]], k=60)
+    assert [key for key, _ in fused][:2] == [1, 3]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 63)
+
+
+def test_multi_word_topic_is_found_with_tiers(manager):
+    # The old exact-phrase query found nothing for this topic
+    results = manager.search("histoire photographie", k=5)
+    assert results[0]["text"] == FACTS[1] and results[0]["match"] == "near"
+    assert {r["match"] for r in results[1:]} == {"any"}
+    assert {r["text"] for r in results} == {FACTS[0], FACTS[1], FACTS[4]}
+
+    prefix = manager.search("volcan auvergne", k=5)
+    assert [r["text"] for r in prefix] == [FACTS[2]]
+
+
+def test_require_all_terms_drops_partial_matches(manager):
+    results = manager.search("histoire photographie", k=5, require_all_terms=True)
+    assert [r["text"] for r in results] == [FACTS[1]]
+    assert manager.search("histoire volcans", k=1, require_all_terms=True) == []
+    assert manager.search("   ", k=3) == []
+
+
+def test_vector_index_is_fused_and_persisted(manager, tmp_path):
+    pytest.importorskip("numpy")
+    from knowledge_retrieval import HashingEmbedder, make_vector_index
+
+    prefix = str(tmp_path / "unverified.db")
+    retriever = HybridRetriever(manager._pool, "unverified_knowledge", "unverified_knowledge_fts",
+                                make_vector_index(prefix, HashingEmbedder()))
+    # "photographies" is not a prefix of "photographie": only the vector ranking finds these
+    results = retriever.search("photographies anciennes", k=2)
+    assert results and all(r["match"] == "vector" for r in results)
+    assert results[0]["text"] in (FACTS[0], FACTS[1])
+    assert len(retriever.vector_index) == len(FACTS)
+
+    assert not os.path.exists(retriever.vector_index.vectors_path)  # Saves are deferred off the search path
+    retriever.vector_index.save()
+
+    manager.add_entry("Les photographies anciennes se conservent à l'abri de la lumière.", "test")
+    reloaded = make_vector_index(prefix, HashingEmbedder())
+    assert len(reloaded) == len(FACTS)  # Loaded from disk; the new entry is indexed on the next search
+    retriever.vector_index = reloaded
+    top = retriever.search("photographies anciennes", k=1)[0]
+    assert top["match"] in ("near", "all") and "abri" in top["text"]
+    assert len(reloaded) == len(FACTS) + 1
+
+
+def test_concurrent_syncs_index_each_row_once(manager, tmp_path):
+    pytest.importorskip("numpy")
+    from knowledge_retrieval import HashingEmbedder, make_vector_index
+
+    manager.add_entries({"text": f"Fait vectoriel numéro {i}", "source": "test"} for i in range(300))
+    index = make_vector_index(str(tmp_path / "concurrent.db"), HashingEmbedder())
+    index.SYNC_BATCH_SIZE = 16
+
+    def worker():
+        with manager._pool.connection() as conn:
+            index.sync(conn, "unverified_knowledge", max_rows=64, defer_save=True)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [rowid for rowid, _ in index.search("fait vectoriel", k=1000)]
+    assert len(index) == len(ids) == len(set(ids)) == len(FACTS) + 300
+    assert not os.path.exists(index.vectors_path)
+    index.save()
+    assert len(make_vector_index(str(tmp_path / "concurrent.db"), HashingEmbedder())) == len(FACTS) + 300
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from llm_scheduler import (LLMScheduler, LLMRequestCancelled, llm_priority, current_priority,
+                           PRIORITY_USER, PRIORITY_TOOL, PRIORITY_BACKGROUND)
+
+
+def _start_waiter(scheduler, priority, order, errors, backend="llm"):
+    def run():
+        try:
+            with scheduler.slot(backend, priority, label=str(priority)):
+                order.append(priority)
+        except LLMRequestCancelled:
+            errors.append(priority)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for_depth(scheduler, depth, backend="llm"):
+    deadline = time.time() + 2
+    while time.time() < deadline:
+        queued = scheduler.get_metrics()["backends"].get(backend, {}).get("queue_depth", {})
+        if sum(queued.values()) >= depth:
+            return
+        time.sleep(0.005)
+    raise AssertionError("requests did not queue")
+
+
+def test_waiting_requests_are_served_by_priority():
+    scheduler = LLMScheduler(default_max_concurrency=1)
+    order, errors, threads = [], [], []
+    with scheduler.slot("llm", PRIORITY_BACKGROUND):
+        for priority in (PRIORITY_BACKGROUND, PRIORITY_TOOL, PRIORITY_USER):
+            threads.append(_start_waiter(scheduler, priority, order, errors))
+            _wait_for_depth(scheduler, len(threads))
+    for thread in threads:
+        thread.join(timeout=2)
+    assert order == [PRIORITY_USER, PRIORITY_TOOL, PRIORITY_BACKGROUND]
+    metrics = scheduler.get_metrics()
+    assert metrics["priorities"]["user"]["started"] == 1
+    assert metrics["priorities"]["user"]["wait_max_s"] > 0
+    assert metrics["backends"]["llm"]["in_flight"] == 0
+
+
+def test_concurrency_is_bounded_per_backend():
+    scheduler = LLMScheduler(default_max_concurrency=1, backend_concurrency={"wide": 2})
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def run(backend):
+        with scheduler.slot(backend, PRIORITY_USER):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=run, args=("wide",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert peak[0] == 2
+
+
+def test_cancel_queued_only_drops_background_work():
+    scheduler = LLMScheduler()
+    order, errors, threads = [], [], []
+    with scheduler.slot("llm", PRIORITY_BACKGROUND):  # A long-running dream already in flight
+        for priority in (PRIORITY_BACKGROUND, PRIORITY_BACKGROUND, PRIORITY_USER):
+            threads.append(_start_waiter(scheduler, priority, order, errors))
+            _wait_for_depth(scheduler, len(threads))
+        assert scheduler.cancel_queued(PRIORITY_BACKGROUND, reason="user_input") == 2
+    for thread in threads:
+        thread.join(timeout=2)
+    assert errors == [PRIORITY_BACKGROUND, PRIORITY_BACKGROUND]
+    assert order == [PRIORITY_USER]
+    assert scheduler.get_metrics()["priorities"]["background"]["cancelled"] == 2
+
+
+def test_priority_context_is_inherited_by_calls():
+    assert current_priority() == PRIORITY_BACKGROUND
+    with llm_priority(PRIORITY_USER):
+        assert current_priority() == PRIORITY_USER
+        with llm_priority(PRIORITY_TOOL):
+            assert current_priority() == PRIORITY_TOOL
+        assert current_priority() == PRIORITY_USER
+    assert current_priority() == PRIORITY_BACKGROUND
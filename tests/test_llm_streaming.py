@@ -0,0 +1,52 @@
+import json
+
+from llm_streaming import iter_sse_lines, ToolCallStreamFilter, AvatarTalkDriver
+
+
+def _sse(*fragments):
+    lines = [b": keep-alive", b""]
+    for fragment in fragments:
+        lines.append(("data: " + json.dumps({"choices": [{"delta": {"content": fragment}}]})).encode("utf-8"))
+        lines.append(b"")
+    lines.append(b"data: [DONE]")
+    lines.append(b"data: " + json.dumps({"choices": [{"delta": {"content": "after done"}}]}).encode("utf-8"))
+    return lines
+
+
+def test_sse_lines_yield_content_until_done():
+    assert list(iter_sse_lines(_sse("Bon", "jour ", "Foz"))) == ["Bon", "jour ", "Foz"]
+
+
+def _stream(filter_, fragments):
+    return "".join(filter_.feed(fragment) for fragment in fragments) + filter_.finish()
+
+
+def test_tool_call_split_across_fragments_is_hidden():
+    filter_ = ToolCallStreamFilter()
+    shown = _stream(filter_, ["Je regarde. [TO", "OL_CA", "LL] get_weather(ci", 'ty="Paris") Voilà', "."])
+    assert shown == "Je regarde.  Voilà."
+    assert filter_.tool_calls == [("get_weather", 'city="Paris"')]
+
+
+def test_text_is_not_held_longer_than_needed():
+    filter_ = ToolCallStreamFilter()
+    assert filter_.feed("Un crochet [") == "Un crochet "
+    assert filter_.feed("sic] ici") == "[sic] ici"
+
+
+def test_marker_that_cannot_be_a_tool_call_is_released():
+    filter_ = ToolCallStreamFilter()
+    assert filter_.feed("Le marqueur [TOOL_CALL] est spécial") == "Le marqueur [TOOL_CALL] est spécial"
+    assert filter_.feed("[TOOL_CALL] foo(a=\n") == "[TOOL_CALL] foo(a=\n"
+
+
+def test_avatar_driver_talks_while_streaming_and_closes_mouth():
+    sent, now = [], [0.0]
+    driver = AvatarTalkDriver(sent.append, clock=lambda: now[0])
+    driver.on_text("Bonjour")
+    driver.on_text("toi")  # Throttled: same instant
+    now[0] = 1.0
+    driver.on_text("aaa")
+    driver.stop()
+    assert sent[0] == {"type": "animation", "name": "jaw_open"}
+    assert [c["value"] for c in sent if c.get("name") == "V_Open"] == [60.0, 100.0, 0.0]
@@ -0,0 +1,129 @@
+import gzip
+import json
+import logging
+import threading
+from datetime import datetime as real_datetime
+
+import tools.logger as vera_logging
+from tools.logger import AsyncModuleLogHandler, LogPipeline, _RotatingLogFile
+
+
+def _logger(pipeline, directory, name):
+    logger = logging.getLogger(f"test_pipeline.{name}")
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(AsyncModuleLogHandler(pipeline, directory))
+    return logger
+
+
+def test_records_from_many_threads_are_written_to_log_and_jsonl(tmp_path):
+    pipeline = LogPipeline(drop_policy="block", max_bytes=0)
+    logger = _logger(pipeline, tmp_path, "writer")
+
+    def work(thread_id):
+        for i in range(200):
+            logger.info("message %s-%s", thread_id, i, extra={"extra_data": {"data": {"i": i}}})
+
+    threads = [threading.Thread(target=work, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.error("échec", exc_info=True)
+    assert pipeline.flush()
+    pipeline.close()
+
+    log_file = next(tmp_path.glob("test_pipeline.writer_*.log"))
+    jsonl_file = next(tmp_path.glob("test_pipeline.writer_*.jsonl"))
+    plain = log_file.read_text(encoding="utf-8")
+    entries = [json.loads(line) for line in jsonl_file.read_text(encoding="utf-8").splitlines()]
+    assert plain.count("message ") == 800
+    assert "ZeroDivisionError" in plain
+    assert len(entries) == 801 and entries[-1]["message"] == "échec"
+    assert entries[0]["data"]["i"] == 0
+    stats = pipeline.get_stats()
+    assert stats["written"] == 801 and stats["dropped"] == 0
+    assert stats["batches"] < 801  # Records are written in batches
+
+
+def _blocked_pipeline(tmp_path, policy):
+    """Pipeline whose writer is stuck on its first batch, so the queue fills up."""
+    pipeline = LogPipeline(queue_size=2, drop_policy=policy, block_timeout=0.05, max_bytes=0)
+    entered, release = threading.Event(), threading.Event()
+    original = pipeline._write_batch
+
+    def slow_write(batch, dropped):
+        entered.set()
+        release.wait(5)
+        original(batch, dropped)
+
+    pipeline._write_batch = slow_write
+    logger = _logger(pipeline, tmp_path, policy)
+    logger.info("first")
+    assert entered.wait(5)
+    return pipeline, logger, release
+
+
+def _messages(tmp_path, policy):
+    return next(tmp_path.glob(f"test_pipeline.{policy}_*.log")).read_text(encoding="utf-8")
+
+
+def test_drop_oldest_keeps_newest_records_and_reports_losses(tmp_path):
+    pipeline, logger, release = _blocked_pipeline(tmp_path, "drop_oldest")
+    for i in range(5):
+        logger.info(f"queued-{i}")
+    release.set()
+    pipeline.flush()
+    pipeline.close()
+    text = _messages(tmp_path, "drop_oldest")
+    assert "queued-3" in text and "queued-4" in text and "queued-0" not in text
+    assert "3 message(s) de log perdu(s)" in text
+    assert pipeline.get_stats()["dropped"] == 3
+
+
+def test_drop_new_and_block_timeout_reject_incoming_records(tmp_path):
+    for policy in ("drop_new", "block"):
+        pipeline, logger, release = _blocked_pipeline(tmp_path, policy)
+        for i in range(4):
+            logger.info(f"queued-{i}")
+        release.set()
+        pipeline.flush()
+        pipeline.close()
+        text = _messages(tmp_path, policy)
+        assert "queued-0" in text and "queued-1" in text and "queued-3" not in text
+        assert pipeline.get_stats()["dropped"] == 2
+
+
+def test_size_rotation_compresses_and_keeps_backup_count(tmp_path):
+    log_file = _RotatingLogFile(tmp_path, "mod", ".log", max_bytes=100, backup_count=2, compress=True)
+    for i in range(5):
+        log_file.write(f"{i}" * 120 + "\n")
+    log_file.close()
+    day = real_datetime.now().strftime("%Y%m%d")
+    backups = sorted(p.name for p in tmp_path.iterdir())
+    assert backups == [f"mod_{day}.log", f"mod_{day}.log.1.gz", f"mod_{day}.log.2.gz"]
+    with gzip.open(tmp_path / f"mod_{day}.log.1.gz", "rt") as f:
+        assert f.read().startswith("4")
+
+
+def test_date_rotation_compresses_previous_day(tmp_path, monkeypatch):
+    class FakeDatetime:
+        current = real_datetime(2026, 1, 1, 23, 59)
+
+        @classmethod
+        def now(cls):
+            return cls.current
+
+    monkeypatch.setattr(vera_logging, "datetime", FakeDatetime)
+    log_file = _RotatingLogFile(tmp_path, "mod", ".log", max_bytes=0, backup_count=2, compress=True)
+    log_file.write("veille\n")
+    FakeDatetime.current = real_datetime(2026, 1, 2, 0, 1)
+    log_file.write("lendemain\n")
+    log_file.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["mod_20260101.log.gz", "mod_20260102.log"]
+    with gzip.open(tmp_path / "mod_20260101.log.gz", "rt") as f:
+        assert f.read() == "veille\n"
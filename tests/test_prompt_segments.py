@@ -0,0 +1,67 @@
+import pytest
+
+from prompt_segments import (PromptCacheTracker, SegmentedPrompt, apply_cache_hints, estimate_tokens,
+                             usage_from_response)
+
+
+def _prompt(facts="- Foz aime le café.", context="(joie 40%)"):
+    prompt = SegmentedPrompt()
+    prompt.add("persona", "Tu es Vera." * 10)
+    prompt.add("tools", "[TOOL_CALL] get_time()" * 10)
+    prompt.add("facts", facts)
+    prompt.add("context", context, role="user")
+    prompt.add("input", "Foz: Salut\nVera:", role="user")
+    return prompt
+
+
+def test_segments_render_by_role_in_order():
+    prompt = _prompt()
+    assert prompt.names == ["persona", "tools", "facts", "context", "input"]
+    system = prompt.render("system")
+    assert system.index("Tu es Vera") < system.index("[TOOL_CALL]") < system.index("Foz aime le café")
+    assert prompt.render("user") == "(joie 40%)\nFoz: Salut\nVera:"
+
+
+def test_volatile_segment_cannot_precede_stable_one():
+    prompt = SegmentedPrompt().add("facts", "- un fait")
+    with pytest.raises(ValueError):
+        prompt.add("persona", "Tu es Vera.")
+
+
+def test_stable_prefix_ignores_facts_and_context():
+    a, b = _prompt(), _prompt(facts="- Foz vit à Lyon.", context="(tristesse 10%)")
+    assert a.prefix_fingerprint() == b.prefix_fingerprint()
+    assert a.prefix_tokens() == estimate_tokens(a.segment_text("persona") + "\n") + estimate_tokens(a.segment_text("tools") + "\n")
+
+
+def test_cache_hints():
+    assert apply_cache_hints({"model": "m"}, n_keep=120) == {"model": "m", "cache_prompt": True, "n_keep": 120}
+    assert apply_cache_hints({}) == {"cache_prompt": True}
+
+
+def test_usage_from_llama_cpp_timings_and_openai_usage():
+    assert usage_from_response({"timings": {"prompt_n": 20, "cache_n": 980}}) == {"prompt_tokens": 1000, "cached_tokens": 980}
+    assert usage_from_response({"usage": {"prompt_tokens": 50, "prompt_tokens_details": {"cached_tokens": 40}}}) == \
+        {"prompt_tokens": 50, "cached_tokens": 40}
+    assert usage_from_response({}) == {"prompt_tokens": None, "cached_tokens": None}
+
+
+def test_tracker_counts_segments_and_prefix_changes():
+    tracker = PromptCacheTracker()
+    tracker.record_prompt(_prompt())
+    tracker.record_prompt(_prompt(facts="- Foz vit à Lyon."))
+    changed = SegmentedPrompt().add("persona", "Tu es quelqu'un d'autre.").add("tools", "")
+    tracker.record_prompt(changed)
+    tracker.record_response({"timings": {"prompt_n": 10, "cache_n": 90}})
+
+    stats = tracker.get_stats()
+    assert stats["calls"] == 3
+    assert stats["stable_prefix_changes"] == 1
+    assert stats["segments"]["input"]["last_tokens"] == estimate_tokens("Foz: Salut\nVera:")
+    assert stats["server"]["cached_ratio"] == pytest.approx(0.9)
+
+
+def test_reply_system_prompt_puts_facts_last():
+    import llm_wrapper
+    prompt = llm_wrapper.SYSTEM_PROMPT
+    assert prompt.index("## Ton Histoire") < prompt.index("## Tes Outils Internes") < prompt.index("{{SEMANTIC_FACTS}}")
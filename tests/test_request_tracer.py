@@ -0,0 +1,79 @@
+import json
+import logging
+
+from request_tracer import RequestTracer, redact_payload
+
+SCREENSHOT = "data:image/png;base64," + "iVBORw0KGgo" * 1000
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_redaction_elides_images_and_base64_blobs():
+    payload = {"messages": [{"role": "user", "content": [
+        {"type": "text", "text": "Que vois-tu ?"},
+        {"type": "image_url", "image_url": {"url": SCREENSHOT}},
+    ]}], "raw": "QUJD" * 200}
+    redacted = redact_payload(payload)
+    assert redacted["messages"][0]["content"][0]["text"] == "Que vois-tu ?"
+    assert redacted["messages"][0]["content"][1]["image_url"]["url"] == "<image/png base64, 11000 caractères omis>"
+    assert redacted["raw"] == "<base64, 800 caractères omis>"
+    assert payload["messages"][0]["content"][1]["image_url"]["url"] == SCREENSHOT  # Original untouched
+
+
+def test_every_request_is_traced_but_only_sampled_ones_keep_payloads(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    payload = {"max_tokens": 5, "messages": [{"role": "user", "content": SCREENSHOT}]}
+
+    unsampled = RequestTracer(str(path), sample_rate=0.0)
+    unsampled.start("classification", payload).finish(response={"usage": {"prompt_tokens": 40, "completion_tokens": 1}}, text="oui")
+    unsampled.close()
+    sampled = RequestTracer(str(path), sample_rate=1.0)
+    trace = sampled.start("inference", payload)
+    trace.finish(response={"timings": {"prompt_n": 10, "cache_n": 30, "predicted_n": 2}}, text="non")
+    trace.finish("error")  # Ignored: already finished
+    sampled.close()
+
+    first, second = _lines(path)
+    assert first["call_site"] == "classification" and first["status"] == "ok"
+    assert first["prompt_tokens"] == 40 and first["completion_tokens"] == 1
+    assert "payload" not in first and "response_text" not in first
+    assert second["cached_tokens"] == 30 and second["completion_tokens"] == 2
+    assert second["payload"]["messages"][0]["content"].startswith("<image/png base64")
+    assert second["response_text"] == "non"
+    assert len(first["request_id"]) == 12 and first["request_id"] != second["request_id"]
+
+
+def test_trace_file_rotates(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = RequestTracer(str(path), sample_rate=1.0, max_bytes=2000, backup_count=2)
+    for _ in range(20):
+        tracer.start("inference", {"messages": [{"content": "x" * 300}]}).finish()
+    tracer.close()
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert not (tmp_path / "traces.jsonl.3").exists()
+
+
+class RecordingLogger:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.messages = []
+
+    def is_enabled_for(self, level):
+        return self.enabled and level >= logging.DEBUG
+
+    def debug(self, msg, **kwargs):
+        self.messages.append(msg)
+
+
+def test_payload_logging_is_lazy(tmp_path):
+    unserialisable = {"messages": {1, 2}}  # json.dumps would raise if it were built
+    tracer = RequestTracer(None, log_payloads=False)
+    tracer.log_payload(RecordingLogger(True), "Payload", unserialisable)
+    tracer = RequestTracer(None, log_payloads=True)
+    tracer.log_payload(RecordingLogger(False), "Payload", unserialisable)
+
+    logger = RecordingLogger(True)
+    tracer.log_payload(logger, "Payload", {"url": SCREENSHOT})
+    assert logger.messages == ['Payload: {\n  "url": "<image/png base64, 11000 caractères omis>"\n}']
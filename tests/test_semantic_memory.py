@@ -0,0 +1,70 @@
+import copy
+import json
+
+import pytest
+
+import llm_wrapper
+import semantic_memory
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    state = copy.deepcopy(semantic_memory.DEFAULT_MEMORY)
+    state["user"]["dynamic_facts"] = [{"fact": "L'utilisateur aime le café.", "category": "preference"}]
+    saves = []
+    monkeypatch.setattr(semantic_memory, "load_semantic_memory", lambda: copy.deepcopy(state))
+    monkeypatch.setattr(semantic_memory, "save_semantic_memory", lambda data: saves.append(copy.deepcopy(data)))
+    return saves
+
+
+def _fake_llm(monkeypatch, extracted, verdicts):
+    calls = []
+
+    def send_inference_prompt(prompt, max_tokens=256, **kwargs):
+        calls.append(kwargs.get("call_site", "inference"))
+        if kwargs.get("call_site") == "classification.fact_batch":
+            return {"text": json.dumps(verdicts), "confidence": 0.9}
+        if kwargs.get("call_site") == "classification.should_store_fact":
+            return {"text": "oui", "confidence": 0.9}
+        return {"text": json.dumps(extracted), "confidence": 0.9}
+
+    monkeypatch.setattr(llm_wrapper, "send_inference_prompt", send_inference_prompt)
+    return calls
+
+
+def test_facts_are_judged_in_one_call_and_written_once(monkeypatch, memory):
+    calls = _fake_llm(monkeypatch, [
+        {"fact": "l'utilisateur aime le café", "category": "preference", "subject": "utilisateur"},  # Already known
+        {"fact": "L'utilisateur vit à Lyon", "category": "location", "subject": "utilisateur"},
+        {"fact": "L'utilisateur vit à  Lyon.", "category": "location", "subject": "utilisateur"},  # Duplicate in batch
+        {"fact": "Il pleut", "category": "world_fact", "subject": "monde"},
+        {"fact": "Vera aime la musique", "category": "vera_trait", "subject": "vera"},
+    ], verdicts=[True, False, True])
+
+    assert semantic_memory.extract_and_store_facts_from_text("...") == 2
+    assert calls == ["inference", "classification.fact_batch"]
+    assert len(memory) == 1
+    saved = memory[0]
+    assert [f["fact"] for f in saved["user"]["dynamic_facts"]] == ["L'utilisateur aime le café.", "L'utilisateur vit à Lyon"]
+    assert saved["user"]["location"] == "L'utilisateur vit à Lyon"
+    assert saved["world"]["dynamic_facts"] == []
+    assert saved["vera"]["dynamic_facts"] == [{"fact": "Vera aime la musique", "category": "vera_trait"}]
+
+
+def test_unusable_batch_verdict_falls_back_to_per_fact_judgement(monkeypatch, memory):
+    calls = _fake_llm(monkeypatch, [
+        {"fact": "Vera aime la musique", "category": "vera_trait", "subject": "vera"},
+        {"fact": "Il pleut", "category": "world_fact", "subject": "monde"},
+    ], verdicts=[True])  # Wrong length
+
+    assert semantic_memory.extract_and_store_facts_from_text("...") == 2
+    assert calls.count("classification.should_store_fact") == 2
+
+
+def test_nothing_new_means_no_judgement_and_no_write(monkeypatch, memory):
+    calls = _fake_llm(monkeypatch, [
+        {"fact": "L'UTILISATEUR AIME LE CAFÉ", "category": "preference", "subject": "utilisateur"},
+    ], verdicts=[])
+    assert semantic_memory.extract_and_store_facts_from_text("...") == 0
+    assert calls == ["inference"]
+    assert memory == []
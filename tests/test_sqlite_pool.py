@@ -0,0 +1,62 @@
+import threading
+
+from sqlite_pool import SQLitePool
+
+
+def test_connection_is_reused_per_thread_and_configured(tmp_path):
+    pool = SQLitePool(str(tmp_path / "sub" / "pool.db"))
+    with pool.connection() as first:
+        assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert first.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    with pool.connection() as second:
+        assert second is first
+    assert pool.get_stats()["connections_opened"] == 1
+    pool.close_all()
+
+
+def test_connection_cache_is_bounded(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"), max_connections=1)
+    barrier = threading.Barrier(3)
+
+    def worker():
+        with pool.connection() as conn:
+            conn.execute("SELECT 1")
+            barrier.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = pool.get_stats()
+    assert stats["cached_connections"] <= 1
+    assert stats["transient_connections"] >= 2
+    pool.close_all()
+
+
+def test_failed_block_rolls_back(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"))
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+    try:
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    try:
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+            raise KeyboardInterrupt
+    except KeyboardInterrupt:
+        pass
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        conn.commit()  # A later commit on the same cached connection must not persist the interrupted write
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.close_all()
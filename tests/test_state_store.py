@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import state_store
+from state_store import CheckpointedState
+
+
+class CountingDb:
+    """In-memory stand-in for db_manager that counts round-trips."""
+
+    def __init__(self, docs=None):
+        self.docs = dict(docs or {})
+        self.reads = 0
+        self.writes = 0
+
+    def get_document(self, table_name, doc_id, column_name="state_json"):
+        self.reads += 1
+        return self.docs.get((table_name, doc_id))
+
+    def insert_document(self, table_name, doc_id, document, column_name="state_json"):
+        self.writes += 1
+        self.docs[(table_name, doc_id)] = document
+
+
+@pytest.fixture
+def counting_db():
+    db = CountingDb()
+    with patch.object(state_store, "db_manager", db), \
+            patch.object(state_store, "CHECKPOINT_INTERVAL_SECONDS", 0), \
+            patch.dict(state_store._stores, clear=True):
+        yield db
+
+
+def test_updates_are_copy_on_write_and_checkpointed_once(counting_db):
+    counting_db.docs[("t", "d")] = {"value": 1, "history": []}
+    store = CheckpointedState("t", "d", lambda: {"value": 0, "history": []})
+    before = store.read()
+
+    for i in range(5):
+        with store.update() as state:
+            state["value"] += 1
+            state["history"].append(i)
+
+    assert before == {"value": 1, "history": []}  # Earlier snapshots are never modified
+    assert store.read()["value"] == 6
+    assert counting_db.reads == 1 and counting_db.writes == 0
+    assert store.checkpoint()
+    assert not store.checkpoint()  # Nothing changed since
+    assert counting_db.writes == 1 and counting_db.docs[("t", "d")]["history"] == [0, 1, 2, 3, 4]
+
+
+def test_failed_update_is_not_published(counting_db):
+    store = CheckpointedState("t", "d", lambda: {"value": 0})
+    assert store.created and counting_db.writes == 1  # New default documents are saved right away
+
+    with pytest.raises(RuntimeError):
+        with store.update() as state:
+            state["value"] = 42
+            raise RuntimeError("boom")
+
+    assert store.read() == {"value": 0}
+    assert not store.dirty
+
+
+def test_orchestrator_ticks_do_not_touch_the_db(counting_db):
+    import emotion_system
+    from emotion_system import EmotionalSystem
+    from homeostasis_system import HomeostasisSystem
+    from somatic_system import SomaticSystem
+
+    emotions = EmotionalSystem()
+    somatic = SomaticSystem()
+    somatic_other_instance = SomaticSystem()
+    homeostasis = HomeostasisSystem()
+    counting_db.reads = counting_db.writes = 0
+
+    with patch.object(emotion_system, "attention_manager", MagicMock()):  # Focus updates are not under test
+        for _ in range(10):
+            emotions.update_emotion(None)
+            emotions.update_mood()
+            somatic.update_state(emotions.get_emotional_state(), {"cpu_usage_percent": 35.0})
+            homeostasis.update()
+            homeostasis.get_tensions()
+
+    assert (counting_db.reads, counting_db.writes) == (0, 0)
+    assert somatic_other_instance.get_somatic_state() == somatic.get_somatic_state()  # One shared state
+
+    assert state_store.checkpoint_all() == 3
+    assert counting_db.writes == 3
+    saved_needs = counting_db.docs[(homeostasis.table_name, homeostasis.doc_id)]["needs"]
+    assert saved_needs == homeostasis.get_needs()
@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+import db_manager as db_manager_module
+import web_searcher as web_searcher_module
+from db_manager import DbManager
+from web_searcher import WebSearcher
+
+
+@pytest.fixture
+def searcher(tmp_path):
+    """A WebSearcher whose cache lives in a temporary database."""
+    db = object.__new__(DbManager)
+    db._initialized = False
+    with patch.object(db_manager_module, "UNIFIED_DB_PATH", tmp_path / "web.db"):
+        DbManager.__init__(db)
+    with patch.object(web_searcher_module, "db_manager", db):
+        yield WebSearcher()
+    db._get_connection().close()
+
+
+def _results(text, success=True):
+    return {"wikipedia": {"success": success, "articles": [{"title": text, "summary": text * 20}]},
+            "general": {"success": True, "results": [{"title": text, "snippet": text * 20}]},
+            "timestamp": "2026-01-01T00:00:00"}
+
+
+def test_lookup_is_case_and_whitespace_insensitive(searcher):
+    assert searcher._check_cache("Tour Eiffel") is None
+    searcher._add_to_cache("Tour Eiffel", _results("eiffel"))
+
+    cached = searcher._check_cache("  tour   EIFFEL ")
+    assert cached["wikipedia"]["articles"][0]["title"] == "eiffel"
+    assert cached["general"]["success"]
+
+    stats = searcher.get_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+    assert stats["entries"] == 2 and stats["bytes"] > 0
+
+
+def test_expired_and_failed_entries(searcher):
+    searcher._add_to_cache("python", _results("python", success=False))
+    rows = {row["source"]: row for row in web_searcher_module.db_manager.get_rows(searcher.table_name)}
+    assert rows["wikipedia"]["expires_at"] - rows["wikipedia"]["created_at"] == searcher.CACHE_FAILURE_TTL_SECONDS
+    assert rows["general"]["expires_at"] - rows["general"]["created_at"] == searcher.CACHE_TTL_SECONDS["general"]
+
+    with patch.object(web_searcher_module.time, "time", return_value=time.time() + 3600):
+        assert searcher._check_cache("python") is None
+    assert searcher.get_cache_stats()["expired"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_by_bytes(searcher):
+    searcher._add_to_cache("une", _results("une"))
+    entry_bytes = searcher.get_cache_stats()["bytes"]
+    searcher.CACHE_MAX_BYTES = int(entry_bytes * 2.2)
+    searcher._add_to_cache("two", _results("two"))
+    assert searcher._check_cache("une") is not None  # "une" becomes the most recently used
+
+    searcher._add_to_cache("six", _results("six"))
+
+    assert searcher._check_cache("two") is None
+    assert searcher._check_cache("une") is not None and searcher._check_cache("six") is not None
+    stats = searcher.get_cache_stats()
+    assert stats["evictions"] == 2 and stats["bytes"] <= searcher.CACHE_MAX_BYTES
+    assert len(web_searcher_module.db_manager.get_rows(searcher.table_name, columns="id")) == 4
+
+    reloaded = WebSearcher()  # The index is rebuilt from the table on restart
+    assert set(reloaded._lru) == set(searcher._lru)
+    assert reloaded.get_cache_stats()["bytes"] == stats["bytes"]
+
+
+class _SourceHandler(BaseHTTPRequestHandler):
+    """Stub search backend: /<name>?q=...&delay=<seconds> answers {"items": [...]} after the delay."""
+    protocol_version = "HTTP/1.1"
+    hits = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        type(self).hits.append(url.path)
+        time.sleep(float(params.get("delay", ["0"])[0]))
+        body = json.dumps({"items": [f"{url.path[1:]}:{params['q'][0]}"]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def source_server():
+    handler = type("Handler", (_SourceHandler,), {"hits": []})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def _http_source(base_url, name, delay=0.0):
+    def search(query):
+        resp = requests.get(f"{base_url}/{name}", params={"q": query, "delay": delay}, timeout=5)
+        return {"success": True, "results": resp.json()["items"]}
+    return search
+
+
+def test_sources_are_fetched_concurrently_with_deadlines(searcher, source_server):
+    handler, url = source_server
+    searcher.sources = {"wikipedia": _http_source(url, "wiki", delay=0.3),
+                        "general": _http_source(url, "ddg", delay=0.3),
+                        "news": _http_source(url, "news", delay=2.0)}
+    searcher.SOURCE_DEADLINES_SECONDS = {"wikipedia": 1.0, "general": 1.0, "news": 0.5}
+
+    start = time.monotonic()
+    results = searcher.search("volcans")
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.9  # Concurrent, and bounded by the slow source's deadline rather than its latency
+    assert results["wikipedia"]["results"] == ["wiki:volcans"]
+    assert results["general"]["results"] == ["ddg:volcans"]
+    assert results["news"]["timed_out"] and not results["news"]["success"]
+    assert searcher.get_cache_stats()["sources"]["news"]["timeouts"] == 1
+
+    # The late answer of the slow source still lands in the cache
+    assert _wait_for(lambda: searcher._check_cache("volcans") is not None)
+    assert searcher._check_cache("volcans")["news"]["results"] == ["news:volcans"]
+
+
+def test_stale_results_are_served_while_revalidating(searcher, source_server):
+    handler, url = source_server
+    searcher.sources = {"wikipedia": _http_source(url, "wiki"), "general": _http_source(url, "ddg")}
+    searcher.search("lune")
+    handler.hits.clear()
+
+    later = time.time() + searcher.CACHE_TTL_SECONDS["general"] + 60
+    with patch.object(web_searcher_module.time, "time", return_value=later):
+        start = time.monotonic()
+        results = searcher.search("lune")
+        assert time.monotonic() - start < 0.2
+        assert results["stale_sources"] == ["general", "wikipedia"]
+        assert results["general"]["results"] == ["ddg:lune"]
+        assert _wait_for(lambda: sorted(handler.hits) == ["/ddg", "/wiki"])
+        assert _wait_for(lambda: searcher._check_cache("lune") is not None)  # Revalidated entries are fresh
+    assert searcher.get_cache_stats()["stale_hits"] == 1
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
@@ -0,0 +1,39 @@
+"""
+Script de (ré)indexation de la mémoire épisodique de Vera.
+
+Construit l'index plein texte FTS5 des descriptions (episodes_fts) et la table
+de tags normalisée (episode_tags) pour les épisodes déjà présents dans la base.
+L'index est ensuite tenu à jour automatiquement par des triggers.
+
+Usage:
+    python tools/backfill_episodic_index.py [chemin/vers/episodic_memory.db]
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from episodic_memory import MemoryManager
+
+DEFAULT_DB_PATH = "data/episodic_memory.db"
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB_PATH
+    if not os.path.exists(db_path):
+        print(f"ERREUR: La base de données '{db_path}' n'a pas été trouvée.")
+        return 1
+
+    manager = MemoryManager(db_path=db_path)
+    if not manager._fts_enabled:
+        print("ERREUR: Cette version de SQLite ne supporte pas FTS5/JSON1. Indexation impossible.")
+        return 1
+
+    count = manager.backfill_search_index()
+    print(f"Index de recherche reconstruit pour {count} épisodes dans '{db_path}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
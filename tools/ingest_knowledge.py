@@ -0,0 +1,64 @@
+"""
+Script d'ingestion en masse dans les bases de connaissances de Vera.
+
+Lit un fichier JSONL en flux (une connaissance par ligne : {"text": ..., "source": ..., "metadata": {...}})
+et l'ajoute par lots transactionnels, sans doublons, à la base vérifiée (knowledge_map.db) ou
+non-vérifiée (unverified_knowledge.db). L'index FTS est construit en une fois à la fin.
+
+Usage:
+    python tools/ingest_knowledge.py fichier.jsonl [--target verified|unverified] [--db chemin.db]
+                                     [--batch-size 50000] [--no-defer-fts]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from knowledge_ingest import KnowledgeIngestor, read_jsonl
+from sqlite_pool import get_pool
+
+TARGETS = {
+    "verified": ("data/knowledge_map.db", "knowledge", "knowledge_fts"),
+    "unverified": ("data/unverified_knowledge.db", "unverified_knowledge", "unverified_knowledge_fts"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Fichier JSONL à ingérer")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="verified")
+    parser.add_argument("--db", help="Chemin de la base (par défaut celui de la cible)")
+    parser.add_argument("--batch-size", type=int, default=KnowledgeIngestor.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--no-defer-fts", action="store_true", help="Indexer dans FTS après chaque lot")
+    args = parser.parse_args()
+
+    default_db, content_table, fts_table = TARGETS[args.target]
+    db_path = args.db or default_db
+    if not os.path.exists(args.input):
+        print(f"ERREUR: Le fichier '{args.input}' n'a pas été trouvé.")
+        return 1
+
+    # Le gestionnaire de la cible crée les tables (et la table FTS) si nécessaire
+    if args.target == "verified":
+        from external_knowledge_base import ExternalKnowledgeBase
+        if not os.path.exists(db_path):
+            print(f"ERREUR: La base de données '{db_path}' n'existe pas (voir tools/data_migrator.py).")
+            return 1
+        ExternalKnowledgeBase(db_path)
+    else:
+        from unverified_knowledge_manager import UnverifiedKnowledgeManager
+        UnverifiedKnowledgeManager(db_path)
+
+    ingestor = KnowledgeIngestor(get_pool(db_path), content_table, fts_table, batch_size=args.batch_size)
+    stats = ingestor.ingest(read_jsonl(args.input), defer_fts=not args.no_defer_fts)
+    print(f"{stats['read']} entrées lues : {stats['inserted']} ajoutées, {stats['duplicates']} doublons, "
+          f"{stats['invalid']} invalides, en {stats['seconds']:.1f} s ({stats['rows_per_second']:.0f} entrées/s).")
+    print("Si la recherche vectorielle est activée, compléter l'index avec : "
+          f"python knowledge_retrieval.py --db {db_path} --table {content_table}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,19 @@ from filelock import FileLock
 UNVERIFIED_FILE = "data/unverified_knowledge.json"
 LOCK_FILE = "data/unverified_knowledge.json.lock"
 
+def _to_entry(concept):
+    """Entrée de la base principale pour une connaissance approuvée."""
+    return {
+        # Le texte à insérer combine le titre et le résumé pour une recherche FTS plus riche
+        "text": f"Titre: {concept.get('title', '')}. Résumé: {concept.get('summary', '')}",
+        "source": concept.get('source', 'Unknown'),
+        "metadata": {
+            "topic": concept.get('topic'),
+            "original_title": concept.get('title'),
+            "learned_at": concept.get('learned_at')
+        }
+    }
+
 def review_and_integrate():
     """
     Script interactif pour valider les connaissances en quarantaine et les intégrer
@@ -36,6 +49,7 @@ def review_and_integrate():
             print("Pour chaque entrée, tapez 'o' (oui) pour approuver, 'n' (non) pour rejeter, ou 'q' pour quitter.")
             
             remaining_knowledge = []
+            approved = []
             
             for i, concept in enumerate(unverified_knowledge):
                 print("\n" + "="*80)
@@ -64,28 +78,22 @@ def review_and_integrate():
                     break
                 
                 if choice == 'o':
-                    print("Approbation... Intégration à la base de données principale.")
-                    # Le texte à insérer combine le titre et le résumé pour une recherche FTS plus riche
-                    text_to_insert = f"Titre: {concept.get('title', '')}. Résumé: {concept.get('summary', '')}"
-                    
-                    success = external_knowledge_base.add_entry(
-                        text=text_to_insert,
-                        source=concept.get('source', 'Unknown'),
-                        metadata={
-                            "topic": concept.get('topic'),
-                            "original_title": concept.get('title'),
-                            "learned_at": concept.get('learned_at')
-                        }
-                    )
-                    if success:
-                        print("Intégration réussie.")
-                    else:
-                        print("ERREUR: L'intégration a échoué. Cette connaissance sera conservée pour une nouvelle tentative.")
-                        remaining_knowledge.append(concept) # Garder en cas d'échec
+                    print("Approuvé. Intégration à la base de données principale à la fin de la revue.")
+                    approved.append(concept)
                 
                 elif choice == 'n':
                     print("Rejeté. Cette connaissance sera supprimée.")
 
+            if approved:
+                # Une seule ingestion groupée (une transaction, sans doublons) pour toutes les approbations
+                print(f"\nIntégration de {len(approved)} connaissance(s) approuvée(s)...")
+                stats = external_knowledge_base.add_entries(_to_entry(concept) for concept in approved)
+                if stats is not None:
+                    print(f"Intégration réussie : {stats['inserted']} ajoutée(s), {stats['duplicates']} déjà présente(s).")
+                else:
+                    print("ERREUR: L'intégration a échoué. Ces connaissances seront conservées pour une nouvelle tentative.")
+                    remaining_knowledge.extend(approved) # Garder en cas d'échec
+
             # Réécrire le fichier de quarantaine avec les connaissances restantes (celles non traitées ou en erreur)
             with open(UNVERIFIED_FILE, 'w', encoding='utf-8') as f:
                 json.dump(remaining_knowledge, f, indent=2, ensure_ascii=False)
@@ -1,8 +1,14 @@
 import logging
 from pathlib import Path
+import atexit
+import gzip
 import json
+import os
+import shutil
+import time
+from collections import defaultdict, deque
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import sys
 import threading
 
@@ -11,6 +17,31 @@ _logging_setup_lock = threading.Lock()
 _logging_setup_done = False
 _file_handlers = {} # New: To keep track of named file handlers
 
+# --- Pipeline de logs asynchrone (section "logging" de data/config.json) ---
+# Les appels de log ne font qu'enfiler l'enregistrement ; un thread d'écriture unique écrit
+# les lignes .log et .jsonl par lots, avec rotation par taille/date et compression des anciens fichiers.
+try:
+    with open(os.path.join("data", "config.json"), "r", encoding="utf-8") as _f:
+        _logging_config = json.load(_f).get("logging", {})
+except Exception:
+    _logging_config = {}
+
+LOG_PIPELINE_SETTINGS = {
+    "async": True,              # False: ancien mode (écritures synchrones par le thread appelant)
+    "queue_size": 10000,        # Enregistrements en attente au maximum
+    "drop_policy": "drop_oldest",  # "drop_oldest", "drop_new" ou "block" quand la file est pleine
+    "block_timeout": 1.0,       # Attente maximale (s) en mode "block" avant d'abandonner l'enregistrement
+    "batch_size": 500,          # Enregistrements écrits par lot
+    "flush_interval": 0.2,      # Secondes max avant l'écriture d'un lot incomplet
+    "max_bytes": 10 * 1024 * 1024,  # Rotation par taille du fichier du jour
+    "backup_count": 5,
+    "compress": True,           # gzip des fichiers tournés et des fichiers des jours précédents
+}
+LOG_PIPELINE_SETTINGS.update(_logging_config)
+
+PLAIN_LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s:%(lineno)d: %(message)s'
+PLAIN_LOG_DATEFMT = '%Y-%m-%d %H:%M:%S'
+
 class CustomFormatter(logging.Formatter):
     """Formateur personnalisé avec couleurs pour la console"""
     
@@ -48,21 +79,295 @@ class JsonFileHandler(logging.Handler):
             self.handleError(record)
 
     def _format_record(self, record) -> Dict:
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'level': record.levelname,
-            'message': record.getMessage(),
-            'module': record.module,
-            'function': record.funcName,
-            'line': record.lineno
-        }
-        if hasattr(record, 'extra_data'):
-            log_entry.update(record.extra_data)
-        return log_entry
+        return _json_log_entry(record)
 
     def flush(self):
         pass
 
+def _json_log_entry(record) -> Dict:
+    """JSON Lines representation of a record (shared by the synchronous and asynchronous handlers)."""
+    log_entry = {
+        'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+        'level': record.levelname,
+        'message': record.getMessage(),
+        'module': record.module,
+        'function': record.funcName,
+        'line': record.lineno
+    }
+    if hasattr(record, 'extra_data'):
+        log_entry.update(record.extra_data)
+    return log_entry
+
+
+class _RotatingLogFile:
+    """
+    Append-only daily log file ({name}_{YYYYMMDD}{suffix}) kept open by the writer thread.
+    Rotates by size ({file}.1, .2... gzipped if compress) and by date (the previous day's file is gzipped).
+    Only used from the pipeline's writer thread.
+    """
+
+    def __init__(self, directory: Path, name: str, suffix: str, max_bytes: int, backup_count: int, compress: bool):
+        self.directory = directory
+        self.name = name
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self._day = None
+        self._file = None
+        self._size = 0
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.name}_{self._day}{self.suffix}"
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write(self, text: str):
+        day = datetime.now().strftime('%Y%m%d')
+        if day != self._day:
+            previous = self.path if self._day else None
+            self._close()
+            self._day = day
+            if previous is not None and self.compress and previous.exists():
+                _gzip_file(previous, previous.with_name(previous.name + '.gz'))
+        if self._file is None:
+            self._open()
+        self._file.write(text)
+        self._size += len(text.encode('utf-8')) if not text.isascii() else len(text)
+        if self.max_bytes and self._size >= self.max_bytes:
+            self._rotate()
+
+    def _backup_path(self, index: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{index}" + ('.gz' if self.compress else ''))
+
+    def _rotate(self):
+        self._close()
+        if self.backup_count > 0:
+            oldest = self._backup_path(self.backup_count)
+            if oldest.exists():
+                oldest.unlink()
+            for index in range(self.backup_count - 1, 0, -1):
+                if self._backup_path(index).exists():
+                    os.replace(self._backup_path(index), self._backup_path(index + 1))
+            if self.compress:
+                _gzip_file(self.path, self._backup_path(1))
+            else:
+                os.replace(self.path, self._backup_path(1))
+        else:
+            self.path.unlink()
+        self._open()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        self._close()
+
+
+def _gzip_file(source: Path, target: Path):
+    with open(source, 'rb') as src, gzip.open(target, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    source.unlink()
+
+
+class LogPipeline:
+    """
+    Bounded queue of log records drained by one background writer thread.
+    Records are written in batches (one write per file per batch) to rotating .log/.jsonl files.
+    When the queue is full, the drop policy decides: drop the oldest record, drop the new one,
+    or block the caller (up to block_timeout). Dropped records are reported in the module's .log file.
+    """
+
+    DROP_POLICIES = ("drop_oldest", "drop_new", "block")
+
+    def __init__(self, queue_size: int = 10000, drop_policy: str = "drop_oldest", block_timeout: float = 1.0,
+                 batch_size: int = 500, flush_interval: float = 0.2, max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 5, compress: bool = True):
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"Politique de rejet inconnue: {drop_policy}")
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._file_options = (max_bytes, backup_count, compress)
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._files: Dict[Tuple[str, str, str], _RotatingLogFile] = {}
+        self._dropped_by_logger = defaultdict(int)
+        self._in_flight = 0  # Records taken by the writer but not yet written
+        self._stopping = False
+        self._stats = {"submitted": 0, "written": 0, "dropped": 0, "batches": 0}
+        self._plain_formatter = logging.Formatter(PLAIN_LOG_FORMAT, datefmt=PLAIN_LOG_DATEFMT)
+        self._thread = threading.Thread(target=self._run, name="vera-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, directory: Path, record: logging.LogRecord) -> bool:
+        """Enqueues a prepared record. Returns False if it was dropped."""
+        with self._cond:
+            if self._stopping:
+                return False
+            self._stats["submitted"] += 1
+            if len(self._queue) >= self.queue_size:
+                if self.drop_policy == "drop_oldest":
+                    _, old_record = self._queue.popleft()
+                    self._record_drop(old_record.name)
+                elif self.drop_policy == "block":
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.queue_size and not self._stopping:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    if len(self._queue) >= self.queue_size or self._stopping:
+                        self._record_drop(record.name)
+                        return False
+                else:
+                    self._record_drop(record.name)
+                    return False
+            self._queue.append((directory, record))
+            self._cond.notify_all()
+            return True
+
+    def _record_drop(self, logger_name: str):
+        self._stats["dropped"] += 1
+        self._dropped_by_logger[logger_name] += 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait(self.flush_interval)
+                if not self._queue and self._stopping:
+                    return
+                # Let a short burst accumulate so it is written as one batch
+                if len(self._queue) < self.batch_size and not self._stopping:
+                    self._cond.wait(0.005)
+                batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.batch_size))]
+                dropped = dict(self._dropped_by_logger)
+                self._dropped_by_logger.clear()
+                self._in_flight = len(batch)
+                self._cond.notify_all()  # Wakes callers blocked on a full queue
+            try:
+                self._write_batch(batch, dropped)
+            except Exception as e:
+                sys.stderr.write(f"Erreur d'écriture des logs: {e}\n")
+            with self._cond:
+                self._in_flight = 0
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+                self._cond.notify_all()
+
+    def _file_for(self, directory: Path, name: str, suffix: str) -> _RotatingLogFile:
+        key = (str(directory), name, suffix)
+        log_file = self._files.get(key)
+        if log_file is None:
+            log_file = _RotatingLogFile(directory, name, suffix, *self._file_options)
+            self._files[key] = log_file
+        return log_file
+
+    def _write_batch(self, batch: List[Tuple[Path, logging.LogRecord]], dropped: Dict[str, int]):
+        chunks: Dict[_RotatingLogFile, List[str]] = defaultdict(list)
+        for directory, record in batch:
+            chunks[self._file_for(directory, record.name, '.log')].append(self._plain_formatter.format(record) + '\n')
+            try:
+                line = json.dumps(_json_log_entry(record), ensure_ascii=False, default=str)
+            except Exception as e:
+                line = json.dumps({'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+                                   'level': record.levelname, 'message': record.getMessage(),
+                                   'serialization_error': str(e)}, ensure_ascii=False)
+            chunks[self._file_for(directory, record.name, '.jsonl')].append(line + '\n')
+        for logger_name, count in dropped.items():
+            directories = {str(log_file.directory) for (d, n, _), log_file in self._files.items() if n == logger_name}
+            for directory in directories:
+                notice = (f"{datetime.now().strftime(PLAIN_LOG_DATEFMT)} [WARNING] {logger_name}: "
+                          f"{count} message(s) de log perdu(s) (file de logs pleine).\n")
+                chunks[self._file_for(Path(directory), logger_name, '.log')].append(notice)
+        for log_file, lines in chunks.items():
+            log_file.write(''.join(lines))
+            log_file.flush()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Waits until every record submitted so far is written. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._queue or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Writes the remaining records, stops the writer thread and closes the files."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        for log_file in self._files.values():
+            log_file.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self._stats, queued=len(self._queue), drop_policy=self.drop_policy)
+
+
+class AsyncModuleLogHandler(logging.Handler):
+    """
+    Handler of a module logger: prepares the record on the calling thread (message and traceback
+    rendered, so the record no longer references mutable arguments) and hands it to the pipeline,
+    which writes both the .log and .jsonl lines.
+    """
+
+    def __init__(self, pipeline: LogPipeline, directory: Path):
+        super().__init__()
+        self.pipeline = pipeline
+        self.directory = directory
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+        record.msg, record.args = record.message, None
+        record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            self.pipeline.submit(self.directory, self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def get_log_pipeline() -> LogPipeline:
+    """Process-wide log pipeline, created on first use and flushed at exit."""
+    global _pipeline
+    if _pipeline is None:
+        settings = {k: v for k, v in LOG_PIPELINE_SETTINGS.items() if k != "async"}
+        _pipeline = LogPipeline(**settings)
+        atexit.register(_pipeline.close)
+    return _pipeline
+
+
+def flush_logs(timeout: float = 5.0) -> bool:
+    """Blocks until queued log records are written (no-op in synchronous mode)."""
+    return _pipeline.flush(timeout) if _pipeline is not None else True
+
 class VeraLogger:
     """Gestionnaire de logging centralisé pour Vera"""
     
@@ -73,7 +378,14 @@ class VeraLogger:
 
         # Add file handlers for this named logger if they don't already exist
         with _logging_setup_lock:
-            if name not in _file_handlers:
+            if name not in _file_handlers and LOG_PIPELINE_SETTINGS["async"]:
+                # One queued handler writes both the .log and .jsonl files from the writer thread
+                log_dir = Path(__file__).parent.parent / "logs"
+                handler = AsyncModuleLogHandler(get_log_pipeline(), log_dir)
+                handler.setLevel(logging.DEBUG)
+                self.logger.addHandler(handler)
+                _file_handlers[name] = [handler]
+            elif name not in _file_handlers:
                 log_dir = Path(__file__).parent.parent / "logs"
                 log_dir.mkdir(exist_ok=True)
 
@@ -81,10 +393,7 @@ class VeraLogger:
                 module_log_file = log_dir / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
                 file_handler = logging.FileHandler(module_log_file, encoding='utf-8')
                 file_handler.setLevel(logging.DEBUG)
-                file_formatter = logging.Formatter(
-                    '%(asctime)s [%(levelname)s] %(name)s:%(lineno)d: %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S'
-                )
+                file_formatter = logging.Formatter(PLAIN_LOG_FORMAT, datefmt=PLAIN_LOG_DATEFMT)
                 file_handler.setFormatter(file_formatter)
                 self.logger.addHandler(file_handler)
                 _file_handlers[name] = [file_handler] # Store handler
@@ -102,6 +411,10 @@ class VeraLogger:
                     if handler not in self.logger.handlers:
                         self.logger.addHandler(handler)
         
+    def is_enabled_for(self, level: int) -> bool:
+        """Whether a message at `level` would be handled (lets callers skip building costly messages)."""
+        return self.logger.isEnabledFor(level)
+
     def debug(self, msg: str, **kwargs):
         exc_info = kwargs.pop('exc_info', False)
         self.logger.debug(msg, exc_info=exc_info, extra=self._prepare_extra(kwargs))
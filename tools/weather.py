@@ -3,28 +3,32 @@ This module handles weather-related functionalities.
 """
 from typing import Dict, Any
 import requests
-import json
-import os
+from http_client import app_config, http_client
 from tools.logger import VeraLogger
 
 logger = VeraLogger("weather")
 
+WEATHER_API_URL = "http://api.openweathermap.org/data/2.5/weather"
+WEATHER_TIMEOUT_SECONDS = 8.0
+DEFAULT_WEATHER_CACHE_MINUTES = 10
+
 def get_weather(city: str) -> Dict[str, Any]:
     """
     Gets the weather for a given city.
+    Responses are cached per city for "weather_cache_minutes" (data/config.json, 10 by default).
     """
     try:
-        with open(os.path.join("data", "config.json"), "r", encoding="utf-8") as f:
-            config = json.load(f)
-        api_key = config.get("weather_api_key")
+        api_key = app_config.get("weather_api_key")
 
         if not api_key:
             logger.warning("Weather API key is not set in data/config.json.")
             return {"status": "error", "message": "Weather API key not configured."}
 
         # OpenWeatherMap API call
-        url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric&lang=fr"
-        response = requests.get(url)
+        params = {"q": city.strip(), "appid": api_key, "units": "metric", "lang": "fr"}
+        cache_minutes = float(app_config.get("weather_cache_minutes", DEFAULT_WEATHER_CACHE_MINUTES))
+        response = http_client.get(WEATHER_API_URL, params=params, timeout=WEATHER_TIMEOUT_SECONDS,
+                                   cache_ttl=cache_minutes * 60)
         response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
         weather_data = response.json()
 
@@ -15,6 +15,7 @@ class ChatView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.selected_image_path = None
+        self._streaming_rows = {} # stream_id -> row of the message being streamed
         self.init_ui()
 
     def init_ui(self):
@@ -117,5 +118,28 @@ class ChatView(QWidget):
         self.message_model.add_message(message)
         self.message_list_view.scrollToBottom()
 
+    def update_streaming_message(self, stream_id: str, sender: str, text: str, avatar_path: Optional[str] = None, avatar_size: int = 56):
+        """Affiche un message en cours de génération, puis le fait grandir à chaque nouveau fragment."""
+        row = self._streaming_rows.get(stream_id)
+        if row is None:
+            self.add_message(sender, text, avatar_path=avatar_path, avatar_size=avatar_size)
+            self._streaming_rows[stream_id] = self.message_model.rowCount() - 1
+        else:
+            self._set_message_text(row, text)
+
+    def finish_streaming_message(self, stream_id: str, final_text: str) -> bool:
+        """Remplace le texte d'un message streamé par sa version finale. Retourne False s'il n'existe pas."""
+        row = self._streaming_rows.pop(stream_id, None)
+        if row is None:
+            return False
+        self._set_message_text(row, final_text)
+        return True
+
+    def _set_message_text(self, row: int, text: str):
+        self.message_model.update_message_text(row, text)
+        # The bubble grows with the text: ask the view to re-query its size
+        self.message_list_view.itemDelegate().sizeHintChanged.emit(self.message_model.index(row))
+        self.message_list_view.scrollToBottom()
+
     def clear_messages(self):
         self.message_model.clear_messages()
@@ -2,6 +2,7 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QPushButton, QTextEdit, QLabel
 from PyQt5.QtCore import QTimer, Qt
 from db_manager import db_manager
 from db_config import TABLE_NAMES
+from attention_manager import attention_manager
 from tools.logger import VeraLogger
 import json
 
@@ -60,7 +61,7 @@ class DBMonitorTab(QWidget):
     def refresh_display(self):
         self.logger.debug("Refreshing DB Monitor Tab display...")
         # Attention Focus
-        attention_focus_data = db_manager.get_document(TABLE_NAMES["attention_focus"], "current_focus")
+        attention_focus_data = attention_manager.get_persisted_focus() or None
         self.update_text_edit(TABLE_NAMES["attention_focus"] + "_current_focus", attention_focus_data)
 
         # Emotions
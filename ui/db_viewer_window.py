@@ -3,6 +3,7 @@ from PyQt5.QtCore import Qt, QPoint, QRect
 from PyQt5.QtGui import QMouseEvent, QCursor
 from db_manager import db_manager
 from db_config import TABLE_NAMES
+from attention_manager import attention_manager
 from tools.logger import VeraLogger
 import json
 
@@ -63,6 +64,8 @@ class DBViewerWindow(QMainWindow):
 
         # --- Populate Tabs ---
         self.display_widgets = {}
+        self.attention_key = (TABLE_NAMES["attention_focus"], "current_focus")
+        self._attention_items = {} # Cached focus items, refreshed row by row
         self.init_tabs()
         
         # --- Final Steps ---
@@ -112,6 +115,12 @@ class DBViewerWindow(QMainWindow):
     def refresh_single_tab(self, table_name, doc_id):
         """Refreshes only the specific tab that was updated."""
         self.logger.debug(f"Partial refresh triggered for table: {table_name}, doc_id: {doc_id}")
+        if table_name == TABLE_NAMES["attention_focus_items"]:
+            self.refresh_attention_item(doc_id)
+            return
+        if (table_name, doc_id) == self.attention_key:
+            self.refresh_attention_item(None)
+            return
         widget = self.display_widgets.get((table_name, doc_id))
         if widget:
             data = db_manager.get_document(table_name, doc_id)
@@ -123,9 +132,27 @@ class DBViewerWindow(QMainWindow):
         """Refreshes all tabs manually."""
         self.logger.debug("Full manual refresh triggered...")
         for (table_name, doc_id), widget in self.display_widgets.items():
+            if (table_name, doc_id) == self.attention_key:
+                self.refresh_attention_item(None)
+                continue
             data = db_manager.get_document(table_name, doc_id)
             self.update_text_edit(widget, data)
 
+    def refresh_attention_item(self, source):
+        """
+        Refreshes the Attention tab. The focus is stored one row per item, so a single
+        changed item only re-reads that row; source None or '*' reloads everything.
+        """
+        if source is None or source == "*":
+            self._attention_items = attention_manager.get_persisted_focus()
+        else:
+            item = attention_manager.get_persisted_focus_item(source)
+            if item is None:
+                self._attention_items.pop(source, None)
+            else:
+                self._attention_items[source] = item
+        self.update_text_edit(self.display_widgets.get(self.attention_key), self._attention_items or None)
+
     def update_text_edit(self, widget: QTextEdit, data: dict):
         """Updates the content of a specific QTextEdit widget."""
         if widget:
@@ -47,6 +47,16 @@ class MessageListModel(QAbstractListModel):
         self.messages.append(message)
         self.endInsertRows()
 
+    def update_message_text(self, row: int, text: str):
+        """Met à jour le texte d'un message existant (ex: réponse affichée en streaming)"""
+        if not (0 <= row < len(self.messages)):
+            return
+        message = self.messages[row]
+        if message.text != text:
+            message.text = text
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.UserRole])
+
     def clear(self):
         """Efface tous les messages"""
         self.beginResetModel()
@@ -1,9 +1,10 @@
 # unverified_knowledge_manager.py
 import os
-import json
-import sqlite3
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
 from tools.logger import VeraLogger
+from sqlite_pool import get_pool
+from knowledge_retrieval import HybridRetriever, make_vector_index
+from knowledge_ingest import KnowledgeIngestor
 
 # --- Configuration ---
 UNVERIFIED_KNOWLEDGE_DB_PATH = "data/unverified_knowledge.db"
@@ -17,6 +18,10 @@ class UnverifiedKnowledgeManager:
     """
     def __init__(self, db_path=UNVERIFIED_KNOWLEDGE_DB_PATH):
         self.db_path = db_path
+        self._pool = get_pool(db_path) # Connexions réutilisées par thread (WAL, synchronous=NORMAL)
+        # Recherche par mots (BM25, paliers NEAR / AND / OR), fusionnée avec l'index vectoriel s'il est activé
+        self._retriever = HybridRetriever(self._pool, "unverified_knowledge", "unverified_knowledge_fts", make_vector_index(db_path))
+        self._ingestor = KnowledgeIngestor(self._pool, "unverified_knowledge", "unverified_knowledge_fts")
         self._setup_database()
 
     def _setup_database(self):
@@ -24,80 +29,52 @@ class UnverifiedKnowledgeManager:
         S'assure que la base de données et la table FTS sont prêtes.
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
             
-            # Créer la table principale si elle n'existe pas
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS unverified_knowledge (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    text TEXT NOT NULL,
-                    source TEXT,
-                    metadata TEXT
-                );
-            """)
-
-            # Vérifier si la table FTS existe déjà
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='unverified_knowledge_fts';")
-            if cursor.fetchone() is None:
-                logger.info("Création de la table FTS 'unverified_knowledge_fts'...")
+                # Créer la table principale si elle n'existe pas
                 cursor.execute("""
-                    CREATE VIRTUAL TABLE unverified_knowledge_fts USING fts5(
-                        text,
-                        source,
-                        content='unverified_knowledge',
-                        content_rowid='id'
+                    CREATE TABLE IF NOT EXISTS unverified_knowledge (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        text TEXT NOT NULL,
+                        source TEXT,
+                        metadata TEXT
                     );
                 """)
-                # Remplir la table FTS avec les données existantes
-                cursor.execute("INSERT INTO unverified_knowledge_fts(rowid, text, source) SELECT id, text, source FROM unverified_knowledge;")
-                conn.commit()
-                logger.info("Table FTS 'unverified_knowledge_fts' créée et remplie.")
-            else:
-                logger.info("La table FTS 'unverified_knowledge_fts' existe déjà.")
-            conn.close()
+
+                # Vérifier si la table FTS existe déjà
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='unverified_knowledge_fts';")
+                if cursor.fetchone() is None:
+                    logger.info("Création de la table FTS 'unverified_knowledge_fts'...")
+                    cursor.execute("""
+                        CREATE VIRTUAL TABLE unverified_knowledge_fts USING fts5(
+                            text,
+                            source,
+                            content='unverified_knowledge',
+                            content_rowid='id'
+                        );
+                    """)
+                    # Remplir la table FTS avec les données existantes
+                    cursor.execute("INSERT INTO unverified_knowledge_fts(rowid, text, source) SELECT id, text, source FROM unverified_knowledge;")
+                    conn.commit()
+                    logger.info("Table FTS 'unverified_knowledge_fts' créée et remplie.")
+                else:
+                    logger.info("La table FTS 'unverified_knowledge_fts' existe déjà.")
         except Exception as e:
             logger.error(f"Erreur lors de la configuration de la base de données FTS pour unverified_knowledge: {e}", exc_info=True)
 
-    def search(self, query_text: str, k: int = 5) -> List[Dict]:
+    def search(self, query_text: str, k: int = 5, require_all_terms: bool = False) -> List[Dict]:
         """
-        Recherche les k faits les plus pertinents pour une requête donnée en utilisant FTS5.
+        Recherche les k faits les plus pertinents pour une requête donnée (voir knowledge_retrieval).
+        Avec require_all_terms, seuls les faits contenant tous les mots de la requête sont retenus.
         """
-        logger.info(f"Recherche FTS de {k} faits pertinents dans la base non-vérifiée pour: '{query_text}'")
+        logger.info(f"Recherche de {k} faits pertinents dans la base non-vérifiée pour: '{query_text}'")
         
-        results = []
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            escaped_query_text = query_text.replace("'", "''")
-            
-            query = """
-                SELECT uk.text, uk.source, uk.metadata, fts.rank
-                FROM unverified_knowledge_fts AS fts
-                JOIN unverified_knowledge AS uk ON uk.id = fts.rowid
-                WHERE fts.text MATCH ?
-                ORDER BY fts.rank
-                LIMIT ?;
-            """
-            
-            cursor.execute(query, (f'"{escaped_query_text}"', k))
-            rows = cursor.fetchall()
-            conn.close()
-
-            for row in rows:
-                metadata = json.loads(row[2]) if row[2] else {}
-                result = {
-                    "text": row[0],
-                    "source": row[1],
-                    "metadata": metadata,
-                    "relevance": row[3]
-                }
-                results.append(result)
-            
-            logger.info(f"Trouvé {len(results)} résultats dans la base non-vérifiée via FTS.")
+            results = self._retriever.search(query_text, k=k, require_all_terms=require_all_terms)
+            logger.info(f"Trouvé {len(results)} résultats dans la base non-vérifiée.")
         except Exception as e:
-            logger.error(f"Erreur lors de la recherche FTS dans SQLite (unverified): {e}", exc_info=True)
+            logger.error(f"Erreur lors de la recherche dans SQLite (unverified): {e}", exc_info=True)
             return []
 
         return results
@@ -109,31 +86,24 @@ class UnverifiedKnowledgeManager:
         logger.info(f"Ajout d'une nouvelle connaissance non-vérifiée. Source: {source}")
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            metadata_str = json.dumps(metadata) if metadata else "{}"
-            
-            cursor.execute(
-                "INSERT INTO unverified_knowledge (text, source, metadata) VALUES (?, ?, ?)",
-                (text, source, metadata_str)
-            )
-            
-            new_id = cursor.lastrowid
-            
-            cursor.execute(
-                "INSERT INTO unverified_knowledge_fts (rowid, text, source) VALUES (?, ?, ?)",
-                (new_id, text, source)
-            )
-            
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"Nouvelle connaissance non-vérifiée ajoutée avec succès (ID: {new_id}).")
-            return True
+            stats = self._ingestor.ingest([{"text": text, "source": source, "metadata": metadata}], defer_fts=False)
+            if stats["duplicates"]:
+                logger.info("Connaissance non-vérifiée déjà présente, non dupliquée.")
+            return stats["inserted"] + stats["duplicates"] == 1
         except Exception as e:
             logger.error(f"Erreur lors de l'ajout d'une connaissance non-vérifiée à SQLite: {e}", exc_info=True)
             return False
 
+    def add_entries(self, entries: Iterable[Dict], defer_fts: bool = True) -> Optional[Dict]:
+        """
+        Ajoute des connaissances en masse (dicts text/source/metadata, lus en flux), par lots transactionnels,
+        sans doublons (voir knowledge_ingest). Retourne les compteurs de l'ingestion, ou None en cas d'erreur.
+        """
+        try:
+            return self._ingestor.ingest(entries, defer_fts=defer_fts)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'ajout en masse de connaissances non-vérifiées: {e}", exc_info=True)
+            return None
+
 # --- Instance Globale ---
 unverified_knowledge_manager = UnverifiedKnowledgeManager()
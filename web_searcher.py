@@ -1,4 +1,9 @@
 import sys
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from typing import Optional, Dict
 from datetime import datetime, timedelta
 import threading
@@ -10,12 +15,14 @@ from error_handler import log_error
 logger = VeraLogger("web_search")
 print("WebSearcher.py version: 2025-11-10_DDGS_fix")
 
-# Optional requests
+# Optional requests (shared outbound HTTP client)
 try:
-    import requests
+    from http_client import http_client
+    from knowledge_sources import search_wikipedia_articles
     REQUESTS_AVAILABLE = True
 except Exception:
-    requests = None
+    http_client = None
+    search_wikipedia_articles = None
     REQUESTS_AVAILABLE = False
 
 # Optional beautifulsoup4
@@ -26,14 +33,6 @@ except Exception:
     BeautifulSoup = None
     BEAUTIFULSOUP_AVAILABLE = False
 
-# Optional wikipedia
-try:
-    import wikipedia
-    WIKIPEDIA_AVAILABLE = True
-except ImportError:
-    wikipedia = None
-    WIKIPEDIA_AVAILABLE = False
-
 # Optional ddgs
 try:
     from ddgs import DDGS
@@ -53,118 +52,285 @@ from db_config import TABLE_NAMES # NEW: Import TABLE_NAMES
 logger = VeraLogger("web_search")
 print("WebSearcher.py version: 2025-11-10_DDGS_fix")
 
+FETCH_WORKERS = 8  # Shared by all WebSearcher instances
+_fetch_pool: Optional[ThreadPoolExecutor] = None
+_fetch_pool_lock = threading.Lock()
+
+
+def _get_fetch_pool() -> ThreadPoolExecutor:
+    global _fetch_pool
+    with _fetch_pool_lock:
+        if _fetch_pool is None:
+            _fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="web_search")
+        return _fetch_pool
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as cache key."""
+    return " ".join(query.casefold().split())
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+
+
 class WebSearcher:
+    # Cache : une ligne par (requête normalisée, source) dans web_cache_entries.
+    CACHE_TTL_SECONDS = {"wikipedia": 24 * 3600, "general": 24 * 3600}
+    CACHE_FAILURE_TTL_SECONDS = 300  # Failed source results are retried after 5 minutes
+    CACHE_STALE_SECONDS = 7 * 24 * 3600  # Expired entries may still be served (and revalidated) this long
+    CACHE_MAX_BYTES = 8 * 1024 * 1024  # Least recently used entries are evicted beyond this budget
+    # Délai maximal par source : au-delà, la recherche rend les résultats des autres sources
+    SOURCE_DEADLINES_SECONDS = {"wikipedia": 10.0, "general": 8.0, "news": 8.0}
+    DEFAULT_SOURCE_DEADLINE_SECONDS = 8.0
+
     def __init__(self):
-        self.table_name = TABLE_NAMES["web_cache"]
-        self.doc_id = "cache_data"
+        self.table_name = TABLE_NAMES["web_cache_entries"]
         self.cache_lock = threading.Lock()
-        self.cache = self._load_cache() # Load cache from DB
+        self._lru: "OrderedDict[str, int]" = OrderedDict()  # Entry id -> size in bytes, least recently used first
+        self._cache_bytes = 0
+        self._pending_touches: Dict[str, float] = {}  # Last-access updates written with the next cache write
+        self._cache_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+        self._source_stats: Dict[str, Dict[str, float]] = {}
+        self._revalidating: set = set()  # Query hashes with a background refresh in flight
+        # Sources interrogées en parallèle par search() : nom -> fonction(query) -> dict {"success": ...}
+        self.sources = {
+            "wikipedia": self._search_wikipedia,
+            # "news": self._search_news,
+            "general": self._search_ddg,
+        }
+        self._load_cache_index()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36' # More generic User-Agent
         }
-        
-    def _load_cache(self) -> Dict:
-        """Loads cache from DB and handles default if not found."""
-        cache_data = db_manager.get_document(self.table_name, self.doc_id, column_name="cache_json")
-        if cache_data is None:
-            cache_data = {"searches": [], "last_cleanup": datetime.now().isoformat()}
-            self._save_cache(cache_data) # Save default if not found
-        return cache_data
-        
-    def _save_cache(self, cache_data: Dict):
-        """Saves cache to DB."""
+
+    def _load_cache_index(self):
+        """Loads entry ids and sizes (not the payloads) in LRU order; drops the old single-document cache."""
+        try:
+            db_manager.delete_document(TABLE_NAMES["web_cache"], "cache_data")
+            rows = db_manager.get_rows(self.table_name, columns="id, size_bytes", order_by="last_access")
+        except Exception as e:
+            logger.error(f"Impossible de charger l'index du cache web: {e}")
+            rows = []
         with self.cache_lock:
-            db_manager.insert_document(self.table_name, self.doc_id, cache_data, column_name="cache_json")
+            for row in rows:
+                self._lru[row["id"]] = row["size_bytes"] or 0
+            self._cache_bytes = sum(self._lru.values())
                 
-    def search(self, query: str, force_refresh: bool = False) -> Dict:
+    def search(self, query: str, force_refresh: bool = False, stale_while_revalidate: bool = True) -> Dict:
         """
-        Recherche multi-sources avec cache
+        Recherche multi-sources avec cache.
+        Les sources manquantes sont interrogées en parallèle, chacune avec son délai maximal : une source
+        trop lente est rendue en échec ("timed_out") sans retarder les autres. Si toutes les sources sont
+        en cache mais certaines expirées, les résultats expirés sont rendus tout de suite ("stale_sources")
+        et rafraîchis en arrière-plan.
         """
-        # Vérifier cache d'abord
-        if not force_refresh:
-            cached = self._check_cache(query)
-            if cached:
-                return cached
-                
-        results = {
-            "wikipedia": self._search_wikipedia(query),
-            # "news": self._search_news(query),
-            "general": self._search_ddg(query),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        # Sauvegarder dans cache
-        self._add_to_cache(query, results)
-        
+        entries = {} if force_refresh else self._cache_entries(query)
+        fresh = {source: e["result"] for source, e in entries.items() if e["fresh"]}
+        stale = {source: e["result"] for source, e in entries.items() if not e["fresh"]}
+        missing = [source for source in self.sources if source not in entries]
+
+        if not missing and not stale:
+            return dict(fresh, timestamp=self._entries_timestamp(entries))
+        if not missing and stale_while_revalidate:
+            self._revalidate_in_background(query, list(stale))
+            return dict(fresh, **stale, timestamp=self._entries_timestamp(entries), stale_sources=sorted(stale))
+
+        fetched = self.fetch_sources(query, missing + list(stale))
+        to_cache = {}
+        for source, result in fetched.items():
+            if result.get("timed_out") and source in stale:
+                fetched[source] = stale[source]  # Serve the expired copy rather than nothing
+            elif not result.get("timed_out"):
+                to_cache[source] = result
+        self._add_to_cache(query, to_cache)
+        return dict(fresh, **fetched, timestamp=datetime.now().isoformat())
+
+    def fetch_sources(self, query: str, sources) -> Dict[str, Dict]:
+        """
+        Queries `sources` concurrently on the shared pool. A source that misses its deadline is reported as
+        {"success": False, "timed_out": True}; its late result, if successful, is still cached when it arrives.
+        """
+        pool = _get_fetch_pool()
+        started = time.monotonic()
+        futures = {source: pool.submit(self._timed_fetch, source, query) for source in sources}
+        results = {}
+        for source, future in futures.items():
+            deadline = self.SOURCE_DEADLINES_SECONDS.get(source, self.DEFAULT_SOURCE_DEADLINE_SECONDS)
+            try:
+                results[source] = future.result(timeout=max(0.0, started + deadline - time.monotonic()))
+            except FutureTimeout:
+                logger.warning(f"Source '{source}' sans réponse après {deadline:.1f}s pour '{query}', résultats partiels.")
+                self._count_source(source, "timeouts")
+                results[source] = {"success": False, "timed_out": True, "error": f"timeout after {deadline:.1f}s"}
+                future.add_done_callback(lambda f, source=source: self._cache_late_result(query, source, f))
+            except Exception as e:
+                results[source] = {"success": False, "error": str(e)}
         return results
-        
+
+    def _timed_fetch(self, source: str, query: str) -> Dict:
+        start = time.perf_counter()
+        try:
+            result = self.sources[source](query)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self.cache_lock:
+            stats = self._stats_for_source(source)
+            stats["calls"] += 1
+            stats["errors"] += not result.get("success", False)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        return result
+
+    def _stats_for_source(self, source: str) -> Dict[str, float]:
+        """Fetch statistics of one source. Called with cache_lock held."""
+        return self._source_stats.setdefault(source, {"calls": 0, "errors": 0, "timeouts": 0,
+                                                      "total_ms": 0.0, "max_ms": 0.0})
+
+    def _count_source(self, source: str, counter: str):
+        with self.cache_lock:
+            self._stats_for_source(source)[counter] += 1
+
+    def _cache_late_result(self, query: str, source: str, future):
+        try:
+            result = future.result()
+        except Exception:
+            return
+        if result.get("success"):
+            self._add_to_cache(query, {source: result})
+
+    def _revalidate_in_background(self, query: str, sources):
+        """Refreshes expired sources of a query off the caller's thread, once at a time per query."""
+        key = query_hash(query)
+        with self.cache_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def revalidate():
+            try:
+                fetched = self.fetch_sources(query, sources)
+                self._add_to_cache(query, {s: r for s, r in fetched.items() if not r.get("timed_out")})
+            except Exception as e:
+                logger.error(f"Échec du rafraîchissement en arrière-plan de '{query}': {e}")
+            finally:
+                with self.cache_lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=revalidate, name="web_search_revalidate", daemon=True).start()
+
+    def _cache_entries(self, query: str) -> Dict[str, Dict]:
+        """
+        Cached results of a query per source: {source: {"result", "fresh", "created_at"}}, expired entries
+        included until they are purged. Reads only this query's rows, by primary key.
+        """
+        key = query_hash(query)
+        ids = [f"{key}:{source}" for source in self.sources]
+        with self.cache_lock:
+            ids = [entry_id for entry_id in ids if entry_id in self._lru]
+        rows = db_manager.get_rows(self.table_name, where=f"id IN ({', '.join('?' for _ in ids)})",
+                                   params=tuple(ids)) if ids else []
+        now = time.time()
+        entries = {row["source"]: {"result": json.loads(row["result_json"]), "fresh": row["expires_at"] > now,
+                                   "created_at": row["created_at"]} for row in rows}
+        with self.cache_lock:
+            if len(entries) < len(self.sources):
+                self._cache_stats["misses"] += 1
+            elif all(e["fresh"] for e in entries.values()):
+                self._cache_stats["hits"] += 1
+            else:
+                self._cache_stats["stale_hits"] += 1
+            self._cache_stats["expired"] += sum(not e["fresh"] for e in entries.values())
+            for row in rows:
+                if row["id"] in self._lru:
+                    self._lru.move_to_end(row["id"])
+                    self._pending_touches[row["id"]] = now
+        return entries
+
+    @staticmethod
+    def _entries_timestamp(entries: Dict[str, Dict]) -> str:
+        return datetime.fromtimestamp(min(e["created_at"] for e in entries.values())).isoformat()
+
     def _check_cache(self, query: str) -> Optional[Dict]:
         """
-        Vérifier si résultat en cache et pas trop vieux
+        Vérifier si résultat en cache et pas trop vieux (toutes les sources présentes et non expirées)
         """
-        self.cache = self._load_cache() # Ensure cache is fresh
-        for entry in self.cache.get("searches", []):
-            if entry["query"].lower() == query.lower():
-                # Vérifier si moins de 24h
-                cached_time = datetime.fromisoformat(entry["results"]["timestamp"])
-                age = datetime.now() - cached_time
-                if age.days < 1:
-                    return entry["results"]
-        return None
+        entries = self._cache_entries(query)
+        if len(entries) < len(self.sources) or not all(e["fresh"] for e in entries.values()):
+            return None
+        return dict({source: e["result"] for source, e in entries.items()}, timestamp=self._entries_timestamp(entries))
         
     def _add_to_cache(self, query: str, results: Dict):
-        self.cache = self._load_cache() # Ensure cache is fresh before modifying
-        self.cache["searches"].append({
-            "query": query,
-            "results": results
-        })
-        
-        # Garder que 100 dernières recherches
-        if len(self.cache["searches"]) > 100:
-            self.cache["searches"] = self.cache["searches"][-100:]
-        
-        # Persister le cache
-        self._save_cache(self.cache)
+        """Stores each source's result as its own entry, then evicts expired and least recently used entries."""
+        key = query_hash(query)
+        now = time.time()
+        rows = []
+        for source in self.sources:
+            if source not in results:
+                continue
+            payload = json.dumps(results[source], ensure_ascii=False, default=str)
+            ttl = self.CACHE_TTL_SECONDS.get(source, 24 * 3600) if results[source].get("success") \
+                else self.CACHE_FAILURE_TTL_SECONDS
+            rows.append({"id": f"{key}:{source}", "query_hash": key, "source": source,
+                         "query": normalize_query(query), "result_json": payload,
+                         "size_bytes": len(payload.encode("utf-8")), "created_at": now,
+                         "expires_at": now + ttl, "last_access": now})
+        if not rows:
+            return
+        with self.cache_lock:
+            db_manager.write_rows(self.table_name, rows)
+            for row in rows:
+                self._cache_bytes += row["size_bytes"] - self._lru.pop(row["id"], 0)
+                self._lru[row["id"]] = row["size_bytes"]
+                self._pending_touches.pop(row["id"], None)
+            self._cache_stats["stores"] += len(rows)
+            self._evict_locked(now)
+
+    def _evict_locked(self, now: float):
+        """Deletes entries expired for longer than CACHE_STALE_SECONDS, then least recently used ones
+        until the byte budget is met."""
+        touches = [{"id": entry_id, "last_access": ts} for entry_id, ts in self._pending_touches.items()
+                   if entry_id in self._lru]
+        self._pending_touches.clear()
+        db_manager.update_rows(self.table_name, touches)
+
+        expired = [row["id"] for row in db_manager.get_rows(self.table_name, where="expires_at <= ?",
+                                                           params=(now - self.CACHE_STALE_SECONDS,), columns="id")]
+        for entry_id in expired:
+            self._cache_bytes -= self._lru.pop(entry_id, 0)
+        evicted = []
+        while self._cache_bytes > self.CACHE_MAX_BYTES and self._lru:
+            entry_id, size = self._lru.popitem(last=False)
+            self._cache_bytes -= size
+            evicted.append(entry_id)
+        if expired or evicted:
+            db_manager.write_rows(self.table_name, [], deletes=expired + evicted)
+            self._cache_stats["evictions"] += len(evicted)
+
+    def get_cache_stats(self) -> Dict:
+        """Hit rate and size of the web search cache, and per-source fetch latency/timeouts."""
+        with self.cache_lock:
+            stats = dict(self._cache_stats)
+            stats.update(entries=len(self._lru), bytes=self._cache_bytes, max_bytes=self.CACHE_MAX_BYTES)
+            sources = {name: dict(s, avg_ms=s["total_ms"] / s["calls"] if s["calls"] else 0.0)
+                       for name, s in self._source_stats.items()}
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        stats["sources"] = sources
+        return stats
         
     def _search_wikipedia(self, query: str, lang: str = 'fr') -> Dict:
         """
-        Recherche Wikipedia
+        Recherche Wikipedia (API MediaWiki, via le client HTTP partagé)
         """
-        if not WIKIPEDIA_AVAILABLE:
-            return {"success": False, "error": "wikipedia module not installed"}
+        if not REQUESTS_AVAILABLE:
+            return {"success": False, "error": "requests module not installed"}
 
         try:
-            wikipedia.set_lang(lang)
-            # Chercher pages pertinentes
-            search_results = wikipedia.search(query, results=3)
-            articles = []
-            
-            for title in search_results:
-                try:
-                    page = wikipedia.page(title)
-                    articles.append({
-                        "title": page.title,
-                        "summary": page.summary,
-                        "url": page.url
-                    })
-                except wikipedia.exceptions.DisambiguationError as e:
-                    # Prendre première suggestion non ambiguë
-                    if e.options:
-                        try:
-                            page = wikipedia.page(e.options[0])
-                            articles.append({
-                                "title": page.title,
-                                "summary": page.summary,
-                                "url": page.url
-                            })
-                        except:
-                            pass
-                except Exception as e:
-                    print(f"Erreur wiki pour {title}: {e}")
-                    
             return {
                 "success": True,
-                "articles": articles
+                "articles": search_wikipedia_articles(query, lang=lang)
             }
             
         except Exception as e:
@@ -189,7 +355,8 @@ class WebSearcher:
             if not REQUESTS_AVAILABLE:
                 return {"success": False, "error": "requests module not installed"}
 
-            response = requests.get(url, params=params, headers=self.headers)
+            timeout = self.SOURCE_DEADLINES_SECONDS.get("news", self.DEFAULT_SOURCE_DEADLINE_SECONDS)
+            response = http_client.get(url, params=params, headers=self.headers, timeout=timeout)
             if response.status_code == 200:
                 data = response.json()
                 return {